@@ -0,0 +1,131 @@
+"""baseline schema
+
+The tables as Base.metadata.create_all used to build them at import time.
+Databases created that way should be stamped at this revision
+(alembic stamp 0001) before upgrading.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+role_enum = sa.Enum("LANDLORD", "TENANT", "ADMIN", name="roleenum")
+lease_status_enum = sa.Enum("ACTIVE", "TERMINATED", "EXPIRED", name="leasestatusenum")
+maintenance_status_enum = sa.Enum("PENDING", "IN_PROGRESS", "COMPLETED", "CANCELED", name="maintenancestatusenum")
+payment_status_enum = sa.Enum("PENDING", "PAID", "FAILED", name="paymentstatusenum")
+maintenance_priority_enum = sa.Enum("LOW", "MEDIUM", "HIGH", name="maintenancepriorityenum")
+
+
+def _timestamps(nullable: bool = False):
+    return [
+        sa.Column("createdAt", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=nullable),
+        sa.Column("updatedAt", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=nullable),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "User",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("role", role_enum, nullable=False),
+        *_timestamps(nullable=True),
+    )
+    op.create_index("ix_User_id", "User", ["id"])
+    op.create_index("ix_User_email", "User", ["email"], unique=True)
+
+    op.create_table(
+        "Tenant",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("userId", sa.Integer(), sa.ForeignKey("User.id", ondelete="CASCADE"), nullable=False, unique=True),
+    )
+    op.create_index("ix_Tenant_id", "Tenant", ["id"])
+
+    op.create_table(
+        "Property",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("city", sa.String(), nullable=False),
+        sa.Column("province", sa.String(), nullable=False),
+        sa.Column("postalCode", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("landlordId", sa.Integer(), sa.ForeignKey("User.id", ondelete="CASCADE"), nullable=False),
+        *_timestamps(),
+    )
+    op.create_index("ix_Property_id", "Property", ["id"])
+
+    op.create_table(
+        "Unit",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("unitNumber", sa.String(), nullable=False),
+        sa.Column("bedrooms", sa.Integer(), nullable=False),
+        sa.Column("bathrooms", sa.Integer(), nullable=False),
+        sa.Column("rentAmount", sa.Float(), nullable=False),
+        sa.Column("propertyId", sa.Integer(), sa.ForeignKey("Property.id", ondelete="CASCADE"), nullable=False),
+        *_timestamps(),
+    )
+    op.create_index("ix_Unit_id", "Unit", ["id"])
+
+    op.create_table(
+        "Lease",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("startDate", sa.DateTime(), nullable=False),
+        sa.Column("endDate", sa.DateTime(), nullable=False),
+        sa.Column("rent", sa.Integer(), nullable=True),
+        sa.Column("status", lease_status_enum, nullable=False),
+        sa.Column("tenantId", sa.Integer(), sa.ForeignKey("Tenant.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("unitId", sa.Integer(), sa.ForeignKey("Unit.id", ondelete="CASCADE"), nullable=False),
+        *_timestamps(),
+    )
+    op.create_index("ix_Lease_id", "Lease", ["id"])
+
+    op.create_table(
+        "Payment",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("dueDate", sa.DateTime(), nullable=False),
+        sa.Column("status", payment_status_enum, nullable=False),
+        sa.Column("paidAt", sa.DateTime(), nullable=True),
+        sa.Column("stripePaymentIntentId", sa.String(), nullable=True),
+        sa.Column("leaseId", sa.Integer(), sa.ForeignKey("Lease.id", ondelete="CASCADE"), nullable=False),
+        *_timestamps(nullable=True),
+    )
+    op.create_index("ix_Payment_id", "Payment", ["id"])
+
+    op.create_table(
+        "MaintenanceRequest",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("status", maintenance_status_enum, nullable=False),
+        sa.Column("priority", maintenance_priority_enum, nullable=False),
+        sa.Column("contractor", sa.String(), nullable=True),
+        sa.Column("photos", sa.JSON(), nullable=False),
+        sa.Column("leaseId", sa.Integer(), sa.ForeignKey("Lease.id", ondelete="CASCADE"), nullable=False),
+        *_timestamps(),
+        sa.Column("completedAt", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_MaintenanceRequest_id", "MaintenanceRequest", ["id"])
+
+
+def downgrade() -> None:
+    for table in ("MaintenanceRequest", "Payment", "Lease", "Unit", "Property", "Tenant", "User"):
+        op.drop_table(table)
+
+    bind = op.get_bind()
+    for enum in (maintenance_priority_enum, payment_status_enum, maintenance_status_enum,
+                 lease_status_enum, role_enum):
+        enum.drop(bind, checkfirst=True)
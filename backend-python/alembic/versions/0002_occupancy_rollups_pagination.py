@@ -0,0 +1,101 @@
+"""unit occupancy, landlord rollups, pagination indexes
+
+Adds Unit.status / Unit.currentLeaseId (backfilled from the active
+leases), Tenant.createdAt, the LandlordStats table (rows are built on first
+read, or with python -m app.stats rebuild) and the (createdAt, id) indexes
+behind keyset pagination.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:05:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+unit_status_enum = sa.Enum("AVAILABLE", "OCCUPIED", name="unitstatusenum")
+
+PAGINATED_TABLES = ("Property", "Unit", "Lease", "Payment", "MaintenanceRequest", "Tenant")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    unit_status_enum.create(bind, checkfirst=True)
+
+    with op.batch_alter_table("Unit") as batch:
+        batch.add_column(sa.Column("status", unit_status_enum, nullable=False, server_default="AVAILABLE"))
+        batch.add_column(sa.Column("currentLeaseId", sa.Integer(), nullable=True))
+        batch.create_foreign_key("fk_unit_current_lease", "Lease", ["currentLeaseId"], ["id"], ondelete="SET NULL")
+        batch.create_index("ix_Unit_status", ["status"])
+
+    # Same rule as app.occupancy.sync_unit_occupancy: newest ACTIVE lease wins
+    op.execute(
+        """
+        UPDATE "Unit" SET "currentLeaseId" = (
+            SELECT "Lease".id FROM "Lease"
+            WHERE "Lease"."unitId" = "Unit".id AND "Lease".status = 'ACTIVE'
+            ORDER BY "Lease".id DESC LIMIT 1
+        )
+        """
+    )
+    op.execute("""UPDATE "Unit" SET status = 'OCCUPIED' WHERE "currentLeaseId" IS NOT NULL""")
+
+    with op.batch_alter_table("Unit") as batch:
+        batch.alter_column("status", existing_type=unit_status_enum, server_default=None)
+
+    # SQLite cannot ADD COLUMN with a CURRENT_TIMESTAMP default, so add,
+    # backfill, then tighten
+    with op.batch_alter_table("Tenant") as batch:
+        batch.add_column(sa.Column("createdAt", sa.DateTime(timezone=True), nullable=True))
+    op.execute("""UPDATE "Tenant" SET "createdAt" = CURRENT_TIMESTAMP""")
+    with op.batch_alter_table("Tenant") as batch:
+        batch.alter_column(
+            "createdAt",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now()
+        )
+
+    op.create_table(
+        "LandlordStats",
+        sa.Column("landlordId", sa.Integer(), sa.ForeignKey("User.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("properties", sa.Integer(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("activeLeases", sa.Integer(), nullable=False),
+        sa.Column("pendingPayments", sa.Integer(), nullable=False),
+        sa.Column("pendingAmount", sa.Float(), nullable=False),
+        sa.Column("paidPayments", sa.Integer(), nullable=False),
+        sa.Column("paidAmount", sa.Float(), nullable=False),
+        sa.Column("pendingMaintenance", sa.Integer(), nullable=False),
+        sa.Column("inProgressMaintenance", sa.Integer(), nullable=False),
+        sa.Column("completedMaintenance", sa.Integer(), nullable=False),
+        sa.Column("canceledMaintenance", sa.Integer(), nullable=False),
+        sa.Column("updatedAt", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    for table in PAGINATED_TABLES:
+        op.create_index(f"ix_{table}_createdAt_id", table, ["createdAt", "id"])
+
+
+def downgrade() -> None:
+    for table in PAGINATED_TABLES:
+        op.drop_index(f"ix_{table}_createdAt_id", table_name=table)
+
+    op.drop_table("LandlordStats")
+
+    with op.batch_alter_table("Tenant") as batch:
+        batch.drop_column("createdAt")
+
+    with op.batch_alter_table("Unit") as batch:
+        batch.drop_index("ix_Unit_status")
+        batch.drop_constraint("fk_unit_current_lease", type_="foreignkey")
+        batch.drop_column("currentLeaseId")
+        batch.drop_column("status")
+
+    unit_status_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,51 @@
+"""access path indexes
+
+Composite indexes matching the hot filters (landlord -> property -> unit ->
+lease -> payment / maintenance, each narrowed by status) and partial
+indexes for the scans that only ever look at one status: pending payments
+by due date and active leases by end date.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COMPOSITE_INDEXES = (
+    ("ix_Property_landlordId_createdAt_id", "Property", ["landlordId", "createdAt", "id"]),
+    ("ix_Unit_propertyId_status", "Unit", ["propertyId", "status"]),
+    ("ix_Lease_unitId_status", "Lease", ["unitId", "status"]),
+    ("ix_Lease_tenantId_status", "Lease", ["tenantId", "status"]),
+    ("ix_Payment_leaseId_status_dueDate", "Payment", ["leaseId", "status", "dueDate"]),
+    ("ix_MaintenanceRequest_leaseId_status", "MaintenanceRequest", ["leaseId", "status"]),
+)
+
+PARTIAL_INDEXES = (
+    ("ix_Lease_active_endDate", "Lease", ["endDate"], "status = 'ACTIVE'"),
+    ("ix_Payment_pending_dueDate", "Payment", ["dueDate"], "status = 'PENDING'"),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in COMPOSITE_INDEXES:
+        op.create_index(name, table, columns)
+
+    for name, table, columns, predicate in PARTIAL_INDEXES:
+        op.create_index(
+            name, table, columns,
+            postgresql_where=sa.text(predicate),
+            sqlite_where=sa.text(predicate)
+        )
+
+
+def downgrade() -> None:
+    for name, table, *_ in PARTIAL_INDEXES + COMPOSITE_INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,77 @@
+"""denormalized landlordId on leases, payments and maintenance requests
+
+Adds an owning-landlord column so landlord-scoped reads filter one table
+instead of joining Lease -> Unit -> Property. The column is added nullable,
+backfilled from Unit -> Property ownership, then made NOT NULL.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 10:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TABLES = ("Lease", "Payment", "MaintenanceRequest")
+
+INDEXES = (
+    ("ix_Lease_landlordId_createdAt_id", "Lease", ["landlordId", "createdAt", "id"]),
+    ("ix_Lease_landlordId_status_endDate", "Lease", ["landlordId", "status", "endDate"]),
+    ("ix_Payment_landlordId_createdAt_id", "Payment", ["landlordId", "createdAt", "id"]),
+    ("ix_Payment_landlordId_status_dueDate", "Payment", ["landlordId", "status", "dueDate"]),
+    ("ix_MaintenanceRequest_landlordId_createdAt_id", "MaintenanceRequest", ["landlordId", "createdAt", "id"]),
+    ("ix_MaintenanceRequest_landlordId_status", "MaintenanceRequest", ["landlordId", "status"]),
+)
+
+
+def _foreign_key_name(table: str) -> str:
+    return f"fk_{table.lower()}_landlord"
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("landlordId", sa.Integer(), nullable=True))
+
+    # Same derivation as app.ownership.sync_landlord_ids
+    op.execute(
+        """
+        UPDATE "Lease" SET "landlordId" = (
+            SELECT "Property"."landlordId" FROM "Unit"
+            JOIN "Property" ON "Property".id = "Unit"."propertyId"
+            WHERE "Unit".id = "Lease"."unitId"
+        )
+        """
+    )
+    for table in ("Payment", "MaintenanceRequest"):
+        op.execute(
+            f"""
+            UPDATE "{table}" SET "landlordId" = (
+                SELECT "Lease"."landlordId" FROM "Lease" WHERE "Lease".id = "{table}"."leaseId"
+            )
+            """
+        )
+
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column("landlordId", existing_type=sa.Integer(), nullable=False)
+            batch.create_foreign_key(_foreign_key_name(table), "User", ["landlordId"], ["id"], ondelete="CASCADE")
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.drop_constraint(_foreign_key_name(table), type_="foreignkey")
+            batch.drop_column("landlordId")
@@ -0,0 +1,54 @@
+"""alert inbox
+
+Materialized alerts with read state, written by the handlers when a
+payment, maintenance request or lease changes and by the periodic sweep
+for time-based transitions. Existing data gets its alerts from
+`python -m app.alerts sweep --backfill` after upgrading.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 13:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+UNREAD = '"readAt" IS NULL'
+
+
+def upgrade() -> None:
+    op.create_table(
+        "Alert",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("entityId", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("severity", sa.String(), nullable=False),
+        sa.Column("message", sa.String(), nullable=False),
+        sa.Column("link", sa.String(), nullable=True),
+        sa.Column("eventDate", sa.DateTime(), nullable=False),
+        sa.Column("readAt", sa.DateTime(), nullable=True),
+        sa.Column("recipientId", sa.Integer(), sa.ForeignKey("User.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("leaseId", sa.Integer(), sa.ForeignKey("Lease.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("createdAt", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("recipientId", "kind", "entityId", name="uq_Alert_recipient_kind_entity"),
+    )
+    op.create_index("ix_Alert_id", "Alert", ["id"])
+    op.create_index("ix_Alert_leaseId", "Alert", ["leaseId"])
+    op.create_index("ix_Alert_recipientId_createdAt_id", "Alert", ["recipientId", "createdAt", "id"])
+    op.create_index(
+        "ix_Alert_unread_recipientId_createdAt_id", "Alert", ["recipientId", "createdAt", "id"],
+        postgresql_where=sa.text(UNREAD),
+        sqlite_where=sa.text(UNREAD)
+    )
+    op.create_index("ix_Alert_kind_entityId", "Alert", ["kind", "entityId"])
+
+
+def downgrade() -> None:
+    op.drop_table("Alert")
@@ -0,0 +1,51 @@
+"""sweeper
+
+Payment.overdueAt, the overdue flag the background sweeper stamps on
+pending payments once their due date passes (with a partial index over the
+payments still waiting to be flagged), and SchedulerLock, the leader lease
+that keeps the sweeper to one worker at a time. Pending payments already
+past due are flagged on upgrade.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+UNFLAGGED = "status = 'PENDING' AND \"overdueAt\" IS NULL"
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("Payment") as batch:
+        batch.add_column(sa.Column("overdueAt", sa.DateTime(), nullable=True))
+    op.execute(
+        'UPDATE "Payment" SET "overdueAt" = CURRENT_TIMESTAMP '
+        "WHERE status = 'PENDING' AND \"dueDate\" < CURRENT_TIMESTAMP"
+    )
+    op.create_index(
+        "ix_Payment_unflagged_dueDate", "Payment", ["dueDate"],
+        postgresql_where=sa.text(UNFLAGGED),
+        sqlite_where=sa.text(UNFLAGGED)
+    )
+
+    op.create_table(
+        "SchedulerLock",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("expiresAt", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("SchedulerLock")
+    op.drop_index("ix_Payment_unflagged_dueDate", table_name="Payment")
+    with op.batch_alter_table("Payment") as batch:
+        batch.drop_column("overdueAt")
@@ -0,0 +1,47 @@
+"""webhook inbox
+
+WebhookEvent, the durable inbox of received Stripe webhook events keyed
+by Stripe's event id, with a partial index over the events still waiting
+to be applied.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+PENDING = '"processedAt" IS NULL'
+
+
+def upgrade() -> None:
+    op.create_table(
+        "WebhookEvent",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("paymentId", sa.Integer(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("stripeCreatedAt", sa.DateTime(), nullable=False),
+        sa.Column("receivedAt", sa.DateTime(), nullable=False),
+        sa.Column("processedAt", sa.DateTime(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+    )
+    op.create_index("ix_WebhookEvent_paymentId", "WebhookEvent", ["paymentId"])
+    op.create_index("ix_WebhookEvent_processedAt", "WebhookEvent", ["processedAt"])
+    op.create_index(
+        "ix_WebhookEvent_pending", "WebhookEvent", ["stripeCreatedAt", "receivedAt"],
+        postgresql_where=sa.text(PENDING),
+        sqlite_where=sa.text(PENDING)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("WebhookEvent")
@@ -0,0 +1,45 @@
+"""photo store
+
+PhotoObject, one row per stored photo file keyed by its SHA-256, with the
+count of photo URLs referencing it and a partial index over the objects
+left without references.
+
+Existing photos keep their uploads/maintenance/ URLs; move them into the
+store with `python -m app.photo_store import-legacy`.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+UNREFERENCED = '"refCount" <= 0'
+
+
+def upgrade() -> None:
+    op.create_table(
+        "PhotoObject",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("extension", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("contentType", sa.String(), nullable=True),
+        sa.Column("refCount", sa.Integer(), nullable=False),
+        sa.Column("createdAt", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_PhotoObject_unreferenced", "PhotoObject", ["sha256"],
+        postgresql_where=sa.text(UNREFERENCED),
+        sqlite_where=sa.text(UNREFERENCED)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("PhotoObject")
@@ -0,0 +1,44 @@
+"""photo renditions
+
+Rendition state on PhotoObject: the rendition URLs once generated, the
+attempts made and the last error, with a partial index over the objects
+still waiting for theirs. Existing objects start pending and are picked up
+by the sweeper.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 14:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+PENDING = '"renditions" IS NULL'
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("PhotoObject") as batch:
+        batch.add_column(sa.Column("renditions", sa.JSON(none_as_null=True), nullable=True))
+        batch.add_column(sa.Column("renditionAttempts", sa.Integer(), nullable=False, server_default="0"))
+        batch.add_column(sa.Column("renditionError", sa.String(), nullable=True))
+    with op.batch_alter_table("PhotoObject") as batch:
+        batch.alter_column("renditionAttempts", server_default=None)
+    op.create_index(
+        "ix_PhotoObject_pending_renditions", "PhotoObject", ["createdAt"],
+        postgresql_where=sa.text(PENDING),
+        sqlite_where=sa.text(PENDING)
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_PhotoObject_pending_renditions", table_name="PhotoObject")
+    with op.batch_alter_table("PhotoObject") as batch:
+        batch.drop_column("renditionError")
+        batch.drop_column("renditionAttempts")
+        batch.drop_column("renditions")
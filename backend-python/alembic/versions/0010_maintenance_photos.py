@@ -0,0 +1,105 @@
+"""maintenance photos
+
+MaintenancePhoto, one row per photo on a maintenance request (URL, stored
+object hash, size, dimensions), replacing the MaintenanceRequest.photos
+JSON array. Existing arrays become rows in their order; content URLs get
+their hash and size from PhotoObject. Dimensions are only known for photos
+uploaded from now on.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+# /uploads/objects/ab/cd/<sha256>.<ext>: the hash starts at character 24
+CONTENT_URL = """"url" LIKE '/uploads/objects/__/__/%'"""
+URL_SHA256 = """substr("url", 24, 64)"""
+
+ROWS_FROM_ARRAYS = {
+    "postgresql": """
+        INSERT INTO "MaintenancePhoto" ("requestId", "url", "createdAt")
+        SELECT request.id, photo.url, request."createdAt"
+        FROM "MaintenanceRequest" AS request
+        CROSS JOIN LATERAL json_array_elements_text(request.photos) WITH ORDINALITY AS photo(url, position)
+        ORDER BY request.id, photo.position
+    """,
+    "sqlite": """
+        INSERT INTO "MaintenancePhoto" ("requestId", "url", "createdAt")
+        SELECT request.id, photo.value, request."createdAt"
+        FROM "MaintenanceRequest" AS request, json_each(request.photos) AS photo
+        ORDER BY request.id, photo.key
+    """,
+}
+
+ARRAYS_FROM_ROWS = {
+    "postgresql": """
+        UPDATE "MaintenanceRequest" SET photos = COALESCE((
+            SELECT json_agg(photo.url ORDER BY photo.id) FROM "MaintenancePhoto" AS photo
+            WHERE photo."requestId" = "MaintenanceRequest".id
+        ), '[]'::json)
+    """,
+    "sqlite": """
+        UPDATE "MaintenanceRequest" SET photos = (
+            SELECT json_group_array(url) FROM (
+                SELECT photo.url FROM "MaintenancePhoto" AS photo
+                WHERE photo."requestId" = "MaintenanceRequest".id ORDER BY photo.id
+            )
+        )
+    """,
+}
+
+
+def _dialect() -> str:
+    return op.get_context().dialect.name
+
+
+def upgrade() -> None:
+    op.create_table(
+        "MaintenancePhoto",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "requestId", sa.Integer(), sa.ForeignKey("MaintenanceRequest.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=True),
+        sa.Column("size", sa.Integer(), nullable=True),
+        sa.Column("width", sa.Integer(), nullable=True),
+        sa.Column("height", sa.Integer(), nullable=True),
+        sa.Column("createdAt", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_MaintenancePhoto_requestId_id", "MaintenancePhoto", ["requestId", "id"])
+    op.create_index("ix_MaintenancePhoto_sha256", "MaintenancePhoto", ["sha256"])
+
+    op.execute(ROWS_FROM_ARRAYS[_dialect()])
+    # Content URLs of objects in the store: their hash and size
+    op.execute(
+        f"""
+        UPDATE "MaintenancePhoto" SET
+            sha256 = {URL_SHA256},
+            size = (SELECT "PhotoObject".size FROM "PhotoObject" WHERE "PhotoObject".sha256 = {URL_SHA256})
+        WHERE {CONTENT_URL}
+          AND {URL_SHA256} IN (SELECT sha256 FROM "PhotoObject")
+        """
+    )
+
+    with op.batch_alter_table("MaintenanceRequest") as batch:
+        batch.drop_column("photos")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("MaintenanceRequest") as batch:
+        batch.add_column(sa.Column("photos", sa.JSON(), nullable=True))
+    op.execute(ARRAYS_FROM_ROWS[_dialect()])
+    with op.batch_alter_table("MaintenanceRequest") as batch:
+        batch.alter_column("photos", existing_type=sa.JSON(), nullable=False)
+
+    op.drop_table("MaintenancePhoto")
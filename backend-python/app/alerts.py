@@ -0,0 +1,374 @@
+"""
+Alert inbox
+Materializes the dashboard alerts into the Alert table so the inbox
+endpoints read an indexed page instead of scanning payments, maintenance
+requests and leases on every call.
+
+The write handlers call the sync_* functions for the rows they change, in
+the same transaction. Payments falling overdue and leases expiring are
+synced by the sweeper jobs that flag them (app/sweeper.py); the other
+time-based transitions are picked up by the periodic alert sweep, which
+the scheduler runs in committed batches. It only looks at rows that
+crossed a window boundary and have no alert yet (a payment coming due, a
+lease entering its expiry window) and at alerts that went stale with time
+(a lease whose end date passed), so a run costs what changed, not every
+stored alert. The full sweep re-derives every alerted row instead, for
+repairs and backfills:
+
+    python -m app.alerts sweep [--full] [--backfill]
+
+Each sync derives the alerts a row should have right now and reconciles
+them with the stored ones: missing alerts are inserted, stale ones
+deleted, and an alert whose wording changed is replaced by a new unread
+one. Syncing is idempotent, so the sweep and the handlers can overlap.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+import argparse
+
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.orm import Session
+
+from .database import insert_ignoring_conflicts
+from .models import Alert, Lease, MaintenanceRequest, Payment, Tenant
+
+# Alert kinds, grouped by the table their entityId points at
+PAYMENT_OVERDUE = "PAYMENT_OVERDUE"
+PAYMENT_DUE = "PAYMENT_DUE"
+MAINTENANCE_PENDING = "MAINTENANCE_PENDING"
+MAINTENANCE_UPDATE = "MAINTENANCE_UPDATE"
+LEASE_EXPIRING = "LEASE_EXPIRING"
+
+PAYMENT_KINDS = (PAYMENT_OVERDUE, PAYMENT_DUE)
+MAINTENANCE_KINDS = (MAINTENANCE_PENDING, MAINTENANCE_UPDATE)
+LEASE_KINDS = (LEASE_EXPIRING,)
+
+# Tenants hear about payments this many days ahead; landlords about leases
+UPCOMING_PAYMENT_DAYS = 7
+EXPIRING_LEASE_DAYS = 30
+
+MAINTENANCE_SEVERITY = {"HIGH": "high", "MEDIUM": "medium", "LOW": "low"}
+
+# Ids reconciled per round trip
+SYNC_BATCH_SIZE = 500
+
+# Compared to decide whether a stored alert still says the right thing
+CONTENT_FIELDS = ("type", "severity", "message", "link", "leaseId")
+
+
+def _status_key(status) -> Optional[str]:
+    return getattr(status, "value", status)
+
+
+def _batches(ids: Iterable[int]):
+    ids = sorted(set(ids))
+    for start in range(0, len(ids), SYNC_BATCH_SIZE):
+        yield ids[start:start + SYNC_BATCH_SIZE]
+
+
+def _alert(kind, row_id, lease_id, recipient_id, alert_type, severity, message, event_date=None, link=None) -> dict:
+    return {
+        "kind": kind,
+        "entityId": row_id,
+        "leaseId": lease_id,
+        "recipientId": recipient_id,
+        "type": alert_type,
+        "severity": severity,
+        "message": message,
+        "link": link,
+        "eventDate": event_date,
+    }
+
+
+def _payment_alerts(row, now: datetime) -> List[dict]:
+    """Alerts a payment row should have at `now`"""
+    if _status_key(row.status) != "PENDING":
+        return []
+
+    due = row.dueDate.strftime("%Y-%m-%d")
+    # Overdue is the persisted flag set by the sweeper / write handlers
+    if row.overdueAt is not None:
+        return [
+            _alert(PAYMENT_OVERDUE, row.id, row.leaseId, row.landlordId, "payment", "high",
+                   f"Overdue payment of ${row.amount} from lease {row.leaseId}", row.dueDate),
+            _alert(PAYMENT_OVERDUE, row.id, row.leaseId, row.tenantUserId, "urgent", "high",
+                   f"Payment of ${row.amount} was due on {due}", row.dueDate, "/tenant/payments"),
+        ]
+    if row.dueDate <= now + timedelta(days=UPCOMING_PAYMENT_DAYS):
+        return [
+            _alert(PAYMENT_DUE, row.id, row.leaseId, row.tenantUserId, "warning", "medium",
+                   f"Payment of ${row.amount} is due on {due}", row.dueDate, "/tenant/payments"),
+        ]
+    return []
+
+
+def _maintenance_alerts(row, now: datetime) -> List[dict]:
+    """Alerts a maintenance request row should have"""
+    status = _status_key(row.status)
+    if status == "PENDING":
+        return [
+            _alert(MAINTENANCE_PENDING, row.id, row.leaseId, row.landlordId, "maintenance",
+                   MAINTENANCE_SEVERITY.get(_status_key(row.priority), "medium"),
+                   f"Maintenance request: {row.title}"),
+        ]
+    if status in ("IN_PROGRESS", "COMPLETED"):
+        state = "completed" if status == "COMPLETED" else "in progress"
+        return [
+            _alert(MAINTENANCE_UPDATE, row.id, row.leaseId, row.tenantUserId, "info", "low",
+                   f"Maintenance request '{row.title}' is now {state}", link="/tenant/maintenance"),
+        ]
+    return []
+
+
+def _lease_alerts(row, now: datetime) -> List[dict]:
+    """Alerts a lease row should have at `now`"""
+    if _status_key(row.status) != "ACTIVE":
+        return []
+    if now <= row.endDate <= now + timedelta(days=EXPIRING_LEASE_DAYS):
+        return [
+            _alert(LEASE_EXPIRING, row.id, row.id, row.landlordId, "lease", "medium",
+                   f"Lease {row.id} expiring on {row.endDate.strftime('%Y-%m-%d')}", row.endDate),
+        ]
+    return []
+
+
+def _reconcile(db: Session, kinds, ids: List[int], desired: List[dict], now: datetime) -> dict:
+    """Make the stored alerts of `kinds` for `ids` match `desired`"""
+    stored = db.execute(
+        select(Alert.id, Alert.recipientId, Alert.kind, Alert.entityId, Alert.eventDate,
+               *[getattr(Alert, field) for field in CONTENT_FIELDS])
+        .where(Alert.kind.in_(kinds), Alert.entityId.in_(ids))
+    ).all()
+    stored = {(row.recipientId, row.kind, row.entityId): row for row in stored}
+
+    wanted = {}
+    for alert in desired:
+        if alert["recipientId"] is not None:
+            wanted[(alert["recipientId"], alert["kind"], alert["entityId"])] = alert
+
+    stale = [row.id for key, row in stored.items() if key not in wanted]
+    inserts, moved = [], []
+    for key, alert in wanted.items():
+        row = stored.get(key)
+        if row is not None:
+            if all(getattr(row, field) == alert[field] for field in CONTENT_FIELDS):
+                if alert["eventDate"] is not None and row.eventDate != alert["eventDate"]:
+                    moved.append({"id": row.id, "eventDate": alert["eventDate"]})
+                continue
+            # Reworded: replace it so it comes back unread at the top of the inbox
+            stale.append(row.id)
+        inserts.append({**alert, "eventDate": alert["eventDate"] or now})
+
+    if stale:
+        db.execute(delete(Alert).where(Alert.id.in_(stale)).execution_options(synchronize_session=False))
+    if moved:
+        db.execute(update(Alert), moved)
+    if inserts:
+        # A concurrent sync may have just written the same alert. On the
+        # connection: the ORM would send the conflict-ignoring INSERT row by row
+        db.connection().execute(
+            insert_ignoring_conflicts(db, Alert, Alert.recipientId, Alert.kind, Alert.entityId), inserts
+        )
+
+    return {"created": len(inserts), "removed": len(stale)}
+
+
+def _sync(db: Session, ids, kinds, load, derive, now: Optional[datetime]) -> dict:
+    db.flush()
+    now = now or datetime.utcnow()
+    totals = {"created": 0, "removed": 0}
+    for batch in _batches(ids):
+        desired = [alert for row in db.execute(load(batch)).all() for alert in derive(row, now)]
+        result = _reconcile(db, kinds, batch, desired, now)
+        totals = {key: totals[key] + result[key] for key in totals}
+    return totals
+
+
+def sync_payment_alerts(db: Session, payment_ids: Iterable[int], now: Optional[datetime] = None) -> dict:
+    """Reconcile the alerts of the given payments (deleted payments lose theirs)"""
+    return _sync(
+        db, payment_ids, PAYMENT_KINDS,
+        lambda batch: select(
+            Payment.id, Payment.amount, Payment.dueDate, Payment.overdueAt, Payment.status, Payment.leaseId,
+            Payment.landlordId, Tenant.userId.label("tenantUserId")
+        ).join(Lease, Payment.leaseId == Lease.id).join(Tenant).where(Payment.id.in_(batch)),
+        _payment_alerts, now
+    )
+
+
+def sync_maintenance_alerts(db: Session, request_ids: Iterable[int], now: Optional[datetime] = None) -> dict:
+    """Reconcile the alerts of the given maintenance requests"""
+    return _sync(
+        db, request_ids, MAINTENANCE_KINDS,
+        lambda batch: select(
+            MaintenanceRequest.id, MaintenanceRequest.title, MaintenanceRequest.status, MaintenanceRequest.priority,
+            MaintenanceRequest.leaseId, MaintenanceRequest.landlordId, Tenant.userId.label("tenantUserId")
+        ).join(Lease, MaintenanceRequest.leaseId == Lease.id).join(Tenant).where(MaintenanceRequest.id.in_(batch)),
+        _maintenance_alerts, now
+    )
+
+
+def sync_lease_alerts(db: Session, lease_ids: Iterable[int], now: Optional[datetime] = None) -> dict:
+    """Reconcile the alerts of the given leases"""
+    return _sync(
+        db, lease_ids, LEASE_KINDS,
+        lambda batch: select(Lease.id, Lease.status, Lease.endDate, Lease.landlordId).where(Lease.id.in_(batch)),
+        _lease_alerts, now
+    )
+
+
+def _payment_window(now: datetime):
+    """Pending payments that are due soon or overdue, the only ones with alerts"""
+    return select(Payment.id).where(
+        Payment.status == "PENDING",
+        Payment.dueDate <= now + timedelta(days=UPCOMING_PAYMENT_DAYS)
+    )
+
+
+def _alerted_ids(db: Session, kinds, lease_ids: Optional[List[int]] = None) -> List[int]:
+    stmt = select(Alert.entityId).where(Alert.kind.in_(kinds)).distinct()
+    if lease_ids is not None:
+        stmt = stmt.where(Alert.leaseId.in_(lease_ids))
+    return db.execute(stmt).scalars().all()
+
+
+def _open_requests():
+    return select(MaintenanceRequest.id).where(MaintenanceRequest.status.in_(["PENDING", "IN_PROGRESS"]))
+
+
+def sync_lease_tree_alerts(db: Session, lease_ids: Iterable[int], now: Optional[datetime] = None) -> dict:
+    """
+    Reconcile the alerts of leases and of their payments and maintenance
+    requests, for changes that touch many rows at once: bulk-inserted
+    payment schedules, or a unit moving to another landlord.
+    """
+    db.flush()
+    now = now or datetime.utcnow()
+    lease_ids = sorted(set(lease_ids))
+    payment_ids, request_ids = set(), set()
+    for batch in _batches(lease_ids):
+        payment_ids |= set(db.execute(_payment_window(now).where(Payment.leaseId.in_(batch))).scalars())
+        payment_ids |= set(_alerted_ids(db, PAYMENT_KINDS, batch))
+        request_ids |= set(db.execute(_open_requests().where(MaintenanceRequest.leaseId.in_(batch))).scalars())
+        request_ids |= set(_alerted_ids(db, MAINTENANCE_KINDS, batch))
+
+    results = [
+        sync_lease_alerts(db, lease_ids, now),
+        sync_payment_alerts(db, payment_ids, now),
+        sync_maintenance_alerts(db, request_ids, now),
+    ]
+    return {key: sum(result[key] for result in results) for key in ("created", "removed")}
+
+
+def _coming_due(now: datetime):
+    """Unflagged pending payments inside the upcoming window without their alert yet"""
+    return select(Payment.id).where(
+        Payment.status == "PENDING",
+        Payment.overdueAt.is_(None),
+        Payment.dueDate >= now,
+        Payment.dueDate <= now + timedelta(days=UPCOMING_PAYMENT_DAYS),
+        ~exists().where(Alert.kind == PAYMENT_DUE, Alert.entityId == Payment.id)
+    ).order_by(Payment.dueDate)
+
+
+def _coming_expiry(now: datetime):
+    """Active leases inside the expiry window without their alert yet"""
+    return select(Lease.id).where(
+        Lease.status == "ACTIVE",
+        Lease.landlordId.is_not(None),
+        Lease.endDate >= now,
+        Lease.endDate <= now + timedelta(days=EXPIRING_LEASE_DAYS),
+        ~exists().where(Alert.kind == LEASE_EXPIRING, Alert.entityId == Lease.id)
+    ).order_by(Lease.endDate)
+
+
+def _lapsed_expiry(now: datetime):
+    """Leases whose expiry alert outlived their end date"""
+    return select(Alert.entityId).where(Alert.kind == LEASE_EXPIRING, Alert.eventDate < now).distinct()
+
+
+def sweep_alerts_batch(db: Session, now: datetime, limit: int) -> int:
+    """
+    Sync up to `limit` payments coming due and `limit` leases entering or
+    leaving their expiry window, as a sweeper step. Synced rows drop out of
+    the selection, so repeated batches work through the backlog. Returns
+    the rows synced.
+    """
+    payment_ids = db.execute(_coming_due(now).limit(limit)).scalars().all()
+    lease_ids = set(db.execute(_coming_expiry(now).limit(limit)).scalars())
+    lease_ids |= set(db.execute(_lapsed_expiry(now).limit(limit)).scalars())
+
+    sync_payment_alerts(db, payment_ids, now)
+    sync_lease_alerts(db, lease_ids, now)
+    return len(payment_ids) + len(lease_ids)
+
+
+def sweep_alerts(db: Session, now: Optional[datetime] = None, backfill: bool = False) -> dict:
+    """
+    Re-derive every alert in one transaction (repairs and backfills).
+
+    Re-syncs every payment and lease inside its alert window plus every row
+    that already has an alert, so alerts leave the inbox once their window
+    has passed or their row disappeared. With backfill, also syncs open
+    maintenance requests (used once after the table is created). Its cost
+    grows with the stored alerts; the scheduler runs sweep_alerts_batch.
+    """
+    now = now or datetime.utcnow()
+
+    payment_ids = set(db.execute(_payment_window(now)).scalars()) | set(_alerted_ids(db, PAYMENT_KINDS))
+    lease_ids = set(db.execute(
+        select(Lease.id).where(
+            Lease.status == "ACTIVE",
+            Lease.endDate <= now + timedelta(days=EXPIRING_LEASE_DAYS)
+        )
+    ).scalars()) | set(_alerted_ids(db, LEASE_KINDS))
+    request_ids = set(_alerted_ids(db, MAINTENANCE_KINDS))
+    if backfill:
+        request_ids |= set(db.execute(_open_requests()).scalars())
+
+    results = [
+        sync_payment_alerts(db, payment_ids, now),
+        sync_lease_alerts(db, lease_ids, now),
+        sync_maintenance_alerts(db, request_ids, now),
+    ]
+    return {
+        "payments": len(payment_ids),
+        "leases": len(lease_ids),
+        "maintenanceRequests": len(request_ids),
+        "created": sum(result["created"] for result in results),
+        "removed": sum(result["removed"] for result in results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the materialized alert inbox")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sweep_parser = subparsers.add_parser("sweep", help="Raise and retire time-based alerts")
+    sweep_parser.add_argument("--full", action="store_true", help="Re-derive every alerted row (repair)")
+    sweep_parser.add_argument("--backfill", action="store_true",
+                              help="Full sweep that also raises alerts for open maintenance requests")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "sweep" and (args.full or args.backfill):
+            result = sweep_alerts(db, backfill=args.backfill)
+            db.commit()
+            print(f"✅ Alert sweep: {result['created']} created, {result['removed']} removed")
+        elif args.command == "sweep":
+            now, rows = datetime.utcnow(), 0
+            while True:
+                synced = sweep_alerts_batch(db, now, SYNC_BATCH_SIZE)
+                db.commit()
+                rows += synced
+                if synced < SYNC_BATCH_SIZE:
+                    break
+            print(f"✅ Alert sweep: {rows} row(s) synced")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,23 @@
 """
 Authentication utilities for JWT and password hashing
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 
 from .database import get_db
 from .models import User
 from .schemas import TokenData
+from .cache import TTLCache
 
 load_dotenv()
 
@@ -21,6 +25,10 @@ load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-change-this")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRATION_MINUTES", "1440"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(os.cpu_count() or 2)))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", str(PASSWORD_POOL_SIZE * 4)))
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -28,6 +36,18 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Authenticated-user identity keyed by token subject (email). Entries hold
+# plain column values, never the password hash; writers that change a
+# user's password, role or existence call invalidate_cached_user.
+USER_CACHE_FIELDS = ("id", "name", "email", "role", "createdAt", "updatedAt")
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(email: Optional[str]) -> None:
+    """Forget the cached identity for a token subject"""
+    if email:
+        user_cache.invalidate(email)
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -39,6 +59,55 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# bcrypt releases the GIL while hashing, so a thread pool gives real
+# parallelism and keeps ~250 ms of CPU per call off the event loop
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_POOL_SIZE, thread_name_prefix="bcrypt")
+_password_jobs = {"pending": 0, "completed": 0, "rejected": 0}
+
+
+async def _run_password_job(fn, *args):
+    """
+    Run a bcrypt call on the password pool.
+
+    At most PASSWORD_QUEUE_LIMIT calls may be running or queued; beyond
+    that the request is shed with 503 + Retry-After instead of piling up
+    latency for everyone behind it.
+    """
+    if _password_jobs["pending"] >= PASSWORD_QUEUE_LIMIT:
+        _password_jobs["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    
+    _password_jobs["pending"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_pool, fn, *args)
+    finally:
+        _password_jobs["pending"] -= 1
+        _password_jobs["completed"] += 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bounded password pool"""
+    return await _run_password_job(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bounded password pool"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+def password_pool_stats() -> dict:
+    """Occupancy of the password pool"""
+    return {
+        "workers": PASSWORD_POOL_SIZE,
+        "queueLimit": PASSWORD_QUEUE_LIMIT,
+        **_password_jobs
+    }
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -67,7 +136,7 @@ def decode_access_token(token: str) -> Optional[str]:
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get the current authenticated user from the token
@@ -82,10 +151,16 @@ async def get_current_user(
     if email is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    # A fresh detached User per request, so handlers never share one instance
+    snapshot = user_cache.get(email)
+    if snapshot is not None:
+        return User(**snapshot)
+    
+    user = await db.scalar(select(User).where(User.email == email))
     if user is None:
         raise credentials_exception
     
+    user_cache.set(email, {field: getattr(user, field) for field in USER_CACHE_FIELDS})
     return user
 
 
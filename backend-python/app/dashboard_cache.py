@@ -0,0 +1,83 @@
+"""
+Dashboard response cache
+Per-landlord cache for the polled dashboard endpoints. Entries expire
+after a short TTL and are dropped as soon as a write touching the
+landlord's data commits; concurrent identical requests share one
+computation.
+
+Write handlers mark the landlords they touch with touch_landlord(db, id)
+(bump_stats / rebuild_stats do this for every rollup change); the marks
+are applied when the session commits and discarded if it rolls back, so a
+reader can never re-cache data from before the write.
+
+The cache is per process: with several workers, another worker's copy can
+stay stale for up to DASHBOARD_CACHE_TTL_SECONDS.
+"""
+from typing import Any, Awaitable, Callable, Dict, Union
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .cache import SingleFlightCache
+
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+DASHBOARD_CACHE_MAX_SIZE = int(os.getenv("DASHBOARD_CACHE_MAX_SIZE", "4096"))
+
+dashboard_cache = SingleFlightCache(maxsize=DASHBOARD_CACHE_MAX_SIZE, ttl=DASHBOARD_CACHE_TTL_SECONDS)
+
+# Bumped on every invalidation; part of the cache key, so a computation that
+# started before a write commits is stored under a key nobody reads again
+_generations: Dict[int, int] = {}
+_generations_lock = threading.Lock()
+_invalidations = {"count": 0}
+
+_SESSION_KEY = "dashboard_landlords"
+
+
+def _generation(landlord_id: int) -> int:
+    with _generations_lock:
+        return _generations.get(landlord_id, 0)
+
+
+def invalidate_landlord(landlord_id: int) -> None:
+    """Drop a landlord's cached dashboard responses now"""
+    with _generations_lock:
+        _generations[landlord_id] = _generations.get(landlord_id, 0) + 1
+        _invalidations["count"] += 1
+    dashboard_cache.invalidate_matching(lambda key: key[0] == landlord_id)
+
+
+def touch_landlord(db: Union[Session, AsyncSession], landlord_id) -> None:
+    """Invalidate a landlord's dashboard when this session commits"""
+    if landlord_id is not None:
+        db.info.setdefault(_SESSION_KEY, set()).add(landlord_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for landlord_id in session.info.pop(_SESSION_KEY, ()):
+        invalidate_landlord(landlord_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+async def cached_response(landlord_id: int, endpoint: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Serve a landlord's dashboard endpoint from the cache, computing it once on a miss"""
+    key = (landlord_id, _generation(landlord_id), endpoint)
+    return await dashboard_cache.get_or_compute(key, compute)
+
+
+def dashboard_cache_stats() -> dict:
+    """Cache counters plus how often writes invalidated it"""
+    return {**dashboard_cache.stats(), "invalidations": _invalidations["count"]}
+
+
+def clear_dashboard_cache() -> None:
+    """Forget every cached response"""
+    dashboard_cache.clear()
@@ -0,0 +1,291 @@
+"""
+Prometheus metrics
+Counters, gauges and histograms kept in process and rendered in the
+Prometheus text exposition format at GET /metrics:
+
+- http_request_duration_seconds{method,route,status}: latency by route
+  template, from MetricsMiddleware; http_requests_in_flight
+- db_pool_checkout_seconds: waits for a connection of the async engine
+  (TimedAsyncQueuePool); db_pool_size / _checked_out / _overflow
+- password_pool_pending / _queue_limit / _rejected_total: the bcrypt pool
+  (app/auth.py)
+- stripe_request_duration_seconds{operation,outcome}: Stripe API calls
+  made through timed_stripe
+- webhook_apply_lag_seconds: receipt to application of webhook events
+  (app/webhook_inbox.py); webhook_pending_events and the age of the oldest
+- metrics_collector_failed{collector}: 1 when the last scrape could not
+  read that source (the database is down, the pool is exhausted); its
+  gauges are left out and everything else is still served
+
+Recording is a dict lookup and a bisect under no lock: the event loop is
+single-threaded, and values touched from threads (Stripe calls) may at
+worst lose an increment. Values read from elsewhere (pools, the inbox)
+are collected when /metrics is scraped, not per request.
+"""
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .query_stats import route_template
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; request latencies from a cached read to a slow report
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Seconds; a pool checkout is normally immediate
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+# Seconds; webhook events wait for the consumer's next poll and batch
+LAG_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+        _registry.append(self)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, *labels, value: float) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        # [per-bucket counts (not cumulative; the last is +Inf), sum]
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+_registry: List[_Metric] = []
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served")
+POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Wait for a database connection from the async engine's pool",
+    buckets=POOL_WAIT_BUCKETS
+)
+POOL_SIZE = Gauge("db_pool_size", "Connections the async engine's pool keeps")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections of the async engine in use")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the pool size")
+PASSWORD_PENDING = Gauge("password_pool_pending", "bcrypt calls running or queued")
+PASSWORD_QUEUE_LIMIT = Gauge("password_pool_queue_limit", "bcrypt calls allowed before shedding with 503")
+PASSWORD_REJECTED = Counter("password_pool_rejected_total", "bcrypt calls shed with 503")
+STRIPE_LATENCY = Histogram(
+    "stripe_request_duration_seconds", "Stripe API call latency", ("operation", "outcome")
+)
+WEBHOOK_LAG = Histogram(
+    "webhook_apply_lag_seconds", "Time from receiving a webhook event to applying it", buckets=LAG_BUCKETS
+)
+WEBHOOK_PENDING = Gauge("webhook_pending_events", "Webhook events received and not applied yet")
+WEBHOOK_OLDEST_PENDING = Gauge("webhook_oldest_pending_seconds", "Age of the oldest unapplied webhook event")
+COLLECTOR_FAILED = Gauge(
+    "metrics_collector_failed", "1 when the last scrape could not collect this source", ("collector",)
+)
+
+# Longest a scrape waits on the database, well inside Prometheus' scrape timeout
+COLLECT_TIMEOUT_SECONDS = 2.0
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency by route template and status, and requests in flight"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started, scope["method"], route_template(scope), status[0]
+            )
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """The async engine's default pool, recording how long checkouts take (db_pool_checkout_seconds)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT.observe(time.perf_counter() - started)
+
+
+def timed_stripe(operation: str, call: Callable) -> Callable:
+    """Wrap a Stripe SDK call to record its latency and outcome (stripe_request_duration_seconds)"""
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = call(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            STRIPE_LATENCY.observe(time.perf_counter() - started, operation, outcome)
+    return timed
+
+
+def observe_webhook_lag(received_at: Sequence[datetime], now: datetime) -> None:
+    """Record the lag of webhook events applied at `now`"""
+    for received in received_at:
+        WEBHOOK_LAG.observe(max((now - received).total_seconds(), 0.0))
+
+
+def _collect_pool(pool) -> None:
+    # QueuePool and its subclasses; other pools (NullPool, StaticPool) have no size
+    if hasattr(pool, "checkedout"):
+        POOL_SIZE.set(value=pool.size())
+        POOL_CHECKED_OUT.set(value=pool.checkedout())
+        POOL_OVERFLOW.set(value=max(pool.overflow(), 0))
+
+
+def _collect_password_pool() -> None:
+    from .auth import password_pool_stats
+
+    stats = password_pool_stats()
+    PASSWORD_PENDING.set(value=stats["pending"])
+    PASSWORD_QUEUE_LIMIT.set(value=stats["queueLimit"])
+    PASSWORD_REJECTED.clear()
+    PASSWORD_REJECTED.inc(amount=stats["rejected"])
+
+
+async def _collect_webhooks(session_factory, now: datetime) -> None:
+    from .models import WebhookEvent
+
+    async def backlog():
+        async with session_factory() as db:
+            return (await db.execute(
+                select(func.count(), func.min(WebhookEvent.receivedAt)).where(WebhookEvent.processedAt.is_(None))
+            )).one()
+
+    try:
+        pending, oldest = await asyncio.wait_for(backlog(), COLLECT_TIMEOUT_SECONDS)
+    except Exception as exc:
+        # Stale values would read as a healthy backlog: leave the gauges out
+        WEBHOOK_PENDING.clear()
+        WEBHOOK_OLDEST_PENDING.clear()
+        COLLECTOR_FAILED.set("webhooks", value=1)
+        print(f"❌ Metrics could not read the webhook backlog: {exc!r}")
+        return
+    WEBHOOK_PENDING.set(value=pending)
+    WEBHOOK_OLDEST_PENDING.set(value=(now - oldest).total_seconds() if oldest else 0)
+    COLLECTOR_FAILED.set("webhooks", value=0)
+
+
+async def render(session_factory, pool=None, now: Optional[datetime] = None) -> str:
+    """
+    Collect the sampled values and render every metric. The database is
+    only read through a session opened here, and a failing read leaves its
+    gauges out instead of failing the scrape.
+    """
+    if pool is None:
+        from .database import async_engine
+        pool = async_engine.pool
+    _collect_pool(pool)
+    _collect_password_pool()
+    await _collect_webhooks(session_factory, now or datetime.utcnow())
+
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def samples(text: str) -> Dict[Tuple[str, str], float]:
+    """Parse rendered samples into {(name, labels): value}, for tests and benchmarks"""
+    parsed = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            name, _, labels = series.partition("{")
+            parsed[(name, "{" + labels if labels else "")] = float(value)
+    return parsed
@@ -2,7 +2,7 @@
 SQLAlchemy Models for Property Management System
 Converted from Prisma schema
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, UniqueConstraint, Enum as SQLEnum, JSON, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -23,6 +23,11 @@ class LeaseStatusEnum(str, enum.Enum):
     EXPIRED = "EXPIRED"
 
 
+class UnitStatusEnum(str, enum.Enum):
+    AVAILABLE = "AVAILABLE"
+    OCCUPIED = "OCCUPIED"
+
+
 class MaintenanceStatusEnum(str, enum.Enum):
     PENDING = "PENDING"
     IN_PROGRESS = "IN_PROGRESS"
@@ -61,12 +66,18 @@ class User(Base):
 
 class Tenant(Base):
     __tablename__ = "Tenant"
+    __table_args__ = (
+        # Keyset pagination order (app/pagination.py)
+        Index("ix_Tenant_createdAt_id", "createdAt", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     phone = Column(String, nullable=True)
     
     userId = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), unique=True, nullable=False)
     
+    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
     # Relationships
     user = relationship("User", back_populates="tenant")
     leases = relationship("Lease", back_populates="tenant", cascade="all, delete-orphan")
@@ -74,6 +85,12 @@ class Tenant(Base):
 
 class Property(Base):
     __tablename__ = "Property"
+    __table_args__ = (
+        # Keyset pagination order (app/pagination.py)
+        Index("ix_Property_createdAt_id", "createdAt", "id"),
+        # A landlord's properties in keyset order
+        Index("ix_Property_landlordId_createdAt_id", "landlordId", "createdAt", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String, nullable=False)
@@ -95,6 +112,12 @@ class Property(Base):
 
 class Unit(Base):
     __tablename__ = "Unit"
+    __table_args__ = (
+        # Keyset pagination order (app/pagination.py)
+        Index("ix_Unit_createdAt_id", "createdAt", "id"),
+        # Units of a property, optionally by occupancy
+        Index("ix_Unit_propertyId_status", "propertyId", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     unitNumber = Column(String, nullable=False)
@@ -104,16 +127,40 @@ class Unit(Base):
     
     propertyId = Column(Integer, ForeignKey("Property.id", ondelete="CASCADE"), nullable=False)
     
+    # Denormalized occupancy, maintained by the lease lifecycle (app/occupancy.py)
+    status = Column(SQLEnum(UnitStatusEnum), default=UnitStatusEnum.AVAILABLE, nullable=False, index=True)
+    currentLeaseId = Column(
+        Integer,
+        ForeignKey("Lease.id", ondelete="SET NULL", use_alter=True, name="fk_unit_current_lease"),
+        nullable=True
+    )
+    
     createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updatedAt = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     property = relationship("Property", back_populates="units")
-    leases = relationship("Lease", back_populates="unit", cascade="all, delete-orphan")
+    leases = relationship("Lease", back_populates="unit", cascade="all, delete-orphan", foreign_keys="Lease.unitId")
 
 
 class Lease(Base):
     __tablename__ = "Lease"
+    __table_args__ = (
+        # Keyset pagination order (app/pagination.py)
+        Index("ix_Lease_createdAt_id", "createdAt", "id"),
+        # A landlord's leases in keyset order, and their active leases by end date
+        Index("ix_Lease_landlordId_createdAt_id", "landlordId", "createdAt", "id"),
+        Index("ix_Lease_landlordId_status_endDate", "landlordId", "status", "endDate"),
+        # Active-lease lookups per unit (occupancy) and per tenant (portal)
+        Index("ix_Lease_unitId_status", "unitId", "status"),
+        Index("ix_Lease_tenantId_status", "tenantId", "status"),
+        # Expiring-lease alerts only ever look at active leases
+        Index(
+            "ix_Lease_active_endDate", "endDate",
+            postgresql_where=text("status = 'ACTIVE'"),
+            sqlite_where=text("status = 'ACTIVE'")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     startDate = Column(DateTime, nullable=False)
@@ -123,28 +170,56 @@ class Lease(Base):
     
     tenantId = Column(Integer, ForeignKey("Tenant.id", ondelete="CASCADE"), nullable=False)
     unitId = Column(Integer, ForeignKey("Unit.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized owner of the unit's property (app/ownership.py)
+    landlordId = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
     
     createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updatedAt = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     tenant = relationship("Tenant", back_populates="leases")
-    unit = relationship("Unit", back_populates="leases")
+    unit = relationship("Unit", back_populates="leases", foreign_keys=[unitId])
     payments = relationship("Payment", back_populates="lease", cascade="all, delete-orphan")
     maintenanceRequests = relationship("MaintenanceRequest", back_populates="lease", cascade="all, delete-orphan")
+    alerts = relationship("Alert", back_populates="lease", cascade="all, delete-orphan")
 
 
 class Payment(Base):
     __tablename__ = "Payment"
+    __table_args__ = (
+        # Keyset pagination order (app/pagination.py)
+        Index("ix_Payment_createdAt_id", "createdAt", "id"),
+        # A landlord's payments in keyset order, and by status / due date
+        Index("ix_Payment_landlordId_createdAt_id", "landlordId", "createdAt", "id"),
+        Index("ix_Payment_landlordId_status_dueDate", "landlordId", "status", "dueDate"),
+        # Per-lease status counters and schedules
+        Index("ix_Payment_leaseId_status_dueDate", "leaseId", "status", "dueDate"),
+        # Overdue / upcoming scans only ever look at pending payments
+        Index(
+            "ix_Payment_pending_dueDate", "dueDate",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'")
+        ),
+        # The sweeper's next overdue candidates (app/sweeper.py)
+        Index(
+            "ix_Payment_unflagged_dueDate", "dueDate",
+            postgresql_where=text("status = 'PENDING' AND \"overdueAt\" IS NULL"),
+            sqlite_where=text("status = 'PENDING' AND \"overdueAt\" IS NULL")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     amount = Column(Float, nullable=False)
     dueDate = Column(DateTime, nullable=False)
     status = Column(SQLEnum(PaymentStatusEnum), default=PaymentStatusEnum.PENDING, nullable=False)
     paidAt = Column(DateTime, nullable=True)
+    # Set once a pending payment is past its due date (app/sweeper.py)
+    overdueAt = Column(DateTime, nullable=True)
     stripePaymentIntentId = Column(String, nullable=True)
     
     leaseId = Column(Integer, ForeignKey("Lease.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized from the lease (app/ownership.py)
+    landlordId = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
     
     createdAt = Column(DateTime(timezone=True), server_default=func.now())
     updatedAt = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
@@ -155,6 +230,15 @@ class Payment(Base):
 
 class MaintenanceRequest(Base):
     __tablename__ = "MaintenanceRequest"
+    __table_args__ = (
+        # Keyset pagination order (app/pagination.py)
+        Index("ix_MaintenanceRequest_createdAt_id", "createdAt", "id"),
+        # A landlord's requests in keyset order, and by status
+        Index("ix_MaintenanceRequest_landlordId_createdAt_id", "landlordId", "createdAt", "id"),
+        Index("ix_MaintenanceRequest_landlordId_status", "landlordId", "status"),
+        # Per-lease status counters
+        Index("ix_MaintenanceRequest_leaseId_status", "leaseId", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String, nullable=False)
@@ -162,9 +246,10 @@ class MaintenanceRequest(Base):
     status = Column(SQLEnum(MaintenanceStatusEnum), default=MaintenanceStatusEnum.PENDING, nullable=False)
     priority = Column(SQLEnum(MaintenancePriorityEnum), default=MaintenancePriorityEnum.MEDIUM, nullable=False)
     contractor = Column(String, nullable=True)
-    photos = Column(JSON, default=list, nullable=False)
     
     leaseId = Column(Integer, ForeignKey("Lease.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized from the lease (app/ownership.py)
+    landlordId = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
     
     createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updatedAt = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -172,3 +257,172 @@ class MaintenanceRequest(Base):
 
     # Relationships
     lease = relationship("Lease", back_populates="maintenanceRequests")
+    photoRecords = relationship(
+        "MaintenancePhoto", order_by="MaintenancePhoto.id", cascade="all, delete-orphan"
+    )
+
+    @property
+    def photos(self):
+        """Photo URLs in upload order"""
+        return [photo.url for photo in self.photoRecords]
+
+    @property
+    def photoRenditions(self):
+        """Per photo, its URL and the rendition URLs that are ready (app/thumbnails.py)"""
+        return [
+            {"url": photo.url, **((photo.object.renditions or {}) if photo.object else {})}
+            for photo in self.photoRecords
+        ]
+
+
+class MaintenancePhoto(Base):
+    """A photo on a maintenance request; rows are appended, never rewritten (app/photo_store.py)"""
+    __tablename__ = "MaintenancePhoto"
+    __table_args__ = (
+        # A batch of requests' photos in upload order (the list endpoints' loader)
+        Index("ix_MaintenancePhoto_requestId_id", "requestId", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    requestId = Column(Integer, ForeignKey("MaintenanceRequest.id", ondelete="CASCADE"), nullable=False)
+    # Storage key: a content URL in the photo store, or a URL given on create
+    url = Column(String, nullable=False)
+    # The stored object (PhotoObject.sha256); NULL for URLs outside the store.
+    # Not a foreign key: objects are pruned by refCount, independently
+    sha256 = Column(String(64), nullable=True, index=True)
+    size = Column(Integer, nullable=True)
+    # Pixels, EXIF orientation applied; NULL when not an image or unknown
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    createdAt = Column(DateTime, nullable=False)
+
+    object = relationship(
+        "PhotoObject", primaryjoin="foreign(MaintenancePhoto.sha256) == PhotoObject.sha256", viewonly=True
+    )
+
+
+class LandlordStats(Base):
+    """Per-landlord dashboard counters, maintained by the write handlers"""
+    __tablename__ = "LandlordStats"
+
+    landlordId = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True)
+    properties = Column(Integer, default=0, nullable=False)
+    units = Column(Integer, default=0, nullable=False)
+    activeLeases = Column(Integer, default=0, nullable=False)
+    pendingPayments = Column(Integer, default=0, nullable=False)
+    pendingAmount = Column(Float, default=0, nullable=False)
+    paidPayments = Column(Integer, default=0, nullable=False)
+    paidAmount = Column(Float, default=0, nullable=False)
+    pendingMaintenance = Column(Integer, default=0, nullable=False)
+    inProgressMaintenance = Column(Integer, default=0, nullable=False)
+    completedMaintenance = Column(Integer, default=0, nullable=False)
+    canceledMaintenance = Column(Integer, default=0, nullable=False)
+    
+    updatedAt = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class Alert(Base):
+    """Materialized inbox entry, maintained by the write handlers and the sweep (app/alerts.py)"""
+    __tablename__ = "Alert"
+    __table_args__ = (
+        # One alert per recipient, kind and subject row
+        UniqueConstraint("recipientId", "kind", "entityId", name="uq_Alert_recipient_kind_entity"),
+        # A recipient's inbox in keyset order, and just its unread part
+        Index("ix_Alert_recipientId_createdAt_id", "recipientId", "createdAt", "id"),
+        Index(
+            "ix_Alert_unread_recipientId_createdAt_id", "recipientId", "createdAt", "id",
+            postgresql_where=text('"readAt" IS NULL'),
+            sqlite_where=text('"readAt" IS NULL')
+        ),
+        # Reconciling the alerts of a batch of payments / requests / leases
+        Index("ix_Alert_kind_entityId", "kind", "entityId"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    # Payment, MaintenanceRequest or Lease id, depending on kind
+    entityId = Column(Integer, nullable=False)
+    type = Column(String, nullable=False)
+    severity = Column(String, nullable=False)
+    message = Column(String, nullable=False)
+    link = Column(String, nullable=True)
+    eventDate = Column(DateTime, nullable=False)
+    readAt = Column(DateTime, nullable=True)
+    
+    recipientId = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
+    leaseId = Column(Integer, ForeignKey("Lease.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    lease = relationship("Lease", back_populates="alerts")
+
+
+class SchedulerLock(Base):
+    """Expiring leader lease, so one worker runs the background jobs (app/sweeper.py)"""
+    __tablename__ = "SchedulerLock"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=True)
+    expiresAt = Column(DateTime, nullable=False)
+
+
+class WebhookEvent(Base):
+    """Received Stripe webhook event, applied by the inbox consumer (app/webhook_inbox.py)"""
+    __tablename__ = "WebhookEvent"
+    __table_args__ = (
+        # The consumer's queue: unapplied events in Stripe's order
+        Index(
+            "ix_WebhookEvent_pending", "stripeCreatedAt", "receivedAt",
+            postgresql_where=text('"processedAt" IS NULL'),
+            sqlite_where=text('"processedAt" IS NULL')
+        ),
+        # Pruning applied events past retention
+        Index("ix_WebhookEvent_processedAt", "processedAt"),
+    )
+
+    # Stripe's event id: a redelivered event collides here and is dropped
+    id = Column(String, primary_key=True)
+    type = Column(String, nullable=False)
+    # From the event object's metadata; events of one payment apply in order
+    paymentId = Column(Integer, nullable=True, index=True)
+    payload = Column(JSON, nullable=False)
+    stripeCreatedAt = Column(DateTime, nullable=False)
+    receivedAt = Column(DateTime, nullable=False)
+    processedAt = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+
+
+class PhotoObject(Base):
+    """Stored photo file, keyed by content (app/photo_store.py)"""
+    __tablename__ = "PhotoObject"
+    __table_args__ = (
+        # Pruning objects no photo URL points at any more
+        Index(
+            "ix_PhotoObject_unreferenced", "sha256",
+            postgresql_where=text('"refCount" <= 0'),
+            sqlite_where=text('"refCount" <= 0')
+        ),
+        # Objects still waiting for their renditions (app/thumbnails.py)
+        Index(
+            "ix_PhotoObject_pending_renditions", "createdAt",
+            postgresql_where=text('"renditions" IS NULL'),
+            sqlite_where=text('"renditions" IS NULL')
+        ),
+    )
+
+    # SHA-256 of the file; the object's path and URL are derived from it
+    sha256 = Column(String(64), primary_key=True)
+    # File extension of the first upload (".jpg"), so the file is served with its type
+    extension = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    contentType = Column(String, nullable=True)
+    # MaintenancePhoto rows referencing the object
+    refCount = Column(Integer, nullable=False, default=0)
+    createdAt = Column(DateTime, nullable=False)
+    # Rendition name -> URL once generated ({} when the file is not an image);
+    # NULL while pending
+    renditions = Column(JSON(none_as_null=True), nullable=True)
+    renditionAttempts = Column(Integer, nullable=False, default=0)
+    renditionError = Column(String, nullable=True)
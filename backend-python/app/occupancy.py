@@ -0,0 +1,114 @@
+"""
+Unit occupancy
+Keeps the denormalized Unit.status / Unit.currentLeaseId columns in step
+with the lease lifecycle and provides a consistency check:
+
+    python -m app.occupancy check [--fix]
+"""
+from typing import Iterable, List, Optional
+import argparse
+import sys
+
+from sqlalchemy import select, update, case
+from sqlalchemy.orm import Session
+
+from .models import Unit, Lease
+
+
+def _active_lease_id():
+    """Correlated subquery for the ACTIVE lease of the enclosing Unit row"""
+    return select(Lease.id).where(
+        Lease.unitId == Unit.id,
+        Lease.status == "ACTIVE"
+    ).order_by(Lease.id.desc()).limit(1).correlate(Unit).scalar_subquery()
+
+
+def _expected_status(active_lease_id):
+    return case((active_lease_id.is_not(None), "OCCUPIED"), else_="AVAILABLE")
+
+
+def sync_unit_occupancy(db: Session, unit_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute occupancy for the given units (or every unit) in one UPDATE.
+
+    Runs in the caller's transaction so the unit flips together with the
+    lease change that caused it.
+    """
+    db.flush()
+    active_lease_id = _active_lease_id()
+
+    stmt = update(Unit).values(
+        currentLeaseId=active_lease_id,
+        status=_expected_status(active_lease_id)
+    ).execution_options(synchronize_session=False)
+    if unit_ids is not None:
+        stmt = stmt.where(Unit.id.in_(list(unit_ids)))
+
+    return db.execute(stmt).rowcount
+
+
+def find_drift(db: Session) -> List[dict]:
+    """List units whose stored occupancy disagrees with their leases"""
+    active_lease_id = _active_lease_id()
+    expected_status = _expected_status(active_lease_id)
+
+    rows = db.execute(
+        select(
+            Unit.id,
+            Unit.status,
+            Unit.currentLeaseId,
+            expected_status.label("expected_status"),
+            active_lease_id.label("expected_lease_id")
+        ).order_by(Unit.id)
+    ).all()
+
+    drift = []
+    for row in rows:
+        status = getattr(row.status, "value", row.status)
+        if status != row.expected_status or row.currentLeaseId != row.expected_lease_id:
+            drift.append({
+                "unitId": row.id,
+                "status": status,
+                "currentLeaseId": row.currentLeaseId,
+                "expectedStatus": row.expected_status,
+                "expectedLeaseId": row.expected_lease_id
+            })
+    return drift
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check denormalized unit occupancy against leases")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check_parser = subparsers.add_parser("check", help="Report units whose occupancy has drifted")
+    check_parser.add_argument("--fix", action="store_true", help="Repair drifted units")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        drift = find_drift(db)
+        for item in drift:
+            print(
+                f"Unit {item['unitId']}: stored {item['status']} (lease {item['currentLeaseId']}), "
+                f"expected {item['expectedStatus']} (lease {item['expectedLeaseId']})"
+            )
+
+        if not drift:
+            print("✅ Unit occupancy is consistent")
+            return 0
+
+        if args.fix:
+            sync_unit_occupancy(db, [item["unitId"] for item in drift])
+            db.commit()
+            print(f"✅ Repaired {len(drift)} unit(s)")
+            return 0
+
+        print(f"❌ {len(drift)} unit(s) out of sync (rerun with --fix to repair)")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Row ownership
+Keeps the denormalized landlordId on Lease, Payment and MaintenanceRequest
+in step with Unit -> Property ownership and provides a consistency check:
+
+    python -m app.ownership check [--fix]
+"""
+from typing import Iterable, List, Optional
+import argparse
+import sys
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .models import Property, Unit, Lease, Payment, MaintenanceRequest
+
+
+def _unit_owner():
+    """Correlated subquery for the landlord of the enclosing Lease row's unit"""
+    return select(Property.landlordId).join(Unit).where(
+        Unit.id == Lease.unitId
+    ).correlate(Lease).scalar_subquery()
+
+
+def _lease_owner(model):
+    """Correlated subquery for the landlordId of the enclosing row's lease"""
+    return select(Lease.landlordId).where(
+        Lease.id == model.leaseId
+    ).correlate(model).scalar_subquery()
+
+
+def sync_landlord_ids(db: Session, unit_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Re-derive landlordId for the leases (and their payments and maintenance
+    requests) of the given units, or of every unit.
+
+    Repairs ownership changed outside the API (units only move between
+    properties of the same landlord there). Runs in the caller's
+    transaction; returns the leases updated.
+    """
+    db.flush()
+    lease_ids = select(Lease.id)
+    stmt = update(Lease).values(landlordId=_unit_owner()).execution_options(synchronize_session=False)
+    if unit_ids is not None:
+        unit_ids = list(unit_ids)
+        lease_ids = lease_ids.where(Lease.unitId.in_(unit_ids))
+        stmt = stmt.where(Lease.unitId.in_(unit_ids))
+
+    count = db.execute(stmt).rowcount
+    for model in (Payment, MaintenanceRequest):
+        db.execute(
+            update(model)
+            .where(model.leaseId.in_(lease_ids))
+            .values(landlordId=_lease_owner(model))
+            .execution_options(synchronize_session=False)
+        )
+
+    return count
+
+
+def find_drift(db: Session) -> List[dict]:
+    """List leases whose rows disagree with the landlord that owns the unit"""
+    expected = _unit_owner()
+    rows = db.execute(
+        select(Lease.id, Lease.unitId, Lease.landlordId, expected.label("expected_landlord_id"))
+        .order_by(Lease.id)
+    ).all()
+    drift = {
+        row.id: {
+            "leaseId": row.id,
+            "unitId": row.unitId,
+            "landlordId": row.landlordId,
+            "expectedLandlordId": row.expected_landlord_id
+        }
+        for row in rows if row.landlordId != row.expected_landlord_id
+    }
+
+    # Children that disagree with a lease that is itself correct
+    for model in (Payment, MaintenanceRequest):
+        stale = db.execute(
+            select(Lease.id, Lease.unitId, Lease.landlordId).join(model, model.leaseId == Lease.id)
+            .where(model.landlordId != Lease.landlordId).distinct()
+        ).all()
+        for row in stale:
+            drift.setdefault(row.id, {
+                "leaseId": row.id,
+                "unitId": row.unitId,
+                "landlordId": row.landlordId,
+                "expectedLandlordId": row.landlordId
+            })
+
+    return [drift[lease_id] for lease_id in sorted(drift)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check denormalized landlordId columns against unit ownership")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check_parser = subparsers.add_parser("check", help="Report leases whose ownership has drifted")
+    check_parser.add_argument("--fix", action="store_true", help="Repair drifted leases and their rows")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+    from .alerts import sync_lease_tree_alerts
+
+    db = SessionLocal()
+    try:
+        drift = find_drift(db)
+        for item in drift:
+            print(
+                f"Lease {item['leaseId']} (unit {item['unitId']}): stored landlord {item['landlordId']}, "
+                f"expected {item['expectedLandlordId']}"
+            )
+
+        if not drift:
+            print("✅ Row ownership is consistent")
+            return 0
+
+        if args.fix:
+            sync_landlord_ids(db, {item["unitId"] for item in drift})
+            # Landlord alerts move to the new owner's inbox
+            sync_lease_tree_alerts(db, [item["leaseId"] for item in drift])
+            db.commit()
+            print(f"✅ Repaired {len(drift)} lease(s)")
+            return 0
+
+        print(f"❌ {len(drift)} lease(s) out of sync (rerun with --fix to repair)")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
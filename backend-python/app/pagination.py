@@ -0,0 +1,85 @@
+"""
+Keyset (cursor) pagination
+Shared by the list endpoints so a page costs the same wherever it starts:
+rows are ordered newest first on (createdAt, id) and each page resumes
+strictly after the last row of the previous one instead of using OFFSET.
+"""
+from datetime import datetime
+from typing import Optional
+import base64
+import json
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class CursorParams:
+    """Query parameters for a cursor-paginated list endpoint"""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor")
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Pack a (createdAt, id) position into an opaque URL-safe token"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Unpack a cursor token, rejecting anything that was not issued by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+async def paginate(db: AsyncSession, query: Select, model, params: CursorParams) -> dict:
+    """
+    Run one page of a select over `model`, newest first.
+
+    Fetches limit + 1 rows to learn whether another page exists, and
+    returns the envelope {"items": [...], "next_cursor": str | None}.
+    """
+    if params.cursor:
+        created_at, row_id = decode_cursor(params.cursor)
+        # Compare against the anchor row's stored createdAt so both sides share the
+        # column's own representation (SQLite keeps CURRENT_TIMESTAMP without
+        # fractional seconds); the cursor value covers an anchor deleted since
+        anchor_row = aliased(model)
+        anchor = func.coalesce(
+            select(anchor_row.createdAt).where(anchor_row.id == row_id).scalar_subquery(),
+            created_at
+        )
+        query = query.where(or_(
+            model.createdAt < anchor,
+            and_(model.createdAt == anchor, model.id < row_id)
+        ))
+
+    rows = (await db.scalars(
+        query.order_by(model.createdAt.desc(), model.id.desc()).limit(params.limit + 1)
+    )).unique().all()
+
+    items = rows[:params.limit]
+    next_cursor = None
+    if len(rows) > params.limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.createdAt, last.id)
+
+    return {"items": items, "next_cursor": next_cursor}
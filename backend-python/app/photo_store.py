@@ -0,0 +1,354 @@
+"""
+Content-addressable photo store
+Photos are stored once per distinct content, under the SHA-256 of their
+bytes, in a two-level fan-out so no directory grows past 256 entries:
+
+    uploads/objects/ab/cd/abcd...ef.jpg  ->  /uploads/objects/ab/cd/abcd...ef.jpg
+
+An object never changes once written, so its URL is stable and served as
+immutable with the hash as ETag (PhotoFiles). A request's photos are
+MaintenancePhoto rows, appended by uploads and by requests created with
+photo URLs. PhotoObject.refCount counts the rows pointing at an object:
+adding rows adds references, deleting a request releases them, and the
+sweeper removes objects left without any.
+
+An upload claims its objects (and commits) before moving its staged files
+into place, and pruning deletes an object's row before unlinking its file,
+so a concurrent upload of the same content either keeps the row alive or
+recreates it and places the file again. An upload failing after its claim
+releases it again, leaving the objects to pruning.
+
+    python -m app.photo_store recount [--fix]
+    python -m app.photo_store import-legacy
+"""
+from collections import Counter
+from datetime import datetime
+from email.utils import parsedate
+from typing import Dict, Iterable, List, Optional
+import argparse
+import glob
+import mimetypes
+import os
+import re
+import sys
+
+from fastapi import HTTPException
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+from .database import insert_ignoring_conflicts
+from .models import MaintenancePhoto, PhotoObject
+
+UPLOAD_ROOT = "uploads"
+OBJECTS_DIR = os.path.join(UPLOAD_ROOT, "objects")
+# Uploads in progress; same filesystem as the objects, so placing is a rename
+STAGING_DIR = os.path.join(OBJECTS_DIR, "staging")
+URL_PREFIX = "/uploads/objects/"
+
+# A year: objects are never rewritten under the same name
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_OBJECT_NAME = re.compile(r"^([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})(\.[a-z0-9]{1,8})?$")
+# Objects and files derived from them (app/thumbnails.py: <sha256>.thumb320.jpg)
+_SERVED_NAME = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64}(?:\.[a-z]+[0-9]+)?)(?:\.[a-z0-9]{1,8})?$")
+
+
+def object_name(sha256: str, extension: str) -> str:
+    """Path of an object relative to OBJECTS_DIR (and URL_PREFIX)"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def object_path(sha256: str, extension: str) -> str:
+    return os.path.join(OBJECTS_DIR, *object_name(sha256, extension).split("/"))
+
+
+def content_url(sha256: str, extension: str) -> str:
+    return URL_PREFIX + object_name(sha256, extension)
+
+
+def url_sha256(url: str) -> Optional[str]:
+    """The object hash in a content URL; None for any other URL"""
+    if not url.startswith(URL_PREFIX):
+        return None
+    match = _OBJECT_NAME.match(url[len(URL_PREFIX):])
+    return match.group(3) if match else None
+
+
+def file_extension(filename: str, content_type: Optional[str] = None) -> str:
+    """Lowercase extension of the upload's name, else one for its content type"""
+    extension = os.path.splitext(filename)[1].lower()
+    if re.fullmatch(r"\.[a-z0-9]{1,8}", extension):
+        return extension
+    guessed = mimetypes.guess_extension(content_type or "") or ""
+    return guessed if re.fullmatch(r"\.[a-z0-9]{1,8}", guessed) else ""
+
+
+def add_objects(db: Session, files: List[dict], now: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Take one reference per file (as returned by app.uploads.receive_files),
+    creating the objects not stored yet. Returns the extension each object
+    is stored under, by hash. The caller commits, then places the files.
+    """
+    now = now or datetime.utcnow()
+    for file in files:
+        db.execute(
+            insert_ignoring_conflicts(db, PhotoObject, PhotoObject.sha256).values(
+                sha256=file["sha256"],
+                extension=file_extension(file["filename"], file["contentType"]),
+                size=file["size"],
+                contentType=file["contentType"],
+                refCount=0,
+                createdAt=now
+            )
+        )
+    _adjust(db, Counter(file["sha256"] for file in files), 1)
+    return dict(db.execute(
+        select(PhotoObject.sha256, PhotoObject.extension).where(
+            PhotoObject.sha256.in_({file["sha256"] for file in files})
+        )
+    ).all())
+
+
+def add_photos(db: Session, request_id: int, photos: List[dict], now: Optional[datetime] = None) -> None:
+    """
+    Append photo rows (url, and sha256/size/width/height when known) to a
+    request, in order. Plain inserts: concurrent uploads never rewrite each
+    other's photos. References are taken separately (add_objects, retain).
+    """
+    if photos:
+        now = now or datetime.utcnow()
+        db.execute(insert(MaintenancePhoto), [{**photo, "requestId": request_id, "createdAt": now} for photo in photos])
+
+
+def add_photo_urls(db: Session, request_id: int, urls: List[str]) -> None:
+    """
+    Append photos given by URL (a request created with photos) and
+    reference the stored ones, copying what is known about their content
+    from earlier photos of the same object
+    """
+    sha256s = {url_sha256(url) for url in urls} - {None}
+    known = {
+        row.sha256: row for row in db.execute(
+            select(MaintenancePhoto.sha256, MaintenancePhoto.size, MaintenancePhoto.width, MaintenancePhoto.height)
+            .where(MaintenancePhoto.sha256.in_(sha256s))
+            .order_by(MaintenancePhoto.id)
+        )
+    } if sha256s else {}
+    photos = []
+    for url in urls:
+        sha256 = url_sha256(url)
+        photo = {"url": url, "sha256": sha256, "size": None, "width": None, "height": None}
+        if sha256 in known:
+            photo.update(size=known[sha256].size, width=known[sha256].width, height=known[sha256].height)
+        photos.append(photo)
+    add_photos(db, request_id, photos)
+    retain(db, urls)
+
+
+def remove_photos(db: Session, request_id: int) -> None:
+    """Delete a request's photo rows and release their references"""
+    sha256s = db.scalars(
+        delete(MaintenancePhoto).where(MaintenancePhoto.requestId == request_id)
+        .returning(MaintenancePhoto.sha256)
+        .execution_options(synchronize_session=False)
+    ).all()
+    _adjust(db, Counter(filter(None, sha256s)), -1)
+
+
+def retain(db: Session, urls: Iterable[str]) -> None:
+    """Add a reference for each stored content URL in `urls` (others are ignored)"""
+    _adjust(db, Counter(filter(None, map(url_sha256, urls))), 1)
+
+
+def release_objects(db: Session, sha256s: Iterable[str]) -> None:
+    """Drop one reference per hash, undoing add_objects for files that never got a photo row"""
+    _adjust(db, Counter(sha256s), -1)
+
+
+def release(db: Session, urls: Iterable[str]) -> None:
+    """Drop a reference for each stored content URL in `urls`; unreferenced objects are pruned later"""
+    _adjust(db, Counter(filter(None, map(url_sha256, urls))), -1)
+
+
+def _adjust(db: Session, counts: Counter, sign: int) -> None:
+    for sha256, count in counts.items():
+        db.execute(
+            update(PhotoObject)
+            .where(PhotoObject.sha256 == sha256)
+            .values(refCount=PhotoObject.refCount + sign * count)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def place_object(staged_path: str, sha256: str, extension: str) -> str:
+    """Move a staged upload to its object path (dropping it if already stored); returns the URL"""
+    path = object_path(sha256, extension)
+    if os.path.exists(path):
+        os.remove(staged_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staged_path, path)
+    return content_url(sha256, extension)
+
+
+def prune_photo_objects_batch(db: Session, now: datetime, limit: int) -> int:
+    """Delete up to `limit` objects no photo references, row first, then files"""
+    unreferenced = db.execute(
+        select(PhotoObject.sha256, PhotoObject.extension).where(PhotoObject.refCount <= 0).limit(limit)
+    ).all()
+    removed = 0
+    for sha256, extension in unreferenced:
+        # Conditional: an upload may have taken a reference since the SELECT
+        deleted = db.execute(
+            delete(PhotoObject)
+            .where(PhotoObject.sha256 == sha256, PhotoObject.refCount <= 0)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if deleted:
+            # The object and the files derived from it (<sha256>.<...>)
+            for path in glob.glob(f"{object_path(sha256, '')}*"):
+                os.remove(path)
+            removed += 1
+    return removed
+
+
+class PhotoFiles(StaticFiles):
+    """
+    The /uploads mount: content-addressed objects and their renditions are
+    served as immutable with their hash as a strong ETag; staged uploads
+    are not served.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        relative = os.path.relpath(full_path, os.path.realpath(OBJECTS_DIR)).replace(os.sep, "/")
+        if relative.startswith("staging/"):
+            raise HTTPException(status_code=404)
+        match = _SERVED_NAME.match(relative)
+        if not match:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=scope["method"])
+        response.headers["etag"] = f'"{match.group(1)}"'
+        response.headers["cache-control"] = CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if "if-none-match" in request_headers:
+            # Any of the listed tags, weak or strong, or "*"
+            tags = {tag.strip().removeprefix("W/") for tag in request_headers["if-none-match"].split(",")}
+            return "*" in tags or response_headers.get("etag") in tags
+        if "if-modified-since" in request_headers and "last-modified" in response_headers:
+            since = parsedate(request_headers["if-modified-since"])
+            modified = parsedate(response_headers["last-modified"])
+            return since is not None and modified is not None and since >= modified
+        return False
+
+
+def find_refcount_drift(db: Session) -> List[dict]:
+    """Objects whose refCount disagrees with the photo rows pointing at them"""
+    expected = dict(db.execute(
+        select(MaintenancePhoto.sha256, func.count())
+        .where(MaintenancePhoto.sha256.is_not(None))
+        .group_by(MaintenancePhoto.sha256)
+    ).all())
+    drift = []
+    for sha256, ref_count in db.execute(select(PhotoObject.sha256, PhotoObject.refCount).order_by(PhotoObject.sha256)):
+        if ref_count != expected.get(sha256, 0):
+            drift.append({"sha256": sha256, "refCount": ref_count, "expected": expected.get(sha256, 0)})
+    return drift
+
+
+def import_legacy(db: Session) -> int:
+    """
+    Move photos stored under uploads/maintenance/ into the store and point
+    their rows at the content URLs. Returns the number of photos moved.
+
+    Photo URLs came from clients, so a URL resolving outside
+    uploads/maintenance/ (through .. or a symlink) is skipped. Files are
+    staged in a directory of their own, next to the live uploads' one.
+    """
+    import hashlib
+    import shutil
+    import tempfile
+
+    from .thumbnails import image_size
+
+    legacy_root = os.path.realpath(os.path.join(UPLOAD_ROOT, "maintenance"))
+    os.makedirs(OBJECTS_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix="import-", dir=OBJECTS_DIR)
+    rewritten = 0
+    legacy = db.scalars(
+        select(MaintenancePhoto).where(MaintenancePhoto.url.like("/uploads/maintenance/%")).order_by(MaintenancePhoto.id)
+    ).all()
+    try:
+        for photo in legacy:
+            legacy_path = os.path.realpath(os.path.join(UPLOAD_ROOT, *photo.url.split("/")[2:]))
+            if os.path.commonpath([legacy_path, legacy_root]) != legacy_root:
+                print(f"⚠️  Photo {photo.id}: {photo.url} is outside uploads/maintenance/, skipped")
+                continue
+            if not os.path.isfile(legacy_path):
+                continue
+            staged_path = os.path.join(staging, f"{photo.id}.part")
+            digest = hashlib.sha256()
+            with open(legacy_path, "rb") as source, open(staged_path, "wb") as target:
+                for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                    digest.update(chunk)
+                    target.write(chunk)
+            file = {
+                "sha256": digest.hexdigest(), "filename": os.path.basename(legacy_path),
+                "size": os.path.getsize(staged_path), "contentType": mimetypes.guess_type(legacy_path)[0],
+            }
+            dimensions = image_size(staged_path) or (None, None)
+            extension = add_objects(db, [file])[file["sha256"]]
+            db.commit()
+            photo.url = place_object(staged_path, file["sha256"], extension)
+            photo.sha256, photo.size = file["sha256"], file["size"]
+            photo.width, photo.height = dimensions
+            db.commit()
+            rewritten += 1
+    finally:
+        # Legacy files stay in place until checked and removed by hand
+        shutil.rmtree(staging, ignore_errors=True)
+    return rewritten
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Photo store maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    recount = subparsers.add_parser("recount", help="Check object refCounts against the photo rows referencing them")
+    recount.add_argument("--fix", action="store_true", help="Rewrite drifted refCounts")
+    subparsers.add_parser("import-legacy", help="Move uploads/maintenance/ photos into the store")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "recount":
+            drift = find_refcount_drift(db)
+            for row in drift:
+                print(f"⚠️  Object {row['sha256']}: refCount={row['refCount']} expected={row['expected']}")
+            if drift and args.fix:
+                db.execute(update(PhotoObject), [
+                    {"sha256": row["sha256"], "refCount": row["expected"]} for row in drift
+                ])
+                db.commit()
+                print(f"✅ Fixed {len(drift)} object(s)")
+            elif not drift:
+                print("✅ Object refCounts match the photo rows referencing them")
+            else:
+                sys.exit(1)
+        elif args.command == "import-legacy":
+            print(f"✅ Moved {import_legacy(db)} photo(s) into the store")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
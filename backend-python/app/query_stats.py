@@ -0,0 +1,225 @@
+"""
+Per-route query statistics
+Cursor events on the engines (app/database.py) count the statements each
+HTTP request runs, their total database time and the rows they returned or
+changed. QueryStatsMiddleware attributes them to the FastAPI route template
+("GET /api/maintenance/{request_id}") and aggregates them per route.
+
+A statement repeated QUERY_N_PLUS_ONE_THRESHOLD times or more in one
+request, after normalizing its bound parameters and IN lists, is flagged as
+a suspected N+1: a query issued once per row of an earlier result instead
+of once for all of them.
+
+With QUERY_DEBUG on, responses carry the counts as headers
+
+    X-DB-Queries: 4
+    X-DB-Time-Ms: 3.2
+    X-DB-Rows: 57
+    X-DB-N-Plus-One: 1        (statements suspected, when any)
+
+and GET /debug/query-stats returns the per-route aggregates, heaviest first.
+"""
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional
+import os
+import re
+import time
+
+from sqlalchemy import event
+
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "false").lower() in ("1", "true")
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Suspected statements remembered per route
+_MAX_SUSPECTS = 5
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+# IN (?, ?, ?) and multi-row VALUES lists differ in length only
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestQueries:
+    """What one request ran; shared with the tasks and threads it spawns"""
+    __slots__ = ("scope", "count", "seconds", "rows", "statements", "closed")
+
+    def __init__(self, scope=None):
+        # The ASGI scope; names the route once the request has been routed
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.statements: Dict[str, int] = {}
+        # Set when the request has been accounted; later statements (tasks
+        # it started that outlive it) are not attributed to it
+        self.closed = False
+
+    def suspects(self) -> Dict[str, int]:
+        """Statements run often enough in this request to suggest an N+1"""
+        return {
+            statement: count for statement, count in self.statements.items()
+            if count >= QUERY_N_PLUS_ONE_THRESHOLD
+        }
+
+
+class RouteStats:
+    """Totals of the requests served by one route"""
+    __slots__ = ("requests", "queries", "seconds", "rows", "maxQueries", "nPlusOneRequests", "suspects")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.maxQueries = 0
+        self.nPlusOneRequests = 0
+        # Normalized statement -> most repeats seen in one request
+        self.suspects: Dict[str, int] = {}
+
+    def add(self, queries: RequestQueries, suspects: Dict[str, int]) -> None:
+        self.requests += 1
+        self.queries += queries.count
+        self.seconds += queries.seconds
+        self.rows += queries.rows
+        self.maxQueries = max(self.maxQueries, queries.count)
+        if suspects:
+            self.nPlusOneRequests += 1
+            for statement, count in suspects.items():
+                self.suspects[statement] = max(count, self.suspects.get(statement, 0))
+            if len(self.suspects) > _MAX_SUSPECTS:
+                kept = sorted(self.suspects.items(), key=lambda item: -item[1])[:_MAX_SUSPECTS]
+                self.suspects = dict(kept)
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+_routes: Dict[str, RouteStats] = {}
+
+
+@lru_cache(maxsize=2048)
+def normalize(statement: str) -> str:
+    """The statement's structure: whitespace collapsed, placeholder lists folded"""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def current_queries() -> Optional[RequestQueries]:
+    """The statistics of the request being served, if any"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    if queries is not None and not queries.closed:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    started = getattr(context, "_query_started", None)
+    if queries is None or queries.closed or started is None:
+        return
+    queries.seconds += time.perf_counter() - started
+    queries.count += 1
+    if cursor.rowcount >= 0:
+        queries.rows += cursor.rowcount
+    else:
+        # SELECT on the asyncio adapters: rowcount is -1 but the rows are
+        # already fetched into the adapter's buffer
+        queries.rows += len(getattr(cursor, "_rows", ()))
+    key = normalize(statement)
+    queries.statements[key] = queries.statements.get(key, 0) + 1
+
+
+def instrument_engine(engine) -> None:
+    """Count the statements `engine` runs toward the current request (sync engines; async_engine.sync_engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope) -> str:
+    """The path template a request matched ("/api/units/{unit_id}"), or its mount"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope.get("root_path") or "(unmatched)"
+
+
+def route_name(scope) -> str:
+    """Method and route template ("GET /api/units/{unit_id}")"""
+    return f"{scope['method']} {route_template(scope)}"
+
+
+def _headers(queries: RequestQueries) -> List[tuple]:
+    headers = [
+        (b"x-db-queries", str(queries.count).encode()),
+        (b"x-db-time-ms", f"{queries.seconds * 1000:.1f}".encode()),
+        (b"x-db-rows", str(queries.rows).encode()),
+    ]
+    suspects = queries.suspects()
+    if suspects:
+        headers.append((b"x-db-n-plus-one", str(len(suspects)).encode()))
+    return headers
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware giving each HTTP request its statistics and recording them per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(scope)
+        token = _current.set(queries)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + _headers(queries)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if QUERY_DEBUG else send)
+        finally:
+            queries.closed = True
+            _current.reset(token)
+            _record(route_name(scope), queries)
+
+
+def _record(route: str, queries: RequestQueries) -> None:
+    stats = _routes.get(route)
+    if stats is None:
+        stats = _routes[route] = RouteStats()
+    suspects = queries.suspects()
+    for statement, count in suspects.items():
+        if statement not in stats.suspects:
+            print(f"⚠️  Suspected N+1 on {route}: {count}x {statement[:200]}")
+    stats.add(queries, suspects)
+
+
+def route_stats() -> List[dict]:
+    """Per-route aggregates, by total database time"""
+    report = []
+    for route, stats in _routes.items():
+        report.append({
+            "route": route,
+            "requests": stats.requests,
+            "queries": stats.queries,
+            "queriesPerRequest": round(stats.queries / stats.requests, 2),
+            "maxQueries": stats.maxQueries,
+            "dbTimeMs": round(stats.seconds * 1000, 1),
+            "dbTimeMsPerRequest": round(stats.seconds * 1000 / stats.requests, 2),
+            "rows": stats.rows,
+            "nPlusOneRequests": stats.nPlusOneRequests,
+            "suspectedNPlusOne": [
+                {"statement": statement, "repeats": count}
+                for statement, count in sorted(stats.suspects.items(), key=lambda item: -item[1])
+            ],
+        })
+    return sorted(report, key=lambda row: -row["dbTimeMs"])
+
+
+def reset_route_stats() -> None:
+    _routes.clear()
@@ -3,7 +3,9 @@ Authentication Router
 Handles user registration, login, and profile management
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
@@ -14,7 +16,10 @@ import string
 from ..database import get_db
 from ..models import User, Tenant
 from ..schemas import UserCreate, UserLogin, Token, UserBasic, RoleEnum
-from ..auth import hash_password, verify_password, create_access_token, get_current_user
+from ..auth import (
+    hash_password_async, verify_password_async, create_access_token, get_current_user, get_current_admin,
+    invalidate_cached_user, user_cache
+)
 
 router = APIRouter()
 
@@ -28,11 +33,11 @@ class GoogleAuthRequest(BaseModel):
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -40,7 +45,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     new_user = User(
         name=user_data.name,
         email=user_data.email,
@@ -49,14 +54,16 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    # The email may belong to a recently deleted account still in the cache
+    invalidate_cached_user(new_user.email)
     
     # If user is a tenant, create tenant record
     if new_user.role == "TENANT":
         tenant = Tenant(userId=new_user.id)
         db.add(tenant)
-        db.commit()
+        await db.commit()
     
     # Create access token
     access_token = create_access_token(data={"sub": new_user.email})
@@ -72,13 +79,13 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login user and return JWT token"""
     
     # Find user by email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await db.scalar(select(User).where(User.email == credentials.email))
     
-    if not user or not verify_password(credentials.password, user.password):
+    if not user or not await verify_password_async(credentials.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -114,7 +121,7 @@ async def verify_token(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/google", response_model=Token)
-async def google_login_or_register(google_data: GoogleAuthRequest, db: Session = Depends(get_db)):
+async def google_login_or_register(google_data: GoogleAuthRequest, db: AsyncSession = Depends(get_db)):
     """Handle Google OAuth login or registration"""
     
     if not google_data.credential:
@@ -130,8 +137,9 @@ async def google_login_or_register(google_data: GoogleAuthRequest, db: Session =
         )
     
     try:
-        # Verify the Google token
-        idinfo = id_token.verify_oauth2_token(
+        # Verify the Google token (fetches Google's certs, so keep it off the event loop)
+        idinfo = await run_in_threadpool(
+            id_token.verify_oauth2_token,
             google_data.credential,
             google_requests.Request(),
             GOOGLE_CLIENT_ID
@@ -147,7 +155,7 @@ async def google_login_or_register(google_data: GoogleAuthRequest, db: Session =
             )
         
         # Check if user exists
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
         
         # If user doesn't exist and no role provided (login), don't auto-register
         if not user and not google_data.role:
@@ -165,7 +173,7 @@ async def google_login_or_register(google_data: GoogleAuthRequest, db: Session =
             
             # Generate random password (not used for Google auth)
             random_password = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(16))
-            hashed_password = hash_password(random_password)
+            hashed_password = await hash_password_async(random_password)
             
             user = User(
                 email=email,
@@ -175,14 +183,15 @@ async def google_login_or_register(google_data: GoogleAuthRequest, db: Session =
             )
             
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
+            invalidate_cached_user(user.email)
             
             # If user is a tenant, create tenant record
             if user.role == "TENANT":
                 tenant = Tenant(userId=user.id)
                 db.add(tenant)
-                db.commit()
+                await db.commit()
         
         # Create access token
         access_token = create_access_token(data={"sub": user.email})
@@ -196,6 +205,8 @@ async def google_login_or_register(google_data: GoogleAuthRequest, db: Session =
             user=user_basic
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         print(f"❌ Google auth ValueError: {str(e)}")
         raise HTTPException(
@@ -210,3 +221,9 @@ async def google_login_or_register(google_data: GoogleAuthRequest, db: Session =
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Google authentication failed: {str(e)}"
         )
+
+
+@router.get("/user-cache/stats")
+async def get_user_cache_stats(current_user: User = Depends(get_current_admin)):
+    """Hit/miss counters of the authenticated-user cache (admin only)"""
+    return user_cache.stats()
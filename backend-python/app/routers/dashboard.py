@@ -2,83 +2,59 @@
 Dashboard Router
 Provides statistics and overview data
 """
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import datetime
 
 from ..database import get_db
-from ..models import User, Property, Unit, Lease, Payment, MaintenanceRequest, Tenant
-from ..auth import get_current_user, get_current_landlord
+from ..pagination import CursorParams, paginate
+from ..models import User, Property, Unit, Lease, Payment, MaintenanceRequest, Tenant, Alert
+from ..schemas import AlertResponse, AlertUnreadCount, Page
+from ..auth import get_current_user, get_current_landlord, get_current_admin
+from ..stats import landlord_aggregates, get_stats
+from ..dashboard_cache import cached_response, dashboard_cache_stats
+from ..sweeper import sweeper_stats
 
 router = APIRouter()
 
 
 @router.get("/stats")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Get dashboard statistics for landlord"""
-    
-    # Count properties
-    property_count = db.query(func.count(Property.id)).filter(
-        Property.landlordId == current_user.id
-    ).scalar()
-    
-    # Count units
-    unit_count = db.query(func.count(Unit.id)).join(Property).filter(
-        Property.landlordId == current_user.id
-    ).scalar()
-    
-    # Count active leases
-    active_lease_count = db.query(func.count(Lease.id)).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Lease.status == "ACTIVE"
-    ).scalar()
-    
-    # Count pending payments
-    pending_payments = db.query(func.count(Payment.id)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Payment.status == "PENDING"
-    ).scalar()
-    
-    # Sum pending payment amounts
-    pending_amount = db.query(func.sum(Payment.amount)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Payment.status == "PENDING"
-    ).scalar() or 0
-    
-    # Count maintenance requests by status
-    pending_maintenance = db.query(func.count(MaintenanceRequest.id)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        MaintenanceRequest.status == "PENDING"
-    ).scalar()
-    
-    in_progress_maintenance = db.query(func.count(MaintenanceRequest.id)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        MaintenanceRequest.status == "IN_PROGRESS"
-    ).scalar()
-    
+    return await cached_response(current_user.id, "stats", lambda: _dashboard_stats(db, current_user.id))
+
+
+async def _dashboard_stats(db: AsyncSession, landlord_id: int) -> dict:
+    """Rollup counters for the stats card"""
+    stats = await db.run_sync(get_stats, landlord_id)
+    # Keeps the rollup row if this read materialized it
+    await db.commit()
+
     return {
-        "properties": property_count,
-        "units": unit_count,
-        "activeLeases": active_lease_count,
-        "pendingPayments": pending_payments,
-        "pendingAmount": float(pending_amount),
-        "pendingMaintenance": pending_maintenance,
-        "inProgressMaintenance": in_progress_maintenance
+        "properties": stats.properties,
+        "units": stats.units,
+        "activeLeases": stats.activeLeases,
+        "pendingPayments": stats.pendingPayments,
+        "pendingAmount": float(stats.pendingAmount),
+        "pendingMaintenance": stats.pendingMaintenance,
+        "inProgressMaintenance": stats.inProgressMaintenance
     }
 
 
 @router.get("/tenant/stats")
 async def get_tenant_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get dashboard statistics for tenant"""
     
     # Get tenant record
-    tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
+    tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
     
     if not tenant:
         return {
@@ -89,27 +65,27 @@ async def get_tenant_dashboard_stats(
         }
     
     # Count active leases
-    active_leases = db.query(func.count(Lease.id)).filter(
+    active_leases = await db.scalar(select(func.count(Lease.id)).where(
         Lease.tenantId == tenant.id,
         Lease.status == "ACTIVE"
-    ).scalar()
+    ))
     
     # Count pending payments
-    pending_payments = db.query(func.count(Payment.id)).join(Lease).filter(
+    pending_payments = await db.scalar(select(func.count(Payment.id)).join(Lease).where(
         Lease.tenantId == tenant.id,
         Payment.status == "PENDING"
-    ).scalar()
+    ))
     
     # Sum pending payment amounts
-    pending_amount = db.query(func.sum(Payment.amount)).join(Lease).filter(
+    pending_amount = await db.scalar(select(func.sum(Payment.amount)).join(Lease).where(
         Lease.tenantId == tenant.id,
         Payment.status == "PENDING"
-    ).scalar() or 0
+    )) or 0
     
     # Count maintenance requests
-    maintenance_count = db.query(func.count(MaintenanceRequest.id)).join(Lease).filter(
+    maintenance_count = await db.scalar(select(func.count(MaintenanceRequest.id)).join(Lease).where(
         Lease.tenantId == tenant.id
-    ).scalar()
+    ))
     
     return {
         "activeLeases": active_leases,
@@ -121,26 +97,19 @@ async def get_tenant_dashboard_stats(
 
 @router.get("/manager-stats")
 async def get_manager_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Get manager/landlord dashboard statistics with complete data"""
+    return await cached_response(current_user.id, "manager-stats", lambda: _manager_stats(db, current_user.id))
+
+
+async def _manager_stats(db: AsyncSession, landlord_id: int) -> dict:
+    """Portfolio totals and occupancy for the manager view"""
+    totals = await db.run_sync(landlord_aggregates, landlord_id)
     
-    # Count total properties
-    total_properties = db.query(func.count(Property.id)).filter(
-        Property.landlordId == current_user.id
-    ).scalar() or 0
-    
-    # Count total units
-    total_units = db.query(func.count(Unit.id)).join(Property).filter(
-        Property.landlordId == current_user.id
-    ).scalar() or 0
-    
-    # Count occupied units (units with active leases)
-    occupied_units = db.query(func.count(func.distinct(Lease.unitId))).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Lease.status == "ACTIVE"
-    ).scalar() or 0
+    total_units = totals["units"]
+    occupied_units = totals["occupied_units"]
     
     # Calculate vacant units
     vacant_units = total_units - occupied_units
@@ -148,132 +117,59 @@ async def get_manager_stats(
     # Calculate occupancy rate
     occupancy_rate = (occupied_units / total_units * 100) if total_units > 0 else 0
     
-    # Count active leases
-    active_leases = db.query(func.count(Lease.id)).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Lease.status == "ACTIVE"
-    ).scalar() or 0
-    
-    # Count pending maintenance
-    pending_maintenance = db.query(func.count(MaintenanceRequest.id)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        MaintenanceRequest.status == "PENDING"
-    ).scalar() or 0
-    
-    # Count overdue payments
-    from datetime import datetime
-    overdue_payments = db.query(func.count(Payment.id)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Payment.status == "PENDING",
-        Payment.dueDate < datetime.utcnow()
-    ).scalar() or 0
-    
-    # Calculate total revenue (sum of PAID payments)
-    total_revenue = db.query(func.sum(Payment.amount)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Payment.status == "PAID"
-    ).scalar() or 0
-    
-    # Calculate pending revenue (sum of PENDING payments)
-    pending_revenue = db.query(func.sum(Payment.amount)).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Payment.status == "PENDING"
-    ).scalar() or 0
-    
     return {
-        "totalProperties": total_properties,
+        "totalProperties": totals["properties"],
         "totalUnits": total_units,
         "occupiedUnits": occupied_units,
         "vacantUnits": vacant_units,
         "occupancyRate": round(occupancy_rate, 1),
-        "activeLeases": active_leases,
-        "pendingMaintenance": pending_maintenance,
-        "overduePayments": overdue_payments,
-        "totalRevenue": float(total_revenue),
-        "pendingRevenue": float(pending_revenue)
+        "activeLeases": totals["active_leases"],
+        "pendingMaintenance": totals["pending_maintenance"],
+        "overduePayments": totals["overdue_payments"],
+        "totalRevenue": float(totals["paid_amount"]),
+        "pendingRevenue": float(totals["pending_amount"]),
+        "overdueRevenue": float(totals["overdue_amount"])
     }
 
 
-@router.get("/manager-alerts")
+@router.get("/manager-alerts", response_model=Page[AlertResponse])
 async def get_manager_alerts(
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    unread_only: bool = Query(False, description="Only alerts not yet marked read"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
-    """Get alerts and notifications for landlord"""
-    
-    # Get overdue payments
-    from datetime import datetime
-    overdue_payments = db.query(Payment).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Payment.status == "PENDING",
-        Payment.dueDate < datetime.utcnow()
-    ).all()
-    
-    # Get pending maintenance requests
-    pending_maintenance = db.query(MaintenanceRequest).join(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        MaintenanceRequest.status == "PENDING"
-    ).all()
-    
-    # Get expiring leases (within 30 days)
-    from datetime import timedelta
-    expiring_soon = datetime.utcnow() + timedelta(days=30)
-    expiring_leases = db.query(Lease).join(Unit).join(Property).filter(
-        Property.landlordId == current_user.id,
-        Lease.status == "ACTIVE",
-        Lease.endDate <= expiring_soon,
-        Lease.endDate >= datetime.utcnow()
-    ).all()
-    
-    alerts = []
-    
-    # Add overdue payment alerts
-    for payment in overdue_payments:
-        alerts.append({
-            "type": "payment",
-            "severity": "high",
-            "message": f"Overdue payment of ${payment.amount} from lease {payment.leaseId}",
-            "date": payment.dueDate.isoformat(),
-            "id": payment.id
-        })
-    
-    # Add maintenance alerts
-    for maintenance in pending_maintenance:
-        alerts.append({
-            "type": "maintenance",
-            "severity": "medium" if maintenance.priority == "MEDIUM" else "high" if maintenance.priority == "HIGH" else "low",
-            "message": f"Maintenance request: {maintenance.title}",
-            "date": maintenance.createdAt.isoformat(),
-            "id": maintenance.id
-        })
-    
-    # Add expiring lease alerts
-    for lease in expiring_leases:
-        alerts.append({
-            "type": "lease",
-            "severity": "medium",
-            "message": f"Lease {lease.id} expiring on {lease.endDate.strftime('%Y-%m-%d')}",
-            "date": lease.endDate.isoformat(),
-            "id": lease.id
-        })
-    
-    return alerts  # Return array directly, not wrapped in object
+    """Get a page of the landlord's alert inbox, newest first"""
+    return await _alert_inbox(db, current_user.id, page, unread_only)
+
+
+async def _alert_inbox(db: AsyncSession, user_id: int, page: CursorParams, unread_only: bool) -> dict:
+    """One page of a user's materialized alerts (app/alerts.py)"""
+    query = select(Alert).where(Alert.recipientId == user_id)
+    if unread_only:
+        query = query.where(Alert.readAt.is_(None))
+    return await paginate(db, query, Alert, page)
 
 
 @router.get("/recent-activity")
 async def get_recent_activity(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Get recent activity for landlord's properties"""
+    return await cached_response(current_user.id, "recent-activity", lambda: _recent_activity(db, current_user.id))
+
+
+async def _recent_activity(db: AsyncSession, landlord_id: int) -> list:
+    """Latest property and unit changes"""
     from datetime import datetime
     
     activities = []
     
     # Get recently created properties
-    recent_properties = db.query(Property).filter(
-        Property.landlordId == current_user.id
-    ).order_by(Property.createdAt.desc()).limit(5).all()
+    recent_properties = (await db.scalars(select(Property).where(
+        Property.landlordId == landlord_id
+    ).order_by(Property.createdAt.desc()).limit(5))).all()
     
     for prop in recent_properties:
         time_diff = datetime.utcnow() - prop.createdAt
@@ -293,9 +189,9 @@ async def get_recent_activity(
         })
     
     # Get recently created units
-    recent_units = db.query(Unit).join(Property).filter(
-        Property.landlordId == current_user.id
-    ).order_by(Unit.createdAt.desc()).limit(5).all()
+    recent_units = (await db.scalars(select(Unit).options(joinedload(Unit.property)).join(Property).where(
+        Property.landlordId == landlord_id
+    ).order_by(Unit.createdAt.desc()).limit(5))).all()
     
     for unit in recent_units:
         time_diff = datetime.utcnow() - unit.createdAt
@@ -315,10 +211,10 @@ async def get_recent_activity(
         })
     
     # Get recently updated properties
-    recent_updates = db.query(Property).filter(
-        Property.landlordId == current_user.id,
+    recent_updates = (await db.scalars(select(Property).where(
+        Property.landlordId == landlord_id,
         Property.updatedAt > Property.createdAt
-    ).order_by(Property.updatedAt.desc()).limit(5).all()
+    ).order_by(Property.updatedAt.desc()).limit(5))).all()
     
     for prop in recent_updates:
         time_diff = datetime.utcnow() - prop.updatedAt
@@ -342,78 +238,92 @@ async def get_recent_activity(
     return activities[:10]
 
 
-@router.get("/tenant-alerts")
+@router.get("/tenant-alerts", response_model=Page[AlertResponse])
 async def get_tenant_alerts(
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    unread_only: bool = Query(False, description="Only alerts not yet marked read"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get alerts and notifications for tenant"""
-    from datetime import datetime, timedelta
-    
-    # Get tenant record
-    tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
-    
-    if not tenant:
-        return []
-    
-    alerts = []
-    
-    # Get upcoming payments (due within 7 days)
-    upcoming_deadline = datetime.utcnow() + timedelta(days=7)
-    upcoming_payments = db.query(Payment).join(Lease).filter(
-        Lease.tenantId == tenant.id,
-        Payment.status == "PENDING",
-        Payment.dueDate <= upcoming_deadline,
-        Payment.dueDate >= datetime.utcnow()
-    ).all()
-    
-    # Get overdue payments
-    overdue_payments = db.query(Payment).join(Lease).filter(
-        Lease.tenantId == tenant.id,
-        Payment.status == "PENDING",
-        Payment.dueDate < datetime.utcnow()
-    ).all()
-    
-    # Get maintenance requests with updates
-    recent_maintenance_updates = db.query(MaintenanceRequest).join(Lease).filter(
-        Lease.tenantId == tenant.id,
-        MaintenanceRequest.status.in_(["IN_PROGRESS", "COMPLETED"])
-    ).order_by(MaintenanceRequest.updatedAt.desc()).limit(3).all()
-    
-    # Add overdue payment alerts (highest priority)
-    for payment in overdue_payments:
-        days_overdue = (datetime.utcnow() - payment.dueDate).days
-        alerts.append({
-            "type": "urgent",
-            "severity": "high",
-            "message": f"Payment of ${payment.amount} is {days_overdue} day{'s' if days_overdue != 1 else ''} overdue",
-            "date": payment.dueDate.isoformat(),
-            "link": "/tenant/payments",
-            "id": payment.id
-        })
-    
-    # Add upcoming payment alerts
-    for payment in upcoming_payments:
-        days_until = (payment.dueDate - datetime.utcnow()).days
-        alerts.append({
-            "type": "warning",
-            "severity": "medium",
-            "message": f"Payment of ${payment.amount} due in {days_until} day{'s' if days_until != 1 else ''}",
-            "date": payment.dueDate.isoformat(),
-            "link": "/tenant/payments",
-            "id": payment.id
-        })
-    
-    # Add maintenance update alerts
-    for maintenance in recent_maintenance_updates:
-        status_msg = "completed" if maintenance.status == "COMPLETED" else "in progress"
-        alerts.append({
-            "type": "info",
-            "severity": "low",
-            "message": f"Maintenance request '{maintenance.title}' is now {status_msg}",
-            "date": maintenance.updatedAt.isoformat(),
-            "link": "/tenant/maintenance",
-            "id": maintenance.id
-        })
-    
-    return alerts
+    """Get a page of the tenant's alert inbox, newest first"""
+    return await _alert_inbox(db, current_user.id, page, unread_only)
+
+
+@router.get("/alerts/unread-count", response_model=AlertUnreadCount)
+async def get_unread_alert_count(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Count the current user's unread alerts"""
+    unread = await db.scalar(select(func.count(Alert.id)).where(
+        Alert.recipientId == current_user.id,
+        Alert.readAt.is_(None)
+    ))
+    return {"unread": unread}
+
+
+@router.post("/alerts/read-all", response_model=AlertUnreadCount)
+async def mark_all_alerts_read(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Mark every alert in the current user's inbox as read"""
+    await db.execute(
+        update(Alert)
+        .where(Alert.recipientId == current_user.id, Alert.readAt.is_(None))
+        .values(readAt=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return {"unread": 0}
+
+
+@router.post("/alerts/{alert_id}/read", response_model=AlertResponse)
+async def mark_alert_read(
+    alert_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Mark one of the current user's alerts as read"""
+    return await _set_alert_read(db, current_user.id, alert_id, True)
+
+
+@router.post("/alerts/{alert_id}/unread", response_model=AlertResponse)
+async def mark_alert_unread(
+    alert_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Put one of the current user's alerts back into the unread list"""
+    return await _set_alert_read(db, current_user.id, alert_id, False)
+
+
+async def _set_alert_read(db: AsyncSession, user_id: int, alert_id: int, read: bool) -> Alert:
+    alert = await db.get(Alert, alert_id)
+    
+    # Someone else's alert is reported as missing rather than forbidden
+    if not alert or alert.recipientId != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert not found"
+        )
+    
+    if read and alert.readAt is None:
+        alert.readAt = datetime.utcnow()
+    elif not read:
+        alert.readAt = None
+    await db.commit()
+    
+    return alert
+
+
+@router.get("/cache/stats")
+async def get_dashboard_cache_stats(current_user: User = Depends(get_current_admin)):
+    """Hit/miss, coalescing and invalidation counters of the dashboard cache (admin only)"""
+    return dashboard_cache_stats()
+
+
+@router.get("/sweeper/stats")
+async def get_sweeper_stats(current_user: User = Depends(get_current_admin)):
+    """Run counts, rows changed and timings of the background sweeper on this worker (admin only)"""
+    return sweeper_stats()
@@ -3,78 +3,88 @@ Leases Router
 Handles lease CRUD operations
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 
 from ..database import get_db
+from ..pagination import CursorParams, paginate
 from ..models import User, Lease, Tenant, Unit, Property, Payment
-from ..schemas import LeaseCreate, LeaseUpdate, LeaseResponse
+from ..schemas import (
+    LeaseCreate, LeaseUpdate, LeaseResponse, Page,
+    PaymentScheduleBulkRequest, PaymentScheduleBulkResponse
+)
 from ..auth import get_current_user, get_current_landlord
+from ..stats import bump_stats, rebuild_stats
+from ..occupancy import sync_unit_occupancy
+from ..schedules import insert_schedules
+from ..alerts import sync_lease_alerts, sync_lease_tree_alerts
 
 router = APIRouter()
 
+# Everything LeaseResponse serializes, loaded up front (no lazy IO on AsyncSession)
+LEASE_LOAD_OPTIONS = (
+    joinedload(Lease.tenant).joinedload(Tenant.user),
+    joinedload(Lease.unit).joinedload(Unit.property)
+)
 
-@router.get("/", response_model=List[LeaseResponse])
+
+async def load_lease(db: AsyncSession, lease_id: int):
+    """Fetch a lease with the relationships LeaseResponse needs"""
+    return await db.scalar(
+        select(Lease).options(*LEASE_LOAD_OPTIONS).where(Lease.id == lease_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+@router.get("/", response_model=Page[LeaseResponse])
 async def get_leases(
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all leases"""
+    """Get a page of leases, newest first"""
+    query = select(Lease).options(*LEASE_LOAD_OPTIONS)
     if current_user.role == "LANDLORD":
-        # Get leases for landlord's properties with tenant and unit data
-        leases = db.query(Lease).options(
-            joinedload(Lease.tenant).joinedload(Tenant.user),
-            joinedload(Lease.unit)
-        ).join(Unit).join(Property).filter(
-            Property.landlordId == current_user.id
-        ).all()
+        # Leases for landlord's properties with tenant and unit data
+        query = query.where(Lease.landlordId == current_user.id)
     elif current_user.role == "TENANT":
-        # Get leases for tenant
-        tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
-        if tenant:
-            leases = db.query(Lease).options(
-                joinedload(Lease.tenant).joinedload(Tenant.user),
-                joinedload(Lease.unit)
-            ).filter(Lease.tenantId == tenant.id).all()
-        else:
-            leases = []
-    else:
-        leases = db.query(Lease).options(
-            joinedload(Lease.tenant).joinedload(Tenant.user),
-            joinedload(Lease.unit)
-        ).all()
+        # Leases for tenant
+        tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
+        if not tenant:
+            return {"items": [], "next_cursor": None}
+        query = query.where(Lease.tenantId == tenant.id)
     
-    return leases
+    return await paginate(db, query, Lease, page)
 
 
 @router.post("/", response_model=LeaseResponse, status_code=status.HTTP_201_CREATED)
 async def create_lease(
     lease_data: LeaseCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Create a new lease"""
     # Verify unit exists and belongs to landlord
-    unit = db.query(Unit).filter(Unit.id == lease_data.unitId).first()
+    unit = await db.get(Unit, lease_data.unitId)
     if not unit:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Unit not found"
         )
     
-    property_obj = db.query(Property).filter(Property.id == unit.propertyId).first()
+    property_obj = await db.get(Property, unit.propertyId)
     if property_obj.landlordId != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to create lease for this unit"
         )
     
-    existing_active_lease = db.query(Lease).filter(
+    existing_active_lease = await db.scalar(select(Lease).where(
         Lease.unitId == lease_data.unitId,
         Lease.status == "ACTIVE"
-    ).first()
+    ))
     
     if existing_active_lease:
         raise HTTPException(
@@ -90,66 +100,93 @@ async def create_lease(
         )
     
     # Verify tenant exists
-    tenant = db.query(Tenant).filter(Tenant.id == lease_data.tenantId).first()
+    tenant = await db.get(Tenant, lease_data.tenantId)
     if not tenant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tenant not found"
         )
     
-    new_lease = Lease(**lease_data.model_dump())
+    new_lease = Lease(**lease_data.model_dump(), landlordId=property_obj.landlordId)
     
     db.add(new_lease)
-    db.commit()
-    db.refresh(new_lease)
+    await db.flush()
     
-    # Auto-generate monthly payments for the lease duration
-    try:
-        start_date = new_lease.startDate
-        end_date = new_lease.endDate if new_lease.endDate else start_date + relativedelta(years=1)  # Default 1 year if no end date
-        
-        current_date = start_date
-        payments_created = 0
-        
-        # Generate payments for each month
-        while current_date <= end_date and payments_created < 12:  # Limit to 12 months max
-            payment = Payment(
-                leaseId=new_lease.id,
-                amount=new_lease.rent,
-                dueDate=current_date,
-                status="PENDING"
-            )
-            db.add(payment)
-            current_date = current_date + relativedelta(months=1)
-            payments_created += 1
-        
-        db.commit()
-        print(f"✅ Created {payments_created} payment(s) for lease {new_lease.id}")
+    # Monthly payments for the whole term, inserted in the lease's transaction
+    payments_created, payments_amount = await db.run_sync(
+        insert_schedules,
+        [(new_lease.id, new_lease.landlordId, new_lease.startDate, new_lease.endDate, new_lease.rent)]
+    )
     
-    except Exception as e:
-        print(f"❌ Error creating payments: {str(e)}")
-        # Don't fail lease creation if payment generation fails
+    await db.run_sync(
+        bump_stats,
+        current_user.id,
+        activeLeases=1 if new_lease.status == "ACTIVE" else 0,
+        pendingPayments=payments_created,
+        pendingAmount=payments_amount
+    )
+    if new_lease.status == "ACTIVE":
+        await db.run_sync(sync_unit_occupancy, [new_lease.unitId])
+    await db.run_sync(sync_lease_tree_alerts, [new_lease.id])
+    await db.commit()
     
     # Reload with relationships
-    lease_with_relations = db.query(Lease).options(
-        joinedload(Lease.tenant).joinedload(Tenant.user),
-        joinedload(Lease.unit)
-    ).filter(Lease.id == new_lease.id).first()
+    return await load_lease(db, new_lease.id)
+
+
+@router.post("/payment-schedules", response_model=PaymentScheduleBulkResponse, status_code=status.HTTP_201_CREATED)
+async def generate_payment_schedules(
+    request: PaymentScheduleBulkRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_landlord)
+):
+    """Generate payment schedules for many leases at once (portfolio onboarding)"""
+    lease_ids = set(request.leaseIds)
+    leases = (await db.execute(
+        select(Lease.id, Lease.landlordId, Lease.startDate, Lease.endDate, Lease.rent).where(
+            Lease.id.in_(lease_ids),
+            Lease.landlordId == current_user.id
+        ).order_by(Lease.id)
+    )).all()
     
-    return lease_with_relations
+    missing = sorted(lease_ids - {lease.id for lease in leases})
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Leases not found: {missing}"
+        )
+    
+    # Leases that already have a schedule are left alone
+    scheduled = set((await db.scalars(
+        select(Payment.leaseId).where(Payment.leaseId.in_(lease_ids)).distinct()
+    )).all())
+    pending = [tuple(lease) for lease in leases if lease.id not in scheduled]
+    
+    payments_created, payments_amount = await db.run_sync(insert_schedules, pending)
+    await db.run_sync(
+        bump_stats,
+        current_user.id,
+        pendingPayments=payments_created,
+        pendingAmount=payments_amount
+    )
+    await db.run_sync(sync_lease_tree_alerts, [lease[0] for lease in pending])
+    await db.commit()
+    
+    return {
+        "leases": len(pending),
+        "skippedLeaseIds": sorted(scheduled),
+        "paymentsCreated": payments_created
+    }
 
 
 @router.get("/{lease_id}", response_model=LeaseResponse)
 async def get_lease(
     lease_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific lease"""
-    lease = db.query(Lease).options(
-        joinedload(Lease.tenant).joinedload(Tenant.user),
-        joinedload(Lease.unit)
-    ).filter(Lease.id == lease_id).first()
+    lease = await load_lease(db, lease_id)
     
     if not lease:
         raise HTTPException(
@@ -164,11 +201,11 @@ async def get_lease(
 async def update_lease(
     lease_id: int,
     lease_data: LeaseUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Update a lease"""
-    lease = db.query(Lease).filter(Lease.id == lease_id).first()
+    lease = await db.get(Lease, lease_id)
     
     if not lease:
         raise HTTPException(
@@ -177,9 +214,7 @@ async def update_lease(
         )
     
     # Verify landlord authorization
-    unit = db.query(Unit).filter(Unit.id == lease.unitId).first()
-    property_obj = db.query(Property).filter(Property.id == unit.propertyId).first()
-    if property_obj.landlordId != current_user.id:
+    if lease.landlordId != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this lease"
@@ -190,20 +225,27 @@ async def update_lease(
     for key, value in lease_data.model_dump(exclude_unset=True).items():
         setattr(lease, key, value)
     
-    db.commit()
-    db.refresh(lease)
+    was_active = old_status == "ACTIVE"
+    is_active = lease.status == "ACTIVE"
+    if was_active != is_active:
+        await db.run_sync(bump_stats, current_user.id, activeLeases=1 if is_active else -1)
+        await db.run_sync(sync_unit_occupancy, [lease.unitId])
     
-    return lease
+    # End dates move leases in and out of the expiry window even when the status holds
+    await db.run_sync(sync_lease_alerts, [lease.id])
+    await db.commit()
+    
+    return await load_lease(db, lease.id)
 
 
 @router.delete("/{lease_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_lease(
     lease_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Delete a lease"""
-    lease = db.query(Lease).filter(Lease.id == lease_id).first()
+    lease = await db.get(Lease, lease_id)
     
     if not lease:
         raise HTTPException(
@@ -212,33 +254,35 @@ async def delete_lease(
         )
     
     # Verify landlord authorization
-    unit = db.query(Unit).filter(Unit.id == lease.unitId).first()
-    property_obj = db.query(Property).filter(Property.id == unit.propertyId).first()
-    if property_obj.landlordId != current_user.id:
+    if lease.landlordId != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this lease"
         )
     
     # Delete associated payments first
-    db.query(Payment).filter(Payment.leaseId == lease_id).delete()
+    await db.execute(delete(Payment).where(Payment.leaseId == lease_id))
     
     # Delete the lease
-    db.delete(lease)
-    db.commit()
+    await db.delete(lease)
+    await db.run_sync(sync_unit_occupancy, [lease.unitId])
+    # Payments and maintenance go with the lease, so recount
+    await db.run_sync(rebuild_stats, current_user.id)
+    await db.commit()
     
     return None
 
 
-@router.get("/property/{property_id}", response_model=List[LeaseResponse])
+@router.get("/property/{property_id}", response_model=Page[LeaseResponse])
 async def get_leases_by_property(
     property_id: int,
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get leases for a specific property"""
+    """Get a page of leases for a specific property"""
     # Verify property exists and user has access
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    property_obj = await db.get(Property, property_id)
     if not property_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -251,22 +295,17 @@ async def get_leases_by_property(
             detail="Not authorized to view leases for this property"
         )
     
-    leases = db.query(Lease).options(
-        joinedload(Lease.tenant).joinedload(Tenant.user),
-        joinedload(Lease.unit)
-    ).join(Unit).filter(Unit.propertyId == property_id).all()
-    return leases
+    query = select(Lease).options(*LEASE_LOAD_OPTIONS).join(Lease.unit).where(Unit.propertyId == property_id)
+    return await paginate(db, query, Lease, page)
 
 
-@router.get("/unit/{unit_id}", response_model=List[LeaseResponse])
+@router.get("/unit/{unit_id}", response_model=Page[LeaseResponse])
 async def get_leases_by_unit(
     unit_id: int,
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get leases for a specific unit"""
-    leases = db.query(Lease).options(
-        joinedload(Lease.tenant).joinedload(Tenant.user),
-        joinedload(Lease.unit)
-    ).filter(Lease.unitId == unit_id).all()
-    return leases
+    """Get a page of leases for a specific unit"""
+    query = select(Lease).options(*LEASE_LOAD_OPTIONS).where(Lease.unitId == unit_id)
+    return await paginate(db, query, Lease, page)
@@ -2,77 +2,81 @@
 Maintenance Router
 Handles maintenance request operations with file uploads
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from typing import List, Optional
 from datetime import datetime
+import asyncio
 import os
-import shutil
 
 from ..database import get_db
-from ..models import User, MaintenanceRequest, Lease, Tenant, Unit, Property
-from ..schemas import MaintenanceRequestCreate, MaintenanceRequestUpdate, MaintenanceRequestResponse
+from ..pagination import CursorParams, paginate
+from ..models import User, MaintenanceRequest, MaintenancePhoto, Lease, Tenant, Unit
+from ..schemas import MaintenanceRequestCreate, MaintenanceRequestUpdate, MaintenanceRequestResponse, Page
 from ..auth import get_current_user
+from ..stats import bump_stats, maintenance_delta, merge_deltas
+from ..alerts import sync_maintenance_alerts
+from ..uploads import FILES_REQUEST_BODY, receive_files
+from .. import photo_store, thumbnails
 
 router = APIRouter()
 
+# Everything MaintenanceRequestResponse serializes, loaded up front (no lazy IO on AsyncSession)
+MAINTENANCE_LOAD_OPTIONS = (
+    joinedload(MaintenanceRequest.lease)
+    .joinedload(Lease.unit)
+    .joinedload(Unit.property),
+    joinedload(MaintenanceRequest.lease)
+    .joinedload(Lease.tenant)
+    .joinedload(Tenant.user),
+    # Batch loader: one query for the photos (and their objects' renditions)
+    # of every request on the page
+    selectinload(MaintenanceRequest.photoRecords)
+    .joinedload(MaintenancePhoto.object)
+)
 
-@router.get("", response_model=List[MaintenanceRequestResponse])
+
+async def load_maintenance_request(db: AsyncSession, request_id: int):
+    """Fetch a maintenance request with the relationships its response needs"""
+    return await db.scalar(
+        select(MaintenanceRequest).options(*MAINTENANCE_LOAD_OPTIONS)
+        .where(MaintenanceRequest.id == request_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+@router.get("", response_model=Page[MaintenanceRequestResponse])
 async def get_maintenance_requests(
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all maintenance requests"""
+    """Get a page of maintenance requests, newest first"""
+    query = select(MaintenanceRequest).options(*MAINTENANCE_LOAD_OPTIONS)
     if current_user.role == "LANDLORD":
-        # Get maintenance requests for landlord's properties
-        requests = db.query(MaintenanceRequest).options(
-            joinedload(MaintenanceRequest.lease)
-            .joinedload(Lease.unit)
-            .joinedload(Unit.property),
-            joinedload(MaintenanceRequest.lease)
-            .joinedload(Lease.tenant)
-            .joinedload(Tenant.user)
-        ).join(Lease).join(Unit).join(Property).filter(
-            Property.landlordId == current_user.id
-        ).all()
+        # Maintenance requests for landlord's properties
+        query = query.where(MaintenanceRequest.landlordId == current_user.id)
     elif current_user.role == "TENANT":
-        # Get maintenance requests for tenant's leases
-        tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
-        if tenant:
-            requests = db.query(MaintenanceRequest).options(
-                joinedload(MaintenanceRequest.lease)
-                .joinedload(Lease.unit)
-                .joinedload(Unit.property),
-                joinedload(MaintenanceRequest.lease)
-                .joinedload(Lease.tenant)
-                .joinedload(Tenant.user)
-            ).join(Lease).filter(
-                Lease.tenantId == tenant.id
-            ).all()
-        else:
-            requests = []
-    else:
-        requests = db.query(MaintenanceRequest).options(
-            joinedload(MaintenanceRequest.lease)
-            .joinedload(Lease.unit)
-            .joinedload(Unit.property),
-            joinedload(MaintenanceRequest.lease)
-            .joinedload(Lease.tenant)
-            .joinedload(Tenant.user)
-        ).all()
-    
-    return requests
+        # Maintenance requests for tenant's leases
+        tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
+        if not tenant:
+            return {"items": [], "next_cursor": None}
+        query = query.join(Lease).where(Lease.tenantId == tenant.id)
+    
+    return await paginate(db, query, MaintenanceRequest, page)
 
 
 @router.post("", response_model=MaintenanceRequestResponse, status_code=status.HTTP_201_CREATED)
 async def create_maintenance_request(
     maintenance_data: MaintenanceRequestCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new maintenance request"""
     # Verify lease exists
-    lease = db.query(Lease).filter(Lease.id == maintenance_data.leaseId).first()
+    lease = await db.get(Lease, maintenance_data.leaseId)
     if not lease:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -81,37 +85,35 @@ async def create_maintenance_request(
     
     # Verify tenant authorization if tenant is creating the request
     if current_user.role == "TENANT":
-        tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
+        tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
         if not tenant or lease.tenantId != tenant.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to create maintenance request for this lease"
             )
     
-    new_request = MaintenanceRequest(**maintenance_data.model_dump())
+    request_data = maintenance_data.model_dump()
+    photo_urls = request_data.pop("photos")
+    new_request = MaintenanceRequest(**request_data, landlordId=lease.landlordId)
     
     db.add(new_request)
-    db.commit()
-    db.refresh(new_request)
+    await db.run_sync(bump_stats, lease.landlordId, **maintenance_delta(new_request.status))
+    await db.flush()
+    await db.run_sync(sync_maintenance_alerts, [new_request.id])
+    await db.run_sync(photo_store.add_photo_urls, new_request.id, photo_urls)
+    await db.commit()
     
-    return new_request
+    return await load_maintenance_request(db, new_request.id)
 
 
 @router.get("/{request_id}", response_model=MaintenanceRequestResponse)
 async def get_maintenance_request(
     request_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific maintenance request"""
-    request = db.query(MaintenanceRequest).options(
-        joinedload(MaintenanceRequest.lease)
-        .joinedload(Lease.unit)
-        .joinedload(Unit.property),
-        joinedload(MaintenanceRequest.lease)
-        .joinedload(Lease.tenant)
-        .joinedload(Tenant.user)
-    ).filter(MaintenanceRequest.id == request_id).first()
+    request = await load_maintenance_request(db, request_id)
     
     if not request:
         raise HTTPException(
@@ -126,11 +128,11 @@ async def get_maintenance_request(
 async def update_maintenance_request(
     request_id: int,
     maintenance_data: MaintenanceRequestUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a maintenance request"""
-    request = db.query(MaintenanceRequest).filter(MaintenanceRequest.id == request_id).first()
+    request = await db.get(MaintenanceRequest, request_id)
     
     if not request:
         raise HTTPException(
@@ -145,65 +147,103 @@ async def update_maintenance_request(
     if "status" in update_data and update_data["status"] == "COMPLETED" and not request.completedAt:
         update_data["completedAt"] = datetime.utcnow()
     
+    removed = maintenance_delta(request.status, -1)
     for key, value in update_data.items():
         setattr(request, key, value)
     
-    db.commit()
-    db.refresh(request)
+    await db.run_sync(
+        bump_stats,
+        request.landlordId,
+        **merge_deltas(removed, maintenance_delta(request.status))
+    )
+    await db.run_sync(sync_maintenance_alerts, [request.id])
+    await db.commit()
     
-    return request
+    return await load_maintenance_request(db, request.id)
+
 
+async def _release_claims(db: AsyncSession, sha256s: List[str]) -> None:
+    try:
+        await db.rollback()
+        await db.run_sync(photo_store.release_objects, sha256s)
+        await db.commit()
+    except Exception as exc:
+        # Left for python -m app.photo_store recount --fix
+        print(f"❌ Could not release photo objects {sha256s}: {exc}")
 
-@router.post("/{request_id}/photos")
+
+@router.post("/{request_id}/photos", openapi_extra=FILES_REQUEST_BODY)
 async def upload_maintenance_photos(
     request_id: int,
-    files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload photos for a maintenance request"""
-    request = db.query(MaintenanceRequest).filter(MaintenanceRequest.id == request_id).first()
-    
-    if not request:
+    """Upload photos for a maintenance request (multipart field `files`)"""
+    if not await db.get(MaintenanceRequest, request_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Maintenance request not found"
         )
+    # Give the connection back while the body streams in
+    await db.commit()
     
-    # Create uploads directory if it doesn't exist
-    upload_dir = f"uploads/maintenance/{request_id}"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    photo_urls = []
-    for file in files:
-        # Save file
-        file_path = os.path.join(upload_dir, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Add to photo URLs
-        photo_url = f"/uploads/maintenance/{request_id}/{file.filename}"
-        photo_urls.append(photo_url)
-    
-    # Update request with new photo URLs
-    if not request.photos:
-        request.photos = []
-    request.photos.extend(photo_urls)
+    saved = await receive_files(http_request, photo_store.STAGING_DIR)
+    try:
+        # Reference the objects before placing the files, so pruning cannot
+        # remove one in between
+        extensions = await db.run_sync(photo_store.add_objects, saved)
+        await db.commit()
+        try:
+            photos = []
+            for file in saved:
+                # Read from the header, off the event loop
+                width, height = await asyncio.to_thread(thumbnails.image_size, file["path"]) or (None, None)
+                photos.append({
+                    "url": photo_store.place_object(file["path"], file["sha256"], extensions[file["sha256"]]),
+                    "sha256": file["sha256"], "size": file["size"], "width": width, "height": height,
+                })
+            # Thumbnails and previews are made in the background
+            thumbnails.enqueue(extensions)
+            
+            if not await db.get(MaintenanceRequest, request_id, populate_existing=True):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Maintenance request not found"
+                )
+            # Appended rows: photos added by a concurrent upload are kept
+            await db.run_sync(photo_store.add_photos, request_id, photos)
+            await db.commit()
+        except BaseException:
+            # No photo rows point at the claimed objects: give the references
+            # back (also when cancelled) so pruning can collect them
+            await asyncio.shield(_release_claims(db, [file["sha256"] for file in saved]))
+            raise
+    finally:
+        for file in saved:
+            if os.path.exists(file["path"]):
+                os.remove(file["path"])
     
-    db.commit()
-    db.refresh(request)
+    photo_urls = [photo["url"] for photo in photos]
     
-    return {"message": "Photos uploaded successfully", "photos": photo_urls}
+    return {
+        "message": "Photos uploaded successfully",
+        "photos": photo_urls,
+        "files": [
+            {key: photo[key] for key in ("url", "size", "sha256", "width", "height")}
+            for photo in photos
+        ]
+    }
 
 
 @router.delete("/{request_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_maintenance_request(
     request_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a maintenance request"""
-    request = db.query(MaintenanceRequest).filter(MaintenanceRequest.id == request_id).first()
+    request = await db.get(MaintenanceRequest, request_id)
     
     if not request:
         raise HTTPException(
@@ -211,7 +251,10 @@ async def delete_maintenance_request(
             detail="Maintenance request not found"
         )
     
-    db.delete(request)
-    db.commit()
+    await db.run_sync(bump_stats, request.landlordId, **maintenance_delta(request.status, -1))
+    await db.run_sync(photo_store.remove_photos, request.id)
+    await db.delete(request)
+    await db.run_sync(sync_maintenance_alerts, [request.id])
+    await db.commit()
     
     return None
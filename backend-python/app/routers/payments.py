@@ -2,63 +2,77 @@
 Payments Router
 Handles payment CRUD operations and Stripe integration
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import stripe
 import os
 
-from ..database import get_db
-from ..models import User, Payment, Lease, Tenant, Unit, Property
-from ..schemas import PaymentCreate, PaymentUpdate, PaymentResponse
+from ..database import get_db, get_session_factory
+from ..pagination import CursorParams, paginate
+from ..models import User, Payment, Lease, Tenant, Unit
+from ..schemas import PaymentCreate, PaymentUpdate, PaymentResponse, Page
 from ..auth import get_current_user, get_current_landlord
+from ..stats import bump_stats, payment_delta, merge_deltas
+from ..alerts import sync_payment_alerts
+from ..schedules import overdue_at
+from ..metrics import timed_stripe
+from ..stripe_sync import (
+    STRIPE_SYNC_INLINE_LIMIT,
+    get_sync_job,
+    pending_intents_query,
+    reconcile_landlord,
+    start_sync_job,
+)
 
 router = APIRouter()
 
 # Configure Stripe
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
+# Everything PaymentResponse serializes, loaded up front (no lazy IO on AsyncSession)
+PAYMENT_LOAD_OPTIONS = (
+    joinedload(Payment.lease).joinedload(Lease.tenant).joinedload(Tenant.user),
+    joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
+)
 
-@router.get("/", response_model=List[PaymentResponse])
+
+async def load_payment(db: AsyncSession, payment_id: int):
+    """Fetch a payment with the relationships PaymentResponse needs"""
+    return await db.scalar(
+        select(Payment).options(*PAYMENT_LOAD_OPTIONS).where(Payment.id == payment_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+@router.get("/", response_model=Page[PaymentResponse])
 async def get_payments(
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all payments"""
+    """Get a page of payments, newest first"""
+    query = select(Payment).options(*PAYMENT_LOAD_OPTIONS)
     if current_user.role == "LANDLORD":
-        # Get payments for landlord's properties with nested data
-        payments = db.query(Payment).options(
-            joinedload(Payment.lease).joinedload(Lease.tenant).joinedload(Tenant.user),
-            joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
-        ).join(Lease).join(Unit).join(Property).filter(
-            Property.landlordId == current_user.id
-        ).all()
+        # Payments for landlord's properties with nested data
+        query = query.where(Payment.landlordId == current_user.id)
     elif current_user.role == "TENANT":
-        # Get payments for tenant's leases with nested data
-        tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
-        if tenant:
-            payments = db.query(Payment).options(
-                joinedload(Payment.lease).joinedload(Lease.tenant).joinedload(Tenant.user),
-                joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
-            ).join(Lease).filter(
-                Lease.tenantId == tenant.id
-            ).all()
-        else:
-            payments = []
-    else:
-        payments = db.query(Payment).options(
-            joinedload(Payment.lease).joinedload(Lease.tenant).joinedload(Tenant.user),
-            joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
-        ).all()
+        # Payments for tenant's leases with nested data
+        tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
+        if not tenant:
+            return {"items": [], "next_cursor": None}
+        query = query.join(Lease).where(Lease.tenantId == tenant.id)
     
-    return payments
+    return await paginate(db, query, Payment, page)
 
 
 @router.post("/", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
 async def create_payment(
     payment_data: PaymentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Create a new payment"""
@@ -70,7 +84,7 @@ async def create_payment(
         )
     
     # Verify lease exists
-    lease = db.query(Lease).filter(Lease.id == payment_data.leaseId).first()
+    lease = await db.get(Lease, payment_data.leaseId)
     if not lease:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,31 +92,33 @@ async def create_payment(
         )
     
     # Verify landlord authorization
-    unit = db.query(Unit).filter(Unit.id == lease.unitId).first()
-    property_obj = db.query(Property).filter(Property.id == unit.propertyId).first()
-    if property_obj.landlordId != current_user.id:
+    if lease.landlordId != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to create payment for this lease"
         )
     
-    new_payment = Payment(**payment_data.model_dump())
+    new_payment = Payment(**payment_data.model_dump(), landlordId=lease.landlordId)
+    if new_payment.status == "PENDING":
+        new_payment.overdueAt = overdue_at(new_payment.dueDate)
     
     db.add(new_payment)
-    db.commit()
-    db.refresh(new_payment)
+    await db.run_sync(bump_stats, lease.landlordId, **payment_delta(new_payment.status, new_payment.amount))
+    await db.flush()
+    await db.run_sync(sync_payment_alerts, [new_payment.id])
+    await db.commit()
     
-    return new_payment
+    return await load_payment(db, new_payment.id)
 
 
 @router.get("/{payment_id}", response_model=PaymentResponse)
 async def get_payment(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific payment"""
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    payment = await load_payment(db, payment_id)
     
     if not payment:
         raise HTTPException(
@@ -117,11 +133,11 @@ async def get_payment(
 async def update_payment(
     payment_id: int,
     payment_data: PaymentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a payment"""
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    payment = await db.get(Payment, payment_id)
     
     if not payment:
         raise HTTPException(
@@ -130,23 +146,32 @@ async def update_payment(
         )
     
     # Update fields
+    removed = payment_delta(payment.status, payment.amount, -1)
     for key, value in payment_data.model_dump(exclude_unset=True).items():
         setattr(payment, key, value)
+    if payment.status == "PENDING":
+        # A moved due date can make the payment overdue, or no longer overdue
+        payment.overdueAt = overdue_at(payment.dueDate, payment.overdueAt)
     
-    db.commit()
-    db.refresh(payment)
+    await db.run_sync(
+        bump_stats,
+        payment.landlordId,
+        **merge_deltas(removed, payment_delta(payment.status, payment.amount))
+    )
+    await db.run_sync(sync_payment_alerts, [payment.id])
+    await db.commit()
     
-    return payment
+    return await load_payment(db, payment.id)
 
 
 @router.post("/{payment_id}/pay", response_model=PaymentResponse)
 async def mark_payment_paid(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark a payment as paid"""
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    payment = await db.get(Payment, payment_id)
     
     if not payment:
         raise HTTPException(
@@ -154,25 +179,33 @@ async def mark_payment_paid(
             detail="Payment not found"
         )
     
+    removed = payment_delta(payment.status, payment.amount, -1)
     payment.status = "PAID"
     payment.paidAt = datetime.utcnow()
     
-    db.commit()
-    db.refresh(payment)
+    await db.run_sync(
+        bump_stats,
+        payment.landlordId,
+        **merge_deltas(removed, payment_delta(payment.status, payment.amount))
+    )
+    await db.run_sync(sync_payment_alerts, [payment.id])
+    await db.commit()
     
-    return payment
+    return await load_payment(db, payment.id)
 
 
 @router.post("/{payment_id}/checkout")
 async def create_checkout_session(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a Stripe checkout session for a payment"""
-    payment = db.query(Payment).options(
-        joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
-    ).filter(Payment.id == payment_id).first()
+    payment = await db.scalar(
+        select(Payment).options(
+            joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
+        ).where(Payment.id == payment_id)
+    )
     
     if not payment:
         raise HTTPException(
@@ -182,7 +215,7 @@ async def create_checkout_session(
     
     # Verify tenant authorization
     if current_user.role == "TENANT":
-        tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
+        tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
         if not tenant or payment.lease.tenantId != tenant.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -197,7 +230,8 @@ async def create_checkout_session(
     
     try:
         # Create Stripe checkout session
-        checkout_session = stripe.checkout.Session.create(
+        checkout_session = await run_in_threadpool(
+            timed_stripe("checkout.Session.create", stripe.checkout.Session.create),
             payment_method_types=['card'],
             line_items=[{
                 'price_data': {
@@ -237,11 +271,11 @@ async def create_checkout_session(
 async def verify_payment(
     payment_id: int,
     session_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Verify Stripe payment and mark as paid"""
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    payment = await db.get(Payment, payment_id)
     
     if not payment:
         raise HTTPException(
@@ -251,15 +285,23 @@ async def verify_payment(
     
     try:
         # Retrieve the checkout session from Stripe
-        session = stripe.checkout.Session.retrieve(session_id)
+        session = await run_in_threadpool(
+            timed_stripe("checkout.Session.retrieve", stripe.checkout.Session.retrieve), session_id
+        )
         
         # Verify payment was successful
         if session.payment_status == "paid":
+            removed = payment_delta(payment.status, payment.amount, -1)
             payment.status = "PAID"
             payment.paidAt = datetime.utcnow()
-            payment.stripePaymentId = session.payment_intent
-            db.commit()
-            db.refresh(payment)
+            payment.stripePaymentIntentId = session.payment_intent
+            await db.run_sync(
+                bump_stats,
+                payment.landlordId,
+                **merge_deltas(removed, payment_delta(payment.status, payment.amount))
+            )
+            await db.run_sync(sync_payment_alerts, [payment.id])
+            await db.commit()
             return {"status": "success", "message": "Payment verified and marked as paid"}
         else:
             return {"status": "pending", "message": "Payment not yet completed"}
@@ -278,56 +320,71 @@ async def verify_payment(
 
 @router.post("/sync")
 async def sync_payments(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    session_factory = Depends(get_session_factory),
     current_user: User = Depends(get_current_landlord)
 ):
-    """Sync payments with Stripe - check for completed payments"""
-    try:
-        # Get all pending payments for landlord's properties
-        pending_payments = db.query(Payment).join(Lease).join(Unit).join(Property).filter(
-            Property.landlordId == current_user.id,
-            Payment.status == "PENDING",
-            Payment.stripePaymentId.isnot(None)
-        ).all()
-        
-        synced_count = 0
-        
-        for payment in pending_payments:
-            if payment.stripePaymentId:
-                try:
-                    # Check payment intent status in Stripe
-                    payment_intent = stripe.PaymentIntent.retrieve(payment.stripePaymentId)
-                    
-                    if payment_intent.status == "succeeded":
-                        payment.status = "PAID"
-                        payment.paidAt = datetime.utcnow()
-                        synced_count += 1
-                except stripe.error.StripeError:
-                    continue
-        
-        db.commit()
-        
+    """
+    Sync payments with Stripe - check for completed payments.
+    
+    Up to STRIPE_SYNC_INLINE_LIMIT pending intents are reconciled in the
+    request; more start a background job (202) to poll at /sync/{job_id}.
+    """
+    pending = await db.scalar(
+        select(func.count()).select_from(pending_intents_query(current_user.id).subquery())
+    )
+    
+    if pending > STRIPE_SYNC_INLINE_LIMIT:
+        job = start_sync_job(current_user.id, session_factory)
+        response.status_code = status.HTTP_202_ACCEPTED
         return {
-            "status": "success",
-            "message": f"Synced {synced_count} payment(s) with Stripe",
-            "synced_count": synced_count
+            "status": "started",
+            "message": f"Syncing {pending} payment(s) with Stripe in the background",
+            "job": job
         }
     
+    try:
+        progress = await reconcile_landlord(current_user.id, session_factory)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to sync payments: {str(e)}"
         )
+    
+    return {
+        "status": "success",
+        "message": f"Synced {progress['synced']} payment(s) with Stripe",
+        "synced_count": progress["synced"],
+        "failed_count": progress["failed"]
+    }
+
+
+@router.get("/sync/{job_id}")
+async def get_sync_progress(
+    job_id: str,
+    current_user: User = Depends(get_current_landlord)
+):
+    """Progress of a background Stripe sync started by this landlord"""
+    job = get_sync_job(job_id)
+    
+    if not job or job["landlordId"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sync job not found"
+        )
+    
+    return job
 
 
 @router.delete("/{payment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_payment(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Delete a payment"""
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    payment = await db.get(Payment, payment_id)
     
     if not payment:
         raise HTTPException(
@@ -335,7 +392,9 @@ async def delete_payment(
             detail="Payment not found"
         )
     
-    db.delete(payment)
-    db.commit()
+    await db.run_sync(bump_stats, payment.landlordId, **payment_delta(payment.status, payment.amount, -1))
+    await db.delete(payment)
+    await db.run_sync(sync_payment_alerts, [payment.id])
+    await db.commit()
     
     return None
@@ -3,42 +3,46 @@ Properties Router
 Handles property CRUD operations
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
+from ..pagination import CursorParams, paginate
 from ..models import User, Property
-from ..schemas import PropertyCreate, PropertyUpdate, PropertyResponse
+from ..schemas import PropertyCreate, PropertyUpdate, PropertyResponse, Page
 from ..auth import get_current_user, get_current_landlord
+from ..stats import bump_stats, rebuild_stats
+from ..dashboard_cache import touch_landlord
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[PropertyResponse])
-@router.get("/", response_model=List[PropertyResponse])
+@router.get("", response_model=Page[PropertyResponse])
+@router.get("/", response_model=Page[PropertyResponse])
 async def get_properties(
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all properties for the current landlord"""
+    """Get a page of properties for the current landlord, newest first"""
     if current_user.role == "LANDLORD":
-        properties = db.query(Property).filter(Property.landlordId == current_user.id).all()
+        query = select(Property).where(Property.landlordId == current_user.id)
     elif current_user.role == "ADMIN":
-        properties = db.query(Property).all()
+        query = select(Property)
     else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view properties"
         )
     
-    return properties
+    return await paginate(db, query, Property, page)
 
 
 @router.post("", response_model=PropertyResponse, status_code=status.HTTP_201_CREATED)
 @router.post("/", response_model=PropertyResponse, status_code=status.HTTP_201_CREATED)
 async def create_property(
     property_data: PropertyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Create a new property"""
@@ -48,8 +52,9 @@ async def create_property(
     )
     
     db.add(new_property)
-    db.commit()
-    db.refresh(new_property)
+    await db.run_sync(bump_stats, current_user.id, properties=1)
+    await db.commit()
+    await db.refresh(new_property)
     
     return new_property
 
@@ -57,11 +62,11 @@ async def create_property(
 @router.get("/{property_id}", response_model=PropertyResponse)
 async def get_property(
     property_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific property"""
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    property_obj = await db.get(Property, property_id)
     
     if not property_obj:
         raise HTTPException(
@@ -83,11 +88,11 @@ async def get_property(
 async def update_property(
     property_id: int,
     property_data: PropertyUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Update a property"""
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    property_obj = await db.get(Property, property_id)
     
     if not property_obj:
         raise HTTPException(
@@ -106,8 +111,9 @@ async def update_property(
     for key, value in property_data.model_dump(exclude_unset=True).items():
         setattr(property_obj, key, value)
     
-    db.commit()
-    db.refresh(property_obj)
+    touch_landlord(db, current_user.id)
+    await db.commit()
+    await db.refresh(property_obj)
     
     return property_obj
 
@@ -115,11 +121,11 @@ async def update_property(
 @router.delete("/{property_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_property(
     property_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Delete a property"""
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    property_obj = await db.get(Property, property_id)
     
     if not property_obj:
         raise HTTPException(
@@ -134,7 +140,9 @@ async def delete_property(
             detail="Not authorized to delete this property"
         )
     
-    db.delete(property_obj)
-    db.commit()
+    await db.delete(property_obj)
+    # Cascades to units, leases, payments and maintenance, so recount
+    await db.run_sync(rebuild_stats, current_user.id)
+    await db.commit()
     
     return None
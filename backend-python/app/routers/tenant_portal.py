@@ -3,7 +3,9 @@ Tenant Portal Router
 Special endpoints for tenant-specific operations
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 
 from ..database import get_db
 from ..models import User, Tenant, Lease, Payment, MaintenanceRequest, Unit, Property
@@ -14,58 +16,65 @@ router = APIRouter()
 
 @router.get("/my-leases")
 async def get_my_leases(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_tenant)
 ):
     """Get current tenant's leases"""
-    tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
+    tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
     
     if not tenant:
         return []
     
-    leases = db.query(Lease).options(
-        joinedload(Lease.tenant).joinedload(Tenant.user),
-        joinedload(Lease.unit).joinedload(Unit.property)
-    ).filter(Lease.tenantId == tenant.id).all()
+    leases = (await db.scalars(
+        select(Lease).options(
+            joinedload(Lease.tenant).joinedload(Tenant.user),
+            joinedload(Lease.unit).joinedload(Unit.property)
+        ).where(Lease.tenantId == tenant.id)
+    )).all()
     return leases
 
 
 @router.get("/my-payments")
 async def get_my_payments(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_tenant)
 ):
     """Get current tenant's payments"""
-    tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
+    tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
     
     if not tenant:
         return []
     
-    payments = db.query(Payment).options(
-        joinedload(Payment.lease).joinedload(Lease.tenant).joinedload(Tenant.user),
-        joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
-    ).join(Lease).filter(
-        Lease.tenantId == tenant.id
-    ).all()
+    payments = (await db.scalars(
+        select(Payment).options(
+            joinedload(Payment.lease).joinedload(Lease.tenant).joinedload(Tenant.user),
+            joinedload(Payment.lease).joinedload(Lease.unit).joinedload(Unit.property)
+        ).join(Lease).where(
+            Lease.tenantId == tenant.id
+        )
+    )).all()
     
     return payments
 
 
 @router.get("/my-maintenance")
 async def get_my_maintenance_requests(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_tenant)
 ):
     """Get current tenant's maintenance requests"""
-    tenant = db.query(Tenant).filter(Tenant.userId == current_user.id).first()
+    tenant = await db.scalar(select(Tenant).where(Tenant.userId == current_user.id))
     
     if not tenant:
         return []
     
-    maintenance = db.query(MaintenanceRequest).options(
-        joinedload(MaintenanceRequest.lease).joinedload(Lease.unit).joinedload(Unit.property)
-    ).join(Lease).filter(
-        Lease.tenantId == tenant.id
-    ).all()
+    maintenance = (await db.scalars(
+        select(MaintenanceRequest).options(
+            joinedload(MaintenanceRequest.lease).joinedload(Lease.unit).joinedload(Unit.property),
+            selectinload(MaintenanceRequest.photoRecords)
+        ).join(Lease).where(
+            Lease.tenantId == tenant.id
+        )
+    )).all()
     
     return maintenance
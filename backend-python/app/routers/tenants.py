@@ -3,39 +3,41 @@ Tenants Router
 Handles tenant-related operations
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from ..database import get_db
+from ..pagination import CursorParams, paginate
 from ..models import User, Tenant
-from ..schemas import TenantResponse, TenantCreate
-from ..auth import get_current_user, get_current_landlord
+from ..schemas import TenantResponse, TenantCreate, Page
+from ..auth import get_current_user, get_current_landlord, invalidate_cached_user
+from ..stats import rebuild_stats
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[TenantResponse])
+@router.get("/", response_model=Page[TenantResponse])
 async def get_tenants(
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
-    """Get all tenants with their user information"""
-    tenants = db.query(Tenant).options(
-        joinedload(Tenant.user)
-    ).all()
-    return tenants
+    """Get a page of tenants with their user information, newest first"""
+    query = select(Tenant).options(joinedload(Tenant.user))
+    return await paginate(db, query, Tenant, page)
 
 
 @router.get("/{tenant_id}", response_model=TenantResponse)
 async def get_tenant(
     tenant_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific tenant with user information"""
-    tenant = db.query(Tenant).options(
-        joinedload(Tenant.user)
-    ).filter(Tenant.id == tenant_id).first()
+    tenant = await db.scalar(
+        select(Tenant).options(joinedload(Tenant.user)).where(Tenant.id == tenant_id)
+    )
     
     if not tenant:
         raise HTTPException(
@@ -49,11 +51,13 @@ async def get_tenant(
 @router.get("/user/{user_id}", response_model=TenantResponse)
 async def get_tenant_by_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get tenant by user ID"""
-    tenant = db.query(Tenant).filter(Tenant.userId == user_id).first()
+    tenant = await db.scalar(
+        select(Tenant).options(joinedload(Tenant.user)).where(Tenant.userId == user_id)
+    )
     
     if not tenant:
         raise HTTPException(
@@ -67,11 +71,11 @@ async def get_tenant_by_user(
 @router.delete("/{tenant_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_tenant(
     tenant_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Delete a tenant and their associated user account (landlord only)"""
-    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    tenant = await db.get(Tenant, tenant_id)
     
     if not tenant:
         raise HTTPException(
@@ -80,10 +84,10 @@ async def delete_tenant(
         )
     
     from ..models import Lease
-    active_leases = db.query(Lease).filter(
+    active_leases = await db.scalar(select(func.count(Lease.id)).where(
         Lease.tenantId == tenant_id,
         Lease.status == "ACTIVE"
-    ).count()
+    ))
     
     if active_leases > 0:
         raise HTTPException(
@@ -91,8 +95,18 @@ async def delete_tenant(
             detail=f"Cannot delete tenant with {active_leases} active lease(s). Please end all leases first."
         )
     
+    # Landlords whose ended leases (and their payments) go with the tenant
+    landlord_ids = (await db.scalars(
+        select(Lease.landlordId).where(Lease.tenantId == tenant_id).distinct()
+    )).all()
+    
+    email = await db.scalar(select(User.email).where(User.id == tenant.userId))
+    
     # Delete tenant (this will cascade delete to leases and user due to CASCADE)
-    db.delete(tenant)
-    db.commit()
+    await db.delete(tenant)
+    for landlord_id in landlord_ids:
+        await db.run_sync(rebuild_stats, landlord_id)
+    await db.commit()
+    invalidate_cached_user(email)
     
     return None
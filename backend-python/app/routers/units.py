@@ -3,70 +3,46 @@ Units Router
 Handles unit CRUD operations
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
-from ..models import User, Unit, Property, Lease
-from ..schemas import UnitCreate, UnitCreateForProperty, UnitUpdate, UnitResponse
+from ..pagination import CursorParams, paginate
+from ..models import User, Unit, Property
+from ..schemas import UnitCreate, UnitCreateForProperty, UnitUpdate, UnitResponse, Page
 from ..auth import get_current_user, get_current_landlord
+from ..stats import bump_stats, rebuild_stats
+from ..dashboard_cache import touch_landlord
 
 router = APIRouter()
 
 
-def compute_unit_status(unit: Unit, db: Session) -> str:
-    """Compute unit status based on active leases"""
-    active_lease = db.query(Lease).filter(
-        Lease.unitId == unit.id,
-        Lease.status == "ACTIVE"
-    ).first()
-    status = "OCCUPIED" if active_lease else "AVAILABLE"
-    print(f"Unit {unit.id} ({unit.unitNumber}): {status} (active_lease: {active_lease.id if active_lease else None})")
-    return status
-
-
-@router.get("/", response_model=List[UnitResponse])
+@router.get("/", response_model=Page[UnitResponse])
 async def get_units(
     property_id: int = None,
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all units, optionally filtered by property"""
-    query = db.query(Unit)
+    """Get a page of units, optionally filtered by property"""
+    query = select(Unit)
     
     if property_id:
-        query = query.filter(Unit.propertyId == property_id)
-    
-    units = query.all()
+        query = query.where(Unit.propertyId == property_id)
     
-    # Add computed status to each unit
-    result = []
-    for unit in units:
-        unit_dict = {
-            "id": unit.id,
-            "unitNumber": unit.unitNumber,
-            "bedrooms": unit.bedrooms,
-            "bathrooms": unit.bathrooms,
-            "rentAmount": unit.rentAmount,
-            "propertyId": unit.propertyId,
-            "createdAt": unit.createdAt,
-            "updatedAt": unit.updatedAt,
-            "status": compute_unit_status(unit, db)
-        }
-        result.append(unit_dict)
-    
-    return result
+    # Occupancy status is stored on the unit by the lease lifecycle
+    return await paginate(db, query, Unit, page)
 
 
 @router.post("/", response_model=UnitResponse, status_code=status.HTTP_201_CREATED)
 async def create_unit(
     unit_data: UnitCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Create a new unit"""
     # Verify property exists and belongs to landlord
-    property_obj = db.query(Property).filter(Property.id == unit_data.propertyId).first()
+    property_obj = await db.get(Property, unit_data.propertyId)
     
     if not property_obj:
         raise HTTPException(
@@ -83,30 +59,21 @@ async def create_unit(
     new_unit = Unit(**unit_data.model_dump())
     
     db.add(new_unit)
-    db.commit()
-    db.refresh(new_unit)
+    await db.run_sync(bump_stats, current_user.id, units=1)
+    await db.commit()
+    await db.refresh(new_unit)
     
-    return {
-        "id": new_unit.id,
-        "unitNumber": new_unit.unitNumber,
-        "bedrooms": new_unit.bedrooms,
-        "bathrooms": new_unit.bathrooms,
-        "rentAmount": new_unit.rentAmount,
-        "propertyId": new_unit.propertyId,
-        "createdAt": new_unit.createdAt,
-        "updatedAt": new_unit.updatedAt,
-        "status": "AVAILABLE"
-    }
+    return new_unit
 
 
 @router.get("/{unit_id}", response_model=UnitResponse)
 async def get_unit(
     unit_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific unit"""
-    unit = db.query(Unit).filter(Unit.id == unit_id).first()
+    unit = await db.get(Unit, unit_id)
     
     if not unit:
         raise HTTPException(
@@ -114,28 +81,18 @@ async def get_unit(
             detail="Unit not found"
         )
     
-    return {
-        "id": unit.id,
-        "unitNumber": unit.unitNumber,
-        "bedrooms": unit.bedrooms,
-        "bathrooms": unit.bathrooms,
-        "rentAmount": unit.rentAmount,
-        "propertyId": unit.propertyId,
-        "createdAt": unit.createdAt,
-        "updatedAt": unit.updatedAt,
-        "status": compute_unit_status(unit, db)
-    }
+    return unit
 
 
 @router.put("/{unit_id}", response_model=UnitResponse)
 async def update_unit(
     unit_id: int,
     unit_data: UnitUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Update a unit"""
-    unit = db.query(Unit).filter(Unit.id == unit_id).first()
+    unit = await db.get(Unit, unit_id)
     
     if not unit:
         raise HTTPException(
@@ -144,41 +101,51 @@ async def update_unit(
         )
     
     # Verify landlord owns the property
-    property_obj = db.query(Property).filter(Property.id == unit.propertyId).first()
+    property_obj = await db.get(Property, unit.propertyId)
     if property_obj.landlordId != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this unit"
         )
     
+    update_data = unit_data.model_dump(exclude_unset=True)
+    if update_data.get("propertyId") is None:
+        update_data.pop("propertyId", None)
+    moved = "propertyId" in update_data and update_data["propertyId"] != unit.propertyId
+    if moved:
+        target = await db.get(Property, update_data["propertyId"])
+        if not target:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Property not found"
+            )
+        # Same landlord on both sides, so the denormalized landlordId of the
+        # unit's leases, payments and maintenance requests stays correct
+        if target.landlordId != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to move unit to this property"
+            )
+    
     # Update fields
-    for key, value in unit_data.model_dump(exclude_unset=True).items():
+    for key, value in update_data.items():
         setattr(unit, key, value)
     
-    db.commit()
-    db.refresh(unit)
+    touch_landlord(db, current_user.id)
+    await db.commit()
+    await db.refresh(unit)
     
-    return {
-        "id": unit.id,
-        "unitNumber": unit.unitNumber,
-        "bedrooms": unit.bedrooms,
-        "bathrooms": unit.bathrooms,
-        "rentAmount": unit.rentAmount,
-        "propertyId": unit.propertyId,
-        "createdAt": unit.createdAt,
-        "updatedAt": unit.updatedAt,
-        "status": compute_unit_status(unit, db)
-    }
+    return unit
 
 
 @router.delete("/{unit_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_unit(
     unit_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Delete a unit"""
-    unit = db.query(Unit).filter(Unit.id == unit_id).first()
+    unit = await db.get(Unit, unit_id)
     
     if not unit:
         raise HTTPException(
@@ -187,48 +154,50 @@ async def delete_unit(
         )
     
     # Verify landlord owns the property
-    property_obj = db.query(Property).filter(Property.id == unit.propertyId).first()
+    property_obj = await db.get(Property, unit.propertyId)
     if property_obj.landlordId != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this unit"
         )
     
-    db.delete(unit)
-    db.commit()
+    await db.delete(unit)
+    # Cascades to leases, payments and maintenance, so recount
+    await db.run_sync(rebuild_stats, current_user.id)
+    await db.commit()
     
     return None
 
 
-@router.get("/property/{property_id}", response_model=List[UnitResponse])
+@router.get("/property/{property_id}", response_model=Page[UnitResponse])
 async def get_units_by_property(
     property_id: int,
-    db: Session = Depends(get_db),
+    page: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all units for a specific property"""
+    """Get a page of units for a specific property"""
     # Verify property exists
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    property_obj = await db.get(Property, property_id)
     if not property_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Property not found"
         )
     
-    units = db.query(Unit).filter(Unit.propertyId == property_id).all()
-    return units
+    return await paginate(db, select(Unit).where(Unit.propertyId == property_id), Unit, page)
 
 
 @router.post("/property/{property_id}", response_model=UnitResponse, status_code=status.HTTP_201_CREATED)
 async def create_unit_for_property(
     property_id: int,
     unit_data: UnitCreateForProperty,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_landlord)
 ):
     """Create a new unit for a specific property"""
     # Verify property exists and belongs to landlord
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    property_obj = await db.get(Property, property_id)
     
     if not property_obj:
         raise HTTPException(
@@ -257,7 +226,8 @@ async def create_unit_for_property(
     new_unit = Unit(**unit_dict)
     
     db.add(new_unit)
-    db.commit()
-    db.refresh(new_unit)
+    await db.run_sync(bump_stats, current_user.id, units=1)
+    await db.commit()
+    await db.refresh(new_unit)
     
     return new_unit
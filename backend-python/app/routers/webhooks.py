@@ -2,14 +2,14 @@
 Webhooks Router
 Handles external webhooks (e.g., Stripe)
 """
-from fastapi import APIRouter, Request, HTTPException, status, Header
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import APIRouter, Depends, Request, HTTPException, status, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+import json
 import os
 import stripe
 
-from ..database import SessionLocal
-from ..models import Payment
+from ..database import get_db
+from ..webhook_inbox import notify_consumer, store_event
 
 router = APIRouter()
 
@@ -19,8 +19,12 @@ webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
 
 
 @router.post("/stripe")
-async def stripe_webhook(request: Request, stripe_signature: str = Header(None)):
-    """Handle Stripe webhook events"""
+async def stripe_webhook(
+    request: Request,
+    stripe_signature: str = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Receive Stripe webhook events into the inbox"""
     
     if not webhook_secret:
         raise HTTPException(
@@ -31,7 +35,8 @@ async def stripe_webhook(request: Request, stripe_signature: str = Header(None))
     payload = await request.body()
     
     try:
-        event = stripe.Webhook.construct_event(
+        # Raises unless the payload is signed with our webhook secret
+        stripe.Webhook.construct_event(
             payload, stripe_signature, webhook_secret
         )
     except ValueError:
@@ -39,33 +44,9 @@ async def stripe_webhook(request: Request, stripe_signature: str = Header(None))
     except stripe.error.SignatureVerificationError:
         raise HTTPException(status_code=400, detail="Invalid signature")
     
-    # Handle the event
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        
-        # Get payment_id from metadata
-        payment_id = session.get("metadata", {}).get("payment_id")
-        
-        if payment_id:
-            db = SessionLocal()
-            try:
-                payment = db.query(Payment).filter(Payment.id == int(payment_id)).first()
-                if payment:
-                    payment.status = "PAID"
-                    payment.paidAt = datetime.utcnow()
-                    payment.stripePaymentId = session.get("payment_intent")
-                    db.commit()
-                    print(f"✅ Payment {payment_id} marked as PAID")
-                else:
-                    print(f"❌ Payment {payment_id} not found")
-            except Exception as e:
-                print(f"❌ Error updating payment: {str(e)}")
-                db.rollback()
-            finally:
-                db.close()
+    # Store and acknowledge; the inbox consumer applies it (app/webhook_inbox.py)
+    stored = await db.run_sync(store_event, json.loads(payload))
+    await db.commit()
+    notify_consumer()
     
-    elif event["type"] == "payment_intent.payment_failed":
-        payment_intent = event["data"]["object"]
-        print(f"❌ Payment failed: {payment_intent['id']}")
-    
-    return {"status": "success"}
+    return {"status": "success", "duplicate": not stored}
@@ -0,0 +1,73 @@
+"""
+Payment schedules
+Computes a lease's monthly due dates in one pass and inserts the whole
+schedule with a single bulk INSERT inside the caller's transaction. Also
+holds the overdue flag written payments start with; the sweeper flags
+the ones that fall overdue later (app/sweeper.py).
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .models import Payment
+
+# Leases without an end date are billed for a year
+DEFAULT_TERM = relativedelta(years=1)
+
+
+def overdue_at(due_date: Optional[datetime], flagged_at: Optional[datetime] = None,
+               now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    overdueAt for a pending payment being written by a handler: set when it
+    is already past due (keeping an earlier flag), cleared when the due date
+    moved into the future.
+    """
+    now = now or datetime.utcnow()
+    if due_date is None or due_date >= now:
+        return None
+    return flagged_at or now
+
+
+def monthly_due_dates(start: datetime, end: Optional[datetime] = None) -> List[datetime]:
+    """
+    Due dates for every month that starts before the end date.
+
+    Each date is offset from the start rather than from the previous due
+    date, so a lease starting on the 31st stays on the last day of short
+    months instead of drifting to the 28th. Terms are compared by calendar
+    day, so a lease ending on its anniversary does not owe an extra month.
+    A lease always owes at least its first month.
+    """
+    end = end or start + DEFAULT_TERM
+    months = (end.year - start.year) * 12 + (end.month - start.month) + 1
+    dates = [start + relativedelta(months=offset) for offset in range(max(months, 1))]
+    return [due for due in dates if due.date() < end.date()] or [start]
+
+
+def schedule_rows(lease_id: int, landlord_id: int, start: datetime, end: Optional[datetime], rent) -> List[dict]:
+    """PENDING payment rows for one lease; none when the lease has no rent"""
+    if rent is None:
+        return []
+    now = datetime.utcnow()
+    return [
+        {"leaseId": lease_id, "landlordId": landlord_id, "amount": float(rent), "dueDate": due, "status": "PENDING",
+         # Back-dated leases start with their past months already overdue
+         "overdueAt": overdue_at(due, now=now)}
+        for due in monthly_due_dates(start, end)
+    ]
+
+
+def insert_schedules(db: Session, leases: Iterable[Tuple[int, int, datetime, Optional[datetime], Optional[float]]]) -> Tuple[int, float]:
+    """
+    Insert the schedules for (lease id, landlord id, start, end, rent) tuples in one statement.
+
+    Runs in the caller's transaction and returns (payments, total amount)
+    for the rollup counters.
+    """
+    rows = [row for lease in leases for row in schedule_rows(*lease)]
+    if rows:
+        db.execute(insert(Payment), rows)
+    return len(rows), sum(row["amount"] for row in rows)
@@ -1,9 +1,9 @@
 """
 Pydantic Schemas for API request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, computed_field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Generic, TypeVar
 from enum import Enum
 
 
@@ -156,6 +156,7 @@ class UnitUpdate(BaseModel):
     bedrooms: Optional[int] = None
     bathrooms: Optional[int] = None
     rentAmount: Optional[float] = None
+    propertyId: Optional[int] = None
 
 
 class UnitResponse(UnitBase):
@@ -163,7 +164,8 @@ class UnitResponse(UnitBase):
     propertyId: int
     createdAt: datetime
     updatedAt: datetime
-    status: Optional[str] = None  # Computed field for occupancy status
+    status: Optional[str] = None  # Occupancy status maintained by the lease lifecycle
+    currentLeaseId: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -188,6 +190,16 @@ class LeaseUpdate(BaseModel):
     status: Optional[LeaseStatusEnum] = None
 
 
+class PaymentScheduleBulkRequest(BaseModel):
+    leaseIds: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class PaymentScheduleBulkResponse(BaseModel):
+    leases: int
+    skippedLeaseIds: List[int]
+    paymentsCreated: int
+
+
 class UnitBasic(BaseModel):
     id: int
     unitNumber: str
@@ -234,6 +246,7 @@ class PaymentResponse(PaymentBase):
     leaseId: int
     lease: Optional['LeaseResponse'] = None
     paidAt: Optional[datetime] = None
+    overdueAt: Optional[datetime] = None
     stripePaymentIntentId: Optional[str] = None
     createdAt: datetime
     updatedAt: datetime
@@ -264,6 +277,13 @@ class MaintenanceRequestUpdate(BaseModel):
     completedAt: Optional[datetime] = None
 
 
+class PhotoRenditions(BaseModel):
+    """A photo's URL and those of its renditions that are ready (app/thumbnails.py)"""
+    url: str
+    thumb: Optional[str] = None
+    preview: Optional[str] = None
+
+
 class MaintenanceRequestResponse(MaintenanceRequestBase):
     id: int
     leaseId: int
@@ -271,5 +291,43 @@ class MaintenanceRequestResponse(MaintenanceRequestBase):
     createdAt: datetime
     updatedAt: datetime
     completedAt: Optional[datetime] = None
+    # Same order as photos (MaintenanceRequest.photoRenditions)
+    photoRenditions: List[PhotoRenditions] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Alert Schemas
+class AlertResponse(BaseModel):
+    id: int
+    kind: str
+    type: str
+    severity: str
+    message: str
+    link: Optional[str] = None
+    date: datetime = Field(validation_alias="eventDate")
+    entityId: int
+    leaseId: int
+    readAt: Optional[datetime] = None
+    createdAt: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def read(self) -> bool:
+        return self.readAt is not None
+
+
+class AlertUnreadCount(BaseModel):
+    unread: int
+
+
+# Pagination Schemas
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Cursor-paginated list envelope; pass next_cursor back as ?cursor= for the next page"""
+    items: List[T]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,466 @@
+"""
+Synthetic portfolio generator
+Bulk-loads a realistic portfolio for load and scale testing: landlords with
+properties and units, a history of leases per unit (one tenant each) with
+their monthly payments, and maintenance requests with photo metadata:
+
+    python -m app.seed load [--landlords 100] [--properties 10] [--units 8] [--months 24] [--seed 1]
+
+The same seed, sizes and --as-of date produce the same rows. Ids are
+assigned here, after the highest ids already stored, so rows go out in
+large batches without RETURNING: COPY on PostgreSQL (psycopg2), executemany
+elsewhere. Indexes of tables that start out empty are dropped for the load
+and rebuilt once after it. The state the write handlers would have kept up
+(unit occupancy, landlord stats, alerts) is then derived from the loaded
+rows and the tables are analyzed.
+
+Every user signs in with --password (hashed once), as
+landlord<N>@seed<seed>.example.com or tenant<N>@seed<seed>.example.com,
+N counting from 1. Photo objects are rows only; no files are written.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import argparse
+import csv
+import hashlib
+import io
+import json
+import random
+import sys
+import time
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import JSON, DateTime, func, insert, select
+from sqlalchemy.orm import Session
+
+from .database import Base
+from .models import (
+    Lease, MaintenancePhoto, MaintenanceRequest, Payment, Property, Tenant, Unit, User
+)
+from .photo_store import content_url
+from .schedules import monthly_due_dates, overdue_at
+from .thumbnails import RENDITIONS, rendition_name
+
+# Parents before children, so foreign keys hold at every flush
+COLUMNS = {
+    "User": ("id", "name", "email", "password", "role", "createdAt", "updatedAt"),
+    "Tenant": ("id", "phone", "userId", "createdAt"),
+    "Property": ("id", "title", "address", "city", "province", "postalCode", "description", "landlordId",
+                 "createdAt", "updatedAt"),
+    "Unit": ("id", "unitNumber", "bedrooms", "bathrooms", "rentAmount", "propertyId", "status", "createdAt",
+             "updatedAt"),
+    "Lease": ("id", "startDate", "endDate", "rent", "status", "tenantId", "unitId", "landlordId", "createdAt",
+              "updatedAt"),
+    "Payment": ("id", "amount", "dueDate", "status", "paidAt", "overdueAt", "stripePaymentIntentId", "leaseId",
+                "landlordId", "createdAt", "updatedAt"),
+    "MaintenanceRequest": ("id", "title", "description", "status", "priority", "contractor", "leaseId",
+                           "landlordId", "createdAt", "updatedAt", "completedAt"),
+    "PhotoObject": ("sha256", "extension", "size", "contentType", "refCount", "createdAt", "renditions",
+                    "renditionAttempts"),
+    "MaintenancePhoto": ("id", "requestId", "url", "sha256", "size", "width", "height", "createdAt"),
+}
+
+# Tables whose ids are assigned here
+ID_MODELS = (User, Tenant, Property, Unit, Lease, Payment, MaintenanceRequest, MaintenancePhoto)
+
+# Rows buffered across tables before a flush
+BATCH_ROWS = 50000
+# Units whose occupancy is derived per statement
+OCCUPANCY_BATCH = 5000
+
+CITIES = (("Toronto", "ON", "M"), ("Ottawa", "ON", "K"), ("Vancouver", "BC", "V"), ("Calgary", "AB", "T"),
+          ("Montreal", "QC", "H"), ("Halifax", "NS", "B"), ("Winnipeg", "MB", "R"))
+STREETS = ("King", "Queen", "Dundas", "College", "Bloor", "Main", "Elm", "Oak", "Maple", "Park", "Lake", "Hill")
+STREET_TYPES = ("St", "Ave", "Rd", "Blvd", "Cres")
+BUILDINGS = ("Apartments", "Towers", "Residences", "Lofts", "Court", "House")
+FIRST_NAMES = ("Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+               "Priya", "Wei", "Omar", "Sofia", "Lucas", "Amara", "Noah", "Chloe", "Mateo", "Hana")
+LAST_NAMES = ("Smith", "Nguyen", "Patel", "Martin", "Singh", "Brown", "Tremblay", "Lee", "Wilson", "Garcia",
+              "Roy", "Chen", "Kim", "Taylor", "Khan", "Cohen", "Lopez", "Ali", "Murphy", "Dubois")
+ISSUES = ("Leaky faucet", "Clogged drain", "Broken heater", "No hot water", "Window won't close",
+          "Dishwasher not draining", "Light fixture out", "Mold in bathroom", "Door lock sticking",
+          "Fridge not cooling", "Smoke detector beeping", "Pest sighting")
+CONTRACTORS = ("City Plumbing", "Northside HVAC", "Bright Electric", "Handy Repairs", "Pest Away")
+
+
+def landlord_email(seed: int, number: int) -> str:
+    return f"landlord{number}@seed{seed}.example.com"
+
+
+def tenant_email(seed: int, number: int) -> str:
+    return f"tenant{number}@seed{seed}.example.com"
+
+
+@lru_cache(maxsize=4096)
+def _due_dates(start: datetime, term: int) -> Tuple[datetime, ...]:
+    # Leases share start days and terms; their schedules are computed once
+    return tuple(monthly_due_dates(start, start + relativedelta(months=term)))
+
+
+class _Writer:
+    """Buffers generated rows per table and writes them in bulk on one connection"""
+
+    def __init__(self, conn, next_ids: Dict[str, int]):
+        self.conn = conn
+        self.next_ids = next_ids
+        self.rows: Dict[str, List[tuple]] = {name: [] for name in COLUMNS}
+        self.counts: Dict[str, int] = {name: 0 for name in COLUMNS}
+        self.buffered = 0
+        self.copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+        # Column positions needing conversion for the raw drivers
+        self.converters = {}
+        for name, columns in COLUMNS.items():
+            table = Base.metadata.tables[name]
+            self.converters[name] = [
+                (position, _json if isinstance(table.c[column].type, JSON) else self._datetime)
+                for position, column in enumerate(columns)
+                if isinstance(table.c[column].type, (DateTime, JSON))
+            ]
+
+    def new_id(self, table: str) -> int:
+        self.next_ids[table] += 1
+        return self.next_ids[table]
+
+    def add(self, table: str, row: tuple) -> None:
+        self.rows[table].append(row)
+        self.buffered += 1
+
+    def flush_if_full(self) -> None:
+        if self.buffered >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        for name, rows in self.rows.items():
+            if rows:
+                self._write(name, rows)
+                self.counts[name] += len(rows)
+                rows.clear()
+        self.buffered = 0
+
+    def _datetime(self, value):
+        # SQLAlchemy's SQLite storage format; PostgreSQL parses the same text
+        return value.isoformat(" ") if value is not None else None
+
+    def _converted(self, name: str, rows: List[tuple]) -> List[tuple]:
+        converters = self.converters[name]
+        if not converters:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for position, convert in converters:
+                row[position] = convert(row[position])
+            converted.append(tuple(row))
+        return converted
+
+    def _write(self, name: str, rows: List[tuple]) -> None:
+        columns = COLUMNS[name]
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        if self.copy:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(self._converted(name, rows))
+            buffer.seek(0)
+            cursor = self.conn.connection.driver_connection.cursor()
+            try:
+                cursor.copy_expert(f'COPY "{name}" ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+            finally:
+                cursor.close()
+        elif self.conn.dialect.name == "sqlite":
+            placeholders = ", ".join("?" for _ in columns)
+            self.conn.exec_driver_sql(
+                f'INSERT INTO "{name}" ({column_list}) VALUES ({placeholders})', self._converted(name, rows)
+            )
+        else:
+            self.conn.execute(insert(Base.metadata.tables[name]), [dict(zip(columns, row)) for row in rows])
+
+
+def _json(value):
+    return json.dumps(value) if value is not None else None
+
+
+class _Generator:
+    """Generates the rows of a portfolio, in a fixed order of random draws"""
+
+    def __init__(self, writer: _Writer, seed: int, as_of: datetime, password_hash: str, months: int,
+                 occupancy: float, maintenance_per_year: float, max_photos: int):
+        self.writer = writer
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.as_of = as_of
+        self.password_hash = password_hash
+        self.months = months
+        self.occupancy = occupancy
+        self.maintenance_per_year = maintenance_per_year
+        self.max_photos = max_photos
+        self.history_start = as_of - relativedelta(months=months)
+        self.landlords = 0
+        self.tenants = 0
+        self.landlord_ids: List[int] = []
+        self.unit_ids: List[int] = []
+
+    def _name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def _before(self, moment: datetime, max_days: int) -> datetime:
+        return moment - timedelta(days=self.rng.randint(1, max_days), seconds=self.rng.randint(0, 86399))
+
+    def landlord(self, properties: int, units: int) -> None:
+        writer, rng = self.writer, self.rng
+        self.landlords += 1
+        landlord_id = writer.new_id("User")
+        self.landlord_ids.append(landlord_id)
+        joined = self._before(self.history_start, 365)
+        writer.add("User", (landlord_id, self._name(), landlord_email(self.seed, self.landlords),
+                            self.password_hash, "LANDLORD", joined, joined))
+
+        for _ in range(properties):
+            property_id = writer.new_id("Property")
+            city, province, postal = rng.choice(CITIES)
+            street = f"{rng.randint(1, 2999)} {rng.choice(STREETS)} {rng.choice(STREET_TYPES)}"
+            added = joined + timedelta(days=rng.randint(0, 90), seconds=rng.randint(0, 86399))
+            writer.add("Property", (
+                property_id, f"{street.split(' ', 1)[1]} {rng.choice(BUILDINGS)}", street, city, province,
+                f"{postal}{rng.randint(1, 9)}{chr(65 + rng.randint(0, 25))} {rng.randint(1, 9)}"
+                f"{chr(65 + rng.randint(0, 25))}{rng.randint(1, 9)}",
+                None, landlord_id, added, added
+            ))
+            for number in range(units):
+                self.unit(landlord_id, property_id, number, added)
+            writer.flush_if_full()
+
+    def unit(self, landlord_id: int, property_id: int, number: int, added: datetime) -> None:
+        writer, rng = self.writer, self.rng
+        unit_id = writer.new_id("Unit")
+        self.unit_ids.append(unit_id)
+        bedrooms = rng.choice((0, 1, 1, 2, 2, 3))
+        rent = 1100 + 450 * bedrooms + rng.randint(-10, 10) * 10
+        # Occupancy is derived from the leases once they are loaded
+        writer.add("Unit", (unit_id, f"{number // 10 + 1}{number % 10 + 1:02d}", bedrooms, 1 + (bedrooms >= 3),
+                            float(rent), property_id, "AVAILABLE", added, added))
+
+        cursor = self.history_start + timedelta(days=rng.randint(0, 90))
+        while cursor <= self.as_of:
+            start = cursor.replace(hour=0, minute=0, second=0, microsecond=0)
+            term = rng.choice((6, 12, 12, 12, 24))
+            end = start + relativedelta(months=term)
+            status = "EXPIRED"
+            if end > self.as_of:
+                status = "ACTIVE"
+                if rng.random() >= self.occupancy:
+                    # Moved out early; the unit is vacant now
+                    status = "TERMINATED"
+                    end = start + timedelta(days=rng.randint(1, max((self.as_of - start).days, 1)))
+            elif rng.random() < 0.1:
+                status = "TERMINATED"
+                end = start + timedelta(days=rng.randint(30, max((end - start).days - 1, 30)))
+            self.lease(landlord_id, unit_id, start, term, end, status, int(rent))
+            cursor = end + timedelta(days=rng.randint(1, 45))
+            rent = int(rent * 1.025)
+
+    def lease(self, landlord_id: int, unit_id: int, start: datetime, term: int, end: datetime, status: str,
+              rent: int) -> None:
+        writer, rng = self.writer, self.rng
+        self.tenants += 1
+        user_id, tenant_id, lease_id = writer.new_id("User"), writer.new_id("Tenant"), writer.new_id("Lease")
+        signed = self._before(start, 30)
+        ended = min(end, self.as_of) if status != "ACTIVE" else signed
+        writer.add("User", (user_id, self._name(), tenant_email(self.seed, self.tenants), self.password_hash,
+                            "TENANT", signed, signed))
+        writer.add("Tenant", (tenant_id, f"+1-{rng.randint(200, 999)}-555-{rng.randint(0, 9999):04d}", user_id,
+                              signed))
+        writer.add("Lease", (lease_id, start, end, rent, status, tenant_id, unit_id, landlord_id, signed, ended))
+
+        # As monthly_due_dates(start, end) for leases ended early
+        dues = [due for due in _due_dates(start, term) if due.date() < end.date()] or [start]
+        for offset, due in enumerate(dues):
+            if due > self.as_of + timedelta(days=31):
+                break
+            paid_at, intent = None, None
+            draw = rng.random()
+            if due <= self.as_of - timedelta(days=90):
+                # Long unpaid rent has been written off as failed
+                state = "PAID" if draw < 0.985 else "FAILED"
+            elif due <= self.as_of - timedelta(days=5):
+                state = "PAID" if draw < 0.96 else "FAILED" if draw < 0.97 else "PENDING"
+            elif due <= self.as_of:
+                state = "PAID" if draw < 0.5 else "PENDING"
+            else:
+                state = "PAID" if draw < 0.05 else "PENDING"
+            payment_id = writer.new_id("Payment")
+            if state == "PAID":
+                paid_at = min(due + timedelta(hours=rng.randint(-72, 96)), self.as_of)
+                intent = f"pi_seed{self.seed}_{payment_id}"
+            flagged = overdue_at(due, due + timedelta(days=1), now=self.as_of) if state == "PENDING" else None
+            created = signed + timedelta(seconds=offset)
+            writer.add("Payment", (payment_id, float(rent), due, state, paid_at, flagged, intent, lease_id,
+                                   landlord_id, created, paid_at or created))
+
+        for due in dues:
+            if due > self.as_of:
+                break
+            if rng.random() < self.maintenance_per_year / 12:
+                self.maintenance(landlord_id, lease_id, due + timedelta(days=rng.randint(0, 27),
+                                                                        seconds=rng.randint(0, 86399)))
+
+    def maintenance(self, landlord_id: int, lease_id: int, reported: datetime) -> None:
+        writer, rng = self.writer, self.rng
+        reported = min(reported, self.as_of)
+        age = (self.as_of - reported).days
+        draw = rng.random()
+        if age > 60:
+            status = "COMPLETED" if draw < 0.85 else "CANCELED"
+        elif age > 14:
+            status = "COMPLETED" if draw < 0.5 else "IN_PROGRESS" if draw < 0.8 else "PENDING"
+        else:
+            status = "PENDING" if draw < 0.6 else "IN_PROGRESS"
+        completed = None
+        if status == "COMPLETED":
+            completed = min(reported + timedelta(days=rng.randint(1, 14), hours=rng.randint(0, 23)), self.as_of)
+        issue = rng.choice(ISSUES)
+        request_id = writer.new_id("MaintenanceRequest")
+        writer.add("MaintenanceRequest", (
+            request_id, issue, f"{issue}, reported by the tenant", status,
+            rng.choices(("LOW", "MEDIUM", "HIGH"), (3, 5, 2))[0],
+            rng.choice(CONTRACTORS) if status in ("IN_PROGRESS", "COMPLETED") else None,
+            lease_id, landlord_id, reported, completed or reported, completed
+        ))
+
+        for _ in range(rng.randint(0, self.max_photos)):
+            photo_id = writer.new_id("MaintenancePhoto")
+            sha256 = hashlib.sha256(f"seed{self.seed}:photo{photo_id}".encode()).hexdigest()
+            size = rng.randint(200_000, 4_000_000)
+            width, height = (4032, 3024) if rng.random() < 0.5 else (3024, 4032)
+            renditions = {name: "/uploads/objects/" + rendition_name(sha256, name) for name in RENDITIONS}
+            writer.add("PhotoObject", (sha256, ".jpg", size, "image/jpeg", 1, reported, renditions, 0))
+            writer.add("MaintenancePhoto", (photo_id, request_id, content_url(sha256, ".jpg"), sha256, size,
+                                            width, height, reported))
+
+
+def _next_ids(conn) -> Dict[str, int]:
+    return {
+        model.__tablename__: conn.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+        for model in ID_MODELS
+    }
+
+
+def _empty_tables(conn) -> List[str]:
+    return [
+        name for name in COLUMNS
+        if conn.execute(select(1).select_from(Base.metadata.tables[name]).limit(1)).first() is None
+    ]
+
+
+def _derive_state(engine, landlord_ids: List[int], unit_ids: List[int], as_of: datetime) -> None:
+    """Occupancy, stats and alerts, as the write handlers and sweeps would have left them"""
+    from .alerts import sweep_alerts
+    from .occupancy import sync_unit_occupancy
+    from .stats import rebuild_stats
+
+    with Session(engine) as db:
+        for start in range(0, len(unit_ids), OCCUPANCY_BATCH):
+            sync_unit_occupancy(db, unit_ids[start:start + OCCUPANCY_BATCH])
+        db.commit()
+        for landlord_id in landlord_ids:
+            rebuild_stats(db, landlord_id)
+        db.commit()
+        sweep_alerts(db, now=as_of, backfill=True)
+        db.commit()
+
+
+def load_portfolio(engine, landlords: int = 100, properties: int = 10, units: int = 8, months: int = 24,
+                   seed: int = 1, as_of: Optional[datetime] = None, password: str = "password123",
+                   occupancy: float = 0.92, maintenance_per_year: float = 1.5, max_photos: int = 3) -> Dict[str, int]:
+    """
+    Load a portfolio of `landlords`, each with `properties` of `units`, and
+    `months` of lease history up to `as_of` (today by default). Returns the
+    rows written per table.
+    """
+    from .auth import hash_password
+
+    as_of = as_of or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    with engine.connect() as conn:
+        if conn.execute(select(User.id).where(User.email == landlord_email(seed, 1))).first() is not None:
+            raise ValueError(f"Seed {seed} is already loaded (choose another seed)")
+
+        pragmas = {}
+        if conn.dialect.name == "sqlite":
+            for pragma, value in (("synchronous", "OFF"), ("cache_size", "-262144")):
+                pragmas[pragma] = conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+                conn.exec_driver_sql(f"PRAGMA {pragma}={value}")
+
+        deferred = [
+            index for name in _empty_tables(conn) for index in Base.metadata.tables[name].indexes
+        ]
+        for index in deferred:
+            index.drop(conn)
+
+        writer = _Writer(conn, _next_ids(conn))
+        generator = _Generator(writer, seed, as_of, hash_password(password), months, occupancy,
+                               maintenance_per_year, max_photos)
+        try:
+            for _ in range(landlords):
+                generator.landlord(properties, units)
+            writer.flush()
+        except Exception:
+            conn.rollback()
+            # pysqlite runs DDL outside the transaction: put the indexes back
+            for index in deferred:
+                index.create(conn, checkfirst=True)
+            conn.commit()
+            raise
+
+        for index in deferred:
+            index.create(conn)
+        if conn.dialect.name == "postgresql":
+            for model in ID_MODELS:
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('\"{model.__tablename__}\"', 'id'), "
+                    f"(SELECT max(id) FROM \"{model.__tablename__}\"))"
+                )
+        conn.commit()
+        for pragma, value in pragmas.items():
+            conn.exec_driver_sql(f"PRAGMA {pragma}={value}")
+
+    _derive_state(engine, generator.landlord_ids, generator.unit_ids, as_of)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+    return writer.counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic portfolio data for load and scale testing")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    load_parser = subparsers.add_parser("load", help="Bulk-load a generated portfolio")
+    load_parser.add_argument("--landlords", type=int, default=100)
+    load_parser.add_argument("--properties", type=int, default=10, help="Properties per landlord")
+    load_parser.add_argument("--units", type=int, default=8, help="Units per property")
+    load_parser.add_argument("--months", type=int, default=24, help="Months of lease and payment history")
+    load_parser.add_argument("--seed", type=int, default=1)
+    load_parser.add_argument("--as-of", type=lambda value: datetime.strptime(value, "%Y-%m-%d"), default=None,
+                             help="Date the history runs up to (YYYY-MM-DD, default today)")
+    load_parser.add_argument("--password", default="password123", help="Password of every generated user")
+    load_parser.add_argument("--occupancy", type=float, default=0.92, help="Share of units with an active lease")
+    load_parser.add_argument("--maintenance-per-year", type=float, default=1.5, help="Requests per lease per year")
+    load_parser.add_argument("--max-photos", type=int, default=3, help="Photos per request, at most")
+    args = parser.parse_args(argv)
+
+    from .database import engine
+
+    started = time.perf_counter()
+    try:
+        counts = load_portfolio(
+            engine, args.landlords, args.properties, args.units, args.months, args.seed, args.as_of,
+            args.password, args.occupancy, args.maintenance_per_year, args.max_photos
+        )
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        return 1
+    print(", ".join(f"{name}={count}" for name, count in counts.items()))
+    print(f"✅ Loaded {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Slow-query log
+Statements taking SLOW_QUERY_MS or longer are written, one JSON object per
+line, to SLOW_QUERY_LOG_FILE (rotated at SLOW_QUERY_LOG_MAX_BYTES) with
+their SQL, parameters, the route that ran them (app/query_stats.py) and
+the database's plan for them:
+
+    {"at": "...", "ms": 812.4, "route": "GET /api/dashboard/stats",
+     "sql": "SELECT ...", "params": [3, "PENDING"],
+     "plan": ["SEARCH Payment USING INDEX ix_Payment_landlordId_status_dueDate ..."],
+     "suppressed": 0}
+
+The plan is EXPLAIN QUERY PLAN on SQLite and EXPLAIN on PostgreSQL, run on
+the same connection inside a savepoint so a failing EXPLAIN cannot abort
+the caller's transaction. SLOW_QUERY_EXPLAIN=analyze adds ANALYZE (and
+BUFFERS) for SELECTs on PostgreSQL, which runs the statement a second
+time; off skips plans.
+
+At most SLOW_QUERY_MAX_PER_MINUTE statements are logged (and explained)
+per minute; the ones past that are only counted, in the next entry's
+"suppressed", so a slow database under load is not slowed further by its
+own log.
+"""
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+
+from .query_stats import current_queries, route_name
+
+# 0 disables the log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+# plan, analyze or off
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "plan").lower()
+SLOW_QUERY_MAX_PER_MINUTE = int(os.getenv("SLOW_QUERY_MAX_PER_MINUTE", "30"))
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", os.path.join("logs", "slow_queries.log"))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# Longest parameter value kept in an entry
+_MAX_PARAM_CHARS = 200
+
+logger = logging.getLogger("app.slow_queries")
+logger.propagate = False
+
+_lock = threading.Lock()
+_window = {"start": 0.0, "logged": 0, "suppressed": 0}
+
+
+def _handler_for(path: str) -> Optional[logging.Handler]:
+    for handler in logger.handlers:
+        if getattr(handler, "baseFilename", None) == os.path.abspath(path):
+            return handler
+    return None
+
+
+def _ensure_handler() -> None:
+    if _handler_for(SLOW_QUERY_LOG_FILE):
+        return
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    os.makedirs(os.path.dirname(os.path.abspath(SLOW_QUERY_LOG_FILE)), exist_ok=True)
+    handler = RotatingFileHandler(
+        SLOW_QUERY_LOG_FILE, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def _admit() -> Optional[int]:
+    """Take a slot in this minute's budget: the count suppressed before it, or None when over budget"""
+    now = time.monotonic()
+    with _lock:
+        if now - _window["start"] >= 60:
+            _window["start"], _window["logged"] = now, 0
+        if _window["logged"] >= SLOW_QUERY_MAX_PER_MINUTE:
+            _window["suppressed"] += 1
+            return None
+        _window["logged"] += 1
+        suppressed, _window["suppressed"] = _window["suppressed"], 0
+        return suppressed
+
+
+def _param(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = str(value)
+    return text if len(text) <= _MAX_PARAM_CHARS else text[:_MAX_PARAM_CHARS] + "..."
+
+
+def _params(parameters):
+    if isinstance(parameters, dict):
+        return {key: _param(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_param(value) for value in parameters]
+    return _param(parameters)
+
+
+def explain(conn, statement: str, parameters) -> Optional[List[str]]:
+    """The plan of a statement, run on the connection that ran it; None for other databases"""
+    dialect = conn.dialect.name
+    analyze = SLOW_QUERY_EXPLAIN == "analyze" and statement.lstrip()[:6].upper() == "SELECT"
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    else:
+        return None
+
+    conn.info["slow_query_explaining"] = True
+    try:
+        if dialect == "postgresql":
+            conn.exec_driver_sql("SAVEPOINT slow_query_explain")
+        try:
+            rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+        except Exception as exc:
+            if dialect == "postgresql":
+                conn.exec_driver_sql("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return [f"EXPLAIN failed: {exc}"[:500]]
+        if dialect == "postgresql":
+            conn.exec_driver_sql("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        conn.info.pop("slow_query_explaining", None)
+    # SQLite: (id, parent, notused, detail); PostgreSQL: one text column per line
+    return [str(row[-1]) for row in rows]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if SLOW_QUERY_MS > 0:
+        context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None or SLOW_QUERY_MS <= 0 or conn.info.get("slow_query_explaining"):
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+    suppressed = _admit()
+    if suppressed is None:
+        return
+
+    queries = current_queries()
+    entry = {
+        "at": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+        "ms": round(elapsed_ms, 1),
+        "route": route_name(queries.scope) if queries is not None and queries.scope else None,
+        "sql": statement,
+        "params": _params(parameters),
+        "executemany": executemany,
+        "plan": None,
+        "suppressed": suppressed,
+    }
+    try:
+        if SLOW_QUERY_EXPLAIN in ("plan", "analyze") and not executemany:
+            entry["plan"] = explain(conn, statement, parameters)
+        _ensure_handler()
+        logger.info(json.dumps(entry, default=str))
+    except Exception as exc:
+        print(f"❌ Slow-query log failed: {exc}")
+
+
+def instrument_engine(engine) -> None:
+    """Log the statements `engine` runs past SLOW_QUERY_MS (sync engines; async_engine.sync_engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
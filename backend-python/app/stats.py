@@ -0,0 +1,228 @@
+"""
+Landlord statistics rollup
+Keeps LandlordStats counters in step with the write handlers and
+provides a rebuild command for drift repair:
+
+    python -m app.stats rebuild [--landlord-id ID]
+"""
+from typing import Optional
+import argparse
+
+from sqlalchemy import func, select, update, case, and_, true
+from sqlalchemy.orm import Session
+
+from .models import User, Property, Unit, Lease, Payment, MaintenanceRequest, LandlordStats
+from .database import insert_ignoring_conflicts
+from .dashboard_cache import touch_landlord
+
+
+# Payment status -> (count column, amount column)
+PAYMENT_COUNTERS = {
+    "PENDING": ("pendingPayments", "pendingAmount"),
+    "PAID": ("paidPayments", "paidAmount"),
+}
+
+# Maintenance status -> count column
+MAINTENANCE_COUNTERS = {
+    "PENDING": "pendingMaintenance",
+    "IN_PROGRESS": "inProgressMaintenance",
+    "COMPLETED": "completedMaintenance",
+    "CANCELED": "canceledMaintenance",
+}
+
+
+def _status_key(status) -> Optional[str]:
+    """Normalize an enum member or plain string to its status name"""
+    if status is None:
+        return None
+    return getattr(status, "value", status)
+
+
+def landlord_aggregates(db: Session, landlord_id: int) -> dict:
+    """
+    Compute every landlord dashboard counter in a single round trip.
+
+    Each table is reduced to a one-row CTE with conditional aggregates and
+    the CTEs are cross joined. Leases, payments and maintenance requests
+    carry their landlordId, so only the unit counts join back to Property.
+    Overdue payments are the ones the sweeper has flagged (app/sweeper.py).
+    """
+    owned = Property.landlordId == landlord_id
+
+    property_totals = select(
+        func.count(Property.id).label("properties")
+    ).where(owned).cte("property_totals")
+
+    unit_totals = select(
+        func.count(Unit.id).label("units"),
+        func.count(case((Unit.status == "OCCUPIED", Unit.id))).label("occupied_units")
+    ).join(Property).where(owned).cte("unit_totals")
+
+    lease_totals = select(
+        func.count(Lease.id).label("active_leases")
+    ).where(
+        Lease.landlordId == landlord_id,
+        Lease.status == "ACTIVE"
+    ).cte("lease_totals")
+
+    payment_totals = select(
+        func.count(case((Payment.status == "PENDING", Payment.id))).label("pending_payments"),
+        func.coalesce(func.sum(case((Payment.status == "PENDING", Payment.amount))), 0).label("pending_amount"),
+        func.count(case((Payment.status == "PAID", Payment.id))).label("paid_payments"),
+        func.coalesce(func.sum(case((Payment.status == "PAID", Payment.amount))), 0).label("paid_amount"),
+        func.count(case((and_(Payment.status == "PENDING", Payment.overdueAt.is_not(None)), Payment.id))).label("overdue_payments"),
+        func.coalesce(func.sum(case((and_(Payment.status == "PENDING", Payment.overdueAt.is_not(None)), Payment.amount))), 0).label("overdue_amount")
+    ).where(Payment.landlordId == landlord_id).cte("payment_totals")
+
+    maintenance_totals = select(
+        func.count(case((MaintenanceRequest.status == "PENDING", MaintenanceRequest.id))).label("pending_maintenance"),
+        func.count(case((MaintenanceRequest.status == "IN_PROGRESS", MaintenanceRequest.id))).label("in_progress_maintenance"),
+        func.count(case((MaintenanceRequest.status == "COMPLETED", MaintenanceRequest.id))).label("completed_maintenance"),
+        func.count(case((MaintenanceRequest.status == "CANCELED", MaintenanceRequest.id))).label("canceled_maintenance")
+    ).where(MaintenanceRequest.landlordId == landlord_id).cte("maintenance_totals")
+
+    totals = [property_totals, unit_totals, lease_totals, payment_totals, maintenance_totals]
+    from_clause = totals[0]
+    for cte in totals[1:]:
+        from_clause = from_clause.join(cte, true())
+
+    row = db.execute(
+        select(*[column for cte in totals for column in cte.c]).select_from(from_clause)
+    ).one()
+
+    return dict(row._mapping)
+
+
+def payment_delta(status, amount, sign: int = 1) -> dict:
+    """Counter changes for adding (sign=1) or removing (sign=-1) a payment"""
+    columns = PAYMENT_COUNTERS.get(_status_key(status))
+    if not columns:
+        return {}
+    count_column, amount_column = columns
+    return {count_column: sign, amount_column: sign * float(amount or 0)}
+
+
+def maintenance_delta(status, sign: int = 1) -> dict:
+    """Counter changes for adding (sign=1) or removing (sign=-1) a maintenance request"""
+    column = MAINTENANCE_COUNTERS.get(_status_key(status))
+    return {column: sign} if column else {}
+
+
+def merge_deltas(*deltas: dict) -> dict:
+    """Sum several counter deltas into one"""
+    merged = {}
+    for delta in deltas:
+        for key, value in delta.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def rebuild_stats(db: Session, landlord_id: int, invalidate: bool = True) -> LandlordStats:
+    """
+    Recompute a landlord's rollup row from the source tables.
+
+    A missing row is created with an insert that skips an existing one and
+    then updated in place, so two requests materializing the same landlord
+    at once both succeed instead of one failing on the primary key.
+    invalidate=False leaves the landlord's cached dashboard alone.
+    """
+    if invalidate:
+        touch_landlord(db, landlord_id)
+    db.flush()
+    totals = landlord_aggregates(db, landlord_id)
+
+    db.execute(insert_ignoring_conflicts(db, LandlordStats, LandlordStats.landlordId).values(landlordId=landlord_id))
+    db.execute(
+        update(LandlordStats)
+        .where(LandlordStats.landlordId == landlord_id)
+        .values(
+            properties=totals["properties"],
+            units=totals["units"],
+            activeLeases=totals["active_leases"],
+            pendingPayments=totals["pending_payments"],
+            pendingAmount=float(totals["pending_amount"]),
+            paidPayments=totals["paid_payments"],
+            paidAmount=float(totals["paid_amount"]),
+            pendingMaintenance=totals["pending_maintenance"],
+            inProgressMaintenance=totals["in_progress_maintenance"],
+            completedMaintenance=totals["completed_maintenance"],
+            canceledMaintenance=totals["canceled_maintenance"],
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.get(LandlordStats, landlord_id, populate_existing=True)
+
+
+def bump_stats(db: Session, landlord_id: Optional[int], **deltas) -> None:
+    """
+    Apply counter deltas to a landlord's rollup row.
+
+    Runs as an in-place UPDATE in the caller's transaction, so the counters
+    commit or roll back together with the change that caused them. A
+    missing row is built from scratch instead. The landlord's cached
+    dashboard is dropped on commit even when no counter moved.
+    """
+    touch_landlord(db, landlord_id)
+    deltas = {key: value for key, value in deltas.items() if value}
+    if landlord_id is None or not deltas:
+        return
+
+    result = db.execute(
+        update(LandlordStats)
+        .where(LandlordStats.landlordId == landlord_id)
+        .values({getattr(LandlordStats, key): getattr(LandlordStats, key) + value for key, value in deltas.items()})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        rebuild_stats(db, landlord_id)
+
+
+def get_stats(db: Session, landlord_id: int) -> LandlordStats:
+    """
+    Primary-key read of a landlord's rollup, materializing it on first use.
+    A materialized row is left for the caller to commit.
+    """
+    stats = db.get(LandlordStats, landlord_id)
+    if stats is None:
+        # Counts the source tables as they are, so nothing cached goes stale;
+        # invalidating would also discard the dashboard read doing this
+        stats = rebuild_stats(db, landlord_id, invalidate=False)
+    return stats
+
+
+def rebuild_all(db: Session, landlord_id: Optional[int] = None) -> int:
+    """Rebuild rollups for one landlord or every landlord"""
+    if landlord_id is not None:
+        landlord_ids = [landlord_id]
+    else:
+        landlord_ids = db.execute(
+            select(User.id).where(User.role == "LANDLORD").order_by(User.id)
+        ).scalars().all()
+
+    for lid in landlord_ids:
+        rebuild_stats(db, lid)
+        db.commit()
+
+    return len(landlord_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain landlord statistics rollups")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Recompute rollups from the source tables")
+    rebuild_parser.add_argument("--landlord-id", type=int, default=None, help="Only rebuild this landlord")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            count = rebuild_all(db, args.landlord_id)
+            print(f"✅ Rebuilt statistics for {count} landlord(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
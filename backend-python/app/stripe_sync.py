@@ -0,0 +1,217 @@
+"""
+Stripe reconciliation
+Brings a landlord's pending payments up to date with their Stripe
+PaymentIntents, for payments whose webhook never arrived.
+
+Intents are retrieved on a bounded thread pool (the Stripe library is
+synchronous), a batch at a time: every call has a timeout, transient
+failures (network errors, timeouts, 429 and 5xx) are retried with
+exponentially growing, fully jittered delays, and each batch's payments
+are marked PAID and committed before the next batch starts, so an
+interrupted sync keeps what it already reconciled.
+
+Small syncs run inside the request; larger ones become an in-process
+background job whose progress is polled with GET /api/payments/sync/{id}.
+Jobs live in the worker that started them.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import os
+import random
+import uuid
+
+import stripe
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .metrics import timed_stripe
+from .models import Payment
+from .stats import bump_stats
+from .alerts import sync_payment_alerts
+
+# Seconds before a single Stripe call gives up (the library default is 80)
+STRIPE_TIMEOUT_SECONDS = float(os.getenv("STRIPE_TIMEOUT_SECONDS", "10"))
+# Stripe calls in flight at once, across every sync in this worker
+STRIPE_SYNC_CONCURRENCY = int(os.getenv("STRIPE_SYNC_CONCURRENCY", "8"))
+# Retries of a transient failure, and the base of the backoff between them
+STRIPE_SYNC_RETRIES = int(os.getenv("STRIPE_SYNC_RETRIES", "3"))
+STRIPE_SYNC_BACKOFF_SECONDS = float(os.getenv("STRIPE_SYNC_BACKOFF_SECONDS", "0.5"))
+STRIPE_SYNC_MAX_BACKOFF_SECONDS = 8.0
+# Payments per committed batch, and the most a request reconciles inline
+STRIPE_SYNC_BATCH_SIZE = int(os.getenv("STRIPE_SYNC_BATCH_SIZE", "50"))
+STRIPE_SYNC_INLINE_LIMIT = int(os.getenv("STRIPE_SYNC_INLINE_LIMIT", "50"))
+# Finished jobs kept for progress polling
+STRIPE_SYNC_JOB_HISTORY = 256
+
+if stripe.default_http_client is None:
+    stripe.default_http_client = stripe.http_client.RequestsClient(timeout=STRIPE_TIMEOUT_SECONDS)
+
+_stripe_pool = ThreadPoolExecutor(max_workers=STRIPE_SYNC_CONCURRENCY, thread_name_prefix="stripe")
+
+
+def _retryable(exc: stripe.error.StripeError) -> bool:
+    """Network errors, timeouts, rate limits and Stripe-side errors are worth another try"""
+    if isinstance(exc, (stripe.error.APIConnectionError, stripe.error.RateLimitError, stripe.error.APIError)):
+        return True
+    return bool(getattr(exc, "should_retry", False))
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: anywhere up to the exponential delay, so retries do not arrive in lockstep"""
+    return random.uniform(0, min(STRIPE_SYNC_MAX_BACKOFF_SECONDS, STRIPE_SYNC_BACKOFF_SECONDS * 2 ** attempt))
+
+
+async def retrieve_intent(intent_id: str):
+    """Fetch a PaymentIntent on the Stripe pool, retrying transient failures"""
+    loop = asyncio.get_running_loop()
+    for attempt in range(STRIPE_SYNC_RETRIES + 1):
+        try:
+            return await loop.run_in_executor(
+                _stripe_pool, timed_stripe("PaymentIntent.retrieve", stripe.PaymentIntent.retrieve), intent_id
+            )
+        except stripe.error.StripeError as exc:
+            if attempt == STRIPE_SYNC_RETRIES or not _retryable(exc):
+                raise
+        await asyncio.sleep(_backoff(attempt))
+
+
+def mark_payments_paid(db: Session, landlord_id: int, payment_ids: Iterable[int],
+                       paid_at: Optional[datetime] = None) -> List[int]:
+    """
+    Mark pending payments PAID, with their rollup counters and alerts.
+
+    The UPDATE only matches payments still PENDING, so one paid meanwhile
+    (webhook, verify) is neither touched nor counted twice. Returns the ids
+    actually changed.
+    """
+    payment_ids = list(payment_ids)
+    if not payment_ids:
+        return []
+
+    paid = db.execute(
+        update(Payment)
+        .where(Payment.id.in_(payment_ids), Payment.landlordId == landlord_id, Payment.status == "PENDING")
+        .values(status="PAID", paidAt=paid_at or datetime.utcnow())
+        .returning(Payment.id, Payment.amount)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not paid:
+        return []
+
+    amount = sum(float(payment.amount or 0) for payment in paid)
+    bump_stats(
+        db, landlord_id,
+        pendingPayments=-len(paid), pendingAmount=-amount,
+        paidPayments=len(paid), paidAmount=amount
+    )
+    sync_payment_alerts(db, [payment.id for payment in paid])
+    return [payment.id for payment in paid]
+
+
+def pending_intents_query(landlord_id: int):
+    """A landlord's pending payments that have a Stripe PaymentIntent to check"""
+    return select(Payment.id, Payment.stripePaymentIntentId).where(
+        Payment.landlordId == landlord_id,
+        Payment.status == "PENDING",
+        Payment.stripePaymentIntentId.isnot(None)
+    ).order_by(Payment.id)
+
+
+def new_progress(landlord_id: int) -> dict:
+    return {
+        "id": uuid.uuid4().hex,
+        "landlordId": landlord_id,
+        "state": "running",
+        "total": 0,
+        "processed": 0,
+        "synced": 0,
+        "failed": 0,
+        "startedAt": datetime.utcnow().isoformat(),
+        "finishedAt": None,
+        "error": None,
+    }
+
+
+async def reconcile_landlord(landlord_id: int, session_factory, progress: Optional[dict] = None) -> dict:
+    """
+    Check every pending payment of a landlord against Stripe, committing
+    each batch. `progress` is updated as batches complete and returned.
+    """
+    progress = progress or new_progress(landlord_id)
+
+    async with session_factory() as db:
+        rows = (await db.execute(pending_intents_query(landlord_id))).all()
+    progress["total"] = len(rows)
+
+    for start in range(0, len(rows), STRIPE_SYNC_BATCH_SIZE):
+        batch = rows[start:start + STRIPE_SYNC_BATCH_SIZE]
+        intents = await asyncio.gather(
+            *(retrieve_intent(row.stripePaymentIntentId) for row in batch),
+            return_exceptions=True
+        )
+
+        succeeded = []
+        for row, intent in zip(batch, intents):
+            if isinstance(intent, stripe.error.StripeError):
+                progress["failed"] += 1
+            elif isinstance(intent, BaseException):
+                raise intent
+            elif intent.status == "succeeded":
+                succeeded.append(row.id)
+
+        async with session_factory() as db:
+            paid = await db.run_sync(mark_payments_paid, landlord_id, succeeded)
+            await db.commit()
+        progress["synced"] += len(paid)
+        progress["processed"] += len(batch)
+
+    progress["state"] = "succeeded"
+    progress["finishedAt"] = datetime.utcnow().isoformat()
+    return progress
+
+
+_jobs: Dict[str, dict] = {}
+_running: Dict[int, str] = {}
+# Strong references, so a running job is not garbage collected mid-flight
+_tasks = set()
+
+
+async def _run_job(progress: dict, session_factory) -> None:
+    try:
+        await reconcile_landlord(progress["landlordId"], session_factory, progress)
+    except Exception as exc:
+        progress["state"] = "failed"
+        progress["error"] = str(exc)
+        progress["finishedAt"] = datetime.utcnow().isoformat()
+        print(f"❌ Stripe sync {progress['id']} failed: {exc}")
+    finally:
+        _running.pop(progress["landlordId"], None)
+
+
+def _forget_finished_jobs() -> None:
+    finished = [job_id for job_id, job in _jobs.items() if job["state"] != "running"]
+    for job_id in finished[:max(0, len(finished) - STRIPE_SYNC_JOB_HISTORY)]:
+        del _jobs[job_id]
+
+
+def start_sync_job(landlord_id: int, session_factory) -> dict:
+    """Start a background sync for a landlord, or return the one already running"""
+    running = _running.get(landlord_id)
+    if running:
+        return _jobs[running]
+
+    _forget_finished_jobs()
+    progress = new_progress(landlord_id)
+    _jobs[progress["id"]] = progress
+    _running[landlord_id] = progress["id"]
+
+    task = asyncio.create_task(_run_job(progress, session_factory))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return progress
+
+
+def get_sync_job(job_id: str) -> Optional[dict]:
+    return _jobs.get(job_id)
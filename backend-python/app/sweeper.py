@@ -0,0 +1,328 @@
+"""
+Background sweeper
+Moves time-based state forward so request handlers never have to derive it
+from the clock: ACTIVE leases past their end date become EXPIRED, and
+pending payments past their due date are flagged overdue (Payment.overdueAt).
+Both are set-based UPDATE ... RETURNING statements over bounded batches,
+each committed with its side effects (rollup counters, unit occupancy,
+alerts, dashboard cache) before the next one starts. Applied webhook
+events past their retention, and photo objects no longer referenced, are
+pruned the same way, and photos left without renditions are queued again.
+
+The jobs run on APScheduler, started from the app lifespan. Every worker
+schedules them, but a run only does work while its worker holds the
+"sweeper" leader lease in SchedulerLock; the lease is renewed on each run
+and taken over by another worker once it expires. Each run records its
+timing, exposed through GET /api/dashboard/sweeper/stats.
+
+    python -m app.sweeper run
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import argparse
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import delete, select, update, or_
+from sqlalchemy.orm import Session
+
+from .database import insert_ignoring_conflicts
+from .models import Lease, Payment, SchedulerLock, WebhookEvent
+from .stats import bump_stats
+from .occupancy import sync_unit_occupancy
+from .alerts import sweep_alerts_batch, sync_lease_alerts, sync_payment_alerts
+from .dashboard_cache import touch_landlord
+from .photo_store import prune_photo_objects_batch
+from .thumbnails import requeue_renditions_batch
+
+# Seconds between lease-expiry / overdue runs and between alert sweeps; 0 disables a job
+SWEEPER_INTERVAL_SECONDS = float(os.getenv("SWEEPER_INTERVAL_SECONDS", "60"))
+ALERT_SWEEP_INTERVAL_SECONDS = float(os.getenv("ALERT_SWEEP_INTERVAL_SECONDS", "300"))
+
+# Rows per UPDATE, and batches per run before yielding to the next run
+SWEEPER_BATCH_SIZE = int(os.getenv("SWEEPER_BATCH_SIZE", "500"))
+SWEEPER_MAX_BATCHES = int(os.getenv("SWEEPER_MAX_BATCHES", "20"))
+
+# Days applied webhook events are kept; also the window in which a
+# redelivered event is recognized (Stripe retries for up to three days)
+WEBHOOK_RETENTION_DAYS = float(os.getenv("WEBHOOK_RETENTION_DAYS", "30"))
+
+LOCK_NAME = "sweeper"
+# This process's identity in SchedulerLock
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _lock_ttl() -> float:
+    """Leader lease length: a few missed renewals before another worker takes over"""
+    enabled = [interval for interval in (SWEEPER_INTERVAL_SECONDS, ALERT_SWEEP_INTERVAL_SECONDS) if interval > 0]
+    return float(os.getenv("SWEEPER_LOCK_TTL_SECONDS", 3 * min(enabled, default=60)))
+
+
+def acquire_leader(db: Session, owner: str = WORKER_ID, ttl: Optional[float] = None,
+                   now: Optional[datetime] = None, name: str = LOCK_NAME) -> bool:
+    """
+    Take or renew the leader lease; False while another worker holds it.
+
+    The conditional UPDATE is the whole election: it only matches when the
+    lease is ours already or has expired, so two workers can never both win.
+    """
+    now = now or datetime.utcnow()
+    expires = now + timedelta(seconds=ttl if ttl is not None else _lock_ttl())
+    db.execute(
+        insert_ignoring_conflicts(db, SchedulerLock, SchedulerLock.name),
+        [{"name": name, "owner": None, "expiresAt": now}]
+    )
+    result = db.execute(
+        update(SchedulerLock)
+        .where(
+            SchedulerLock.name == name,
+            or_(SchedulerLock.owner == owner, SchedulerLock.owner.is_(None), SchedulerLock.expiresAt <= now)
+        )
+        .values(owner=owner, expiresAt=expires)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def release_leader(db: Session, owner: str = WORKER_ID, name: str = LOCK_NAME) -> None:
+    """Give the lease up (on shutdown) so another worker can take over at once"""
+    db.execute(
+        update(SchedulerLock)
+        .where(SchedulerLock.name == name, SchedulerLock.owner == owner)
+        .values(owner=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def expire_leases_batch(db: Session, now: datetime, limit: int) -> int:
+    """Flip up to `limit` ACTIVE leases that ended before `now` to EXPIRED"""
+    due = select(Lease.id).where(
+        Lease.status == "ACTIVE",
+        Lease.endDate < now
+    ).order_by(Lease.endDate).limit(limit)
+
+    expired = db.execute(
+        update(Lease)
+        .where(Lease.id.in_(due), Lease.status == "ACTIVE")
+        .values(status="EXPIRED")
+        .returning(Lease.id, Lease.unitId, Lease.landlordId)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not expired:
+        return 0
+
+    per_landlord: Dict[int, int] = {}
+    for lease in expired:
+        per_landlord[lease.landlordId] = per_landlord.get(lease.landlordId, 0) + 1
+    for landlord_id, count in per_landlord.items():
+        bump_stats(db, landlord_id, activeLeases=-count)
+    sync_unit_occupancy(db, {lease.unitId for lease in expired})
+    sync_lease_alerts(db, [lease.id for lease in expired], now)
+
+    return len(expired)
+
+
+def flag_overdue_payments_batch(db: Session, now: datetime, limit: int) -> int:
+    """Stamp overdueAt on up to `limit` pending payments whose due date has passed"""
+    due = select(Payment.id).where(
+        Payment.status == "PENDING",
+        Payment.overdueAt.is_(None),
+        Payment.dueDate < now
+    ).order_by(Payment.dueDate).limit(limit)
+
+    flagged = db.execute(
+        update(Payment)
+        .where(Payment.id.in_(due), Payment.overdueAt.is_(None))
+        .values(overdueAt=now)
+        .returning(Payment.id, Payment.landlordId)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not flagged:
+        return 0
+
+    # Overdue counts feed the cached manager dashboard
+    for landlord_id in {payment.landlordId for payment in flagged}:
+        touch_landlord(db, landlord_id)
+    sync_payment_alerts(db, [payment.id for payment in flagged], now)
+
+    return len(flagged)
+
+
+def prune_webhook_events_batch(db: Session, now: datetime, limit: int) -> int:
+    """Delete up to `limit` webhook events applied more than WEBHOOK_RETENTION_DAYS ago"""
+    old = select(WebhookEvent.id).where(
+        WebhookEvent.processedAt < now - timedelta(days=WEBHOOK_RETENTION_DAYS)
+    ).limit(limit)
+    return db.execute(
+        delete(WebhookEvent)
+        .where(WebhookEvent.id.in_(old))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+# Step name -> (function, batched); batched steps repeat until a short batch
+SWEEPER_STEPS = {
+    "expire-leases": (expire_leases_batch, True),
+    "flag-overdue-payments": (flag_overdue_payments_batch, True),
+    "prune-webhook-events": (prune_webhook_events_batch, True),
+    "prune-photo-objects": (prune_photo_objects_batch, True),
+    "requeue-photo-renditions": (requeue_renditions_batch, False),
+}
+ALERT_STEPS = {
+    "alerts": (sweep_alerts_batch, True),
+}
+
+_metrics: Dict[str, dict] = {}
+_leader = {"held": False, "skippedRuns": 0}
+
+
+def _record(step: str, rows: int, batches: int, duration_ms: float, error: Optional[str] = None) -> None:
+    metrics = _metrics.setdefault(step, {
+        "runs": 0, "errors": 0, "rows": 0, "batches": 0,
+        "totalDurationMs": 0.0, "maxDurationMs": 0.0,
+        "lastRunAt": None, "lastRows": 0, "lastDurationMs": 0.0, "lastError": None
+    })
+    metrics["runs"] += 1
+    metrics["rows"] += rows
+    metrics["batches"] += batches
+    metrics["totalDurationMs"] = round(metrics["totalDurationMs"] + duration_ms, 2)
+    metrics["maxDurationMs"] = round(max(metrics["maxDurationMs"], duration_ms), 2)
+    metrics["lastRunAt"] = datetime.utcnow().isoformat()
+    metrics["lastRows"] = rows
+    metrics["lastDurationMs"] = round(duration_ms, 2)
+    if error:
+        metrics["errors"] += 1
+        metrics["lastError"] = error
+
+
+async def run_steps(steps: Dict[str, tuple], session_factory=None, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    One scheduled run: renew the leader lease, then run each step batch by
+    batch, committing after every batch. Returns rows changed per step, or
+    an empty dict when another worker is the leader.
+    """
+    if session_factory is None:
+        from .database import AsyncSessionLocal as session_factory
+
+    try:
+        async with session_factory() as db:
+            _leader["held"] = await db.run_sync(acquire_leader)
+            await db.commit()
+    except Exception as exc:
+        _leader["held"] = False
+        print(f"❌ Sweeper could not take the leader lock: {exc}")
+        return {}
+    if not _leader["held"]:
+        _leader["skippedRuns"] += 1
+        return {}
+
+    results = {}
+    for step, (function, batched) in steps.items():
+        started = time.perf_counter()
+        rows, batches, error = 0, 0, None
+        try:
+            for _ in range(SWEEPER_MAX_BATCHES if batched else 1):
+                async with session_factory() as db:
+                    changed = await db.run_sync(function, now or datetime.utcnow(), SWEEPER_BATCH_SIZE)
+                    await db.commit()
+                rows += changed
+                batches += 1
+                if changed < SWEEPER_BATCH_SIZE:
+                    break
+        except Exception as exc:
+            error = str(exc)
+            print(f"❌ Sweeper step {step} failed: {exc}")
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        _record(step, rows, batches, duration_ms, error)
+        results[step] = rows
+        if rows:
+            print(f"⏱️  Sweeper {step}: {rows} row(s) in {batches} batch(es), {duration_ms:.1f}ms")
+
+    return results
+
+
+def sweeper_stats() -> dict:
+    """Per-step run counters and timings of this worker, plus whether it leads"""
+    return {
+        "worker": WORKER_ID,
+        "leader": _leader["held"],
+        "skippedRuns": _leader["skippedRuns"],
+        "batchSize": SWEEPER_BATCH_SIZE,
+        "maxBatches": SWEEPER_MAX_BATCHES,
+        "steps": {step: dict(metrics) for step, metrics in _metrics.items()},
+    }
+
+
+def start_scheduler():
+    """Schedule the enabled jobs on the running event loop (None if all are disabled)"""
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+    jobs = [
+        ("sweeper", SWEEPER_INTERVAL_SECONDS, SWEEPER_STEPS),
+        ("alerts", ALERT_SWEEP_INTERVAL_SECONDS, ALERT_STEPS),
+    ]
+    jobs = [job for job in jobs if job[1] > 0]
+    if not jobs:
+        return None
+
+    scheduler = AsyncIOScheduler(timezone="UTC")
+    for job_id, interval, steps in jobs:
+        # One run at a time per job; runs missed while busy collapse into one
+        scheduler.add_job(
+            run_steps, "interval", seconds=interval, args=[steps], id=job_id,
+            max_instances=1, coalesce=True, next_run_time=datetime.utcnow()
+        )
+    scheduler.start()
+    return scheduler
+
+
+async def stop_scheduler(scheduler) -> None:
+    """Stop scheduling and hand the leader lease over"""
+    from .database import AsyncSessionLocal
+
+    scheduler.shutdown(wait=False)
+    if _leader["held"]:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(release_leader)
+            await db.commit()
+        _leader["held"] = False
+
+
+def run_once(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Every step to completion in one go, ignoring the leader lease (command line)"""
+    now = now or datetime.utcnow()
+    results = {}
+    for step, (function, batched) in {**SWEEPER_STEPS, **ALERT_STEPS}.items():
+        rows = 0
+        while True:
+            changed = function(db, now, SWEEPER_BATCH_SIZE)
+            db.commit()
+            rows += changed
+            if not batched or changed < SWEEPER_BATCH_SIZE:
+                break
+        results[step] = rows
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expire leases, flag overdue payments, prune webhook events and photos, and sweep alerts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("run", help="Run every sweeper step once, to completion")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "run":
+            for step, rows in run_once(db).items():
+                print(f"✅ {step}: {rows} row(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
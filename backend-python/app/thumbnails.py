@@ -0,0 +1,203 @@
+"""
+Photo renditions
+Every stored photo object gets downscaled, recompressed JPEG renditions
+(RENDITIONS), written next to it in the store and served the same way:
+
+    uploads/objects/ab/cd/<sha256>.thumb320.jpg
+
+Uploads only queue their objects; THUMBNAIL_WORKERS tasks take them off
+the queue and decode/resize in a process pool of the same size, so image
+work never runs on the event loop or holds the GIL of the API process.
+The result is recorded on PhotoObject.renditions, which responses read
+through each MaintenancePhoto to expose rendition URLs once they exist
+(MaintenanceRequest.photoRenditions).
+
+The queue lives in the worker that received the upload; objects it lost
+(restart, crash) or never saw (imports) still have renditions NULL, and
+the sweeper puts those back on the queue of its leader.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+import asyncio
+import multiprocessing
+import os
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .models import PhotoObject
+from .photo_store import OBJECTS_DIR, URL_PREFIX, object_path
+
+# Rendering processes (and queue consumers); 0 disables rendering
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_MAX_ATTEMPTS = int(os.getenv("THUMBNAIL_MAX_ATTEMPTS", "3"))
+# Objects younger than this are left to the queue of the worker that stored them
+THUMBNAIL_REQUEUE_AFTER_SECONDS = float(os.getenv("THUMBNAIL_REQUEUE_AFTER_SECONDS", "300"))
+
+# Rendition name -> longest side in pixels. The size is part of the file
+# name, so changing it yields new URLs rather than stale cached files
+RENDITIONS = {"thumb": 320, "preview": 1280}
+
+_queue: Optional[asyncio.Queue] = None
+_queued: Set[str] = set()
+_pool: Optional[Executor] = None
+
+
+def rendition_name(sha256: str, rendition: str) -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.{rendition}{RENDITIONS[rendition]}.jpg"
+
+
+def rendition_path(sha256: str, rendition: str) -> str:
+    return os.path.join(OBJECTS_DIR, *rendition_name(sha256, rendition).split("/"))
+
+
+def render(source_path: str, targets: List[Tuple[str, int]]) -> Optional[str]:
+    """
+    Write JPEG renditions of an image to (path, longest side) targets,
+    largest first. Runs in a pool process. Returns an error message when
+    the source is not an image (not worth retrying).
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(source_path) as source:
+            largest = max(size for _, size in targets)
+            # JPEG: decode straight at a reduced scale instead of full resolution
+            source.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(source).convert("RGB")
+    except UnidentifiedImageError:
+        return "Not an image"
+
+    for path, size in sorted(targets, key=lambda target: -target[1]):
+        # In place, so each smaller rendition is scaled from the previous one
+        image.thumbnail((size, size), Image.LANCZOS)
+        partial_path = f"{path}.{os.getpid()}.tmp"
+        image.save(partial_path, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+        os.replace(partial_path, path)
+    return None
+
+
+def image_size(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Width and height of an image as displayed (EXIF orientation applied),
+    from its header alone; None when the file is not an image
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            # Orientations 5-8 are rotated a quarter turn
+            if image.getexif().get(0x0112) in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+def _lower_priority():
+    # Pool processes yield the CPU to request handling
+    os.nice(10)
+
+
+def enqueue(sha256s: Iterable[str]) -> None:
+    """Queue objects for rendering on this worker (no-op when rendering is disabled)"""
+    if _queue is None:
+        return
+    for sha256 in sha256s:
+        if sha256 not in _queued:
+            _queued.add(sha256)
+            _queue.put_nowait(sha256)
+
+
+async def render_object(sha256: str, session_factory=None, executor: Optional[Executor] = None) -> Optional[dict]:
+    """
+    Render one object's renditions and record them; returns the recorded
+    renditions, or None when there was nothing to do or the attempt failed.
+    """
+    if session_factory is None:
+        from .database import AsyncSessionLocal as session_factory
+
+    async with session_factory() as db:
+        stored = await db.get(PhotoObject, sha256)
+        if stored is None or stored.renditions is not None:
+            return None
+        source_path = os.path.abspath(object_path(sha256, stored.extension))
+
+    targets = [(os.path.abspath(rendition_path(sha256, name)), size) for name, size in RENDITIONS.items()]
+    values = {"renditionAttempts": PhotoObject.renditionAttempts + 1, "renditionError": None}
+    try:
+        error = await asyncio.get_running_loop().run_in_executor(executor or _pool, render, source_path, targets)
+        if error:
+            values.update(renditions={}, renditionError=error)
+        else:
+            values["renditions"] = {name: URL_PREFIX + rendition_name(sha256, name) for name in RENDITIONS}
+    except Exception as exc:
+        print(f"❌ Rendering photo {sha256} failed: {exc}")
+        values["renditionError"] = str(exc)[:500]
+
+    async with session_factory() as db:
+        stored = await db.get(PhotoObject, sha256)
+        if stored is None:
+            return None
+        if "renditions" not in values and stored.renditionAttempts + 1 >= THUMBNAIL_MAX_ATTEMPTS:
+            # Give up: served without renditions from now on
+            values["renditions"] = {}
+        await db.execute(update(PhotoObject).where(PhotoObject.sha256 == sha256).values(**values))
+        await db.commit()
+    return values.get("renditions")
+
+
+async def _consume(session_factory=None) -> None:
+    while True:
+        sha256 = await _queue.get()
+        try:
+            await render_object(sha256, session_factory)
+        except Exception as exc:
+            print(f"❌ Rendition worker failed on {sha256}: {exc}")
+        finally:
+            _queued.discard(sha256)
+            _queue.task_done()
+
+
+def start_thumbnailer(session_factory=None) -> Optional[List[asyncio.Task]]:
+    """Start the rendering pool and its queue consumers (None when disabled)"""
+    global _queue, _pool
+    if THUMBNAIL_WORKERS <= 0:
+        return None
+    _queue = asyncio.Queue()
+    # spawn: forking the API process would copy its threads' locks
+    _pool = ProcessPoolExecutor(
+        max_workers=THUMBNAIL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_lower_priority
+    )
+    return [asyncio.create_task(_consume(session_factory)) for _ in range(THUMBNAIL_WORKERS)]
+
+
+async def stop_thumbnailer(tasks: List[asyncio.Task]) -> None:
+    """Stop consuming and shut the pool down; unfinished objects are requeued by the sweeper"""
+    global _queue, _pool
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _pool.shutdown(wait=False, cancel_futures=True)
+    _queue, _pool = None, None
+    _queued.clear()
+
+
+def requeue_renditions_batch(db: Session, now: datetime, limit: int) -> int:
+    """Put up to `limit` objects still without renditions back on this worker's queue"""
+    if _queue is None:
+        return 0
+    pending = db.scalars(
+        select(PhotoObject.sha256).where(
+            PhotoObject.renditions.is_(None),
+            PhotoObject.createdAt < now - timedelta(seconds=THUMBNAIL_REQUEUE_AFTER_SECONDS)
+        ).order_by(PhotoObject.createdAt).limit(limit)
+    ).all()
+    fresh = [sha256 for sha256 in pending if sha256 not in _queued]
+    enqueue(fresh)
+    return len(fresh)
@@ -0,0 +1,306 @@
+"""
+Streaming file uploads
+Parses a multipart request body as it arrives and writes each file part
+to a staging file under a unique name: no temporary copy by the framework,
+no full-file buffering. Callers move the staged files where they belong
+(app/photo_store.py), or remove them.
+
+Data is written in UPLOAD_CHUNK_SIZE chunks by one writer task per file,
+fed through a small bounded queue, so a file is still being flushed to
+disk while the next one is received and the client is slowed down rather
+than buffered when the disk falls behind. Inside a part, the bytes that
+cannot belong to the next boundary are taken as file data directly (a
+C-speed search for the delimiter) rather than scanned by the parser's
+per-byte loop, which otherwise dominates the cost of an upload. Each chunk is written and added
+to the file's SHA-256 in one worker-thread call. A file growing past
+UPLOAD_MAX_FILE_BYTES aborts the upload with 413 at that point, and a
+failing write (507 when the disk is full) aborts it as soon as the next
+chunk is handed over; either way whatever was already written is removed.
+"""
+from typing import List, Optional
+import asyncio
+import errno
+import hashlib
+import os
+import re
+import uuid
+
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request, status
+
+try:
+    # Parser internals behind the fast path below; python-multipart is pinned
+    # and tests/test_uploads.py checks they still mean what receive_files expects
+    from multipart.multipart import STATE_PART_DATA
+except ImportError:
+    STATE_PART_DATA = None
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "20"))
+
+# Chunks a writer may fall behind the network before the receiver waits
+_QUEUE_CHUNKS = 4
+# Multipart framing allowance on top of the file bytes, per file
+_PART_OVERHEAD = 16 * 1024
+
+# OpenAPI description of a body read through receive_files (the parameter
+# is not declared, so FastAPI would otherwise document no body at all)
+FILES_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                }
+            }
+        },
+    }
+}
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """The client's file name reduced to a plain, harmless base name"""
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", name).lstrip(".")
+    return name[:128] or "upload"
+
+
+class _FileWriter:
+    """Writes one file part from a queue of chunks, hashing as it goes"""
+
+    def __init__(self, directory: str, filename: str, content_type: Optional[str]):
+        self.filename = safe_filename(filename)
+        self.content_type = content_type
+        self.path = os.path.join(directory, f"{uuid.uuid4().hex}.part")
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_CHUNKS)
+        self.opening: Optional[asyncio.Future] = None
+        self.task = asyncio.create_task(self._run())
+
+    def _open(self):
+        return open(self.path, "wb")
+
+    async def _run(self) -> None:
+        # Shielded: cancelling the writer cannot abandon an open in its thread,
+        # so discard() can still wait for it and close the file
+        self.opening = asyncio.ensure_future(asyncio.to_thread(self._open))
+        out = await asyncio.shield(self.opening)
+        try:
+            while True:
+                chunk = await self.queue.get()
+                if chunk is None:
+                    break
+                # One thread hop per chunk; hashlib releases the GIL on large buffers
+                await asyncio.to_thread(self._write, out, chunk)
+        finally:
+            await asyncio.to_thread(out.close)
+
+    def _write(self, out, chunk) -> None:
+        out.write(chunk)
+        self.sha256.update(chunk)
+
+    async def put(self, chunk) -> None:
+        """Hand a chunk (None: end of file) to the writer, failing if the writer did"""
+        if not self.task.done() and not self.queue.full():
+            self.queue.put_nowait(chunk)
+            return
+        # Wait for room, unless the writer stops first: then nothing drains the queue
+        put = asyncio.ensure_future(self.queue.put(chunk))
+        await asyncio.wait({put, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+        if self.task.done():
+            _raise_write_error(self.task)
+
+    async def discard(self) -> None:
+        """Stop the writer and remove its file, once nothing can create it again"""
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        if self.opening is not None:
+            try:
+                (await self.opening).close()
+            except OSError:
+                pass
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def result(self) -> dict:
+        return {
+            "filename": self.filename,
+            "path": self.path,
+            "size": self.size,
+            "sha256": self.sha256.hexdigest(),
+            "contentType": self.content_type,
+        }
+
+
+def _raise_write_error(task: asyncio.Task) -> None:
+    """Re-raise a failed writer's error; a full disk is 507"""
+    if task.cancelled():
+        raise asyncio.CancelledError()
+    exc = task.exception()
+    if exc is None:
+        return
+    if isinstance(exc, OSError) and exc.errno in (errno.ENOSPC, errno.EDQUOT):
+        raise HTTPException(status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+                            detail="Not enough storage for the upload") from exc
+    raise exc
+
+
+def _fast_path_supported(parser) -> bool:
+    """Whether the parser exposes the state the part-data fast path reads"""
+    return STATE_PART_DATA is not None and all(
+        hasattr(parser, name) for name in ("boundary", "state", "index")
+    )
+
+
+class _Part:
+    def __init__(self):
+        self.headers = {}
+        self.writer: Optional[_FileWriter] = None
+        self.buffer = bytearray()
+
+
+async def receive_files(request: Request, directory: str, field: str = "files") -> List[dict]:
+    """
+    Stream the files of a multipart request's `field` into staging files
+    in `directory`.
+
+    Returns one dict per file in upload order: the sanitized client file
+    name, the staged path, size, sha256 and contentType. Other form fields
+    are ignored.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a multipart/form-data body")
+
+    limit = UPLOAD_MAX_FILES * (UPLOAD_MAX_FILE_BYTES + _PART_OVERHEAD)
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload too large")
+
+    os.makedirs(directory, exist_ok=True)
+    writers: List[_FileWriter] = []
+    # Parser callbacks are synchronous: they record what happened, and the
+    # loop below acts on it (writing needs await)
+    events = []
+    header = {"name": b"", "value": b""}
+    part = _Part()
+
+    def on_part_begin():
+        nonlocal part
+        part = _Part()
+        events.append(("begin", part, None))
+
+    def on_header_field(data, start, end):
+        header["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        part.headers[header["name"].lower()] = header["value"]
+        header["name"], header["value"] = b"", b""
+
+    def on_headers_finished():
+        events.append(("headers", part, None))
+
+    def on_part_data(data, start, end):
+        events.append(("data", part, data[start:end]))
+
+    def on_part_end():
+        events.append(("end", part, None))
+
+    parser = multipart.MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    # Without the parser internals, every byte goes through the callbacks
+    fast = _fast_path_supported(parser)
+    delimiter = parser.boundary if fast else None
+
+    def feed(chunk: bytes):
+        if fast and parser.state == STATE_PART_DATA and parser.index == 0:
+            # Mid-part with no partial boundary pending: everything before the
+            # delimiter (or before a tail that could start one) is part data
+            end = chunk.find(delimiter)
+            safe = end if end >= 0 else len(chunk) - len(delimiter) + 1
+            if safe > 0:
+                events.append(("data", part, chunk[:safe]))
+                chunk = chunk[safe:]
+        if chunk:
+            parser.write(chunk)
+
+    async def write(current: _Part, data: bytes):
+        if not current.buffer and len(data) >= UPLOAD_CHUNK_SIZE:
+            # Large piece with nothing pending: queue slices of it as they are
+            view = memoryview(data)
+            whole = len(data) - len(data) % UPLOAD_CHUNK_SIZE
+            for offset in range(0, whole, UPLOAD_CHUNK_SIZE):
+                await current.writer.put(view[offset:offset + UPLOAD_CHUNK_SIZE])
+            data = data[whole:]
+        current.buffer += data
+        await flush(current)
+
+    async def flush(current: _Part, final: bool = False):
+        while len(current.buffer) >= UPLOAD_CHUNK_SIZE or (final and current.buffer):
+            chunk = bytes(current.buffer[:UPLOAD_CHUNK_SIZE])
+            del current.buffer[:UPLOAD_CHUNK_SIZE]
+            await current.writer.put(chunk)
+
+    try:
+        async for chunk in request.stream():
+            feed(chunk)
+            for kind, current, data in events:
+                if kind == "headers":
+                    _, options = parse_options_header(current.headers.get(b"content-disposition", b""))
+                    if options.get(b"name", b"").decode("latin-1") != field or b"filename" not in options:
+                        continue
+                    if len(writers) >= UPLOAD_MAX_FILES:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"At most {UPLOAD_MAX_FILES} files per upload"
+                        )
+                    current.writer = _FileWriter(
+                        directory,
+                        options[b"filename"].decode("utf-8", errors="replace"),
+                        current.headers.get(b"content-type", b"").decode("latin-1") or None
+                    )
+                    writers.append(current.writer)
+                elif kind == "data" and current.writer:
+                    current.writer.size += len(data)
+                    if current.writer.size > UPLOAD_MAX_FILE_BYTES:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"{current.writer.filename} is larger than {UPLOAD_MAX_FILE_BYTES} bytes"
+                        )
+                    await write(current, data)
+                elif kind == "end" and current.writer:
+                    await flush(current, final=True)
+                    # Finishes in the background while the next part arrives
+                    await current.writer.put(None)
+            events.clear()
+        parser.finalize()
+        if writers:
+            await asyncio.wait([writer.task for writer in writers])
+        for writer in writers:
+            _raise_write_error(writer.task)
+    except BaseException:
+        await asyncio.shield(asyncio.gather(*(writer.discard() for writer in writers)))
+        raise
+
+    if not writers:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"No files in '{field}'")
+    return [writer.result() for writer in writers]
@@ -0,0 +1,212 @@
+"""
+Stripe webhook inbox
+The webhook endpoint only verifies the signature, stores the event in
+WebhookEvent keyed by Stripe's event id and acknowledges it; a redelivered
+event collides on the key and is dropped, so duplicates cost one INSERT.
+
+A consumer task started from the app lifespan applies stored events in
+batches: one transaction per batch, with the referenced payments loaded
+and updated together. Events apply in Stripe's creation order, so the
+events of a payment never overtake each other. If a batch fails, its
+events are retried one at a time; an event that keeps failing holds back
+later events of the same payment until it is dead-lettered after
+WEBHOOK_MAX_ATTEMPTS (applied, with its error kept).
+
+The endpoint wakes the consumer of its own worker; with several workers,
+only the holder of the "webhooks" leader lease applies events, so events
+received elsewhere wait at most WEBHOOK_POLL_SECONDS.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import os
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .database import insert_ignoring_conflicts
+from .metrics import observe_webhook_lag
+from .models import Payment, WebhookEvent
+from .stripe_sync import mark_payments_paid
+from .sweeper import WORKER_ID, acquire_leader, release_leader
+
+# Seconds between inbox polls when no webhook wakes the consumer; 0 disables it
+WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "2"))
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "200"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+
+LOCK_NAME = "webhooks"
+
+_wakeup: Optional[asyncio.Event] = None
+
+
+def _lock_ttl() -> float:
+    return max(30.0, 3 * WEBHOOK_POLL_SECONDS)
+
+
+def _payment_id(event: dict) -> Optional[int]:
+    """The payment an event is about, from the metadata set at checkout"""
+    metadata = event.get("data", {}).get("object", {}).get("metadata") or {}
+    payment_id = str(metadata.get("payment_id", ""))
+    return int(payment_id) if payment_id.isdigit() else None
+
+
+def store_event(db: Session, event: dict, now: Optional[datetime] = None) -> bool:
+    """Add a verified event to the inbox; False when it was delivered before"""
+    now = now or datetime.utcnow()
+    created = event.get("created")
+    result = db.execute(
+        insert_ignoring_conflicts(db, WebhookEvent, WebhookEvent.id).values(
+            id=event["id"],
+            type=event["type"],
+            paymentId=_payment_id(event),
+            payload=event,
+            stripeCreatedAt=datetime.utcfromtimestamp(created) if created else now,
+            receivedAt=now,
+            attempts=0
+        )
+    )
+    return result.rowcount == 1
+
+
+def notify_consumer() -> None:
+    """Wake this worker's consumer now instead of at its next poll"""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def pending_events_query():
+    return select(WebhookEvent).where(
+        WebhookEvent.processedAt.is_(None)
+    ).order_by(WebhookEvent.stripeCreatedAt, WebhookEvent.receivedAt, WebhookEvent.id)
+
+
+def _apply(db: Session, events: List[WebhookEvent], now: datetime) -> None:
+    """Apply events in order and mark them processed, in the caller's transaction"""
+    payment_ids = {event.paymentId for event in events if event.paymentId is not None}
+    landlords = dict(db.execute(
+        select(Payment.id, Payment.landlordId).where(Payment.id.in_(payment_ids))
+    ).all()) if payment_ids else {}
+
+    to_pay: Dict[int, List[int]] = {}
+    intents: Dict[int, str] = {}
+    for event in events:
+        event.attempts += 1
+        event.processedAt = now
+        event.error = None
+        payload = event.payload["data"]["object"]
+
+        if event.type == "checkout.session.completed":
+            if event.paymentId not in landlords:
+                event.error = "Payment not found"
+                print(f"❌ Payment {event.paymentId} not found (event {event.id})")
+                continue
+            to_pay.setdefault(landlords[event.paymentId], []).append(event.paymentId)
+            if payload.get("payment_intent"):
+                intents[event.paymentId] = payload["payment_intent"]
+        elif event.type == "payment_intent.payment_failed":
+            print(f"❌ Payment failed: {payload.get('id')}")
+        # Other event types are kept for the record only
+
+    if intents:
+        db.execute(update(Payment), [
+            {"id": payment_id, "stripePaymentIntentId": intent} for payment_id, intent in intents.items()
+        ])
+    for landlord_id, ids in to_pay.items():
+        mark_payments_paid(db, landlord_id, ids, now)
+
+
+def apply_webhook_batch(db: Session, limit: int = WEBHOOK_BATCH_SIZE, now: Optional[datetime] = None) -> int:
+    """Apply up to `limit` pending events and commit; returns how many were taken"""
+    now = now or datetime.utcnow()
+    events = db.scalars(pending_events_query().limit(limit)).all()
+    if not events:
+        return 0
+
+    try:
+        _apply(db, events, now)
+        received_at = [event.receivedAt for event in events]
+        db.commit()
+        observe_webhook_lag(received_at, now)
+        return len(events)
+    except Exception as exc:
+        db.rollback()
+        print(f"❌ Webhook batch failed, applying its events one at a time: {exc}")
+
+    event_ids = [event.id for event in events]
+    blocked = set()
+    for event_id in event_ids:
+        event = db.get(WebhookEvent, event_id)
+        if event.paymentId is not None and event.paymentId in blocked:
+            continue
+        try:
+            _apply(db, [event], now)
+            received_at = event.receivedAt
+            db.commit()
+            observe_webhook_lag([received_at], now)
+        except Exception as exc:
+            db.rollback()
+            event = db.get(WebhookEvent, event_id)
+            event.attempts += 1
+            event.error = str(exc)[:500]
+            if event.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                event.processedAt = now
+                print(f"❌ Webhook event {event_id} dead-lettered after {event.attempts} attempts: {exc}")
+            elif event.paymentId is not None:
+                blocked.add(event.paymentId)
+            db.commit()
+    return len(event_ids)
+
+
+async def drain_webhook_inbox(session_factory=None, owner: str = WORKER_ID) -> int:
+    """Apply pending events batch by batch while this worker holds the lease"""
+    if session_factory is None:
+        from .database import AsyncSessionLocal as session_factory
+
+    applied = 0
+    while True:
+        async with session_factory() as db:
+            if not await db.run_sync(acquire_leader, owner, _lock_ttl(), None, LOCK_NAME):
+                return applied
+            await db.commit()
+            count = await db.run_sync(apply_webhook_batch, WEBHOOK_BATCH_SIZE)
+        applied += count
+        if count < WEBHOOK_BATCH_SIZE:
+            return applied
+
+
+async def run_webhook_consumer(session_factory=None) -> None:
+    """Drain the inbox whenever a webhook arrives, and every WEBHOOK_POLL_SECONDS"""
+    while True:
+        _wakeup.clear()
+        try:
+            await drain_webhook_inbox(session_factory)
+        except Exception as exc:
+            print(f"❌ Webhook consumer failed: {exc}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), WEBHOOK_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_webhook_consumer() -> Optional[asyncio.Task]:
+    """Start the consumer on the running event loop (None when disabled)"""
+    global _wakeup
+    if WEBHOOK_POLL_SECONDS <= 0:
+        return None
+    _wakeup = asyncio.Event()
+    return asyncio.create_task(run_webhook_consumer())
+
+
+async def stop_webhook_consumer(task: asyncio.Task) -> None:
+    """Stop the consumer and hand the leader lease over"""
+    from .database import AsyncSessionLocal
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(release_leader, WORKER_ID, LOCK_NAME)
+        await db.commit()
@@ -0,0 +1,150 @@
+"""
+Concurrency benchmark
+Drives a mixed read workload against the app in-process and reports
+latency percentiles and throughput:
+
+    python benchmarks/bench_concurrency.py [--concurrency 50] [--requests 2000]
+
+The database is a throwaway SQLite file seeded with a small portfolio,
+unless DATABASE_URL is already set.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+ENDPOINTS = [
+    "/api/properties/",
+    "/api/units/",
+    "/api/leases/",
+    "/api/payments/",
+    "/api/maintenance",
+    "/api/dashboard/stats",
+    "/api/dashboard/manager-stats",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed(properties: int, units_per_property: int):
+    """Create one landlord with a leased, paid-into portfolio"""
+    from passlib.context import CryptContext
+    from app.database import SessionLocal, Base, engine
+    from app.models import User, Tenant, Property, Unit, Lease, Payment, MaintenanceRequest
+    from app.occupancy import sync_unit_occupancy
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        password = CryptContext(schemes=["bcrypt"], deprecated="auto").hash("password123")
+        landlord = User(email="bench@landlord.com", name="Bench Landlord", password=password, role="LANDLORD")
+        db.add(landlord)
+        db.flush()
+
+        now = datetime.utcnow()
+        for p in range(properties):
+            prop = Property(
+                title=f"Property {p}", address=f"{p} Bench St", city="Toronto",
+                province="ON", postalCode="M5H 2N2", landlordId=landlord.id
+            )
+            db.add(prop)
+            db.flush()
+            for u in range(units_per_property):
+                unit = Unit(propertyId=prop.id, unitNumber=f"{u + 1:03d}", rentAmount=1500)
+                user = User(email=f"tenant-{p}-{u}@bench.com", name=f"Tenant {p}-{u}", password=password, role="TENANT")
+                db.add_all([unit, user])
+                db.flush()
+                tenant = Tenant(userId=user.id)
+                db.add(tenant)
+                db.flush()
+                lease = Lease(
+                    tenantId=tenant.id, unitId=unit.id, landlordId=landlord.id, startDate=now - timedelta(days=180),
+                    endDate=now + timedelta(days=185), rent=1500, status="ACTIVE"
+                )
+                db.add(lease)
+                db.flush()
+                db.add_all([
+                    Payment(leaseId=lease.id, landlordId=landlord.id, amount=1500, dueDate=now - timedelta(days=30 * m),
+                            status="PAID" if m else "PENDING")
+                    for m in range(6)
+                ])
+                db.add(MaintenanceRequest(leaseId=lease.id, landlordId=landlord.id, title="Leaky tap", description="Kitchen"))
+        sync_unit_occupancy(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run(concurrency: int, total: int):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        login = await client.post("/api/auth/login", json={"email": "bench@landlord.com", "password": "password123"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        # Warm up every route once (imports, statement caches, rollups)
+        for path in ENDPOINTS:
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+
+        latencies = []
+        queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(ENDPOINTS[i % len(ENDPOINTS)])
+
+        async def worker():
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return latencies, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mixed-load latency benchmark")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--properties", type=int, default=10)
+    parser.add_argument("--units", type=int, default=10, help="Units per property")
+    args = parser.parse_args(argv)
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='pm-bench-'), 'bench.db')}"
+        seed(args.properties, args.units)
+
+    latencies, elapsed = asyncio.run(run(args.concurrency, args.requests))
+    ms = [value * 1000 for value in latencies]
+
+    print(f"requests={len(ms)} concurrency={args.concurrency} elapsed={elapsed:.2f}s")
+    print(f"throughput={len(ms) / elapsed:.1f} req/s")
+    print(
+        f"p50={percentile(ms, 50):.1f}ms p95={percentile(ms, 95):.1f}ms "
+        f"p99={percentile(ms, 99):.1f}ms max={max(ms):.1f}ms mean={statistics.mean(ms):.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Endpoint benchmark suite
+Drives the hot endpoints of the app in-process against a generated
+portfolio (app/seed.py) and reports, per endpoint, p50/p95/p99 latency,
+throughput and the database statements per request. Compared against a
+JSON baseline, the run exits non-zero when an endpoint regressed:
+
+    python benchmarks/bench_endpoints.py [--landlords 100] [--requests 200] [--rounds 3] [--threshold 0.25]
+    python benchmarks/bench_endpoints.py --update-baseline
+
+Each round measures every endpoint in turn and an endpoint keeps its best
+round (lowest latencies, highest throughput), so a slow moment of the
+machine does not read as a regression of whichever endpoint it hit. A
+regression is p50 or p95 latency above the baseline by more than the
+threshold (and --min-delta-ms), throughput below it by more than the
+threshold, or more statements per request. A baseline entry may carry its
+own "threshold" (kept when the baseline is re-recorded): the writing
+endpoints queue on SQLite's single write lock and have a looser one. Baselines depend on the machine: record them where the
+comparison runs. The settings a baseline was taken with must match.
+
+The database is a throwaway SQLite file loaded with the portfolio, unless
+DATABASE_URL is already set (loaded with python -m app.seed load --seed
+matching --seed). Requests are made as the seed's first landlord.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_concurrency import percentile  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "endpoints.json")
+WEBHOOK_SECRET = "whsec_bench"
+PASSWORD = "password123"
+WARMUP_REQUESTS = 5
+# Metrics a regression is judged on; p99 of a few hundred samples is reported only
+LATENCY_GATES = ("p50Ms", "p95Ms")
+# Settings that must match the baseline's
+SETTINGS = ("landlords", "properties", "units", "months", "seed", "requests", "concurrency", "rounds")
+
+
+def endpoints(context: dict):
+    """(name, method, path, request kwargs(index)) for each benchmarked endpoint"""
+    auth = {"Authorization": f"Bearer {context['token']}"}
+
+    def authorized(index):
+        return {"headers": auth}
+
+    def login(index):
+        return {"json": {"email": context["email"], "password": PASSWORD}}
+
+    def webhook(index):
+        event = json.dumps({
+            "id": f"evt_bench_{context['run']}_{index}", "object": "event", "type": "checkout.session.completed",
+            "created": int(time.time()),
+            "data": {"object": {
+                "id": f"cs_bench_{context['run']}_{index}", "payment_intent": f"pi_bench_{context['run']}_{index}",
+                "metadata": {"payment_id": str(context["paymentIds"][index % len(context["paymentIds"])])},
+            }},
+        })
+        return {"content": event, "headers": {"Stripe-Signature": _signature(event), "Content-Type": "application/json"}}
+
+    def upload(index):
+        # Distinct content per request, so every upload stores a new object
+        photo = context["photo"] + f"{context['run']}:{index}".encode()
+        return {"headers": auth, "files": [("files", (f"bench-{index}.jpg", io.BytesIO(photo), "image/jpeg"))]}
+
+    return [
+        ("dashboard stats", "GET", "/api/dashboard/stats", authorized),
+        ("dashboard alerts", "GET", "/api/dashboard/manager-alerts", authorized),
+        ("payments list", "GET", "/api/payments/", authorized),
+        ("leases list", "GET", "/api/leases/", authorized),
+        ("maintenance list", "GET", "/api/maintenance", authorized),
+        ("units list", "GET", "/api/units/", authorized),
+        ("login", "POST", "/api/auth/login", login),
+        ("webhook ingestion", "POST", "/api/webhooks/stripe", webhook),
+        ("photo upload", "POST", f"/api/maintenance/{context['requestId']}/photos", upload),
+    ]
+
+
+def _signature(payload: str) -> str:
+    timestamp = int(time.time())
+    secret = os.environ["STRIPE_WEBHOOK_SECRET"]
+    digest = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def _photo() -> bytes:
+    from PIL import Image
+
+    image = Image.linear_gradient("L").resize((1280, 960)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def load_dataset(args) -> None:
+    """A throwaway SQLite file with the generated portfolio"""
+    from app.database import Base, engine
+    from app.seed import load_portfolio
+
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    counts = load_portfolio(engine, args.landlords, args.properties, args.units, args.months, args.seed,
+                            password=PASSWORD)
+    print(f"dataset: {', '.join(f'{name}={count}' for name, count in counts.items())} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+def _context(args) -> dict:
+    from sqlalchemy import select
+    from app.database import SessionLocal
+    from app.models import MaintenanceRequest, Payment, User
+    from app.seed import landlord_email
+
+    email = landlord_email(args.seed, 1)
+    with SessionLocal() as db:
+        landlord_id = db.scalar(select(User.id).where(User.email == email))
+        if landlord_id is None:
+            raise SystemExit(f"❌ {email} not found: load the portfolio with python -m app.seed load --seed {args.seed}")
+        payment_ids = db.scalars(
+            select(Payment.id).where(Payment.landlordId == landlord_id, Payment.status == "PENDING").limit(1000)
+        ).all()
+        request_id = db.scalar(
+            select(MaintenanceRequest.id).where(MaintenanceRequest.landlordId == landlord_id).limit(1)
+        )
+    return {"email": email, "paymentIds": payment_ids, "requestId": request_id, "photo": _photo(),
+            "run": uuid.uuid4().hex[:12]}
+
+
+async def measure(client, method: str, path: str, make_request, requests: int, concurrency: int,
+                  first_index: int = 0) -> dict:
+    """Latency percentiles, throughput and statements per request of one endpoint"""
+    latencies, queries, errors = [], [], []
+    queue = asyncio.Queue()
+    # Request indexes stay distinct across rounds (webhook event ids, photo contents)
+    for index in range(first_index, first_index + requests):
+        queue.put_nowait(index)
+
+    async def worker():
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            response = await client.request(method, path, **make_request(index))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            queries.append(int(response.headers.get("x-db-queries", 0)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(ms),
+        "errors": len(errors),
+        "p50Ms": round(percentile(ms, 50), 2),
+        "p95Ms": round(percentile(ms, 95), 2),
+        "p99Ms": round(percentile(ms, 99), 2),
+        "throughput": round(len(ms) / elapsed, 1),
+        "queries": statistics.median(queries),
+    }
+
+
+async def run(args, context: dict) -> dict:
+    import httpx
+    from sqlalchemy import event
+    from main import app
+    from app import auth, query_stats
+    from app.database import async_engine
+
+    # Statement counts come back as X-DB-Queries
+    query_stats.QUERY_DEBUG = True
+
+    if async_engine.dialect.name == "sqlite":
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _wait_for_writer(dbapi_connection, connection_record):
+            # Queue on SQLite's single write lock instead of failing after 5s
+            dbapi_connection.execute("PRAGMA busy_timeout=60000")
+
+    rounds = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        login = await client.post("/api/auth/login", json={"email": context["email"], "password": PASSWORD})
+        login.raise_for_status()
+        context["token"] = login.json()["access_token"]
+
+        selected = [endpoint for endpoint in endpoints(context) if not args.only or endpoint[0] in args.only]
+        # Warm up every route (imports, statement caches, rollups)
+        for name, method, path, make_request in selected:
+            for index in range(WARMUP_REQUESTS):
+                response = await client.request(method, path, **make_request(-1 - index))
+                response.raise_for_status()
+
+        for round_number in range(args.rounds):
+            for name, method, path, make_request in selected:
+                requests, concurrency = args.requests, args.concurrency
+                if name == "login":
+                    # bcrypt is slow by design; past its queue limit logins are shed with 503
+                    requests = max(args.requests // 4, 1)
+                    concurrency = min(concurrency, auth.PASSWORD_QUEUE_LIMIT)
+                rounds.setdefault(name, []).append(await measure(
+                    client, method, path, make_request, requests, concurrency, round_number * requests
+                ))
+
+    # Pooled aiosqlite connections each hold a thread that would keep the process alive
+    await async_engine.dispose()
+
+    results = {name: best_round(measured) for name, measured in rounds.items()}
+    for name, row in results.items():
+        print(f"{name:<18} p50={row['p50Ms']:8.2f}ms p95={row['p95Ms']:8.2f}ms p99={row['p99Ms']:8.2f}ms "
+              f"{row['throughput']:8.1f} req/s queries={row['queries']:g}"
+              + (f" errors={row['errors']}" if row["errors"] else ""))
+    return results
+
+
+def best_round(rounds: list) -> dict:
+    """One endpoint's best values across rounds; requests and errors summed"""
+    return {
+        "requests": sum(row["requests"] for row in rounds),
+        "errors": sum(row["errors"] for row in rounds),
+        "p50Ms": min(row["p50Ms"] for row in rounds),
+        "p95Ms": min(row["p95Ms"] for row in rounds),
+        "p99Ms": min(row["p99Ms"] for row in rounds),
+        "throughput": max(row["throughput"] for row in rounds),
+        "queries": statistics.median(row["queries"] for row in rounds),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """Regressions of `results` against `baseline`, as messages"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base.get("threshold", threshold)
+        for metric in LATENCY_GATES:
+            if current[metric] > base[metric] * (1 + limit) and current[metric] - base[metric] > min_delta_ms:
+                regressions.append(
+                    f"{name}: {metric} {base[metric]:.2f} -> {current[metric]:.2f} "
+                    f"(+{(current[metric] / base[metric] - 1) * 100:.0f}%)"
+                )
+        if current["throughput"] < base["throughput"] * (1 - limit):
+            regressions.append(
+                f"{name}: throughput {base['throughput']:.1f} -> {current['throughput']:.1f} req/s "
+                f"({(current['throughput'] / base['throughput'] - 1) * 100:.0f}%)"
+            )
+        if current["queries"] > base["queries"]:
+            regressions.append(f"{name}: queries per request {base['queries']:g} -> {current['queries']:g}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Endpoint latency, throughput and query-count benchmarks")
+    parser.add_argument("--landlords", type=int, default=100)
+    parser.add_argument("--properties", type=int, default=10, help="Properties per landlord")
+    parser.add_argument("--units", type=int, default=8, help="Units per property")
+    parser.add_argument("--months", type=int, default=24, help="Months of lease and payment history")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds over every endpoint; the best one counts")
+    parser.add_argument("--only", action="append", help="Only this endpoint (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Record this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Latency changes below this are noise")
+    parser.add_argument("--output", help="Also write this run's results here")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("STRIPE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    # Background jobs would compete with the measured requests
+    for variable in ("SWEEPER_INTERVAL_SECONDS", "ALERT_SWEEP_INTERVAL_SECONDS", "WEBHOOK_POLL_SECONDS",
+                     "THUMBNAIL_WORKERS"):
+        os.environ[variable] = "0"
+    if "DATABASE_URL" not in os.environ:
+        directory = tempfile.mkdtemp(prefix="pm-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        # Uploaded photos land under the working directory
+        os.chdir(directory)
+        os.makedirs("uploads", exist_ok=True)
+        load_dataset(args)
+
+    from app.database import engine
+
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            # Concurrent writers: WAL keeps readers out of the writers' way
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    context = _context(args)
+    results = asyncio.run(run(args, context))
+    settings = {name: getattr(args, name) for name in SETTINGS}
+    report = {
+        "settings": settings,
+        "environment": {"python": platform.python_version(), "machine": platform.machine(),
+                        "database": engine.dialect.name},
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    failed = [name for name, row in results.items() if row["errors"]]
+    if failed:
+        print(f"❌ Requests failed: {', '.join(failed)}")
+        sys.exit(1)
+
+    if args.update_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as source:
+                previous = json.load(source)
+            if args.only and previous["settings"] == settings:
+                # Re-record just these endpoints
+                report["endpoints"] = {**previous["endpoints"], **results}
+            # Thresholds set by hand on an endpoint are kept
+            for name, row in report["endpoints"].items():
+                if "threshold" in previous["endpoints"].get(name, {}):
+                    row["threshold"] = previous["endpoints"][name]["threshold"]
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as output:
+            json.dump(report, output, indent=2)
+            output.write("\n")
+        print(f"✅ Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (record one with --update-baseline)")
+        return
+    with open(args.baseline) as source:
+        baseline = json.load(source)
+    if baseline["settings"] != settings:
+        print(f"❌ Baseline was taken with {baseline['settings']}, not {settings}")
+        sys.exit(1)
+
+    regressions = compare(results, baseline["endpoints"], args.threshold, args.min_delta_ms)
+    for message in regressions:
+        print(f"  {message}")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%} of the baseline")
+        sys.exit(1)
+    print(f"✅ No endpoint regressed beyond {args.threshold:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
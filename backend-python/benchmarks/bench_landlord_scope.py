@@ -0,0 +1,162 @@
+"""
+Landlord scope benchmark
+Seeds a throwaway SQLite file at head with a large payment history and
+times each landlord-scoped read two ways on the same data: joining
+Lease -> Unit -> Property for ownership, and filtering the denormalized
+landlordId column the routers use now:
+
+    python benchmarks/bench_landlord_scope.py [--payments 1000000] [--landlords 100]
+
+Pass --plans to print EXPLAIN QUERY PLAN for both forms.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from bench_query_plans import migrate, measure  # noqa: E402
+
+UNITS_PER_PROPERTY = 20
+BATCH_SIZE = 50_000
+
+
+def seed(engine, payments: int, landlords: int, units_per_landlord: int):
+    """Bulk insert a portfolio whose leases share the payment history evenly"""
+    from sqlalchemy import insert
+    from app.models import User, Tenant, Property, Unit, Lease, Payment, MaintenanceRequest
+
+    now = datetime(2026, 1, 1)
+    properties_per_landlord = max(1, units_per_landlord // UNITS_PER_PROPERTY)
+    lease_count = landlords * properties_per_landlord * UNITS_PER_PROPERTY
+    payments_per_lease = max(1, -(-payments // lease_count))
+
+    users, tenants, props, units, leases, requests = [], [], [], [], [], []
+    for landlord_id in range(1, landlords + 1):
+        users.append({"id": landlord_id, "name": f"Landlord {landlord_id}",
+                      "email": f"landlord{landlord_id}@bench.com", "password": "x", "role": "LANDLORD"})
+        for _ in range(properties_per_landlord):
+            property_id = len(props) + 1
+            props.append({"id": property_id, "title": f"Property {property_id}", "address": f"{property_id} Scope St",
+                          "city": "Toronto", "province": "ON", "postalCode": "M5H 2N2", "landlordId": landlord_id})
+            for u in range(UNITS_PER_PROPERTY):
+                lease_id = len(leases) + 1
+                users.append({"id": landlords + lease_id, "name": f"Tenant {lease_id}",
+                              "email": f"tenant{lease_id}@bench.com", "password": "x", "role": "TENANT"})
+                tenants.append({"id": lease_id, "userId": landlords + lease_id})
+                units.append({"id": lease_id, "propertyId": property_id, "unitNumber": f"{u + 1:03d}",
+                              "bedrooms": 1, "bathrooms": 1, "rentAmount": 1500,
+                              "status": "OCCUPIED", "currentLeaseId": lease_id})
+                start = now - timedelta(days=30 * (payments_per_lease - 1) + lease_id % 30)
+                leases.append({"id": lease_id, "tenantId": lease_id, "unitId": lease_id, "landlordId": landlord_id,
+                               "startDate": start, "endDate": now + timedelta(days=lease_id % 90),
+                               "rent": 1500, "status": "ACTIVE"})
+                requests.append({"leaseId": lease_id, "landlordId": landlord_id, "title": "Leaky tap",
+                                 "photos": [], "status": "PENDING" if lease_id % 4 == 0 else "COMPLETED",
+                                 "priority": "MEDIUM"})
+
+    def payment_rows():
+        for lease in leases:
+            for m in range(payments_per_lease):
+                due = lease["startDate"] + timedelta(days=30 * m)
+                yield {"leaseId": lease["id"], "landlordId": lease["landlordId"], "amount": 1500, "dueDate": due,
+                       "status": "PENDING" if m >= payments_per_lease - 2 else "PAID"}
+
+    with engine.begin() as conn:
+        for model, rows in ((User, users), (Tenant, tenants), (Property, props), (Unit, units),
+                            (Lease, leases), (MaintenanceRequest, requests)):
+            conn.execute(insert(model), rows)
+        batch = []
+        for row in payment_rows():
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                conn.execute(insert(Payment), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Payment), batch)
+        conn.exec_driver_sql("ANALYZE")
+
+    return {"landlords": landlords, "leases": lease_count, "payments": lease_count * payments_per_lease}
+
+
+def build_queries(landlord_id: int, denormalized: bool):
+    """(name, callable(session)) pairs for one way of scoping rows to a landlord"""
+    from sqlalchemy import func, select
+    from app.models import Property, Lease, Payment, MaintenanceRequest
+
+    now = datetime(2026, 1, 1)
+
+    def scoped(stmt, model):
+        if denormalized:
+            return stmt.where(model.landlordId == landlord_id)
+        if model is not Lease:
+            stmt = stmt.join(Lease, model.leaseId == Lease.id)
+        return stmt.join(Lease.unit).join(Property).where(Property.landlordId == landlord_id)
+
+    def run(stmt):
+        return lambda db: db.execute(stmt).all()
+
+    return [
+        ("payments page", run(
+            scoped(select(Payment.id, Payment.amount, Payment.dueDate), Payment)
+            .order_by(Payment.createdAt.desc(), Payment.id.desc()).limit(51)
+        )),
+        ("overdue payments", run(
+            scoped(select(Payment.id), Payment).where(Payment.status == "PENDING", Payment.dueDate < now)
+        )),
+        ("payment totals", run(
+            scoped(select(Payment.status, func.count(Payment.id), func.sum(Payment.amount)), Payment)
+            .group_by(Payment.status)
+        )),
+        ("pending maintenance", run(
+            scoped(select(MaintenanceRequest.id), MaintenanceRequest).where(MaintenanceRequest.status == "PENDING")
+        )),
+        ("leases expiring in 30 days", run(
+            scoped(select(Lease.id), Lease).where(
+                Lease.status == "ACTIVE", Lease.endDate.between(now, now + timedelta(days=30))
+            )
+        )),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Join chain vs. denormalized landlordId on a large payment history")
+    parser.add_argument("--payments", type=int, default=1_000_000)
+    parser.add_argument("--landlords", type=int, default=100)
+    parser.add_argument("--units", type=int, default=100, help="Units (and leases) per landlord")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--plans", action="store_true", help="Print EXPLAIN QUERY PLAN for both forms")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import create_engine
+
+    workdir = tempfile.mkdtemp(prefix="pm-scope-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'unused.db')}")
+    url = f"sqlite:///{os.path.join(workdir, 'scope.db')}"
+    migrate(url, "head")
+    engine = create_engine(url)
+
+    started = time.perf_counter()
+    sizes = seed(engine, args.payments, args.landlords, args.units)
+    print(f"seeded {sizes} in {time.perf_counter() - started:.1f}s; median of {args.repeat} runs")
+
+    landlord_id = args.landlords // 2 + 1
+    joined = measure(engine, build_queries(landlord_id, denormalized=False), args.repeat)
+    column = measure(engine, build_queries(landlord_id, denormalized=True), args.repeat)
+    engine.dispose()
+
+    print(f"{'query':<28} {'join chain':>12} {'landlordId':>12} {'speedup':>8}")
+    for name, (join_plan, join_ms) in joined.items():
+        column_plan, column_ms = column[name]
+        print(f"{name:<28} {join_ms:>10.2f}ms {column_ms:>10.2f}ms {join_ms / max(column_ms, 1e-6):>7.1f}x")
+        if args.plans:
+            print("   join:   " + "\n           ".join(join_plan))
+            print("   column: " + "\n           ".join(column_plan))
+
+
+if __name__ == "__main__":
+    main()
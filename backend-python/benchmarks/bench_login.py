@@ -0,0 +1,105 @@
+"""
+Login throughput benchmark
+Fires a burst of concurrent logins at the app in-process while probing
+/health, reporting login throughput and how much the burst delays
+unrelated requests:
+
+    python benchmarks/bench_login.py [--logins 64] [--concurrency 16]
+
+Logins shed with 503 by the password pool are counted under statuses;
+PASSWORD_POOL_SIZE / PASSWORD_QUEUE_LIMIT tune the pool.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from bench_concurrency import percentile  # noqa: E402
+
+EMAIL = "bench@login.com"
+PASSWORD = "password123"
+
+
+def seed():
+    from app.database import SessionLocal, Base, engine
+    from app.auth import hash_password
+    from app.models import User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(User(email=EMAIL, name="Bench User", password=hash_password(PASSWORD), role="LANDLORD"))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run(logins: int, concurrency: int):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+        login_latencies, probe_latencies, statuses = [], [], {}
+        remaining = [logins]
+        done = asyncio.Event()
+
+        async def login_worker():
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                start = time.perf_counter()
+                response = await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                login_latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            # Time a 10 ms sleep plus a /health call; anything past the sleep
+            # is time the event loop spent unable to serve other requests
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                await client.get("/health")
+                probe_latencies.append(time.perf_counter() - start - 0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*[login_worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return login_latencies, probe_latencies, statuses, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Login burst benchmark")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='pm-bench-'), 'bench.db')}"
+        seed()
+
+    logins, probes, statuses, elapsed = asyncio.run(run(args.logins, args.concurrency))
+    login_ms = [value * 1000 for value in logins]
+    probe_ms = [value * 1000 for value in probes]
+
+    print(f"logins={len(login_ms)} concurrency={args.concurrency} elapsed={elapsed:.2f}s statuses={statuses}")
+    print(f"throughput={statuses.get(200, 0) / elapsed:.1f} logins/s")
+    print(f"login p50={percentile(login_ms, 50):.1f}ms p99={percentile(login_ms, 99):.1f}ms")
+    print(
+        f"/health during burst: samples={len(probe_ms)} p50={percentile(probe_ms, 50):.1f}ms "
+        f"p99={percentile(probe_ms, 99):.1f}ms max={max(probe_ms):.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Instrumentation overhead benchmark
+Drives a minimal ASGI endpoint (already routed, like a matched FastAPI
+route) directly, bare and wrapped in the middleware main.py installs, and
+reports the added cost per request. Exits non-zero past the budget:
+
+    python benchmarks/bench_metrics.py [--requests 200000] [--budget-us 50]
+
+Also times rendering /metrics with --routes route templates recorded.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+class _Route:
+    path = "/api/units/{unit_id}"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def time_app(app, requests: int) -> float:
+    """Seconds per request through `app`, best of three runs"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(requests):
+            scope = {"type": "http", "method": "GET", "path": "/api/units/1", "headers": []}
+            await app(scope, _receive, _send)
+        best = min(best, (time.perf_counter() - started) / requests)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Metrics and query statistics middleware overhead")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--budget-us", type=float, default=50.0)
+    parser.add_argument("--routes", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    from app import metrics, query_stats
+
+    stacks = {
+        "bare": endpoint,
+        "metrics": metrics.MetricsMiddleware(endpoint),
+        "metrics+query_stats": metrics.MetricsMiddleware(query_stats.QueryStatsMiddleware(endpoint)),
+    }
+    timings = {name: asyncio.run(time_app(app, args.requests)) for name, app in stacks.items()}
+
+    print(f"requests={args.requests} (best of 3)")
+    over_budget = False
+    for name, seconds in timings.items():
+        line = f"{name:<20} {seconds * 1e6:7.2f}us/request"
+        if name != "bare":
+            overhead = (seconds - timings["bare"]) * 1e6
+            over_budget |= overhead > args.budget_us
+            line += f"  overhead={overhead:.2f}us"
+        print(line)
+
+    for index in range(args.routes):
+        for status in (200, 404):
+            metrics.REQUEST_LATENCY.observe(0.01, "GET", f"/api/route{index}/{{id}}", status)
+
+    class _NoPool:
+        pass
+
+    class _NoDb:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute(self, statement):
+            class _Row:
+                def one(self):
+                    return 0, None
+            return _Row()
+
+    # The first render imports the modules its collectors read
+    asyncio.run(metrics.render(_NoDb, pool=_NoPool()))
+    started = time.perf_counter()
+    text = asyncio.run(metrics.render(_NoDb, pool=_NoPool()))
+    print(f"/metrics render: {len(text.splitlines())} lines in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    if over_budget:
+        print(f"❌ Overhead above {args.budget_us}us per request")
+        sys.exit(1)
+    print(f"✅ Overhead within {args.budget_us}us per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Query plan benchmark
+Migrates two throwaway SQLite files, one to the revision before the access
+path indexes (0002) and one to head, seeds both with the same portfolio and
+prints EXPLAIN QUERY PLAN plus median latency for the hot queries:
+
+    python benchmarks/bench_query_plans.py [--landlords 50] [--properties 10] [--units 10]
+
+Each query is the ORM select a router issued at 0003 (joining through
+Property for ownership, so it runs on both schemas); the SQL it emits is
+captured and explained.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+BEFORE_REVISION = "0002"
+PAYMENTS_PER_LEASE = 12
+
+
+def migrate(url: str, revision: str):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, revision)
+
+
+def seed(engine, landlords: int, properties: int, units: int, seed_value: int = 7):
+    """Bulk insert an identical portfolio into every database"""
+    from sqlalchemy import MetaData, insert
+
+    rng = random.Random(seed_value)
+    now = datetime(2026, 1, 1)
+    users, tenants, props, unit_rows, leases, payments, requests = [], [], [], [], [], [], []
+
+    for l in range(landlords):
+        landlord_id = l + 1
+        users.append({"id": landlord_id, "name": f"Landlord {l}", "email": f"landlord{l}@bench.com",
+                      "password": "x", "role": "LANDLORD"})
+        for p in range(properties):
+            property_id = len(props) + 1
+            props.append({"id": property_id, "title": f"Property {property_id}", "address": f"{property_id} Plan St",
+                          "city": "Toronto", "province": "ON", "postalCode": "M5H 2N2", "landlordId": landlord_id})
+            for u in range(units):
+                unit_id = len(unit_rows) + 1
+                active = rng.random() < 0.8
+                lease_id = len(leases) + 1
+                user_id = landlords + lease_id
+                users.append({"id": user_id, "name": f"Tenant {lease_id}", "email": f"tenant{lease_id}@bench.com",
+                              "password": "x", "role": "TENANT"})
+                tenants.append({"id": lease_id, "userId": user_id})
+                start = now - timedelta(days=rng.randint(0, 700))
+                leases.append({"id": lease_id, "tenantId": lease_id, "unitId": unit_id, "landlordId": landlord_id, "rent": 1500,
+                               "startDate": start, "endDate": start + timedelta(days=365),
+                               "status": "ACTIVE" if active else rng.choice(["TERMINATED", "EXPIRED"])})
+                unit_rows.append({"id": unit_id, "propertyId": property_id, "unitNumber": f"{u + 1:03d}",
+                                  "bedrooms": 1, "bathrooms": 1, "rentAmount": 1500,
+                                  "status": "OCCUPIED" if active else "AVAILABLE",
+                                  "currentLeaseId": lease_id if active else None})
+                for m in range(PAYMENTS_PER_LEASE):
+                    due = start + timedelta(days=30 * m)
+                    payments.append({"leaseId": lease_id, "landlordId": landlord_id, "amount": 1500, "dueDate": due,
+                                     "status": "PAID" if due < now - timedelta(days=30) else "PENDING"})
+                if rng.random() < 0.3:
+                    requests.append({"leaseId": lease_id, "landlordId": landlord_id, "title": "Leaky tap", "photos": "[]",
+                                     "status": rng.choice(["PENDING", "IN_PROGRESS", "COMPLETED"]),
+                                     "priority": "MEDIUM"})
+
+    # Reflected tables, so columns a revision lacks are simply dropped
+    metadata = MetaData()
+    metadata.reflect(engine)
+    with engine.begin() as conn:
+        for name, rows in (("User", users), ("Tenant", tenants), ("Property", props), ("Unit", unit_rows),
+                           ("Lease", leases), ("Payment", payments), ("MaintenanceRequest", requests)):
+            table = metadata.tables[name]
+            conn.execute(insert(table), [{k: v for k, v in row.items() if k in table.c} for row in rows])
+        conn.exec_driver_sql("ANALYZE")
+
+    return {"landlords": landlords, "units": len(unit_rows), "payments": len(payments)}
+
+
+def build_queries(landlords: int, properties: int, units: int):
+    """(name, callable(session)) pairs mirroring the routers' hot paths"""
+    from sqlalchemy import func, select
+    from app.models import Property, Unit, Lease, Payment, MaintenanceRequest
+
+    now = datetime(2026, 1, 1)
+    landlord_id = landlords // 2 + 1
+    property_id = (landlord_id - 1) * properties + 1
+    # Units, leases and tenants share ids in the seeded portfolio
+    unit_id = lease_id = (property_id - 1) * units + 1
+
+    def run(stmt):
+        return lambda db: db.execute(stmt).all()
+
+    return [
+        ("landlord payment totals", run(
+            select(Payment.status, func.count(Payment.id), func.sum(Payment.amount))
+            .join(Lease).join(Lease.unit).join(Property)
+            .where(Property.landlordId == landlord_id).group_by(Payment.status)
+        )),
+        ("landlord properties page", run(
+            select(Property.id).where(Property.landlordId == landlord_id)
+            .order_by(Property.createdAt.desc(), Property.id.desc()).limit(51)
+        )),
+        ("occupied units of property", run(
+            select(Unit.id).where(Unit.propertyId == property_id, Unit.status == "OCCUPIED")
+        )),
+        ("active lease of unit", run(
+            select(Lease.id).where(Lease.unitId == unit_id, Lease.status == "ACTIVE")
+        )),
+        ("pending payments of lease", run(
+            select(Payment.id, Payment.dueDate).where(Payment.leaseId == lease_id, Payment.status == "PENDING")
+            .order_by(Payment.dueDate)
+        )),
+        ("overdue payments", run(
+            select(Payment.id).where(Payment.status == "PENDING", Payment.dueDate < now - timedelta(days=25))
+            .order_by(Payment.dueDate).limit(100)
+        )),
+        ("leases expiring in 30 days", run(
+            select(Lease.id).where(Lease.status == "ACTIVE", Lease.endDate.between(now, now + timedelta(days=30)))
+        )),
+        ("open maintenance of lease", run(
+            select(MaintenanceRequest.id).where(
+                MaintenanceRequest.leaseId == lease_id, MaintenanceRequest.status == "PENDING"
+            )
+        )),
+    ]
+
+
+def measure(engine, queries, repeat: int):
+    """Explain and time each query against one database"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    results = {}
+    with Session(engine) as db:
+        for name, query in queries:
+            captured.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                query(db)
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+
+            plan = []
+            for statement, parameters in captured:
+                rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                plan.extend(row[-1] for row in rows)
+
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                query(db)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = (plan, statistics.median(timings))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query plans before/after the access path indexes")
+    parser.add_argument("--landlords", type=int, default=50)
+    parser.add_argument("--properties", type=int, default=10, help="Properties per landlord")
+    parser.add_argument("--units", type=int, default=10, help="Units (and leases) per property")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import create_engine
+
+    workdir = tempfile.mkdtemp(prefix="pm-plans-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'unused.db')}")
+
+    results = {}
+    for label, revision in (("before", BEFORE_REVISION), ("after", "head")):
+        url = f"sqlite:///{os.path.join(workdir, label + '.db')}"
+        migrate(url, revision)
+        engine = create_engine(url)
+        sizes = seed(engine, args.landlords, args.properties, args.units)
+        results[label] = measure(engine, build_queries(args.landlords, args.properties, args.units), args.repeat)
+        engine.dispose()
+
+    print(f"portfolio: {sizes}  before={BEFORE_REVISION} after=head  median of {args.repeat} runs")
+    for name in results["before"]:
+        before_plan, before_ms = results["before"][name]
+        after_plan, after_ms = results["after"][name]
+        print(f"\n== {name}: {before_ms:.2f}ms -> {after_ms:.2f}ms ({before_ms / max(after_ms, 1e-6):.1f}x)")
+        print("   before: " + "\n           ".join(before_plan))
+        print("   after:  " + "\n           ".join(after_plan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Photo upload benchmark
+Uploads a batch of large photos concurrently to a maintenance request
+in-process while probing /health, and reports upload latency, throughput
+and how long the event loop was unavailable to other requests:
+
+    python benchmarks/bench_uploads.py [--uploads 50] [--size-mb 10]
+
+--legacy runs the same load against the previous handler (Starlette form
+parsing to temporary files, then shutil.copyfileobj on the event loop)
+for comparison. Written files are checked against their SHA-256.
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_concurrency import percentile, seed  # noqa: E402
+
+
+def legacy_app():
+    """The upload handler as it was: buffered form parsing, blocking copies"""
+    from fastapi import FastAPI, File, UploadFile
+
+    app = FastAPI()
+
+    @app.post("/api/maintenance/{request_id}/photos")
+    async def upload(request_id: int, files: List[UploadFile] = File(...)):
+        upload_dir = f"uploads/maintenance/{request_id}"
+        os.makedirs(upload_dir, exist_ok=True)
+        photo_urls = []
+        for file in files:
+            with open(os.path.join(upload_dir, file.filename), "wb") as buffer:
+                shutil.copyfileobj(file.file, buffer)
+            photo_urls.append(f"/uploads/maintenance/{request_id}/{file.filename}")
+        return {"photos": photo_urls}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+async def run(uploads: int, size: int, concurrency: int, legacy: bool):
+    import httpx
+    from main import app as current_app
+    from app.database import SessionLocal
+    from app.models import MaintenanceRequest
+
+    db = SessionLocal()
+    request_id = db.query(MaintenanceRequest.id).first()[0]
+    db.close()
+
+    # One distinct payload per upload, so a mixed-up write cannot pass the hash check
+    base = os.urandom(size)
+    payloads = [index.to_bytes(4, "big") + base[4:] for index in range(uploads)]
+    digests = {f"photo-{index}.jpg": hashlib.sha256(payload).hexdigest() for index, payload in enumerate(payloads)}
+
+    transport = httpx.ASGITransport(app=legacy_app() if legacy else current_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        headers = {}
+        if not legacy:
+            login = await client.post("/api/auth/login", json={"email": "bench@landlord.com", "password": "password123"})
+            headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        latencies, probe_latencies = [], []
+        semaphore = asyncio.Semaphore(concurrency)
+        done = asyncio.Event()
+
+        async def upload(index):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    f"/api/maintenance/{request_id}/photos",
+                    # A file object is sent in 64 KB pieces, like a network client would
+                    files=[("files", (f"photo-{index}.jpg", io.BytesIO(payloads[index]), "image/jpeg"))],
+                    headers=headers
+                )
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        async def probe():
+            # Anything past the 10 ms sleep is time the loop could not serve /health
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                await client.get("/health")
+                probe_latencies.append(time.perf_counter() - start - 0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*[upload(index) for index in range(uploads)])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    from app.database import async_engine
+
+    # Pooled aiosqlite connections each hold a thread that would keep the process alive
+    await async_engine.dispose()
+
+    from app.photo_store import object_path
+
+    mismatched = 0
+    for name, digest in digests.items():
+        if legacy:
+            path = os.path.join("uploads", "maintenance", str(request_id), name)
+        else:
+            path = object_path(digest, ".jpg")
+        with open(path, "rb") as saved:
+            mismatched += hashlib.sha256(saved.read()).hexdigest() != digest
+    return latencies, probe_latencies, elapsed, mismatched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent photo upload benchmark")
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--legacy", action="store_true", help="Run against the previous upload handler")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="pm-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ.setdefault("UPLOAD_MAX_FILE_BYTES", str(int(args.size_mb * 1024 * 1024) + 1))
+    os.chdir(directory)
+    os.makedirs("uploads", exist_ok=True)
+    seed(1, 1)
+
+    size = int(args.size_mb * 1024 * 1024)
+    latencies, probes, elapsed, mismatched = asyncio.run(run(args.uploads, size, args.concurrency, args.legacy))
+    ms = [value * 1000 for value in latencies]
+    probe_ms = [value * 1000 for value in probes]
+
+    label = "legacy" if args.legacy else "streaming"
+    print(f"{label}: uploads={len(ms)} size={args.size_mb:g}MB concurrency={args.concurrency} "
+          f"elapsed={elapsed:.2f}s mismatched={mismatched}")
+    print(f"{label}: throughput={len(ms) * size / elapsed / 1024 / 1024:.1f} MB/s "
+          f"p50={percentile(ms, 50):.0f}ms p95={percentile(ms, 95):.0f}ms p99={percentile(ms, 99):.0f}ms")
+    print(f"{label}: /health during uploads: samples={len(probe_ms)} p50={percentile(probe_ms, 50):.1f}ms "
+          f"p99={percentile(probe_ms, 99):.1f}ms max={max(probe_ms):.1f}ms")
+
+    os.chdir(ROOT)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Webhook inbox benchmark
+Replays synthetic Stripe events (with redeliveries) against the webhook
+endpoint in-process, then drains the inbox, and reports acknowledgement
+latency and apply throughput, batched vs. one event per transaction:
+
+    python benchmarks/bench_webhooks.py [--events 10000] [--batch-size 200]
+
+The database is a throwaway SQLite file seeded with a small portfolio.
+SQLite commits one writer at a time, so ingest throughput is bounded by
+its commit latency here; the acknowledgement path is one INSERT either way.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_concurrency import percentile, seed  # noqa: E402
+
+SECRET = "whsec_bench"
+
+
+def synthetic_events(payment_ids, count: int, duplicate_rate: float):
+    """Checkout completions plus events the inbox only records, some delivered twice"""
+    rng = random.Random(42)
+    now = int(time.time())
+    events = []
+    for index in range(count):
+        payment_id = rng.choice(payment_ids)
+        event_type = "checkout.session.completed" if rng.random() < 0.8 else "payment_intent.created"
+        events.append({
+            "id": f"evt_{index}", "object": "event", "type": event_type, "created": now - count + index,
+            "data": {"object": {
+                "id": f"cs_{index}", "payment_intent": f"pi_{index}",
+                "metadata": {"payment_id": str(payment_id)},
+            }},
+        })
+    redelivered = [rng.choice(events) for _ in range(int(count * duplicate_rate))]
+    deliveries = events + redelivered
+    rng.shuffle(deliveries)
+    return deliveries
+
+
+def _signed(event):
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return payload, {"Stripe-Signature": f"t={timestamp},v1={signature}", "Content-Type": "application/json"}
+
+
+async def ingest(deliveries, concurrency: int):
+    import httpx
+    from sqlalchemy import event
+    from main import app
+    from app.database import async_engine
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _wait_for_writer(dbapi_connection, connection_record):
+        # Queue on SQLite's single write lock instead of failing after 5s
+        dbapi_connection.execute("PRAGMA busy_timeout=60000")
+
+    transport = httpx.ASGITransport(app=app)
+    latencies, duplicates = [], 0
+    queue = asyncio.Queue()
+    for event in deliveries:
+        queue.put_nowait(event)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal duplicates
+            while True:
+                try:
+                    event = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                payload, headers = _signed(event)
+                start = time.perf_counter()
+                response = await client.post("/api/webhooks/stripe", content=payload, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+                duplicates += response.json()["duplicate"]
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return latencies, elapsed, duplicates
+
+
+async def apply(url: str, batch_size: int):
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+    from app import webhook_inbox
+    from app.database import to_async_url
+
+    engine = create_async_engine(to_async_url(url))
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    webhook_inbox.WEBHOOK_BATCH_SIZE = batch_size
+    started = time.perf_counter()
+    applied = await webhook_inbox.drain_webhook_inbox(factory)
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return applied, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Webhook inbox ingest/apply benchmark")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Share of events delivered twice")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--properties", type=int, default=20)
+    parser.add_argument("--units", type=int, default=25, help="Units per property")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="pm-bench-")
+    path = os.path.join(directory, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = SECRET
+    os.environ["WEBHOOK_POLL_SECONDS"] = "0"
+    seed(args.properties, args.units)
+
+    from sqlalchemy import text
+    from app.database import SessionLocal
+    from app.models import Payment
+
+    db = SessionLocal()
+    # Concurrent writers: WAL keeps readers out of the writers' way
+    db.execute(text("PRAGMA journal_mode=WAL"))
+    payment_ids = [payment_id for payment_id, in db.query(Payment.id)]
+    db.close()
+
+    deliveries = synthetic_events(payment_ids, args.events, args.duplicates)
+    latencies, elapsed, duplicates = asyncio.run(ingest(deliveries, args.concurrency))
+    ms = [value * 1000 for value in latencies]
+    print(f"ingest: deliveries={len(ms)} duplicates={duplicates} concurrency={args.concurrency} elapsed={elapsed:.2f}s")
+    print(f"ingest: throughput={len(ms) / elapsed:.1f} events/s "
+          f"p50={percentile(ms, 50):.1f}ms p95={percentile(ms, 95):.1f}ms p99={percentile(ms, 99):.1f}ms")
+
+    # Same inbox for the one-event-per-transaction run (backup API: includes the WAL)
+    single = os.path.join(directory, "single.db")
+    with sqlite3.connect(path) as source, sqlite3.connect(single) as target:
+        source.backup(target)
+    for label, url, batch_size in (
+        (f"batch={args.batch_size}", f"sqlite:///{path}", args.batch_size),
+        ("batch=1", f"sqlite:///{single}", 1),
+    ):
+        applied, elapsed = asyncio.run(apply(url, batch_size))
+        print(f"apply {label}: events={applied} elapsed={elapsed:.2f}s throughput={applied / elapsed:.1f} events/s")
+
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,12 @@
 FastAPI Backend for Property Management System
 Main application entry point
 """
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import os
 
-from app.database import engine, Base
 from app.routers import (
     auth,
     properties,
@@ -21,9 +20,14 @@ from app.routers import (
     tenant_portal,
     webhooks
 )
+from app import metrics, query_stats
+from app.database import get_session_factory
+from app.photo_store import PhotoFiles, STAGING_DIR
+from app.sweeper import start_scheduler, stop_scheduler
+from app.thumbnails import start_thumbnailer, stop_thumbnailer
+from app.webhook_inbox import start_webhook_consumer, stop_webhook_consumer
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic: run `alembic upgrade head` before starting
 
 
 @asynccontextmanager
@@ -32,7 +36,20 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Property Management API...")
     # Create uploads directory if it doesn't exist
     os.makedirs("uploads/maintenance", exist_ok=True)
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    # Lease expiry, overdue payments and time-based alerts
+    scheduler = start_scheduler()
+    # Applies the Stripe events the webhook endpoint stored
+    webhook_consumer = start_webhook_consumer()
+    # Renders photo thumbnails and previews in a process pool
+    thumbnailer = start_thumbnailer()
     yield
+    if thumbnailer:
+        await stop_thumbnailer(thumbnailer)
+    if webhook_consumer:
+        await stop_webhook_consumer(webhook_consumer)
+    if scheduler:
+        await stop_scheduler(scheduler)
     print("👋 Shutting down Property Management API...")
 
 
@@ -52,8 +69,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Statement counts, DB time and rows per route; headers with QUERY_DEBUG
+app.add_middleware(query_stats.QueryStatsMiddleware)
+# Latency by route and requests in flight, for /metrics (outermost)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Mount static files for uploads (content-addressed photos are immutable)
+app.mount("/uploads", PhotoFiles(directory="uploads"), name="uploads")
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -84,6 +106,20 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(session_factory=Depends(get_session_factory)):
+    """Prometheus metrics: latency by route, DB pool, bcrypt pool, Stripe and webhook lag"""
+    return Response(await metrics.render(session_factory), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/query-stats", include_in_schema=False)
+async def query_stats_report():
+    """Per-route query counts, DB time and suspected N+1 statements (QUERY_DEBUG only)"""
+    if not query_stats.QUERY_DEBUG:
+        raise HTTPException(status_code=404)
+    return query_stats.route_stats()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=5000, reload=True)
@@ -1,33 +1,87 @@
 import pytest
 import os
 import sys
+import shutil
+import tempfile
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Tests drive the sweeper, alert sweep, webhook consumer and photo renditions explicitly
+# instead of in the background
+os.environ["SWEEPER_INTERVAL_SECONDS"] = "0"
+os.environ["ALERT_SWEEP_INTERVAL_SECONDS"] = "0"
+os.environ["WEBHOOK_POLL_SECONDS"] = "0"
+os.environ["THUMBNAIL_WORKERS"] = "0"
+
 from main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_session_factory
+from app import slow_queries
+from app.query_stats import instrument_engine
+from app.auth import user_cache
+from app.dashboard_cache import clear_dashboard_cache
 from app.models import User, Property, Unit, Lease, Payment, Tenant, MaintenanceRequest
 
-# Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Temporary SQLite database file shared by the synchronous fixture engine
+# and the async engine the application runs on
+TEST_DB_DIR = tempfile.mkdtemp(prefix="pm-tests-")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: TestClient runs the app on its own event loop per client, so
+# connections must not be reused across loops
+async_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"),
+    poolclass=NullPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _enable_wal(dbapi_connection, connection_record):
+    """WAL lets the fixture session read while the app writes"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+# As app/database.py does for the application's engine
+instrument_engine(async_engine.sync_engine)
+slow_queries.instrument_engine(async_engine.sync_engine)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
+
 
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database session for each test"""
     Base.metadata.create_all(bind=engine)
+    # Cached identities and dashboards would outlive the rows they were read from
+    user_cache.clear()
+    clear_dashboard_cache()
     db = TestingSessionLocal()
     try:
         yield db
@@ -39,18 +93,120 @@ def db_session():
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client with database dependency override"""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingAsyncSessionLocal
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def async_session_factory(db_session):
+    """Async sessions on the test database, for code that opens its own (background jobs)"""
+    return TestingAsyncSessionLocal
+
+
+@pytest.fixture
+def query_log():
+    """Record every SQL statement executed against the test engine"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+class FakeStripe:
+    """
+    Local stand-in for the Stripe API over HTTP: serves PaymentIntents by
+    id, with optional per-call latency and a number of 500s to return per
+    intent before succeeding. Tracks how many calls overlapped.
+    """
+    
+    def __init__(self):
+        self.intents = {}
+        self.failures = {}
+        self.latency = 0.0
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                fake._handle(self)
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+    
+    def add_intent(self, intent_id, status="succeeded"):
+        self.intents[intent_id] = status
+    
+    def _handle(self, request):
+        intent_id = request.path.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls.append(intent_id)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            with self._lock:
+                failing = self.failures.get(intent_id, 0) > 0
+                if failing:
+                    self.failures[intent_id] -= 1
+            if failing:
+                code, body = 500, {"error": {"type": "api_error", "message": "Temporary failure"}}
+            elif intent_id in self.intents:
+                code, body = 200, {"id": intent_id, "object": "payment_intent", "status": self.intents[intent_id]}
+            else:
+                code, body = 404, {"error": {"type": "invalid_request_error", "message": f"No such payment_intent: {intent_id}"}}
+            payload = json.dumps(body).encode()
+            request.send_response(code)
+            request.send_header("Content-Type", "application/json")
+            request.send_header("Content-Length", str(len(payload)))
+            request.end_headers()
+            request.wfile.write(payload)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_stripe(monkeypatch):
+    """Point the Stripe library at a local fake Stripe server"""
+    import stripe
+    from app import stripe_sync
+    
+    fake = FakeStripe()
+    thread = threading.Thread(target=fake.server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(stripe, "api_base", fake.url)
+    monkeypatch.setattr(stripe, "api_key", "sk_test_fake")
+    # Keep retry backoff short
+    monkeypatch.setattr(stripe_sync, "STRIPE_SYNC_BACKOFF_SECONDS", 0.01)
+    try:
+        yield fake
+    finally:
+        fake.server.shutdown()
+        fake.server.server_close()
+
+
 @pytest.fixture
 def landlord_user(db_session):
     """Create a test landlord user"""
@@ -151,7 +307,7 @@ def sample_unit(db_session, sample_property):
 
 
 @pytest.fixture
-def sample_lease(db_session, sample_unit, tenant_user):
+def sample_lease(db_session, sample_property, sample_unit, tenant_user):
     """Create a sample lease"""
     from datetime import datetime, timedelta
     
@@ -161,12 +317,17 @@ def sample_lease(db_session, sample_unit, tenant_user):
     lease = Lease(
         tenantId=tenant.id,
         unitId=sample_unit.id,
+        landlordId=sample_property.landlordId,
         startDate=datetime.now(),
         endDate=datetime.now() + timedelta(days=365),
         rent=1200,
         status="ACTIVE"
     )
     db_session.add(lease)
+    
+    # Mirror the lease lifecycle: the unit becomes occupied by this lease
+    from app.occupancy import sync_unit_occupancy
+    sync_unit_occupancy(db_session, [sample_unit.id])
     db_session.commit()
     db_session.refresh(lease)
     return lease
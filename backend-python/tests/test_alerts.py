@@ -0,0 +1,264 @@
+"""
+Test Alert Inbox
+Tests that alerts are materialized by the write handlers and the sweep,
+and read back as a paginated inbox with read/unread state
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.alerts import sweep_alerts, sweep_alerts_batch
+from app.sweeper import flag_overdue_payments_batch
+from app.models import Alert, Payment
+
+
+def _inbox(client, headers, path="/api/dashboard/manager-alerts", **params):
+    response = client.get(path, headers=headers, params=params)
+    assert response.status_code == 200
+    return response.json()["items"]
+
+
+@pytest.fixture
+def pending_payment(db_session, sample_lease):
+    """A pending payment due in three days, inserted without going through the API"""
+    payment = Payment(
+        leaseId=sample_lease.id,
+        landlordId=sample_lease.landlordId,
+        amount=1200,
+        dueDate=datetime.utcnow() + timedelta(days=3),
+        status="PENDING"
+    )
+    db_session.add(payment)
+    db_session.commit()
+    return payment
+
+
+class TestAlertsFromWrites:
+    """Test the write handlers raise and retire alerts in their transaction"""
+
+    def test_maintenance_request_alerts(self, client, auth_headers_landlord, auth_headers_tenant, sample_lease):
+        """Test filing a request alerts the landlord and progress alerts the tenant"""
+        request_id = client.post("/api/maintenance", headers=auth_headers_tenant, json={
+            "leaseId": sample_lease.id, "title": "Broken heater", "priority": "HIGH"
+        }).json()["id"]
+
+        alerts = _inbox(client, auth_headers_landlord)
+        assert [(a["kind"], a["type"], a["severity"], a["entityId"]) for a in alerts] == [
+            ("MAINTENANCE_PENDING", "maintenance", "high", request_id)
+        ]
+        assert alerts[0]["message"] == "Maintenance request: Broken heater"
+        assert alerts[0]["read"] is False
+
+        client.put(f"/api/maintenance/{request_id}", headers=auth_headers_landlord, json={"status": "IN_PROGRESS"})
+
+        assert _inbox(client, auth_headers_landlord) == []
+        tenant_alerts = _inbox(client, auth_headers_tenant, "/api/dashboard/tenant-alerts")
+        assert [(a["kind"], a["type"], a["link"]) for a in tenant_alerts] == [
+            ("MAINTENANCE_UPDATE", "info", "/tenant/maintenance")
+        ]
+        assert tenant_alerts[0]["message"] == "Maintenance request 'Broken heater' is now in progress"
+
+    def test_status_change_replaces_alert_unread(self, client, auth_headers_landlord, auth_headers_tenant, sample_lease):
+        """Test a new status re-surfaces the tenant's alert even after it was read"""
+        request_id = client.post("/api/maintenance", headers=auth_headers_tenant, json={
+            "leaseId": sample_lease.id, "title": "Leaky tap", "status": "IN_PROGRESS"
+        }).json()["id"]
+        alert = _inbox(client, auth_headers_tenant, "/api/dashboard/tenant-alerts")[0]
+        client.post(f"/api/dashboard/alerts/{alert['id']}/read", headers=auth_headers_tenant)
+
+        client.put(f"/api/maintenance/{request_id}", headers=auth_headers_landlord, json={"status": "COMPLETED"})
+
+        alerts = _inbox(client, auth_headers_tenant, "/api/dashboard/tenant-alerts")
+        assert len(alerts) == 1
+        assert alerts[0]["message"].endswith("is now completed")
+        assert alerts[0]["read"] is False
+
+    def test_overdue_payment_alerts_until_paid(self, client, auth_headers_landlord, auth_headers_tenant, sample_lease):
+        """Test an overdue payment alerts both sides and paying it clears them"""
+        payment_id = client.post("/api/payments/", headers=auth_headers_landlord, json={
+            "leaseId": sample_lease.id, "amount": 1200,
+            "dueDate": (datetime.utcnow() - timedelta(days=5)).isoformat()
+        }).json()["id"]
+
+        landlord_alerts = _inbox(client, auth_headers_landlord)
+        tenant_alerts = _inbox(client, auth_headers_tenant, "/api/dashboard/tenant-alerts")
+        assert [(a["kind"], a["type"], a["entityId"]) for a in landlord_alerts] == [
+            ("PAYMENT_OVERDUE", "payment", payment_id)
+        ]
+        assert [(a["kind"], a["type"], a["link"]) for a in tenant_alerts] == [
+            ("PAYMENT_OVERDUE", "urgent", "/tenant/payments")
+        ]
+
+        client.post(f"/api/payments/{payment_id}/pay", headers=auth_headers_landlord)
+
+        assert _inbox(client, auth_headers_landlord) == []
+        assert _inbox(client, auth_headers_tenant, "/api/dashboard/tenant-alerts") == []
+
+    def test_deleting_lease_removes_its_alerts(self, client, auth_headers_landlord, auth_headers_tenant,
+                                               sample_lease, db_session):
+        """Test alerts go with the lease they belong to"""
+        client.post("/api/maintenance", headers=auth_headers_tenant, json={
+            "leaseId": sample_lease.id, "title": "Broken window"
+        })
+        assert len(_inbox(client, auth_headers_landlord)) == 1
+
+        assert client.delete(f"/api/leases/{sample_lease.id}", headers=auth_headers_landlord).status_code == 204
+
+        assert _inbox(client, auth_headers_landlord) == []
+        assert db_session.query(Alert).count() == 0
+
+    def test_inbox_reads_only_the_alert_table(self, client, auth_headers_landlord, auth_headers_tenant,
+                                              sample_lease, query_log):
+        """Test the inbox no longer scans payments, requests and leases"""
+        client.post("/api/maintenance", headers=auth_headers_tenant, json={
+            "leaseId": sample_lease.id, "title": "Squeaky door"
+        })
+        _inbox(client, auth_headers_landlord)
+
+        query_log.clear()
+        _inbox(client, auth_headers_landlord)
+        assert query_log
+        assert all('FROM "Alert"' in statement for statement in query_log)
+
+
+class TestAlertSweep:
+    """Test the periodic sweep catches time-based transitions"""
+
+    def test_payment_comes_due_then_overdue(self, client, auth_headers_tenant, pending_payment, db_session):
+        """Test the tenant's upcoming-payment alert turns into an overdue one"""
+        assert sweep_alerts_batch(db_session, pending_payment.dueDate - timedelta(days=8), 500) == 0
+        assert sweep_alerts_batch(db_session, datetime.utcnow(), 500) == 1
+        db_session.commit()
+        alerts = _inbox(client, auth_headers_tenant, "/api/dashboard/tenant-alerts")
+        assert [(a["kind"], a["type"]) for a in alerts] == [("PAYMENT_DUE", "warning")]
+
+        assert flag_overdue_payments_batch(db_session, pending_payment.dueDate + timedelta(days=1), 500) == 1
+        db_session.commit()
+        alerts = _inbox(client, auth_headers_tenant, "/api/dashboard/tenant-alerts")
+        assert [(a["kind"], a["type"]) for a in alerts] == [("PAYMENT_OVERDUE", "urgent")]
+
+    def test_sweep_is_idempotent(self, pending_payment, db_session):
+        """Test a second sweep over unchanged data writes nothing"""
+        sweep_alerts(db_session)
+        db_session.commit()
+
+        result = sweep_alerts(db_session)
+        assert result["created"] == 0
+        assert result["removed"] == 0
+
+    def test_batch_skips_settled_rows(self, db_session, sample_lease):
+        """Test rows that already have their alert, or are long overdue, are not selected again"""
+        now = datetime.utcnow()
+        db_session.add_all([
+            Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=1000,
+                    dueDate=now + timedelta(days=index), status="PENDING")
+            for index in range(1, 4)
+        ] + [
+            Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=1000,
+                    dueDate=now - timedelta(days=60), overdueAt=now - timedelta(days=59), status="PENDING")
+        ])
+        db_session.commit()
+
+        assert sweep_alerts_batch(db_session, now, 2) == 2
+        db_session.commit()
+        assert sweep_alerts_batch(db_session, now, 2) == 1
+        db_session.commit()
+        assert sweep_alerts_batch(db_session, now, 2) == 0
+        assert db_session.query(Alert).filter(Alert.kind == "PAYMENT_DUE").count() == 3
+
+    def test_lease_enters_and_leaves_expiry_window(self, client, auth_headers_landlord, sample_lease, db_session):
+        """Test expiring-lease alerts appear 30 days out and go once the lease is terminated"""
+        sweep_alerts_batch(db_session, datetime.utcnow(), 500)
+        db_session.commit()
+        assert _inbox(client, auth_headers_landlord) == []
+
+        sweep_alerts_batch(db_session, sample_lease.endDate - timedelta(days=10), 500)
+        db_session.commit()
+        alerts = _inbox(client, auth_headers_landlord)
+        assert [(a["kind"], a["entityId"]) for a in alerts] == [("LEASE_EXPIRING", sample_lease.id)]
+
+        client.put(f"/api/leases/{sample_lease.id}", headers=auth_headers_landlord, json={"status": "TERMINATED"})
+        assert _inbox(client, auth_headers_landlord) == []
+
+    def test_lapsed_expiry_alert_retired(self, client, auth_headers_landlord, sample_lease, db_session):
+        """Test an expiry alert goes once the end date passed, before the lease is expired"""
+        sweep_alerts_batch(db_session, sample_lease.endDate - timedelta(days=10), 500)
+        db_session.commit()
+        assert len(_inbox(client, auth_headers_landlord)) == 1
+
+        assert sweep_alerts_batch(db_session, sample_lease.endDate + timedelta(hours=1), 500) == 1
+        db_session.commit()
+        assert _inbox(client, auth_headers_landlord) == []
+        assert sweep_alerts_batch(db_session, sample_lease.endDate + timedelta(hours=1), 500) == 0
+
+    def test_backfill_raises_open_maintenance_alerts(self, client, auth_headers_landlord, sample_lease, db_session):
+        """Test backfilling picks up requests filed before the inbox existed"""
+        from app.models import MaintenanceRequest
+
+        db_session.add(MaintenanceRequest(
+            leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title="Old request"
+        ))
+        db_session.commit()
+
+        sweep_alerts(db_session)
+        db_session.commit()
+        assert _inbox(client, auth_headers_landlord) == []
+
+        sweep_alerts(db_session, backfill=True)
+        db_session.commit()
+        assert [a["kind"] for a in _inbox(client, auth_headers_landlord)] == ["MAINTENANCE_PENDING"]
+
+
+class TestAlertReadState:
+    """Test read/unread state and pagination of the inbox"""
+
+    @pytest.fixture
+    def three_alerts(self, client, auth_headers_tenant, sample_lease):
+        for title in ("Heater", "Window", "Door"):
+            client.post("/api/maintenance", headers=auth_headers_tenant, json={
+                "leaseId": sample_lease.id, "title": title
+            })
+
+    def test_mark_read_and_unread(self, client, auth_headers_landlord, three_alerts):
+        """Test read alerts drop out of the unread view and count"""
+        alerts = _inbox(client, auth_headers_landlord)
+        assert client.get("/api/dashboard/alerts/unread-count", headers=auth_headers_landlord).json() == {"unread": 3}
+
+        response = client.post(f"/api/dashboard/alerts/{alerts[0]['id']}/read", headers=auth_headers_landlord)
+        assert response.status_code == 200
+        assert response.json()["read"] is True
+
+        unread = _inbox(client, auth_headers_landlord, unread_only=True)
+        assert [a["id"] for a in unread] == [a["id"] for a in alerts[1:]]
+        assert client.get("/api/dashboard/alerts/unread-count", headers=auth_headers_landlord).json() == {"unread": 2}
+
+        client.post(f"/api/dashboard/alerts/{alerts[0]['id']}/unread", headers=auth_headers_landlord)
+        assert len(_inbox(client, auth_headers_landlord, unread_only=True)) == 3
+
+    def test_mark_all_read(self, client, auth_headers_landlord, three_alerts):
+        """Test read-all empties the unread view but keeps the inbox"""
+        response = client.post("/api/dashboard/alerts/read-all", headers=auth_headers_landlord)
+        assert response.json() == {"unread": 0}
+
+        assert _inbox(client, auth_headers_landlord, unread_only=True) == []
+        assert len(_inbox(client, auth_headers_landlord)) == 3
+
+    def test_other_users_alert_not_found(self, client, auth_headers_landlord, auth_headers_tenant, three_alerts):
+        """Test a user cannot change the read state of someone else's alert"""
+        alert_id = _inbox(client, auth_headers_landlord)[0]["id"]
+
+        response = client.post(f"/api/dashboard/alerts/{alert_id}/read", headers=auth_headers_tenant)
+        assert response.status_code == 404
+
+    def test_inbox_pages(self, client, auth_headers_landlord, three_alerts):
+        """Test the inbox follows the shared cursor pagination"""
+        first = client.get("/api/dashboard/manager-alerts", headers=auth_headers_landlord, params={"limit": 2}).json()
+        assert len(first["items"]) == 2
+        assert first["next_cursor"]
+
+        second = client.get("/api/dashboard/manager-alerts", headers=auth_headers_landlord, params={
+            "limit": 2, "cursor": first["next_cursor"]
+        }).json()
+        assert len(second["items"]) == 1
+        assert second["next_cursor"] is None
+        assert {a["id"] for a in first["items"] + second["items"]} == {a["id"] for a in _inbox(client, auth_headers_landlord)}
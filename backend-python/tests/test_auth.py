@@ -182,3 +182,79 @@ class TestAuthenticatedAccess:
         )
         # Should fail because tenants can't create properties
         assert response.status_code in [403, 401]
+
+
+class TestUserCache:
+    """Test the authenticated-user cache in get_current_user"""
+    
+    @staticmethod
+    def _user_queries(statements):
+        return [s for s in statements if 'FROM "User"' in s]
+    
+    def test_repeat_requests_skip_user_lookup(self, client, auth_headers_landlord, query_log):
+        """Test only the first authenticated request reads the User row"""
+        from app.auth import user_cache
+        
+        query_log.clear()
+        for _ in range(3):
+            response = client.get("/api/auth/verify", headers=auth_headers_landlord)
+            assert response.status_code == 200
+            assert response.json()["user"]["email"] == "landlord@test.com"
+        
+        assert len(self._user_queries(query_log)) == 1
+        stats = user_cache.stats()
+        assert stats["hits"] >= 2
+        assert stats["misses"] >= 1
+    
+    def test_deleted_tenant_token_rejected(self, client, auth_headers_landlord, db_session):
+        """Test deleting a tenant drops their cached identity"""
+        from app.models import User, Tenant
+        
+        client.post("/api/auth/register", json={
+            "email": "cached@test.com", "name": "Cached Tenant",
+            "password": "password123", "role": "TENANT"
+        })
+        token = client.post("/api/auth/login", json={
+            "email": "cached@test.com", "password": "password123"
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+        
+        user = db_session.query(User).filter(User.email == "cached@test.com").first()
+        tenant = db_session.query(Tenant).filter(Tenant.userId == user.id).first()
+        assert client.delete(f"/api/tenants/{tenant.id}", headers=auth_headers_landlord).status_code == 204
+        
+        # The user row is removed out of band; without invalidation the cache would still answer
+        db_session.delete(db_session.get(User, user.id))
+        db_session.commit()
+        assert client.get("/api/auth/me", headers=headers).status_code == 401
+    
+    def test_cache_stats_admin_only(self, client, auth_headers_landlord):
+        """Test cache counters are not exposed to landlords"""
+        response = client.get("/api/auth/user-cache/stats", headers=auth_headers_landlord)
+        assert response.status_code == 403
+
+
+class TestPasswordPool:
+    """Test bcrypt runs on a bounded pool with backpressure"""
+    
+    def test_saturated_pool_returns_503(self, client, landlord_user, monkeypatch):
+        """Test logins are shed with Retry-After once the pool queue is full"""
+        import app.auth
+        monkeypatch.setattr(app.auth, "PASSWORD_QUEUE_LIMIT", 0)
+        
+        response = client.post(
+            "/api/auth/login",
+            json={"email": "landlord@test.com", "password": "password123"}
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert app.auth.password_pool_stats()["rejected"] >= 1
+    
+    def test_login_verifies_on_pool(self, client, landlord_user):
+        """Test a normal login still succeeds through the pool"""
+        response = client.post(
+            "/api/auth/login",
+            json={"email": "landlord@test.com", "password": "password123"}
+        )
+        assert response.status_code == 200
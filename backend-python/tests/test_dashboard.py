@@ -76,6 +76,170 @@ class TestDashboardStatistics:
         assert abs(data["occupancyRate"] - expected_occupancy) < 0.01
 
 
+class TestDashboardQueryCount:
+    """Test dashboard counters are computed in a single aggregate query"""
+    
+    @staticmethod
+    def _dashboard_queries(statements):
+        # Ignore the authenticated-user lookup done by get_current_user
+        return [s for s in statements if 'FROM "User"' not in s]
+    
+    def test_stats_single_query(self, client, auth_headers_landlord, sample_property, sample_unit, sample_lease, query_log):
+        """Test /stats is a single primary-key read of the landlord rollup"""
+        # First read materializes the rollup row from the source tables
+        first = client.get(
+            "/api/dashboard/stats",
+            headers=auth_headers_landlord
+        )
+        assert first.status_code == 200
+        
+        from app.dashboard_cache import clear_dashboard_cache
+        clear_dashboard_cache()
+        query_log.clear()
+        response = client.get(
+            "/api/dashboard/stats",
+            headers=auth_headers_landlord
+        )
+        assert response.status_code == 200
+        queries = self._dashboard_queries(query_log)
+        assert len(queries) == 1
+        assert 'FROM "LandlordStats"' in queries[0]
+        
+        data = response.json()
+        assert data == first.json()
+        assert data["properties"] == 1
+        assert data["units"] == 1
+        assert data["activeLeases"] == 1
+        assert data["pendingPayments"] == 0
+        assert data["pendingAmount"] == 0
+    
+    def test_manager_stats_single_query(self, client, auth_headers_landlord, sample_lease, db_session, query_log):
+        """Test /manager-stats issues one aggregate query and keeps its totals"""
+        from datetime import datetime, timedelta
+        from app.models import Payment, MaintenanceRequest
+        
+        db_session.add_all([
+            Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=1200.00, dueDate=datetime.utcnow() - timedelta(days=5), status="PENDING", overdueAt=datetime.utcnow()),
+            Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=1200.00, dueDate=datetime.utcnow() + timedelta(days=25), status="PENDING"),
+            Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=1000.00, dueDate=datetime.utcnow() - timedelta(days=35), status="PAID"),
+            MaintenanceRequest(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title="Leaky faucet", status="PENDING"),
+            MaintenanceRequest(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title="Broken heater", status="IN_PROGRESS"),
+        ])
+        db_session.commit()
+        
+        query_log.clear()
+        response = client.get(
+            "/api/dashboard/manager-stats",
+            headers=auth_headers_landlord
+        )
+        assert response.status_code == 200
+        assert len(self._dashboard_queries(query_log)) == 1
+        
+        data = response.json()
+        assert data["totalUnits"] == 1
+        assert data["occupiedUnits"] == 1
+        assert data["vacantUnits"] == 0
+        assert data["occupancyRate"] == 100.0
+        assert data["overduePayments"] == 1
+        assert data["pendingMaintenance"] == 1
+        assert data["totalRevenue"] == 1000.0
+        assert data["pendingRevenue"] == 2400.0
+        assert data["overdueRevenue"] == 1200.0
+
+
+class TestLandlordStatsRollup:
+    """Test the landlord rollup tracks writes made through the API"""
+    
+    def test_rollup_matches_source_tables(self, client, auth_headers_landlord, landlord_user, tenant_user, db_session):
+        """Test counters stay in step with create/update/delete handlers"""
+        from datetime import datetime, timedelta
+        from app.models import Tenant
+        from app.stats import landlord_aggregates
+        
+        tenant = db_session.query(Tenant).filter(Tenant.userId == tenant_user.id).first()
+        
+        # Materialize an empty rollup so every later change is incremental
+        assert client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()["properties"] == 0
+        
+        property_id = client.post("/api/properties", headers=auth_headers_landlord, json={
+            "title": "Rollup Property", "address": "1 Main St", "city": "Toronto",
+            "province": "ON", "postalCode": "M5H 2N2"
+        }).json()["id"]
+        unit_ids = [
+            client.post(f"/api/units/property/{property_id}", headers=auth_headers_landlord, json={
+                "unitNumber": number, "rentAmount": 1000
+            }).json()["id"]
+            for number in ("101", "102")
+        ]
+        start = datetime.utcnow()
+        lease_id = client.post("/api/leases/", headers=auth_headers_landlord, json={
+            "tenantId": tenant.id, "unitId": unit_ids[0], "rent": 1000,
+            "startDate": start.isoformat(), "endDate": (start + timedelta(days=90)).isoformat()
+        }).json()["id"]
+        
+        payments = client.get("/api/payments/", headers=auth_headers_landlord).json()["items"]
+        client.post(f"/api/payments/{payments[0]['id']}/pay", headers=auth_headers_landlord)
+        client.delete(f"/api/payments/{payments[1]['id']}", headers=auth_headers_landlord)
+        
+        request_id = client.post("/api/maintenance", headers=auth_headers_landlord, json={
+            "leaseId": lease_id, "title": "Broken window"
+        }).json()["id"]
+        client.put(f"/api/maintenance/{request_id}", headers=auth_headers_landlord, json={"status": "IN_PROGRESS"})
+        client.delete(f"/api/units/{unit_ids[1]}", headers=auth_headers_landlord)
+        
+        data = client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()
+        totals = landlord_aggregates(db_session, landlord_user.id)
+        
+        assert data == {
+            "properties": totals["properties"],
+            "units": totals["units"],
+            "activeLeases": totals["active_leases"],
+            "pendingPayments": totals["pending_payments"],
+            "pendingAmount": float(totals["pending_amount"]),
+            "pendingMaintenance": totals["pending_maintenance"],
+            "inProgressMaintenance": totals["in_progress_maintenance"]
+        }
+        assert data["units"] == 1
+        assert data["activeLeases"] == 1
+        assert data["inProgressMaintenance"] == 1
+    
+    def test_rebuild_repairs_drift(self, db_session, sample_lease, landlord_user):
+        """Test rebuild recomputes counters that have drifted"""
+        from app.models import LandlordStats
+        from app.stats import rebuild_all
+        
+        db_session.add(LandlordStats(landlordId=landlord_user.id, properties=42, units=-3))
+        db_session.commit()
+        
+        assert rebuild_all(db_session) == 1
+        
+        stats = db_session.get(LandlordStats, landlord_user.id)
+        assert stats.properties == 1
+        assert stats.units == 1
+        assert stats.activeLeases == 1
+
+    
+    def test_rebuild_races_another_writer(self, db_session, sample_lease, landlord_user, monkeypatch):
+        """Test a rollup row created by another session mid-rebuild is updated, not inserted twice"""
+        from sqlalchemy.orm import Session
+        from app import stats as stats_module
+        from app.models import LandlordStats
+        
+        aggregates = stats_module.landlord_aggregates
+        
+        def with_interloper(db, landlord_id):
+            with Session(db_session.get_bind()) as other:
+                other.add(LandlordStats(landlordId=landlord_id, properties=42))
+                other.commit()
+            return aggregates(db, landlord_id)
+        
+        monkeypatch.setattr(stats_module, "landlord_aggregates", with_interloper)
+        stats = stats_module.get_stats(db_session, landlord_user.id)
+        db_session.commit()
+        
+        assert (stats.properties, stats.units, stats.activeLeases) == (1, 1, 1)
+
+
 class TestRecentActivity:
     """Test recent activity feed"""
     
@@ -136,3 +300,136 @@ class TestDashboardAuthorization:
         """Test unauthenticated users cannot access dashboard"""
         response = client.get("/api/dashboard/manager-stats")
         assert response.status_code == 401
+
+
+class TestDashboardCache:
+    """Test dashboard responses are cached per landlord and dropped on writes"""
+    
+    def test_repeat_request_served_from_cache(self, client, auth_headers_landlord, sample_lease, query_log):
+        """Test a repeated dashboard poll runs no queries"""
+        first = client.get("/api/dashboard/manager-stats", headers=auth_headers_landlord)
+        assert first.status_code == 200
+        
+        query_log.clear()
+        second = client.get("/api/dashboard/manager-stats", headers=auth_headers_landlord)
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert query_log == []
+    
+    def test_first_read_materializing_rollup_is_cached(self, client, auth_headers_landlord, landlord_user,
+                                                         sample_lease, db_session, query_log):
+        """Test the read that creates a landlord's rollup row still fills the cache"""
+        from app.models import LandlordStats
+        assert db_session.get(LandlordStats, landlord_user.id) is None
+
+        first = client.get("/api/dashboard/stats", headers=auth_headers_landlord)
+        assert first.status_code == 200
+
+        query_log.clear()
+        second = client.get("/api/dashboard/stats", headers=auth_headers_landlord)
+        assert second.json() == first.json()
+        assert query_log == []
+    
+    def test_write_invalidates_cached_response(self, client, auth_headers_landlord, sample_property):
+        """Test creating a property shows up on the next poll"""
+        before = client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()
+        
+        response = client.post("/api/properties", headers=auth_headers_landlord, json={
+            "title": "Second Property", "address": "9 Cache St", "city": "Toronto",
+            "province": "ON", "postalCode": "M5V 3A8"
+        })
+        assert response.status_code == 201
+        
+        after = client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()
+        assert after["properties"] == before["properties"] + 1
+    
+    def test_landlords_do_not_share_entries(self, client, auth_headers_landlord, sample_property):
+        """Test one landlord's cached dashboard is never served to another"""
+        assert client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()["properties"] == 1
+        
+        client.post("/api/auth/register", json={
+            "email": "other@test.com", "name": "Other Landlord",
+            "password": "password123", "role": "LANDLORD"
+        })
+        token = client.post("/api/auth/login", json={
+            "email": "other@test.com", "password": "password123"
+        }).json()["access_token"]
+        other = client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {token}"})
+        assert other.json()["properties"] == 0
+    
+    def test_concurrent_misses_compute_once(self):
+        """Test identical requests arriving together share one computation"""
+        import asyncio
+        from app.cache import SingleFlightCache
+        
+        cache = SingleFlightCache(maxsize=8, ttl=60)
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+        
+        async def burst():
+            return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(20)))
+        
+        results = asyncio.run(burst())
+        assert results == [{"value": 42}] * 20
+        assert len(calls) == 1
+        assert cache.stats()["coalesced"] == 19
+    
+    def test_cancelled_leader_does_not_fail_waiters(self):
+        """Test waiters of a computation whose caller was cancelled compute it themselves"""
+        import asyncio
+        from app.cache import SingleFlightCache
+        
+        cache = SingleFlightCache(maxsize=8, ttl=60)
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": len(calls)}
+        
+        async def burst():
+            leader = asyncio.create_task(cache.get_or_compute("key", compute))
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await asyncio.gather(*waiters), leader
+        
+        results, leader = asyncio.run(burst())
+        assert leader.cancelled()
+        assert results == [{"value": 2}] * 5
+        assert len(calls) == 2
+    
+    def test_failed_computation_not_cached(self):
+        """Test an error reaches every waiter and the next call retries"""
+        import asyncio
+        from app.cache import SingleFlightCache
+        
+        cache = SingleFlightCache(maxsize=8, ttl=60)
+        attempts = []
+        
+        async def compute():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            if len(attempts) == 1:
+                raise RuntimeError("database unavailable")
+            return "ok"
+        
+        async def burst():
+            return await asyncio.gather(
+                *(cache.get_or_compute("key", compute) for _ in range(3)), return_exceptions=True
+            )
+        
+        results = asyncio.run(burst())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert asyncio.run(cache.get_or_compute("key", compute)) == "ok"
+        assert len(attempts) == 2
+    
+    def test_cache_stats_admin_only(self, client, auth_headers_landlord):
+        """Test cache counters are not exposed to landlords"""
+        response = client.get("/api/dashboard/cache/stats", headers=auth_headers_landlord)
+        assert response.status_code == 403
@@ -93,7 +93,7 @@ class TestLeaseRetrieval:
             headers=auth_headers_landlord
         )
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert isinstance(data, list)
         assert len(data) >= 1
     
@@ -147,3 +147,72 @@ class TestLeaseUpdate:
         assert response.status_code == 200
         data = response.json()
         assert data["rent"] == 1500
+
+
+class TestPaymentSchedules:
+    """Test payment schedule generation for leases"""
+    
+    def test_monthly_due_dates_cover_term(self):
+        """Test the schedule spans the full term without month-end drift"""
+        from app.schedules import monthly_due_dates
+        
+        dates = monthly_due_dates(datetime(2025, 1, 31), datetime(2027, 1, 31))
+        assert len(dates) == 24
+        assert dates[1] == datetime(2025, 2, 28)
+        assert dates[2] == datetime(2025, 3, 31)
+        assert dates[-1] == datetime(2026, 12, 31)
+        
+        # Open-ended leases bill for a year; a short lease still owes its first month
+        assert len(monthly_due_dates(datetime(2025, 1, 1))) == 12
+        assert monthly_due_dates(datetime(2025, 1, 1), datetime(2025, 1, 10)) == [datetime(2025, 1, 1)]
+    
+    def test_create_lease_generates_full_schedule(self, client, auth_headers_landlord, sample_unit, tenant_user, db_session):
+        """Test a two-year lease gets 24 payments, not a capped 12"""
+        from app.models import Tenant, Payment
+        tenant = db_session.query(Tenant).filter(Tenant.userId == tenant_user.id).first()
+        
+        response = client.post(
+            "/api/leases/",
+            headers=auth_headers_landlord,
+            json={
+                "tenantId": tenant.id,
+                "unitId": sample_unit.id,
+                "startDate": datetime(2025, 1, 1).isoformat(),
+                "endDate": datetime(2027, 1, 1).isoformat(),
+                "rent": 1200
+            }
+        )
+        assert response.status_code == 201
+        
+        payments = db_session.query(Payment).filter(Payment.leaseId == response.json()["id"]).all()
+        assert len(payments) == 24
+        assert all(p.amount == 1200 and p.status == "PENDING" for p in payments)
+    
+    def test_bulk_generate_schedules(self, client, auth_headers_landlord, sample_lease, db_session):
+        """Test the bulk endpoint fills unscheduled leases and skips scheduled ones"""
+        from app.models import Payment
+        
+        first = client.post(
+            "/api/leases/payment-schedules",
+            headers=auth_headers_landlord,
+            json={"leaseIds": [sample_lease.id]}
+        )
+        assert first.status_code == 201
+        assert first.json() == {"leases": 1, "skippedLeaseIds": [], "paymentsCreated": 12}
+        
+        second = client.post(
+            "/api/leases/payment-schedules",
+            headers=auth_headers_landlord,
+            json={"leaseIds": [sample_lease.id]}
+        )
+        assert second.json() == {"leases": 0, "skippedLeaseIds": [sample_lease.id], "paymentsCreated": 0}
+        assert db_session.query(Payment).filter(Payment.leaseId == sample_lease.id).count() == 12
+    
+    def test_bulk_rejects_unknown_leases(self, client, auth_headers_landlord, sample_lease):
+        """Test leases outside the landlord's portfolio are rejected"""
+        response = client.post(
+            "/api/leases/payment-schedules",
+            headers=auth_headers_landlord,
+            json={"leaseIds": [sample_lease.id, 99999]}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,121 @@
+"""
+Test Maintenance Photo Rows
+Tests a request's photos are appended as MaintenancePhoto rows with their
+hash, size and dimensions, that list endpoints load them in one batch, and
+that deleting a request or its lease removes them
+"""
+import io
+
+import pytest
+from PIL import Image
+from sqlalchemy import select
+
+from app.models import MaintenancePhoto, MaintenanceRequest, PhotoObject
+
+
+@pytest.fixture(autouse=True)
+def upload_root(tmp_path, monkeypatch):
+    """Keep the store under a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_request(db_session, sample_lease):
+    def create(title="Broken window"):
+        request = MaintenanceRequest(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title=title)
+        db_session.add(request)
+        db_session.commit()
+        return request
+    return create
+
+
+def _jpeg(width, height, orientation=None):
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new("RGB", (width, height), (90, 90, 90)).save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def _upload(client, headers, request_id, files):
+    response = client.post(
+        f"/api/maintenance/{request_id}/photos",
+        files=[("files", (name, content, "image/jpeg")) for name, content in files],
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _rows(db_session, request_id):
+    db_session.expire_all()
+    return db_session.scalars(
+        select(MaintenancePhoto).where(MaintenancePhoto.requestId == request_id).order_by(MaintenancePhoto.id)
+    ).all()
+
+
+class TestPhotoRows:
+    """Test the rows written by uploads and creates"""
+
+    def test_upload_records_metadata(self, client, auth_headers_landlord, make_request, db_session):
+        """Test each uploaded file becomes a row with hash, size and displayed dimensions"""
+        request = make_request()
+        body = _upload(client, auth_headers_landlord, request.id, [
+            ("wide.jpg", _jpeg(300, 200)), ("rotated.jpg", _jpeg(300, 200, orientation=6)), ("notes.txt", b"text")
+        ])
+
+        rows = _rows(db_session, request.id)
+        assert [row.url for row in rows] == body["photos"]
+        assert [(row.width, row.height) for row in rows] == [(300, 200), (200, 300), (None, None)]
+        assert [(row.sha256, row.size) for row in rows] == [(file["sha256"], file["size"]) for file in body["files"]]
+        assert [(file["width"], file["height"]) for file in body["files"]] == [(300, 200), (200, 300), (None, None)]
+
+    def test_created_with_urls(self, client, auth_headers_landlord, make_request, sample_lease, db_session):
+        """Test photo URLs given on create become rows, stored ones with what is known of their object"""
+        uploaded = _upload(client, auth_headers_landlord, make_request().id, [("a.jpg", _jpeg(40, 30))])
+        url = uploaded["photos"][0]
+
+        response = client.post("/api/maintenance", json={
+            "leaseId": sample_lease.id, "title": "Same window", "photos": ["https://example.com/a.jpg", url]
+        }, headers=auth_headers_landlord)
+        assert response.status_code == 201
+        assert response.json()["photos"] == ["https://example.com/a.jpg", url]
+
+        rows = _rows(db_session, response.json()["id"])
+        assert [(row.sha256, row.size, row.width, row.height) for row in rows] == [
+            (None, None, None, None), (uploaded["files"][0]["sha256"], uploaded["files"][0]["size"], 40, 30)
+        ]
+
+    def test_list_loads_photos_in_one_query(self, client, auth_headers_landlord, make_request, query_log):
+        """Test a page of requests reads all their photos (and objects) with a single statement"""
+        for index in range(3):
+            request = make_request(f"Request {index}")
+            _upload(client, auth_headers_landlord, request.id, [(f"{index}.jpg", _jpeg(10 + index, 10))])
+
+        query_log.clear()
+        items = client.get("/api/maintenance", headers=auth_headers_landlord).json()["items"]
+        assert [len(item["photos"]) for item in items] == [1, 1, 1]
+        assert len([statement for statement in query_log if 'FROM "MaintenancePhoto"' in statement]) == 1
+
+
+class TestPhotoRowRemoval:
+    """Test rows go with their request"""
+
+    def test_delete_removes_rows_and_references(self, client, auth_headers_landlord, make_request, db_session):
+        """Test deleting a request deletes its rows and releases their objects"""
+        request = make_request()
+        body = _upload(client, auth_headers_landlord, request.id, [("a.jpg", _jpeg(20, 20)), ("b.jpg", _jpeg(20, 20))])
+
+        assert client.delete(f"/api/maintenance/{request.id}", headers=auth_headers_landlord).status_code == 204
+        assert _rows(db_session, request.id) == []
+        assert db_session.get(PhotoObject, body["files"][0]["sha256"]).refCount == 0
+
+    def test_lease_delete_removes_rows(self, client, auth_headers_landlord, make_request, sample_lease, db_session):
+        """Test deleting the lease cascades to its requests' photo rows"""
+        request = make_request()
+        _upload(client, auth_headers_landlord, request.id, [("a.jpg", _jpeg(20, 20))])
+
+        assert client.delete(f"/api/leases/{sample_lease.id}", headers=auth_headers_landlord).status_code == 204
+        assert _rows(db_session, request.id) == []
@@ -0,0 +1,158 @@
+"""
+Test Prometheus Metrics
+Tests /metrics renders latency histograms by route and status, requests in
+flight, the database and bcrypt pools, Stripe call latency and webhook lag
+"""
+from datetime import datetime, timedelta
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import metrics, webhook_inbox
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    for metric in metrics._registry:
+        metric.clear()
+    yield
+
+
+def _scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(metrics.CONTENT_TYPE)
+    return metrics.samples(response.text)
+
+
+def _event(event_id, payment_id):
+    return {
+        "id": event_id, "type": "checkout.session.completed", "created": 1700000000,
+        "data": {"object": {"id": f"cs_{event_id}", "metadata": {"payment_id": str(payment_id)}}},
+    }
+
+
+class TestRequests:
+    """Test request latency and in-flight tracking"""
+
+    def test_latency_by_route_and_status(self, client, auth_headers_landlord, sample_unit):
+        """Test requests land in a histogram labelled by route template and status"""
+        client.get(f"/api/units/{sample_unit.id}", headers=auth_headers_landlord)
+        client.get("/api/units/999", headers=auth_headers_landlord)
+        client.get("/api/units/998", headers=auth_headers_landlord)
+
+        samples = _scrape(client)
+        ok = '{method="GET",route="/api/units/{unit_id}",status="200"}'
+        missing = '{method="GET",route="/api/units/{unit_id}",status="404"}'
+        assert samples[("http_request_duration_seconds_count", ok)] == 1
+        assert samples[("http_request_duration_seconds_count", missing)] == 2
+        assert samples[("http_request_duration_seconds_bucket", missing[:-1] + ',le="+Inf"}')] == 2
+        # The scrape itself is the one request in flight
+        assert samples[("http_requests_in_flight", "")] == 1
+
+    def test_unmatched_paths_share_a_label(self, client):
+        """Test unknown paths do not create a series each"""
+        client.get("/no/such/path")
+        client.get("/another/missing/path")
+
+        samples = _scrape(client)
+        assert samples[("http_request_duration_seconds_count", '{method="GET",route="(unmatched)",status="404"}')] == 2
+
+
+class TestHistogram:
+    """Test the exposition of histograms"""
+
+    def test_cumulative_buckets_sum_and_count(self):
+        """Test buckets count observations at or below their bound, cumulatively"""
+        histogram = metrics.Histogram("test_seconds", "Test", ("kind",), buckets=(0.1, 1))
+        try:
+            for value in (0.05, 0.1, 0.5, 3):
+                histogram.observe(value, "a")
+            assert histogram.render() == [
+                "# HELP test_seconds Test",
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{kind="a",le="0.1"} 2',
+                'test_seconds_bucket{kind="a",le="1.0"} 3',
+                'test_seconds_bucket{kind="a",le="+Inf"} 4',
+                'test_seconds_sum{kind="a"} 3.65',
+                'test_seconds_count{kind="a"} 4',
+            ]
+        finally:
+            metrics._registry.remove(histogram)
+
+
+class TestSources:
+    """Test the values sampled from the pools, Stripe and the webhook inbox"""
+
+    def test_pool_checkout_and_size(self, tmp_path):
+        """Test the timed pool records checkouts and is sampled for its size"""
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=metrics.TimedAsyncQueuePool, pool_size=3
+        )
+
+        async def run():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                metrics._collect_pool(engine.pool)
+            await engine.dispose()
+
+        asyncio.run(run())
+        assert metrics.samples("\n".join(metrics.POOL_CHECKOUT.render()))[("db_pool_checkout_seconds_count", "")] == 1
+        assert metrics.samples("\n".join(metrics.POOL_SIZE.render() + metrics.POOL_CHECKED_OUT.render())) == {
+            ("db_pool_size", ""): 3, ("db_pool_checked_out", ""): 1
+        }
+
+    def test_password_pool(self, client):
+        """Test the bcrypt pool's queue is reported"""
+        samples = _scrape(client)
+        assert samples[("password_pool_pending", "")] == 0
+        assert samples[("password_pool_queue_limit", "")] > 0
+        assert ("password_pool_rejected_total", "") in samples
+
+    def test_stripe_latency_by_outcome(self):
+        """Test wrapped Stripe calls are timed whether they succeed or raise"""
+        def failing(intent_id):
+            raise RuntimeError("stripe down")
+
+        assert metrics.timed_stripe("PaymentIntent.retrieve", lambda intent_id: intent_id)("pi_1") == "pi_1"
+        with pytest.raises(RuntimeError):
+            metrics.timed_stripe("PaymentIntent.retrieve", failing)("pi_2")
+
+        samples = metrics.samples("\n".join(metrics.STRIPE_LATENCY.render()))
+        assert samples[("stripe_request_duration_seconds_count", '{operation="PaymentIntent.retrieve",outcome="ok"}')] == 1
+        assert samples[("stripe_request_duration_seconds_count", '{operation="PaymentIntent.retrieve",outcome="error"}')] == 1
+
+    def test_webhook_backlog_and_lag(self, client, db_session):
+        """Test pending events are reported until applied, then their lag is recorded"""
+        received = datetime.utcnow() - timedelta(seconds=90)
+        webhook_inbox.store_event(db_session, _event("evt_1", 999), now=received)
+        db_session.commit()
+
+        samples = _scrape(client)
+        assert samples[("webhook_pending_events", "")] == 1
+        assert samples[("webhook_oldest_pending_seconds", "")] >= 90
+
+        webhook_inbox.apply_webhook_batch(db_session)
+        samples = _scrape(client)
+        assert samples[("webhook_pending_events", "")] == 0
+        assert samples[("webhook_apply_lag_seconds_count", "")] == 1
+        assert samples[("webhook_apply_lag_seconds_bucket", '{le="60.0"}')] == 0
+        assert samples[("webhook_apply_lag_seconds_bucket", '{le="300.0"}')] == 1
+
+    def test_scrape_survives_database_failure(self, client):
+        """Test a failing backlog read leaves its gauges out and is flagged, the rest still served"""
+        from main import app
+        from app.database import get_session_factory
+
+        def unreachable():
+            raise ConnectionRefusedError("database is down")
+
+        client.get("/health")
+        app.dependency_overrides[get_session_factory] = lambda: unreachable
+        samples = _scrape(client)
+        assert samples[("metrics_collector_failed", '{collector="webhooks"}')] == 1
+        assert ("webhook_pending_events", "") not in samples
+        assert samples[("http_request_duration_seconds_count", '{method="GET",route="/health",status="200"}')] == 1
+        assert ("password_pool_queue_limit", "") in samples
@@ -0,0 +1,143 @@
+"""
+Test Migrations
+Tests that the Alembic history builds the schema the models describe
+"""
+import os
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+@pytest.fixture
+def migration_db(tmp_path):
+    """An empty SQLite file and an Alembic config pointing at it"""
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+
+    engine = create_engine(url)
+    yield config, engine
+    engine.dispose()
+
+
+class TestMigrations:
+    """Test upgrade/downgrade of the migration history"""
+
+    def test_head_matches_models(self, migration_db):
+        """Test upgrading to head leaves nothing for autogenerate to add"""
+        config, engine = migration_db
+        command.upgrade(config, "head")
+
+        with engine.connect() as conn:
+            diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        assert diff == []
+
+    def test_partial_indexes_created(self, migration_db):
+        """Test the status-filtered indexes keep their WHERE clause"""
+        config, engine = migration_db
+        command.upgrade(config, "head")
+
+        with engine.connect() as conn:
+            sql = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'index'")).all())
+        assert "WHERE status = 'PENDING'" in sql["ix_Payment_pending_dueDate"]
+        assert "WHERE status = 'ACTIVE'" in sql["ix_Lease_active_endDate"]
+
+    def test_upgrade_backfills_existing_rows(self, migration_db):
+        """Test a baseline database keeps its data and gets derived columns filled in"""
+        config, engine = migration_db
+        command.upgrade(config, "0001")
+
+        with engine.begin() as conn:
+            conn.execute(text(
+                """INSERT INTO "User" (id, name, email, password, role)
+                   VALUES (1, 'Landlord', 'l@test.com', 'x', 'LANDLORD'),
+                          (2, 'Tenant', 't@test.com', 'x', 'TENANT')"""
+            ))
+            conn.execute(text("""INSERT INTO "Tenant" (id, "userId") VALUES (1, 2)"""))
+            conn.execute(text(
+                """INSERT INTO "Property" (id, title, address, city, province, "postalCode", "landlordId")
+                   VALUES (1, 'P', '1 St', 'Toronto', 'ON', 'M5H', 1)"""
+            ))
+            conn.execute(text(
+                """INSERT INTO "Unit" (id, "unitNumber", bedrooms, bathrooms, "rentAmount", "propertyId")
+                   VALUES (1, '101', 1, 1, 1500, 1), (2, '102', 1, 1, 1500, 1)"""
+            ))
+            conn.execute(text(
+                """INSERT INTO "Lease" (id, "startDate", "endDate", status, "tenantId", "unitId")
+                   VALUES (1, '2025-01-01', '2026-01-01', 'ACTIVE', 1, 1),
+                          (2, '2024-01-01', '2025-01-01', 'EXPIRED', 1, 2)"""
+            ))
+            conn.execute(text(
+                """INSERT INTO "Payment" (id, amount, "dueDate", status, "leaseId")
+                   VALUES (1, 1500, '2025-02-01', 'PENDING', 1)"""
+            ))
+
+        command.upgrade(config, "head")
+
+        with engine.connect() as conn:
+            units = conn.execute(text("""SELECT id, status, "currentLeaseId" FROM "Unit" ORDER BY id""")).all()
+            tenant_created = conn.execute(text("""SELECT "createdAt" FROM "Tenant" WHERE id = 1""")).scalar()
+            lease_owners = conn.execute(text("""SELECT "landlordId" FROM "Lease" ORDER BY id""")).scalars().all()
+            payment_owner = conn.execute(text("""SELECT "landlordId" FROM "Payment" WHERE id = 1""")).scalar()
+        assert [tuple(row) for row in units] == [(1, "OCCUPIED", 1), (2, "AVAILABLE", None)]
+        assert tenant_created is not None
+        assert lease_owners == [1, 1]
+        assert payment_owner == 1
+
+    def test_photo_arrays_become_rows(self, migration_db):
+        """Test JSON photo arrays move to MaintenancePhoto rows in order, and back on downgrade"""
+        config, engine = migration_db
+        command.upgrade(config, "0009")
+        sha256 = "ab" * 32
+        content_url = f"/uploads/objects/ab/ab/{sha256}.jpg"
+
+        with engine.begin() as conn:
+            conn.execute(text(
+                """INSERT INTO "User" (id, name, email, password, role) VALUES (1, 'Landlord', 'l@test.com', 'x', 'LANDLORD')"""
+            ))
+            conn.execute(text(
+                """INSERT INTO "Lease" (id, "startDate", "endDate", status, "tenantId", "unitId", "landlordId")
+                   VALUES (1, '2025-01-01', '2026-01-01', 'ACTIVE', 1, 1, 1)"""
+            ))
+            conn.execute(text(
+                """INSERT INTO "PhotoObject" (sha256, extension, size, "refCount", "createdAt", "renditionAttempts")
+                   VALUES (:sha256, '.jpg', 42, 1, '2025-01-01', 0)"""
+            ), {"sha256": sha256})
+            conn.execute(text(
+                """INSERT INTO "MaintenanceRequest" (id, title, status, priority, photos, "leaseId", "landlordId")
+                   VALUES (1, 'Leak', 'PENDING', 'LOW', :photos, 1, 1), (2, 'Door', 'PENDING', 'LOW', '[]', 1, 1)"""
+            ), {"photos": f'["https://example.com/b.png", "{content_url}"]'})
+
+        command.upgrade(config, "head")
+
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                """SELECT "requestId", url, sha256, size FROM "MaintenancePhoto" ORDER BY id"""
+            )).all()
+        assert [tuple(row) for row in rows] == [
+            (1, "https://example.com/b.png", None, None), (1, content_url, sha256, 42)
+        ]
+
+        command.downgrade(config, "0009")
+
+        with engine.connect() as conn:
+            photos = conn.execute(text("""SELECT photos FROM "MaintenanceRequest" ORDER BY id""")).scalars().all()
+        assert photos == [f'["https://example.com/b.png","{content_url}"]', "[]"]
+
+    def test_downgrade_to_base(self, migration_db):
+        """Test every revision can be rolled back"""
+        config, engine = migration_db
+        command.upgrade(config, "head")
+        command.downgrade(config, "base")
+
+        assert inspect(engine).get_table_names() == ["alembic_version"]
@@ -0,0 +1,95 @@
+"""
+Test Cursor Pagination
+Tests for keyset pagination shared by the list endpoints
+"""
+import pytest
+
+
+class TestCursorPagination:
+    """Test limit/cursor paging over (createdAt, id)"""
+
+    @pytest.fixture
+    def many_properties(self, db_session, landlord_user):
+        """Create properties that share a creation timestamp"""
+        from app.models import Property
+
+        properties = [
+            Property(
+                title=f"Property {i}",
+                address=f"{i} Page St",
+                city="Toronto",
+                province="ON",
+                postalCode="M5H 2N2",
+                landlordId=landlord_user.id
+            )
+            for i in range(7)
+        ]
+        db_session.add_all(properties)
+        db_session.commit()
+        return properties
+
+    def _walk(self, client, headers, path, limit):
+        """Follow next_cursor until the last page"""
+        pages = []
+        params = {"limit": limit}
+        while True:
+            response = client.get(path, headers=headers, params=params)
+            assert response.status_code == 200
+            body = response.json()
+            pages.append(body["items"])
+            if not body["next_cursor"]:
+                return pages
+            params = {"limit": limit, "cursor": body["next_cursor"]}
+
+    def test_pages_cover_every_row_once(self, client, auth_headers_landlord, many_properties):
+        """Test walking the cursor returns each row exactly once, newest first"""
+        pages = self._walk(client, auth_headers_landlord, "/api/properties", 3)
+
+        assert [len(page) for page in pages] == [3, 3, 1]
+        ids = [item["id"] for page in pages for item in page]
+        assert sorted(ids) == sorted(p.id for p in many_properties)
+        # Same timestamp throughout, so id breaks the tie
+        assert ids == sorted(ids, reverse=True)
+
+    def test_cursor_survives_deleted_anchor(self, client, auth_headers_landlord, many_properties, db_session):
+        """Test a page still resumes after the row its cursor points at is gone"""
+        from datetime import datetime, timedelta
+        base = datetime(2025, 1, 1, 12, 0, 0, 500000)
+        for offset, prop in enumerate(many_properties):
+            prop.createdAt = base + timedelta(minutes=offset)
+        db_session.commit()
+
+        first = client.get("/api/properties", headers=auth_headers_landlord, params={"limit": 2}).json()
+        anchor_id = first["items"][-1]["id"]
+
+        from app.models import Property
+        db_session.delete(db_session.get(Property, anchor_id))
+        db_session.commit()
+
+        rest = client.get(
+            "/api/properties",
+            headers=auth_headers_landlord,
+            params={"limit": 10, "cursor": first["next_cursor"]}
+        ).json()
+        assert [item["id"] for item in rest["items"]] == sorted(
+            (p.id for p in many_properties if p.id < anchor_id), reverse=True
+        )
+        assert rest["next_cursor"] is None
+
+    def test_invalid_cursor_rejected(self, client, auth_headers_landlord):
+        """Test a tampered cursor is a client error"""
+        response = client.get(
+            "/api/properties",
+            headers=auth_headers_landlord,
+            params={"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 400
+
+    def test_limit_is_bounded(self, client, auth_headers_landlord):
+        """Test page size cannot exceed the maximum"""
+        response = client.get(
+            "/api/payments/",
+            headers=auth_headers_landlord,
+            params={"limit": 10_000}
+        )
+        assert response.status_code == 422
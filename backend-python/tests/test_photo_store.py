@@ -0,0 +1,197 @@
+"""
+Test Content-Addressable Photo Store
+Tests identical photos are stored once under their hash, that references
+are counted and released, that unreferenced objects are pruned, and that
+objects are served as immutable with their hash as ETag
+"""
+from datetime import datetime
+import hashlib
+import os
+
+import pytest
+
+from app import photo_store
+from app.models import MaintenancePhoto, MaintenanceRequest, PhotoObject
+
+PHOTO = b"\xff\xd8\xff photo bytes"
+SHA = hashlib.sha256(PHOTO).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def upload_root(tmp_path, monkeypatch):
+    """Keep the store under a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_request(db_session, sample_lease):
+    def create():
+        request = MaintenanceRequest(
+            leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title="Broken window"
+        )
+        db_session.add(request)
+        db_session.commit()
+        return request
+    return create
+
+
+def _upload(client, headers, request_id, name="window.jpg", content=PHOTO):
+    return client.post(
+        f"/api/maintenance/{request_id}/photos",
+        files=[("files", (name, content, "image/jpeg"))],
+        headers=headers
+    )
+
+
+def _ref_count(db_session, sha256=SHA):
+    db_session.expire_all()
+    stored = db_session.get(PhotoObject, sha256)
+    return stored.refCount if stored else None
+
+
+class TestDedupe:
+    """Test one object per distinct content"""
+
+    def test_same_content_stored_once(self, client, auth_headers_landlord, make_request, db_session, upload_root):
+        """Test the same photo on two requests shares one file and counts two references"""
+        first, second = make_request(), make_request()
+        url = _upload(client, auth_headers_landlord, first.id).json()["photos"][0]
+        assert _upload(client, auth_headers_landlord, second.id, name="other.png").json()["photos"] == [url]
+
+        assert url == f"/uploads/objects/{SHA[:2]}/{SHA[2:4]}/{SHA}.jpg"
+        assert [path.name for path in (upload_root / "uploads" / "objects").rglob("*") if path.is_file()] == [f"{SHA}.jpg"]
+        assert _ref_count(db_session) == 2
+
+    def test_delete_releases_reference(self, client, auth_headers_landlord, make_request, db_session):
+        """Test deleting a request drops its references but keeps shared content"""
+        first, second = make_request(), make_request()
+        _upload(client, auth_headers_landlord, first.id)
+        _upload(client, auth_headers_landlord, second.id)
+
+        assert client.delete(f"/api/maintenance/{first.id}", headers=auth_headers_landlord).status_code == 204
+        assert _ref_count(db_session) == 1
+        assert os.path.exists(photo_store.object_path(SHA, ".jpg"))
+
+    def test_created_with_photos_retains(self, client, auth_headers_landlord, make_request, sample_lease, db_session):
+        """Test a request created with stored photo URLs references them"""
+        url = _upload(client, auth_headers_landlord, make_request().id).json()["photos"][0]
+
+        response = client.post("/api/maintenance", json={
+            "leaseId": sample_lease.id, "title": "Same window", "photos": [url, "https://example.com/a.jpg"]
+        }, headers=auth_headers_landlord)
+        assert response.status_code == 201
+        assert _ref_count(db_session) == 2
+
+
+class TestPruning:
+    """Test unreferenced objects are removed by the sweeper step"""
+
+    def test_unreferenced_object_pruned(self, client, auth_headers_landlord, make_request, db_session):
+        """Test an object loses its row and file once nothing references it"""
+        request = make_request()
+        _upload(client, auth_headers_landlord, request.id)
+        client.delete(f"/api/maintenance/{request.id}", headers=auth_headers_landlord)
+
+        assert photo_store.prune_photo_objects_batch(db_session, datetime.utcnow(), 500) == 1
+        db_session.commit()
+        assert _ref_count(db_session) is None
+        assert not os.path.exists(photo_store.object_path(SHA, ".jpg"))
+
+    def test_referenced_object_kept(self, client, auth_headers_landlord, make_request, db_session):
+        """Test pruning leaves objects that are still referenced"""
+        _upload(client, auth_headers_landlord, make_request().id)
+
+        assert photo_store.prune_photo_objects_batch(db_session, datetime.utcnow(), 500) == 0
+        assert os.path.exists(photo_store.object_path(SHA, ".jpg"))
+
+    def test_reupload_after_prune_restores_file(self, client, auth_headers_landlord, make_request, db_session):
+        """Test content uploaded again after pruning is stored again under the same URL"""
+        request, later = make_request(), make_request()
+        url = _upload(client, auth_headers_landlord, request.id).json()["photos"][0]
+        client.delete(f"/api/maintenance/{request.id}", headers=auth_headers_landlord)
+        photo_store.prune_photo_objects_batch(db_session, datetime.utcnow(), 500)
+        db_session.commit()
+
+        assert _upload(client, auth_headers_landlord, later.id).json()["photos"] == [url]
+        assert client.get(url).content == PHOTO
+
+    def test_failed_placement_releases_claim(self, client, auth_headers_landlord, make_request, db_session,
+                                             monkeypatch):
+        """Test an upload failing after claiming its object gives the reference back"""
+        def full_disk(staged_path, sha256, extension):
+            raise OSError("No space left on device")
+
+        monkeypatch.setattr(photo_store, "place_object", full_disk)
+        with pytest.raises(OSError):
+            _upload(client, auth_headers_landlord, make_request().id)
+
+        assert _ref_count(db_session) == 0
+        assert os.listdir(photo_store.STAGING_DIR) == []
+
+    def test_recount_finds_drift(self, client, auth_headers_landlord, make_request, db_session):
+        """Test refCounts are checked against the photo URLs referencing them"""
+        _upload(client, auth_headers_landlord, make_request().id)
+        db_session.get(PhotoObject, SHA).refCount = 5
+        db_session.commit()
+
+        assert photo_store.find_refcount_drift(db_session) == [{"sha256": SHA, "refCount": 5, "expected": 1}]
+
+
+class TestServing:
+    """Test the /uploads mount's caching headers"""
+
+    def test_object_immutable_with_hash_etag(self, client, auth_headers_landlord, make_request):
+        """Test objects carry a year-long immutable Cache-Control and their hash as ETag"""
+        url = _upload(client, auth_headers_landlord, make_request().id).json()["photos"][0]
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.content == PHOTO
+        assert response.headers["etag"] == f'"{SHA}"'
+        assert response.headers["cache-control"] == photo_store.CACHE_CONTROL
+        assert response.headers["content-type"] == "image/jpeg"
+
+    def test_conditional_request_not_modified(self, client, auth_headers_landlord, make_request):
+        """Test a matching If-None-Match gets 304 with the caching headers"""
+        url = _upload(client, auth_headers_landlord, make_request().id).json()["photos"][0]
+
+        response = client.get(url, headers={"If-None-Match": f'"other", W/"{SHA}"'})
+        assert response.status_code == 304
+        assert response.headers["cache-control"] == photo_store.CACHE_CONTROL
+
+    def test_staging_not_served(self, client, upload_root):
+        """Test uploads in progress cannot be fetched"""
+        (upload_root / "uploads" / "objects" / "staging" / "abc.part").write_bytes(b"partial")
+        assert client.get("/uploads/objects/staging/abc.part").status_code == 404
+
+
+class TestLegacyImport:
+    """Test photos under uploads/maintenance/ are moved into the store"""
+
+    def test_import_moves_photos_and_confines_paths(self, make_request, db_session, upload_root):
+        """Test a legacy photo is stored by hash, a .. URL is skipped, live staging is left alone"""
+        request = make_request()
+        legacy_dir = upload_root / "uploads" / "maintenance" / str(request.id)
+        legacy_dir.mkdir(parents=True)
+        (legacy_dir / "door.jpg").write_bytes(PHOTO)
+        (upload_root / ".env").write_bytes(b"SECRET_KEY=hunter2")
+        staging = upload_root / "uploads" / "objects" / "staging"
+        staging.mkdir(parents=True)
+        (staging / "live.part").write_bytes(b"upload in progress")
+        db_session.add_all([
+            MaintenancePhoto(requestId=request.id, url=f"/uploads/maintenance/{request.id}/door.jpg",
+                             createdAt=datetime.utcnow()),
+            MaintenancePhoto(requestId=request.id, url="/uploads/maintenance/../../.env", createdAt=datetime.utcnow()),
+        ])
+        db_session.commit()
+
+        assert photo_store.import_legacy(db_session) == 1
+
+        db_session.expire_all()
+        urls = [photo.url for photo in db_session.query(MaintenancePhoto).order_by(MaintenancePhoto.id)]
+        assert urls == [photo_store.content_url(SHA, ".jpg"), "/uploads/maintenance/../../.env"]
+        assert _ref_count(db_session) == 1
+        assert db_session.query(PhotoObject).count() == 1
+        assert (staging / "live.part").read_bytes() == b"upload in progress"
+        assert sorted(path.name for path in (upload_root / "uploads" / "objects").iterdir()) == [SHA[:2], "staging"]
@@ -65,7 +65,7 @@ class TestPropertyRetrieval:
             headers=auth_headers_landlord
         )
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert isinstance(data, list)
         assert len(data) >= 1
         assert data[0]["title"] == "Test Property"
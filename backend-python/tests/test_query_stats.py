@@ -0,0 +1,103 @@
+"""
+Test Per-Route Query Statistics
+Tests statements, DB time and rows are attributed to the route that ran
+them, exposed as headers in debug mode, aggregated per route template, and
+that repeated statements are flagged as suspected N+1s
+"""
+import pytest
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from main import app
+from app import query_stats
+from app.database import get_db
+from app.models import User
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    query_stats.reset_route_stats()
+    yield
+    query_stats.reset_route_stats()
+
+
+@pytest.fixture
+def debug(monkeypatch):
+    monkeypatch.setattr(query_stats, "QUERY_DEBUG", True)
+
+
+@pytest.fixture
+def n_plus_one_route():
+    """A route that loads users one query at a time"""
+    async def users_one_by_one(count: int, db: AsyncSession = Depends(get_db)):
+        return [(await db.get(User, user_id)) is not None for user_id in range(1, count + 1)]
+
+    app.add_api_route("/test/users-one-by-one", users_one_by_one)
+    route = app.router.routes[-1]
+    yield "/test/users-one-by-one"
+    app.router.routes.remove(route)
+
+
+def _route(path):
+    return next(row for row in query_stats.route_stats() if row["route"] == path)
+
+
+class TestHeaders:
+    """Test the debug response headers"""
+
+    def test_counts_in_debug_headers(self, client, auth_headers_landlord, sample_unit, debug):
+        """Test a response reports its statement count, DB time and rows"""
+        response = client.get(f"/api/units/{sample_unit.id}", headers=auth_headers_landlord)
+
+        assert response.status_code == 200
+        assert int(response.headers["x-db-queries"]) >= 1
+        assert int(response.headers["x-db-rows"]) >= 1
+        assert float(response.headers["x-db-time-ms"]) >= 0
+        assert "x-db-n-plus-one" not in response.headers
+
+    def test_no_headers_outside_debug(self, client, auth_headers_landlord, sample_unit):
+        """Test the headers and the stats endpoint are off by default"""
+        response = client.get(f"/api/units/{sample_unit.id}", headers=auth_headers_landlord)
+
+        assert "x-db-queries" not in response.headers
+        assert client.get("/debug/query-stats").status_code == 404
+
+
+class TestRouteStats:
+    """Test aggregation per route template"""
+
+    def test_aggregated_by_template(self, client, auth_headers_landlord, sample_unit, debug):
+        """Test requests to different ids of one route share its entry"""
+        first = client.get(f"/api/units/{sample_unit.id}", headers=auth_headers_landlord)
+        client.get("/api/units/999", headers=auth_headers_landlord)
+
+        stats = _route("GET /api/units/{unit_id}")
+        assert stats["requests"] == 2
+        assert stats["maxQueries"] == int(first.headers["x-db-queries"])
+        assert stats["queries"] >= stats["maxQueries"]
+        assert stats in client.get("/debug/query-stats").json()
+
+    def test_repeated_statement_flagged(self, client, landlord_user, n_plus_one_route, debug, monkeypatch):
+        """Test one statement run per row is reported as a suspected N+1"""
+        monkeypatch.setattr(query_stats, "QUERY_N_PLUS_ONE_THRESHOLD", 3)
+
+        assert "x-db-n-plus-one" not in client.get(n_plus_one_route, params={"count": 2}).headers
+        response = client.get(n_plus_one_route, params={"count": 4})
+        assert response.headers["x-db-n-plus-one"] == "1"
+        assert response.headers["x-db-queries"] == "4"
+
+        stats = _route(f"GET {n_plus_one_route}")
+        assert stats["nPlusOneRequests"] == 1
+        [suspect] = stats["suspectedNPlusOne"]
+        assert suspect["repeats"] == 4
+        assert 'FROM "User"' in suspect["statement"]
+
+
+class TestNormalize:
+    """Test statement normalization"""
+
+    def test_in_lists_folded(self):
+        """Test statements differing only in IN-list length or layout normalize the same"""
+        assert query_stats.normalize("SELECT a FROM t WHERE id IN (?, ?, ?)") == \
+            query_stats.normalize("SELECT a\n  FROM t WHERE id IN (?)")
+        assert query_stats.normalize("SELECT a FROM t WHERE id IN ($1, $2)") == "SELECT a FROM t WHERE id IN (?)"
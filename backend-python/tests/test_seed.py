@@ -0,0 +1,98 @@
+"""
+Test Synthetic Portfolio Generator
+Tests the generated portfolio is deterministic from its seed, consistent
+with what the write handlers maintain, and loads next to existing rows
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app import occupancy, ownership, photo_store, seed
+from app.auth import verify_password
+from app.database import Base
+from app.models import Alert, LandlordStats, Lease, MaintenancePhoto, Payment, Unit, User
+from app.stats import landlord_aggregates
+
+AS_OF = datetime(2026, 6, 1)
+SIZES = {"landlords": 2, "properties": 2, "units": 3, "months": 18, "as_of": AS_OF}
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    engines = []
+
+    def make(name="portfolio.db"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        Base.metadata.create_all(engine)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+def _payments(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(Payment.id, Payment.leaseId, Payment.amount, Payment.dueDate, Payment.status, Payment.paidAt)
+            .order_by(Payment.id)
+        ).all()
+
+
+class TestGenerator:
+    """Test the generated rows"""
+
+    def test_deterministic_from_seed(self, make_engine):
+        """Test the same seed and sizes produce the same rows, and another seed different ones"""
+        first, second, other = make_engine("a.db"), make_engine("b.db"), make_engine("c.db")
+        counts = seed.load_portfolio(first, seed=3, **SIZES)
+        assert seed.load_portfolio(second, seed=3, **SIZES) == counts
+        seed.load_portfolio(other, seed=4, **SIZES)
+
+        assert counts["Unit"] == 12
+        assert counts["Payment"] > counts["Lease"] >= 12
+        assert _payments(first) == _payments(second)
+        assert _payments(first) != _payments(other)
+
+    def test_consistent_derived_state(self, make_engine):
+        """Test occupancy, ownership, photo references, stats and alerts match the loaded rows"""
+        engine = make_engine()
+        seed.load_portfolio(engine, seed=1, maintenance_per_year=6, **SIZES)
+
+        with Session(engine) as db:
+            assert occupancy.find_drift(db) == []
+            assert ownership.find_drift(db) == []
+            assert photo_store.find_refcount_drift(db) == []
+            assert db.scalar(select(func.count(MaintenancePhoto.id))) > 0
+            # Active leases run past the as-of date, one per occupied unit
+            assert db.scalar(select(func.count(Lease.id)).where(Lease.status == "ACTIVE", Lease.endDate <= AS_OF)) == 0
+            assert db.scalar(select(func.count(Unit.id)).where(Unit.status == "OCCUPIED")) == db.scalar(
+                select(func.count(Lease.id)).where(Lease.status == "ACTIVE")
+            )
+            for stats in db.scalars(select(LandlordStats)):
+                totals = landlord_aggregates(db, stats.landlordId)
+                assert (stats.units, stats.pendingPayments, stats.paidPayments) == (
+                    totals["units"], totals["pending_payments"], totals["paid_payments"]
+                )
+            assert db.scalar(select(func.count(LandlordStats.landlordId))) == 2
+            assert db.scalar(select(func.count(Alert.id))) > 0
+
+            landlord = db.scalar(select(User).where(User.email == seed.landlord_email(1, 1)))
+            assert landlord.role == "LANDLORD"
+            assert verify_password("password123", landlord.password)
+
+    def test_loads_next_to_existing_rows(self, make_engine):
+        """Test a second seed appends after the existing ids, a loaded seed is refused, indexes survive"""
+        engine = make_engine()
+        indexes = {index["name"] for index in inspect(engine).get_indexes("Payment")}
+        first = seed.load_portfolio(engine, seed=1, **SIZES)
+        seed.load_portfolio(engine, seed=2, **SIZES)
+        with pytest.raises(ValueError):
+            seed.load_portfolio(engine, seed=1, **SIZES)
+
+        with Session(engine) as db:
+            assert db.scalar(select(func.min(User.id)).where(User.email.like("%@seed2.example.com"))) == first["User"] + 1
+        assert {index["name"] for index in inspect(engine).get_indexes("Payment")} == indexes
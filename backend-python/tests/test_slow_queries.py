@@ -0,0 +1,102 @@
+"""
+Test Slow-Query Log
+Tests statements past the threshold are logged with their SQL, parameters,
+route and plan, that faster ones are not, and that the log is rate-limited
+"""
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import slow_queries
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    """Log every statement (threshold just above zero) to a temporary file"""
+    path = tmp_path / "slow.log"
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 0.0001)
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_LOG_FILE", str(path))
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_MAX_PER_MINUTE", 1000)
+    monkeypatch.setattr(slow_queries, "_window", {"start": 0.0, "logged": 0, "suppressed": 0})
+
+    def entries():
+        if not path.exists():
+            return []
+        for handler in slow_queries.logger.handlers:
+            handler.flush()
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    yield entries
+    for handler in list(slow_queries.logger.handlers):
+        slow_queries.logger.removeHandler(handler)
+        handler.close()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    slow_queries.instrument_engine(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("CREATE INDEX ix_item_name ON item (name)"))
+    yield engine
+    engine.dispose()
+
+
+class TestSlowQueryLog:
+    """Test the entries written for slow statements"""
+
+    def test_statement_logged_with_plan(self, engine, slow_log):
+        """Test the SQL, parameters and plan of a slow statement are logged"""
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT id FROM item WHERE name = :name"), {"name": "x" * 300}).all()
+        assert rows == []
+
+        entry = slow_log()[-1]
+        assert entry["sql"] == "SELECT id FROM item WHERE name = ?"
+        assert entry["params"] == ["x" * 200 + "..."]
+        assert entry["route"] is None
+        assert entry["suppressed"] == 0
+        assert any("ix_item_name" in line for line in entry["plan"])
+
+    def test_route_attributed(self, client, auth_headers_landlord, sample_unit, slow_log):
+        """Test statements run by a request name its route template"""
+        response = client.get(f"/api/units/{sample_unit.id}", headers=auth_headers_landlord)
+        assert response.status_code == 200
+
+        routes = {entry["route"] for entry in slow_log()}
+        assert "GET /api/units/{unit_id}" in routes
+
+    def test_nothing_below_threshold_or_off(self, engine, slow_log, monkeypatch):
+        """Test faster statements, and all of them with the log off, are not logged"""
+        monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 60000)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 0)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert slow_log() == []
+
+    def test_rate_limited(self, engine, slow_log, monkeypatch):
+        """Test statements past the per-minute budget are counted in the next entry"""
+        monkeypatch.setattr(slow_queries, "SLOW_QUERY_MAX_PER_MINUTE", 2)
+        with engine.connect() as conn:
+            for value in range(5):
+                conn.execute(text("SELECT :value"), {"value": value})
+        assert [entry["params"] for entry in slow_log()] == [[0], [1]]
+
+        # A minute later
+        slow_queries._window["start"] -= 60
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 5"))
+        entry = slow_log()[-1]
+        assert entry["sql"] == "SELECT 5"
+        assert entry["suppressed"] == 3
+
+    def test_plans_skipped_when_off(self, engine, slow_log, monkeypatch):
+        """Test SLOW_QUERY_EXPLAIN=off logs statements without running EXPLAIN"""
+        monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN", "off")
+        with engine.connect() as conn:
+            conn.execute(text("SELECT count(*) FROM item"))
+        assert [entry["plan"] for entry in slow_log()] == [None]
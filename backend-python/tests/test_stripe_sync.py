@@ -0,0 +1,149 @@
+"""
+Test Stripe Reconciliation
+Tests /api/payments/sync against a local fake Stripe server: concurrent
+lookups, retries of transient failures, per-batch commits and the
+background job for large syncs
+"""
+from datetime import datetime, timedelta
+import time
+
+import pytest
+
+from app import stripe_sync
+from app.models import Payment
+from app.stats import get_stats
+
+
+@pytest.fixture
+def intent_payments(db_session, sample_lease, fake_stripe):
+    """Create `count` pending payments with PaymentIntents known to the fake server"""
+    def create(count, status="succeeded"):
+        payments = []
+        for index in range(count):
+            intent_id = f"pi_{len(fake_stripe.intents)}"
+            fake_stripe.add_intent(intent_id, status)
+            payments.append(Payment(
+                leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=100,
+                dueDate=datetime.utcnow() + timedelta(days=index), status="PENDING",
+                stripePaymentIntentId=intent_id
+            ))
+        db_session.add_all(payments)
+        db_session.commit()
+        return payments
+    return create
+
+
+def _wait_for_job(client, headers, job_id):
+    for _ in range(100):
+        progress = client.get(f"/api/payments/sync/{job_id}", headers=headers).json()
+        if progress["state"] != "running":
+            return progress
+        time.sleep(0.05)
+    return progress
+
+
+def _statuses(db_session):
+    db_session.expire_all()
+    return {payment.stripePaymentIntentId: payment.status.value for payment in db_session.query(Payment)}
+
+
+class TestInlineSync:
+    """Test small syncs reconciled within the request"""
+
+    def test_marks_succeeded_intents_paid(self, client, auth_headers_landlord, intent_payments, sample_lease, db_session):
+        """Test succeeded intents become PAID with their counters, others stay pending"""
+        intent_payments(2, "succeeded")
+        intent_payments(1, "processing")
+        get_stats(db_session, sample_lease.landlordId)
+        db_session.commit()
+
+        response = client.post("/api/payments/sync", headers=auth_headers_landlord)
+        assert response.status_code == 200
+        assert response.json()["synced_count"] == 2
+        assert response.json()["failed_count"] == 0
+
+        assert _statuses(db_session) == {"pi_0": "PAID", "pi_1": "PAID", "pi_2": "PENDING"}
+        stats = client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()
+        assert stats["pendingPayments"] == 1
+
+    def test_lookups_run_concurrently(self, client, auth_headers_landlord, intent_payments, fake_stripe):
+        """Test intents are fetched in parallel rather than one round trip at a time"""
+        intent_payments(16)
+        fake_stripe.latency = 0.1
+
+        started = time.perf_counter()
+        response = client.post("/api/payments/sync", headers=auth_headers_landlord)
+        elapsed = time.perf_counter() - started
+
+        assert response.json()["synced_count"] == 16
+        assert 1 < fake_stripe.max_in_flight <= stripe_sync.STRIPE_SYNC_CONCURRENCY
+        assert elapsed < 16 * fake_stripe.latency
+
+    def test_transient_failures_retried(self, client, auth_headers_landlord, intent_payments, fake_stripe):
+        """Test 5xx responses are retried and a missing intent is not"""
+        intent_payments(2)
+        fake_stripe.failures["pi_0"] = 2
+        fake_stripe.intents.pop("pi_1")
+
+        response = client.post("/api/payments/sync", headers=auth_headers_landlord)
+        assert response.json()["synced_count"] == 1
+        assert response.json()["failed_count"] == 1
+        assert fake_stripe.calls.count("pi_0") == 3
+        assert fake_stripe.calls.count("pi_1") == 1
+
+    def test_gives_up_after_retries(self, client, auth_headers_landlord, intent_payments, fake_stripe, monkeypatch):
+        """Test an intent failing every attempt is reported, not fatal"""
+        monkeypatch.setattr(stripe_sync, "STRIPE_SYNC_RETRIES", 1)
+        intent_payments(1)
+        fake_stripe.failures["pi_0"] = 5
+
+        response = client.post("/api/payments/sync", headers=auth_headers_landlord)
+        assert response.status_code == 200
+        assert response.json()["failed_count"] == 1
+        assert fake_stripe.calls.count("pi_0") == 2
+
+    def test_already_paid_not_counted_twice(self, sample_lease, db_session):
+        """Test marking paid only changes payments that are still pending"""
+        payment = Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=100,
+                          dueDate=datetime.utcnow(), status="PAID")
+        db_session.add(payment)
+        db_session.commit()
+
+        assert stripe_sync.mark_payments_paid(db_session, sample_lease.landlordId, [payment.id]) == []
+
+
+class TestBackgroundSync:
+    """Test large syncs run as a background job with progress"""
+
+    def test_large_sync_runs_in_background(self, client, auth_headers_landlord, intent_payments,
+                                           db_session, monkeypatch):
+        """Test a sync above the inline limit returns 202 and completes in committed batches"""
+        monkeypatch.setattr(stripe_sync, "STRIPE_SYNC_BATCH_SIZE", 3)
+        monkeypatch.setattr("app.routers.payments.STRIPE_SYNC_INLINE_LIMIT", 5)
+        intent_payments(8)
+
+        response = client.post("/api/payments/sync", headers=auth_headers_landlord)
+        assert response.status_code == 202
+        job_id = response.json()["job"]["id"]
+
+        progress = _wait_for_job(client, auth_headers_landlord, job_id)
+        assert progress["state"] == "succeeded"
+        assert (progress["total"], progress["processed"], progress["synced"]) == (8, 8, 8)
+        assert set(_statuses(db_session).values()) == {"PAID"}
+
+    def test_progress_private_to_landlord(self, client, auth_headers_landlord, intent_payments, monkeypatch):
+        """Test another landlord cannot poll someone else's job"""
+        monkeypatch.setattr("app.routers.payments.STRIPE_SYNC_INLINE_LIMIT", 0)
+        intent_payments(1)
+        job_id = client.post("/api/payments/sync", headers=auth_headers_landlord).json()["job"]["id"]
+
+        client.post("/api/auth/register", json={
+            "email": "other@test.com", "name": "Other Landlord",
+            "password": "password123", "role": "LANDLORD"
+        })
+        token = client.post("/api/auth/login", json={
+            "email": "other@test.com", "password": "password123"
+        }).json()["access_token"]
+        response = client.get(f"/api/payments/sync/{job_id}", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 404
+        assert _wait_for_job(client, auth_headers_landlord, job_id)["state"] == "succeeded"
@@ -0,0 +1,144 @@
+"""
+Test Background Sweeper
+Tests lease expiry and overdue flagging in bounded batches, the leader
+lease that keeps the sweeper to one worker, and its run metrics
+"""
+from datetime import datetime, timedelta
+import asyncio
+
+import pytest
+
+from app import sweeper
+from app.models import Alert, Lease, Payment, SchedulerLock, Unit
+from app.stats import get_stats
+
+
+def _payments(db_session, lease, *days_ago):
+    payments = [
+        Payment(leaseId=lease.id, landlordId=lease.landlordId, amount=1200,
+                dueDate=datetime.utcnow() - timedelta(days=days), status="PENDING")
+        for days in days_ago
+    ]
+    db_session.add_all(payments)
+    db_session.commit()
+    return payments
+
+
+class TestLeaseExpiry:
+    """Test ended leases are expired with their side effects"""
+
+    def test_ended_lease_expires(self, client, auth_headers_landlord, sample_lease, sample_unit, db_session):
+        """Test the lease, unit occupancy and the activeLeases rollup move together"""
+        assert get_stats(db_session, sample_lease.landlordId).activeLeases == 1
+
+        expired = sweeper.expire_leases_batch(db_session, sample_lease.endDate + timedelta(days=1), 500)
+        db_session.commit()
+        assert expired == 1
+
+        db_session.expire_all()
+        assert db_session.get(Lease, sample_lease.id).status.value == "EXPIRED"
+        assert db_session.get(Unit, sample_unit.id).status.value == "AVAILABLE"
+        assert get_stats(db_session, sample_lease.landlordId).activeLeases == 0
+
+        stats = client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()
+        assert stats["activeLeases"] == 0
+
+    def test_running_lease_untouched(self, sample_lease, db_session):
+        """Test a lease that has not ended yet stays active"""
+        assert sweeper.expire_leases_batch(db_session, datetime.utcnow(), 500) == 0
+        db_session.expire_all()
+        assert db_session.get(Lease, sample_lease.id).status.value == "ACTIVE"
+
+
+class TestOverdueFlagging:
+    """Test pending payments past due are flagged overdue"""
+
+    def test_flags_past_due_payments(self, client, auth_headers_landlord, sample_lease, db_session):
+        """Test only pending, past-due payments are flagged, and they raise alerts"""
+        late, = _payments(db_session, sample_lease, 3)
+        upcoming, = _payments(db_session, sample_lease, -10)
+        now = datetime.utcnow()
+
+        assert sweeper.flag_overdue_payments_batch(db_session, now, 500) == 1
+        db_session.commit()
+        db_session.expire_all()
+        assert db_session.get(Payment, late.id).overdueAt == now
+        assert db_session.get(Payment, upcoming.id).overdueAt is None
+
+        alerts = db_session.query(Alert).filter(Alert.kind == "PAYMENT_OVERDUE").all()
+        assert {alert.entityId for alert in alerts} == {late.id}
+        stats = client.get("/api/dashboard/manager-stats", headers=auth_headers_landlord).json()
+        assert stats["overduePayments"] == 1
+
+        # Already flagged payments are not stamped again
+        assert sweeper.flag_overdue_payments_batch(db_session, now + timedelta(hours=1), 500) == 0
+
+    def test_payment_created_past_due_is_flagged(self, client, auth_headers_landlord, sample_lease, db_session):
+        """Test the write path flags a back-dated payment without waiting for the sweeper"""
+        payment_id = client.post("/api/payments/", headers=auth_headers_landlord, json={
+            "leaseId": sample_lease.id, "amount": 1200,
+            "dueDate": (datetime.utcnow() - timedelta(days=2)).isoformat()
+        }).json()["id"]
+        assert db_session.get(Payment, payment_id).overdueAt is not None
+
+        client.put(f"/api/payments/{payment_id}", headers=auth_headers_landlord, json={
+            "dueDate": (datetime.utcnow() + timedelta(days=20)).isoformat()
+        })
+        db_session.expire_all()
+        assert db_session.get(Payment, payment_id).overdueAt is None
+
+    def test_batches_are_bounded(self, sample_lease, db_session, async_session_factory, monkeypatch):
+        """Test a run works through the backlog in batches of SWEEPER_BATCH_SIZE"""
+        _payments(db_session, sample_lease, 1, 2, 3, 4, 5)
+        monkeypatch.setattr(sweeper, "SWEEPER_BATCH_SIZE", 2)
+
+        assert sweeper.flag_overdue_payments_batch(db_session, datetime.utcnow(), 2) == 2
+        db_session.rollback()
+
+        results = asyncio.run(sweeper.run_steps(sweeper.SWEEPER_STEPS, async_session_factory))
+        assert results["flag-overdue-payments"] == 5
+        assert sweeper.sweeper_stats()["steps"]["flag-overdue-payments"]["lastRows"] == 5
+        assert db_session.query(Payment).filter(Payment.overdueAt.is_(None)).count() == 0
+
+
+class TestLeaderLease:
+    """Test only one worker at a time runs the sweeper"""
+
+    def test_second_worker_refused_until_expiry(self, db_session):
+        """Test the lease is exclusive, renewable by its owner and taken over once expired"""
+        now = datetime.utcnow()
+        assert sweeper.acquire_leader(db_session, "worker-a", ttl=60, now=now)
+        assert not sweeper.acquire_leader(db_session, "worker-b", ttl=60, now=now + timedelta(seconds=30))
+        assert sweeper.acquire_leader(db_session, "worker-a", ttl=60, now=now + timedelta(seconds=30))
+        assert not sweeper.acquire_leader(db_session, "worker-b", ttl=60, now=now + timedelta(seconds=60))
+
+        assert sweeper.acquire_leader(db_session, "worker-b", ttl=60, now=now + timedelta(seconds=91))
+        db_session.commit()
+        assert db_session.get(SchedulerLock, sweeper.LOCK_NAME).owner == "worker-b"
+
+    def test_released_lease_taken_at_once(self, db_session):
+        """Test a worker shutting down hands the lease over without waiting for the TTL"""
+        assert sweeper.acquire_leader(db_session, "worker-a", ttl=600)
+        sweeper.release_leader(db_session, "worker-a")
+        assert sweeper.acquire_leader(db_session, "worker-b", ttl=600)
+
+    def test_follower_skips_run(self, sample_lease, db_session, async_session_factory):
+        """Test a run on a worker that does not hold the lease changes nothing"""
+        _payments(db_session, sample_lease, 3)
+        sweeper.acquire_leader(db_session, "another-worker", ttl=600)
+        db_session.commit()
+
+        assert asyncio.run(sweeper.run_steps(sweeper.SWEEPER_STEPS, async_session_factory)) == {}
+        stats = sweeper.sweeper_stats()
+        assert stats["leader"] is False
+        assert stats["skippedRuns"] >= 1
+        assert db_session.query(Payment).filter(Payment.overdueAt.is_not(None)).count() == 0
+
+
+class TestSweeperStats:
+    """Test the sweeper metrics endpoint"""
+
+    def test_stats_admin_only(self, client, auth_headers_landlord):
+        """Test sweeper metrics are not exposed to landlords"""
+        response = client.get("/api/dashboard/sweeper/stats", headers=auth_headers_landlord)
+        assert response.status_code == 403
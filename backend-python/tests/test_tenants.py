@@ -15,7 +15,7 @@ class TestTenantCreation:
             headers=auth_headers_landlord
         )
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert isinstance(data, list)
         assert len(data) >= 1
     
@@ -26,7 +26,7 @@ class TestTenantCreation:
             headers=auth_headers_landlord
         )
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         tenant = data[0]
         assert "user" in tenant
         assert tenant["user"]["email"] == "tenant@test.com"
@@ -0,0 +1,151 @@
+"""
+Test Photo Renditions
+Tests uploads are queued rather than rendered in the request, that
+renditions are downscaled JPEGs exposed on the maintenance response once
+ready, and that failures are retried then given up on
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+from app import thumbnails
+from app.models import MaintenanceRequest, PhotoObject
+
+
+@pytest.fixture(autouse=True)
+def upload_root(tmp_path, monkeypatch):
+    """Keep the store under a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def maintenance_request(db_session, sample_lease):
+    request = MaintenanceRequest(
+        leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title="Cracked tile"
+    )
+    db_session.add(request)
+    db_session.commit()
+    return request
+
+
+def _jpeg(width=2400, height=1600):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _upload(client, headers, request_id, content, name="tile.jpg"):
+    response = client.post(
+        f"/api/maintenance/{request_id}/photos",
+        files=[("files", (name, content, "image/jpeg"))],
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()["files"][0]["sha256"]
+
+
+def _render(sha256, session_factory):
+    # Same code path as the process pool, on a thread for speed
+    with ThreadPoolExecutor(1) as executor:
+        return asyncio.run(thumbnails.render_object(sha256, session_factory, executor))
+
+
+class TestRenditions:
+    """Test rendering and exposure on the response"""
+
+    def test_pending_until_rendered(self, client, auth_headers_landlord, maintenance_request, async_session_factory):
+        """Test the response lists the photo without renditions, then with them"""
+        sha256 = _upload(client, auth_headers_landlord, maintenance_request.id, _jpeg())
+        url = f"/api/maintenance/{maintenance_request.id}"
+
+        pending = client.get(url, headers=auth_headers_landlord).json()["photoRenditions"]
+        assert [(item["thumb"], item["preview"]) for item in pending] == [(None, None)]
+
+        _render(sha256, async_session_factory)
+
+        ready = client.get(url, headers=auth_headers_landlord).json()["photoRenditions"][0]
+        assert ready["url"] == pending[0]["url"]
+        assert ready["thumb"].endswith(f"{sha256}.thumb320.jpg")
+        assert ready["preview"].endswith(f"{sha256}.preview1280.jpg")
+        listed = client.get("/api/maintenance", headers=auth_headers_landlord).json()["items"][0]
+        assert listed["photoRenditions"] == [ready]
+
+    def test_renditions_downscaled(self, client, auth_headers_landlord, maintenance_request, async_session_factory):
+        """Test each rendition fits its size, keeps the aspect ratio and is served immutable"""
+        sha256 = _upload(client, auth_headers_landlord, maintenance_request.id, _jpeg(2400, 1600))
+        renditions = _render(sha256, async_session_factory)
+
+        for name, size in thumbnails.RENDITIONS.items():
+            response = client.get(renditions[name])
+            assert response.headers["cache-control"].endswith("immutable")
+            image = Image.open(io.BytesIO(response.content))
+            assert (image.format, image.size) == ("JPEG", (size, size * 2 // 3))
+
+    def test_not_an_image(self, client, auth_headers_landlord, maintenance_request,
+                          async_session_factory, db_session):
+        """Test a file that is not an image is settled without renditions"""
+        sha256 = _upload(client, auth_headers_landlord, maintenance_request.id, b"%PDF-1.4", name="quote.pdf")
+
+        assert _render(sha256, async_session_factory) == {}
+        stored = db_session.get(PhotoObject, sha256)
+        assert (stored.renditions, stored.renditionError) == ({}, "Not an image")
+
+    def test_failures_retried_then_given_up(self, client, auth_headers_landlord, maintenance_request,
+                                            async_session_factory, db_session, monkeypatch):
+        """Test a failing render stays pending until THUMBNAIL_MAX_ATTEMPTS"""
+        sha256 = _upload(client, auth_headers_landlord, maintenance_request.id, _jpeg(10, 10))
+
+        def broken(source_path, targets):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(thumbnails, "render", broken)
+        monkeypatch.setattr(thumbnails, "THUMBNAIL_MAX_ATTEMPTS", 2)
+
+        _render(sha256, async_session_factory)
+        db_session.expire_all()
+        stored = db_session.get(PhotoObject, sha256)
+        assert (stored.renditions, stored.renditionAttempts, stored.renditionError) == (None, 1, "disk full")
+
+        _render(sha256, async_session_factory)
+        db_session.expire_all()
+        assert db_session.get(PhotoObject, sha256).renditions == {}
+
+
+class TestQueue:
+    """Test the queue, the process pool and the sweeper's requeue"""
+
+    def test_upload_queued_and_rendered_in_pool(self, client, auth_headers_landlord, maintenance_request,
+                                                async_session_factory, db_session, monkeypatch):
+        """Test an upload goes on the queue and a pool process renders it"""
+        sha256 = _upload(client, auth_headers_landlord, maintenance_request.id, _jpeg(800, 600))
+        monkeypatch.setattr(thumbnails, "THUMBNAIL_WORKERS", 1)
+
+        async def run():
+            tasks = thumbnails.start_thumbnailer(async_session_factory)
+            thumbnails.enqueue([sha256, sha256])
+            assert thumbnails._queue.qsize() == 1
+            await asyncio.wait_for(thumbnails._queue.join(), 60)
+            await thumbnails.stop_thumbnailer(tasks)
+
+        asyncio.run(run())
+        db_session.expire_all()
+        assert set(db_session.get(PhotoObject, sha256).renditions) == {"thumb", "preview"}
+
+    def test_sweeper_requeues_stale_pending(self, client, auth_headers_landlord, maintenance_request,
+                                            db_session, monkeypatch):
+        """Test objects left pending past the grace period are queued again, once"""
+        sha256 = _upload(client, auth_headers_landlord, maintenance_request.id, _jpeg(10, 10))
+        monkeypatch.setattr(thumbnails, "_queue", asyncio.Queue())
+        monkeypatch.setattr(thumbnails, "_queued", set())
+        now = datetime.utcnow()
+
+        assert thumbnails.requeue_renditions_batch(db_session, now, 500) == 0
+        later = now + timedelta(seconds=thumbnails.THUMBNAIL_REQUEUE_AFTER_SECONDS + 1)
+        assert thumbnails.requeue_renditions_batch(db_session, later, 500) == 1
+        assert thumbnails.requeue_renditions_batch(db_session, later, 500) == 0
+        assert thumbnails._queue.get_nowait() == sha256
@@ -0,0 +1,232 @@
+"""
+Test Unit Management
+Tests for unit listing and occupancy status maintained by the lease lifecycle
+"""
+import pytest
+from datetime import datetime, timedelta
+
+
+class TestUnitStatus:
+    """Test unit occupancy status is read from the unit itself"""
+
+    @pytest.fixture
+    def extra_units(self, db_session, sample_property):
+        """Create a handful of vacant units next to the sample unit"""
+        from app.models import Unit
+
+        units = [
+            Unit(propertyId=sample_property.id, unitNumber=f"2{i:02d}", rentAmount=1000.00)
+            for i in range(5)
+        ]
+        db_session.add_all(units)
+        db_session.commit()
+        return units
+
+    @staticmethod
+    def _lease_queries(statements):
+        return [s for s in statements if 'FROM "Lease"' in s]
+
+    def test_list_units_without_lease_queries(self, client, auth_headers_landlord, sample_lease, extra_units, query_log):
+        """Test listing units never consults the Lease table"""
+        query_log.clear()
+        response = client.get(
+            "/api/units/",
+            headers=auth_headers_landlord
+        )
+        assert response.status_code == 200
+        data = response.json()["items"]
+        assert len(data) == 6
+        assert self._lease_queries(query_log) == []
+
+        statuses = {unit["id"]: unit["status"] for unit in data}
+        assert statuses[sample_lease.unitId] == "OCCUPIED"
+        assert list(statuses.values()).count("AVAILABLE") == 5
+
+    def test_units_by_property_include_status(self, client, auth_headers_landlord, sample_property, sample_lease, extra_units, query_log):
+        """Test units listed by property carry their occupancy status"""
+        query_log.clear()
+        response = client.get(
+            f"/api/units/property/{sample_property.id}",
+            headers=auth_headers_landlord
+        )
+        assert response.status_code == 200
+        data = response.json()["items"]
+        assert self._lease_queries(query_log) == []
+        assert all(unit["status"] in ("OCCUPIED", "AVAILABLE") for unit in data)
+        assert [u["status"] for u in data if u["id"] == sample_lease.unitId] == ["OCCUPIED"]
+
+    def test_get_unit_status(self, client, auth_headers_landlord, sample_lease):
+        """Test a single unit reports OCCUPIED while it has an active lease"""
+        response = client.get(
+            f"/api/units/{sample_lease.unitId}",
+            headers=auth_headers_landlord
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "OCCUPIED"
+        assert data["currentLeaseId"] == sample_lease.id
+
+
+class TestOccupancyLifecycle:
+    """Test lease create/update/delete keep unit occupancy in step"""
+
+    def _unit(self, client, headers, unit_id):
+        return client.get(f"/api/units/{unit_id}", headers=headers).json()
+
+    def test_create_and_terminate_lease(self, client, auth_headers_landlord, sample_unit, tenant_user, db_session):
+        """Test a unit flips to OCCUPIED on lease creation and back on termination"""
+        from app.models import Tenant
+        tenant = db_session.query(Tenant).filter(Tenant.userId == tenant_user.id).first()
+
+        assert self._unit(client, auth_headers_landlord, sample_unit.id)["status"] == "AVAILABLE"
+
+        start = datetime.now()
+        lease = client.post(
+            "/api/leases/",
+            headers=auth_headers_landlord,
+            json={
+                "tenantId": tenant.id,
+                "unitId": sample_unit.id,
+                "startDate": start.isoformat(),
+                "endDate": (start + timedelta(days=365)).isoformat(),
+                "rent": 1200
+            }
+        ).json()
+
+        unit = self._unit(client, auth_headers_landlord, sample_unit.id)
+        assert unit["status"] == "OCCUPIED"
+        assert unit["currentLeaseId"] == lease["id"]
+
+        client.put(
+            f"/api/leases/{lease['id']}",
+            headers=auth_headers_landlord,
+            json={"status": "TERMINATED"}
+        )
+
+        unit = self._unit(client, auth_headers_landlord, sample_unit.id)
+        assert unit["status"] == "AVAILABLE"
+        assert unit["currentLeaseId"] is None
+
+    def test_delete_lease_frees_unit(self, client, auth_headers_landlord, sample_lease):
+        """Test deleting the active lease makes the unit available"""
+        response = client.delete(
+            f"/api/leases/{sample_lease.id}",
+            headers=auth_headers_landlord
+        )
+        assert response.status_code == 204
+
+        unit = self._unit(client, auth_headers_landlord, sample_lease.unitId)
+        assert unit["status"] == "AVAILABLE"
+        assert unit["currentLeaseId"] is None
+
+    def test_consistency_check_flags_and_repairs_drift(self, db_session, sample_lease, sample_unit):
+        """Test the consistency check finds drifted units and --fix repairs them"""
+        from app.occupancy import find_drift, sync_unit_occupancy
+
+        assert find_drift(db_session) == []
+
+        sample_unit.status = "AVAILABLE"
+        sample_unit.currentLeaseId = None
+        db_session.commit()
+
+        drift = find_drift(db_session)
+        assert [item["unitId"] for item in drift] == [sample_unit.id]
+        assert drift[0]["expectedStatus"] == "OCCUPIED"
+        assert drift[0]["expectedLeaseId"] == sample_lease.id
+
+        sync_unit_occupancy(db_session, [sample_unit.id])
+        db_session.commit()
+        assert find_drift(db_session) == []
+
+
+class TestUnitOwnership:
+    """Test the denormalized landlordId follows the unit's property"""
+
+    @pytest.fixture
+    def lease_rows(self, db_session, sample_lease):
+        """A payment and a maintenance request on the sample lease"""
+        from app.models import Payment, MaintenanceRequest
+
+        payment = Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=1200.00,
+                          dueDate=datetime.utcnow(), status="PENDING")
+        request = MaintenanceRequest(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title="Leaky tap")
+        db_session.add_all([payment, request])
+        db_session.commit()
+        return payment, request
+
+    def test_created_rows_carry_landlord(self, client, auth_headers_landlord, landlord_user, sample_unit, tenant_user, db_session):
+        """Test a lease and its generated schedule are stamped with the owner"""
+        from app.models import Tenant, Payment
+        tenant = db_session.query(Tenant).filter(Tenant.userId == tenant_user.id).first()
+
+        response = client.post(
+            "/api/leases/",
+            headers=auth_headers_landlord,
+            json={
+                "tenantId": tenant.id,
+                "unitId": sample_unit.id,
+                "startDate": datetime.utcnow().isoformat(),
+                "endDate": (datetime.utcnow() + timedelta(days=90)).isoformat(),
+                "rent": 1200,
+                "status": "ACTIVE"
+            }
+        )
+        assert response.status_code == 201
+        lease_id = response.json()["id"]
+
+        owners = {row.landlordId for row in db_session.query(Payment).filter(Payment.leaseId == lease_id)}
+        assert owners == {landlord_user.id}
+
+    def test_move_unit_between_own_properties(self, client, auth_headers_landlord, sample_lease, landlord_user, db_session):
+        """Test a landlord can move a unit to another of their properties"""
+        from app.models import Property
+        other = Property(title="Annex", address="2 Side St", city="Toronto", province="ON",
+                         postalCode="M5H 2N2", landlordId=landlord_user.id)
+        db_session.add(other)
+        db_session.commit()
+
+        response = client.put(
+            f"/api/units/{sample_lease.unitId}",
+            headers=auth_headers_landlord,
+            json={"propertyId": other.id}
+        )
+        assert response.status_code == 200
+        assert response.json()["propertyId"] == other.id
+
+        from app.ownership import find_drift
+        assert find_drift(db_session) == []
+
+    def test_cannot_move_unit_to_foreign_property(self, client, auth_headers_landlord, sample_lease, tenant_user, db_session):
+        """Test a unit cannot be moved to a property the landlord does not own"""
+        from app.models import Property
+        foreign = Property(title="Elsewhere", address="3 Far St", city="Ottawa", province="ON",
+                           postalCode="K1A 0A6", landlordId=tenant_user.id)
+        db_session.add(foreign)
+        db_session.commit()
+
+        response = client.put(
+            f"/api/units/{sample_lease.unitId}",
+            headers=auth_headers_landlord,
+            json={"propertyId": foreign.id}
+        )
+        assert response.status_code == 403
+
+    def test_sync_follows_property_owner(self, db_session, sample_lease, sample_property, lease_rows, tenant_user):
+        """Test an out-of-band ownership change is flagged and repaired"""
+        from app.ownership import find_drift, sync_landlord_ids
+        payment, request = lease_rows
+
+        assert find_drift(db_session) == []
+
+        sample_property.landlordId = tenant_user.id
+        db_session.commit()
+
+        drift = find_drift(db_session)
+        assert [item["leaseId"] for item in drift] == [sample_lease.id]
+        assert drift[0]["expectedLandlordId"] == tenant_user.id
+
+        sync_landlord_ids(db_session, [sample_lease.unitId])
+        db_session.commit()
+        db_session.expire_all()
+        assert find_drift(db_session) == []
+        assert (sample_lease.landlordId, payment.landlordId, request.landlordId) == (tenant_user.id,) * 3
@@ -0,0 +1,224 @@
+"""
+Test Streaming Photo Uploads
+Tests maintenance photos are streamed to disk with their hash and size,
+that the per-file cap is enforced mid-stream, and that client file names
+never become paths
+"""
+import asyncio
+import errno
+import hashlib
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import photo_store, uploads
+from app.models import MaintenanceRequest
+
+
+@pytest.fixture(autouse=True)
+def upload_root(tmp_path, monkeypatch):
+    """Write uploads under a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def maintenance_request(db_session, sample_lease):
+    request = MaintenanceRequest(
+        leaseId=sample_lease.id, landlordId=sample_lease.landlordId, title="Leaky tap"
+    )
+    db_session.add(request)
+    db_session.commit()
+    return request
+
+
+def _upload(client, headers, request_id, files):
+    return client.post(
+        f"/api/maintenance/{request_id}/photos",
+        files=[("files", (name, content, "image/jpeg")) for name, content in files],
+        headers=headers
+    )
+
+
+class TestPhotoUpload:
+    """Test photos are written in chunks and recorded on the request"""
+
+    def test_files_written_with_hash(self, client, auth_headers_landlord, maintenance_request,
+                                     db_session, monkeypatch):
+        """Test several multi-chunk files land in the store intact with their digests"""
+        monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 1024)
+        files = [("a.jpg", os.urandom(10_000)), ("b.jpg", os.urandom(3_000)), ("c.jpg", b"")]
+
+        response = _upload(client, auth_headers_landlord, maintenance_request.id, files)
+        assert response.status_code == 200
+        body = response.json()
+        digests = [hashlib.sha256(content).hexdigest() for _, content in files]
+        assert body["photos"] == [photo_store.content_url(digest, ".jpg") for digest in digests]
+        for (_, content), digest, saved in zip(files, digests, body["files"]):
+            with open(photo_store.object_path(digest, ".jpg"), "rb") as stored:
+                assert stored.read() == content
+            assert (saved["size"], saved["sha256"]) == (len(content), digest)
+        assert os.listdir(photo_store.STAGING_DIR) == []
+
+        db_session.refresh(maintenance_request)
+        assert maintenance_request.photos == body["photos"]
+
+    def test_uploads_append_photos(self, client, auth_headers_landlord, maintenance_request, db_session):
+        """Test a second upload keeps earlier photos, even under the same file name"""
+        first = _upload(client, auth_headers_landlord, maintenance_request.id, [("door.jpg", b"first")])
+        second = _upload(client, auth_headers_landlord, maintenance_request.id, [("door.jpg", b"second")])
+
+        db_session.refresh(maintenance_request)
+        assert maintenance_request.photos == first.json()["photos"] + second.json()["photos"]
+        assert len(set(maintenance_request.photos)) == 2
+
+    def test_file_name_not_a_path(self, client, auth_headers_landlord, maintenance_request, upload_root):
+        """Test a path in the client's file name only contributes its extension"""
+        response = _upload(client, auth_headers_landlord, maintenance_request.id, [("../../evil me.JPG", b"x")])
+
+        assert response.json()["photos"] == [photo_store.content_url(hashlib.sha256(b"x").hexdigest(), ".jpg")]
+        assert not list(upload_root.rglob("evil*"))
+
+    def test_missing_request_rejected_before_body(self, client, auth_headers_landlord, upload_root):
+        """Test an unknown request id is a 404 with nothing written"""
+        response = _upload(client, auth_headers_landlord, 999, [("a.jpg", b"x")])
+        assert response.status_code == 404
+        assert [path.name for path in (upload_root / "uploads" / "objects").iterdir()] == ["staging"]
+        assert os.listdir(photo_store.STAGING_DIR) == []
+
+    def test_no_files_rejected(self, client, auth_headers_landlord, maintenance_request):
+        """Test a form without files is a validation error"""
+        response = client.post(
+            f"/api/maintenance/{maintenance_request.id}/photos",
+            data={"note": "nothing attached"}, files=[("other", ("a.jpg", b"x", "image/jpeg"))],
+            headers=auth_headers_landlord
+        )
+        assert response.status_code == 422
+
+
+class _StreamedRequest:
+    """A multipart request whose body arrives in pieces of the given sizes"""
+
+    def __init__(self, files, sizes):
+        boundary = "7f3c0e1d2b"
+        body = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{name}"\r\n'
+            f"Content-Type: image/jpeg\r\n\r\n".encode() + content + b"\r\n"
+            for name, content in files
+        ) + f"--{boundary}--\r\n".encode()
+        self.headers = {"content-type": f"multipart/form-data; boundary={boundary}",
+                        "content-length": str(len(body))}
+        self.body, self.sizes = body, sizes
+
+    async def stream(self):
+        offset, index = 0, 0
+        while offset < len(self.body):
+            size = self.sizes[index % len(self.sizes)]
+            yield self.body[offset:offset + size]
+            offset, index = offset + size, index + 1
+
+
+class TestStreamParsing:
+    """Test the body is parsed however it is split, and write failures end the upload"""
+
+    def test_split_anywhere(self, tmp_path, monkeypatch):
+        """Test delimiters and boundary look-alikes split across pieces still parse byte for byte"""
+        monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 1024)
+        tricky = b"\r\n--7f3c0e1d2" + os.urandom(3000) + b"\r\n--7f3c" + b"\r\n" * 50
+        files = [("a.jpg", tricky), ("b.jpg", os.urandom(5000)), ("c.jpg", b"")]
+        for sizes in ([1], [7, 13], [1000], [65536]):
+            received = asyncio.run(uploads.receive_files(_StreamedRequest(files, sizes), str(tmp_path)))
+            for (_, content), saved in zip(files, received):
+                with open(saved["path"], "rb") as staged:
+                    assert staged.read() == content
+                assert saved["sha256"] == hashlib.sha256(content).hexdigest()
+
+    def test_parser_internals_unchanged(self):
+        """Test the python-multipart state the fast path reads still exists and means the same
+
+        A failure here means the pinned python-multipart changed: check
+        receive_files' fast path against the new parser before upgrading.
+        """
+        import multipart
+        from multipart.multipart import STATE_PART_DATA
+
+        parser = multipart.MultipartParser(b"xyz", {})
+        assert uploads._fast_path_supported(parser)
+        assert parser.boundary == b"\r\n--xyz"
+        parser.write(b'--xyz\r\nContent-Disposition: form-data; name="f"; filename="a"\r\n\r\nabc')
+        assert (parser.state, parser.index) == (STATE_PART_DATA, 0)
+        parser.write(b"\r\n--x")
+        assert (parser.state, parser.index) == (STATE_PART_DATA, 5)
+
+    def test_parses_without_fast_path(self, tmp_path, monkeypatch):
+        """Test the body still parses through the callbacks alone when the parser internals are missing"""
+        monkeypatch.setattr(uploads, "STATE_PART_DATA", None)
+        files = [("a.jpg", b"\r\n--7f3c" + os.urandom(3000)), ("b.jpg", os.urandom(5000))]
+        received = asyncio.run(uploads.receive_files(_StreamedRequest(files, [7, 1000]), str(tmp_path)))
+        for (_, content), saved in zip(files, received):
+            assert saved["sha256"] == hashlib.sha256(content).hexdigest()
+
+    def test_disk_full_fails_upload(self, tmp_path, monkeypatch):
+        """Test a failing write ends the upload with 507 instead of waiting on the writer, leaving nothing"""
+        monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 1024)
+
+        def full(self, out, chunk):
+            raise OSError(errno.ENOSPC, "No space left on device")
+
+        monkeypatch.setattr(uploads._FileWriter, "_write", full)
+        request = _StreamedRequest([("a.jpg", os.urandom(100_000))], [4096])
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(asyncio.wait_for(uploads.receive_files(request, str(tmp_path)), 10))
+        assert error.value.status_code == 507
+        assert os.listdir(tmp_path) == []
+
+
+    def test_abort_during_open_leaves_nothing(self, tmp_path, monkeypatch):
+        """Test an upload aborted while a file is still being opened does not leave it behind"""
+        monkeypatch.setattr(uploads, "UPLOAD_MAX_FILE_BYTES", 1000)
+        original = uploads._FileWriter._open
+
+        def slow_open(self):
+            time.sleep(0.2)
+            return original(self)
+
+        monkeypatch.setattr(uploads._FileWriter, "_open", slow_open)
+        request = _StreamedRequest([("a.jpg", os.urandom(5000))], [65536])
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(uploads.receive_files(request, str(tmp_path)))
+        assert error.value.status_code == 413
+        time.sleep(0.3)
+        assert os.listdir(tmp_path) == []
+
+class TestUploadLimits:
+    """Test oversized uploads are refused and cleaned up"""
+
+    def test_oversized_file_aborted_mid_stream(self, client, auth_headers_landlord, maintenance_request,
+                                               db_session, upload_root, monkeypatch):
+        """Test a file over the cap is a 413 and no file of the upload is kept"""
+        monkeypatch.setattr(uploads, "UPLOAD_MAX_FILE_BYTES", 4096)
+        monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 1024)
+        files = [("ok.jpg", b"x" * 1000), ("big.jpg", b"x" * 5000)]
+
+        response = _upload(client, auth_headers_landlord, maintenance_request.id, files)
+        assert response.status_code == 413
+
+        assert [path.name for path in (upload_root / "uploads" / "objects").iterdir()] == ["staging"]
+        assert os.listdir(photo_store.STAGING_DIR) == []
+        db_session.refresh(maintenance_request)
+        assert maintenance_request.photos == []
+
+    def test_too_many_files(self, client, auth_headers_landlord, maintenance_request, monkeypatch):
+        """Test the number of files per upload is capped"""
+        monkeypatch.setattr(uploads, "UPLOAD_MAX_FILES", 2)
+        files = [(f"{index}.jpg", b"x") for index in range(3)]
+        assert _upload(client, auth_headers_landlord, maintenance_request.id, files).status_code == 413
+
+    def test_declared_length_checked_first(self, client, auth_headers_landlord, maintenance_request, monkeypatch):
+        """Test a Content-Length beyond any allowed upload is refused up front"""
+        monkeypatch.setattr(uploads, "UPLOAD_MAX_FILE_BYTES", 10)
+        monkeypatch.setattr(uploads, "UPLOAD_MAX_FILES", 1)
+        response = _upload(client, auth_headers_landlord, maintenance_request.id, [("a.jpg", b"x" * 100_000)])
+        assert response.status_code == 413
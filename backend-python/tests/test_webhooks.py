@@ -0,0 +1,196 @@
+"""
+Test Stripe Webhook Inbox
+Tests that webhook events are stored and acknowledged, deduplicated by
+event id, and applied by the consumer in batches in per-payment order
+"""
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+from app import webhook_inbox
+from app.models import Payment, WebhookEvent
+from app.stats import get_stats
+from app.sweeper import prune_webhook_events_batch
+
+SECRET = "whsec_test"
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr("app.routers.webhooks.webhook_secret", SECRET)
+
+
+def _event(event_id, payment_id, event_type="checkout.session.completed", created=None, intent="pi_test"):
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": event_type,
+        "created": created or int(time.time()),
+        "data": {"object": {
+            "id": f"cs_{event_id}",
+            "object": "checkout.session",
+            "payment_intent": intent,
+            "metadata": {"payment_id": str(payment_id)},
+        }},
+    }
+
+
+def _deliver(client, event, secret=SECRET):
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return client.post("/api/webhooks/stripe", content=payload, headers={
+        "Stripe-Signature": f"t={timestamp},v1={signature}",
+        "Content-Type": "application/json",
+    })
+
+
+@pytest.fixture
+def pending_payments(db_session, sample_lease):
+    payments = [
+        Payment(leaseId=sample_lease.id, landlordId=sample_lease.landlordId, amount=1200,
+                dueDate=datetime.utcnow() + timedelta(days=days), status="PENDING")
+        for days in (1, 2, 3)
+    ]
+    db_session.add_all(payments)
+    db_session.commit()
+    return payments
+
+
+class TestWebhookReceive:
+    """Test the endpoint stores and acknowledges without applying"""
+
+    def test_event_stored_not_applied(self, client, pending_payments, db_session):
+        """Test the response comes before the payment changes"""
+        payment = pending_payments[0]
+        response = _deliver(client, _event("evt_1", payment.id))
+        assert response.status_code == 200
+        assert response.json() == {"status": "success", "duplicate": False}
+
+        stored = db_session.get(WebhookEvent, "evt_1")
+        assert (stored.type, stored.paymentId, stored.processedAt) == ("checkout.session.completed", payment.id, None)
+        db_session.refresh(payment)
+        assert payment.status.value == "PENDING"
+
+    def test_duplicate_delivery_absorbed(self, client, pending_payments, db_session):
+        """Test a redelivered event is acknowledged but stored once"""
+        event = _event("evt_dup", pending_payments[0].id)
+        assert _deliver(client, event).json()["duplicate"] is False
+        assert _deliver(client, event).json()["duplicate"] is True
+        assert db_session.query(WebhookEvent).count() == 1
+
+    def test_bad_signature_rejected(self, client, pending_payments, db_session):
+        """Test events not signed with our secret never reach the inbox"""
+        response = _deliver(client, _event("evt_forged", pending_payments[0].id), secret="whsec_other")
+        assert response.status_code == 400
+        assert db_session.query(WebhookEvent).count() == 0
+
+
+class TestWebhookConsumer:
+    """Test the consumer applies stored events"""
+
+    def test_batch_marks_payments_paid(self, client, auth_headers_landlord, pending_payments,
+                                       sample_lease, db_session):
+        """Test one batch pays every referenced payment with its counters and intent ids"""
+        get_stats(db_session, sample_lease.landlordId)
+        db_session.commit()
+        for index, payment in enumerate(pending_payments):
+            _deliver(client, _event(f"evt_{index}", payment.id, intent=f"pi_{index}"))
+
+        assert webhook_inbox.apply_webhook_batch(db_session) == 3
+
+        db_session.expire_all()
+        assert {p.status.value for p in db_session.query(Payment)} == {"PAID"}
+        assert sorted(p.stripePaymentIntentId for p in db_session.query(Payment)) == ["pi_0", "pi_1", "pi_2"]
+        assert db_session.query(WebhookEvent).filter(WebhookEvent.processedAt.is_(None)).count() == 0
+        stats = client.get("/api/dashboard/stats", headers=auth_headers_landlord).json()
+        assert stats["pendingPayments"] == 0
+
+    def test_same_payment_twice_counted_once(self, client, pending_payments, sample_lease, db_session):
+        """Test two distinct events paying one payment move the counters once"""
+        payment = pending_payments[0]
+        before = get_stats(db_session, sample_lease.landlordId).paidPayments
+        db_session.commit()
+        _deliver(client, _event("evt_a", payment.id))
+        _deliver(client, _event("evt_b", payment.id))
+
+        webhook_inbox.apply_webhook_batch(db_session)
+
+        db_session.expire_all()
+        assert get_stats(db_session, sample_lease.landlordId).paidPayments == before + 1
+
+    def test_events_apply_in_stripe_order(self, client, pending_payments, db_session):
+        """Test events are taken by Stripe creation time, not arrival order"""
+        payment = pending_payments[0]
+        now = int(time.time())
+        _deliver(client, _event("evt_late", payment.id, created=now, intent="pi_second"))
+        _deliver(client, _event("evt_early", payment.id, created=now - 60, intent="pi_first"))
+
+        events = db_session.scalars(webhook_inbox.pending_events_query()).all()
+        assert [event.id for event in events] == ["evt_early", "evt_late"]
+
+    def test_unknown_payment_recorded(self, client, db_session):
+        """Test an event for a missing payment is applied with its error kept"""
+        _deliver(client, _event("evt_missing", 999))
+
+        webhook_inbox.apply_webhook_batch(db_session)
+
+        event = db_session.get(WebhookEvent, "evt_missing")
+        assert event.processedAt is not None
+        assert event.error == "Payment not found"
+
+    def test_failing_event_holds_back_its_payment(self, client, pending_payments, db_session, monkeypatch):
+        """Test a failing event is retried, blocks later events of its payment, and is dead-lettered"""
+        first, second = pending_payments[:2]
+        now = int(time.time())
+        _deliver(client, _event("evt_poison", first.id, created=now - 10))
+        _deliver(client, _event("evt_after", first.id, created=now))
+        _deliver(client, _event("evt_other", second.id, created=now))
+
+        original = webhook_inbox._apply
+
+        def failing_apply(db, events, now):
+            if any(event.id == "evt_poison" for event in events):
+                raise RuntimeError("boom")
+            return original(db, events, now)
+
+        monkeypatch.setattr(webhook_inbox, "_apply", failing_apply)
+        monkeypatch.setattr(webhook_inbox, "WEBHOOK_MAX_ATTEMPTS", 2)
+
+        webhook_inbox.apply_webhook_batch(db_session)
+        db_session.expire_all()
+        assert db_session.get(WebhookEvent, "evt_other").processedAt is not None
+        assert db_session.get(WebhookEvent, "evt_after").processedAt is None
+        assert db_session.get(WebhookEvent, "evt_poison").attempts == 1
+
+        webhook_inbox.apply_webhook_batch(db_session)
+        db_session.expire_all()
+        poison = db_session.get(WebhookEvent, "evt_poison")
+        assert (poison.attempts, poison.error) == (2, "boom")
+        assert poison.processedAt is not None
+        assert db_session.get(WebhookEvent, "evt_after").processedAt is not None
+
+    def test_drain_requires_leader_lease(self, client, pending_payments, db_session, async_session_factory):
+        """Test only the lease holder drains the inbox"""
+        _deliver(client, _event("evt_1", pending_payments[0].id))
+
+        assert asyncio.run(webhook_inbox.drain_webhook_inbox(async_session_factory, owner="worker-a")) == 1
+        _deliver(client, _event("evt_2", pending_payments[1].id))
+        assert asyncio.run(webhook_inbox.drain_webhook_inbox(async_session_factory, owner="worker-b")) == 0
+        assert asyncio.run(webhook_inbox.drain_webhook_inbox(async_session_factory, owner="worker-a")) == 1
+
+    def test_applied_events_pruned_after_retention(self, client, pending_payments, db_session):
+        """Test the sweeper deletes applied events once past retention, and only those"""
+        _deliver(client, _event("evt_old", pending_payments[0].id))
+        webhook_inbox.apply_webhook_batch(db_session)
+        _deliver(client, _event("evt_new", pending_payments[1].id))
+
+        assert prune_webhook_events_batch(db_session, datetime.utcnow(), 500) == 0
+        assert prune_webhook_events_batch(db_session, datetime.utcnow() + timedelta(days=31), 500) == 1
+        db_session.commit()
+        assert [event.id for event in db_session.query(WebhookEvent)] == ["evt_new"]
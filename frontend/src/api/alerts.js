@@ -1,13 +1,29 @@
 // src/api/alerts.js
 import api from "./axiosConfig";
 
+// Alert inboxes are paginated ({ items, next_cursor }); the home pages show the newest page
 export const getManagerAlerts = async () => {
   const response = await api.get("/dashboard/manager-alerts");
-  return response.data;
+  return response.data.items;
 };
 
 export const getTenantAlerts = async () => {
   const response = await api.get("/dashboard/tenant-alerts");
+  return response.data.items;
+};
+
+export const getUnreadAlertCount = async () => {
+  const response = await api.get("/dashboard/alerts/unread-count");
+  return response.data.unread;
+};
+
+export const markAlertRead = async (id) => {
+  const response = await api.post(`/dashboard/alerts/${id}/read`);
+  return response.data;
+};
+
+export const markAllAlertsRead = async () => {
+  const response = await api.post("/dashboard/alerts/read-all");
   return response.data;
 };
 
@@ -1,5 +1,6 @@
 // src/api/leases.js
 import API from "./axiosConfig";
+import { fetchPage } from "./pagination";
 
 // Create a lease
 export const createLease = async (data) => {
@@ -7,16 +8,14 @@ export const createLease = async (data) => {
   return res.data;
 };
 
-// Get leases for a property
-export const getLeasesByProperty = async (propertyId) => {
-  const res = await API.get(`/leases/property/${propertyId}`);
-  return res.data;
+// Get a page of leases for a property ({ items, next_cursor })
+export const getLeasesByProperty = async (propertyId, cursor = null) => {
+  return fetchPage(`/leases/property/${propertyId}`, cursor);
 };
 
-// Get leases for a unit (optional, but handy)
-export const getLeasesByUnit = async (unitId) => {
-  const res = await API.get(`/leases/unit/${unitId}`);
-  return res.data;
+// Get a page of leases for a unit (optional, but handy)
+export const getLeasesByUnit = async (unitId, cursor = null) => {
+  return fetchPage(`/leases/unit/${unitId}`, cursor);
 };
 
 // Delete lease
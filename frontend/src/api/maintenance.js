@@ -1,9 +1,10 @@
 // frontend/src/api/maintenance.js
 import API from "./axiosConfig";
+import { fetchPage } from "./pagination";
 
-export const getMaintenanceRequests = async () => {
-  const res = await API.get("/maintenance");
-  return res.data;
+// One page of requests, newest first ({ items, next_cursor })
+export const getMaintenanceRequests = async (cursor = null) => {
+  return fetchPage("/maintenance", cursor);
 };
 
 // Get details of a single request
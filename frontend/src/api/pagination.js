@@ -0,0 +1,13 @@
+// src/api/pagination.js
+import API from "./axiosConfig";
+
+export const PAGE_SIZE = 50;
+
+// List endpoints return { items, next_cursor }; fetch one page, starting
+// after `cursor` (null for the first page)
+export const fetchPage = async (path, cursor = null, params = {}) => {
+  const res = await API.get(path, {
+    params: { ...params, limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+  });
+  return res.data;
+};
@@ -1,16 +1,15 @@
 // frontend/src/api/payments.js
 import API from "./axiosConfig";
+import { fetchPage } from "./pagination";
 
-// Payments for the logged-in tenant or landlord (backend checks role)
-export const getMyPayments = async () => {
-  const res = await API.get("/payments/");
-  return res.data;
+// A page of payments for the logged-in tenant or landlord (backend checks role)
+export const getMyPayments = async (cursor = null) => {
+  return fetchPage("/payments/", cursor);
 };
 
-// Payments for the logged-in property manager (same endpoint, role checked by backend)
-export const getLandlordPayments = async () => {
-  const res = await API.get("/payments/");
-  return res.data;
+// A page of payments for the logged-in property manager (same endpoint, role checked by backend)
+export const getLandlordPayments = async (cursor = null) => {
+  return fetchPage("/payments/", cursor);
 };
 
 // Payments for a specific lease (optional, for detail view)
@@ -38,11 +37,18 @@ export const verifyPayment = async (paymentId, sessionId) => {
 };
 
 // Trigger a manual sync on the backend to reconcile Stripe events
+// (large syncs answer 202 with a `job` to poll via getSyncProgress)
 export const syncPayments = async () => {
   const res = await API.post(`/payments/sync`);
   return res.data;
 };
 
+// Progress of a background Stripe sync
+export const getSyncProgress = async (jobId) => {
+  const res = await API.get(`/payments/sync/${jobId}`);
+  return res.data;
+};
+
 // ---- Analytics endpoints ----
 
 // KPI summary for manager dashboard
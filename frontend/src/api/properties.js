@@ -1,9 +1,10 @@
 // src/api/properties.js
 import API from "./axiosConfig";
+import { fetchPage } from "./pagination";
 
-export const getMyProperties = async () => {
-  const res = await API.get("/properties");
-  return res.data;
+// One page of properties ({ items, next_cursor }); pass next_cursor for the next
+export const getMyProperties = async (cursor = null) => {
+  return fetchPage("/properties", cursor);
 };
 
 export const createProperty = async (data) => {
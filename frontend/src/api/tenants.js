@@ -1,10 +1,10 @@
 // src/api/tenants.js
 import API from "./axiosConfig";
+import { fetchPage } from "./pagination";
 
-// Get all tenants (for LANDLORD creating leases)
-export const getTenants = async () => {
-  const res = await API.get("/tenants/");
-  return res.data;
+// Get a page of tenants (for LANDLORD creating leases)
+export const getTenants = async (cursor = null) => {
+  return fetchPage("/tenants/", cursor);
 };
 
 // Delete a tenant
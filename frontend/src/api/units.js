@@ -1,10 +1,10 @@
 // src/api/units.js
 import API from "./axiosConfig";
+import { fetchPage } from "./pagination";
 
-// propertyId -> list units
-export const getUnitsByProperty = async (propertyId) => {
-  const res = await API.get(`/units/property/${propertyId}`);
-  return res.data;
+// propertyId -> one page of units ({ items, next_cursor })
+export const getUnitsByProperty = async (propertyId, cursor = null) => {
+  return fetchPage(`/units/property/${propertyId}`, cursor);
 };
 
 // propertyId -> create unit under property
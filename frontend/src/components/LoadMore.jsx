@@ -0,0 +1,17 @@
+// src/components/LoadMore.jsx
+// Fetches the next page of a list on demand (see hooks/usePagedList)
+export default function LoadMore({ hasMore, loading, onClick, style }) {
+  if (!hasMore) return null;
+
+  return (
+    <button
+      type="button"
+      className="btn-secondary"
+      onClick={onClick}
+      disabled={loading}
+      style={{ marginTop: '0.75rem', ...style }}
+    >
+      {loading ? "Loading..." : "Load more"}
+    </button>
+  );
+}
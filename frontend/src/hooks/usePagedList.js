@@ -0,0 +1,71 @@
+// src/hooks/usePagedList.js
+import { useCallback, useEffect, useLayoutEffect, useRef, useState } from "react";
+
+// Items of a cursor-paginated list, one page at a time.
+// `fetchPage(cursor)` resolves to { items, next_cursor }; the first page is
+// loaded whenever `deps` change, later pages only when `loadMore` is called.
+export default function usePagedList(fetchPage, deps = []) {
+  const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+
+  // Always the latest fetchPage, which usually closes over the view's state
+  const fetchRef = useRef(fetchPage);
+  useLayoutEffect(() => {
+    fetchRef.current = fetchPage;
+  });
+  // Bumped by every reload so pages of an older list are dropped
+  const generation = useRef(0);
+
+  const reload = useCallback(async () => {
+    const current = ++generation.current;
+    setLoading(true);
+    setError(null);
+    try {
+      const page = await fetchRef.current(null);
+      if (current !== generation.current) return;
+      setItems(page.items);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error("Failed to load page", err);
+      if (current === generation.current) setError(err);
+    } finally {
+      if (current === generation.current) setLoading(false);
+    }
+  }, []);
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    const current = generation.current;
+    setLoadingMore(true);
+    try {
+      const page = await fetchRef.current(nextCursor);
+      if (current !== generation.current) return;
+      setItems((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error("Failed to load page", err);
+      if (current === generation.current) setError(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, loadingMore]);
+
+  useEffect(() => {
+    reload();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, deps);
+
+  return {
+    items,
+    setItems,
+    loading,
+    loadingMore,
+    error,
+    hasMore: Boolean(nextCursor),
+    loadMore,
+    reload,
+  };
+}
@@ -1,19 +1,40 @@
 // src/pages/Leases.jsx
-import { useEffect, useState } from "react";
+import { useState } from "react";
 import { useAuth } from "../context/AuthContext";
 import { getMyProperties } from "../api/properties";
 import { getUnitsByProperty } from "../api/units";
 import { getTenants } from "../api/tenants";
 import { createLease, getLeasesByProperty, deleteLease } from "../api/leases";
 import { FileText, Users, Calendar, DollarSign, Home, X, Plus, Trash2, ChevronDown } from 'lucide-react';
+import LoadMore from "../components/LoadMore";
+import usePagedList from "../hooks/usePagedList";
+
+const NO_PAGE = { items: [], next_cursor: null };
 
 export default function Leases() {
   const { user } = useAuth();
-  const [properties, setProperties] = useState([]);
   const [selectedProperty, setSelectedProperty] = useState("");
-  const [units, setUnits] = useState([]);
-  const [tenants, setTenants] = useState([]);
-  const [leases, setLeases] = useState([]);
+  // Each list loads its first page; the rest only when asked for
+  const properties = usePagedList(getMyProperties);
+  const units = usePagedList(
+    (cursor) => (selectedProperty ? getUnitsByProperty(selectedProperty, cursor) : NO_PAGE),
+    [selectedProperty]
+  );
+  const tenants = usePagedList(
+    (cursor) => (selectedProperty ? getTenants(cursor) : NO_PAGE),
+    [selectedProperty]
+  );
+  const {
+    items: leases,
+    setItems: setLeases,
+    loadingMore: loadingMoreLeases,
+    hasMore: moreLeases,
+    loadMore: loadMoreLeases,
+    reload: reloadLeases,
+  } = usePagedList(
+    (cursor) => (selectedProperty ? getLeasesByProperty(selectedProperty, cursor) : NO_PAGE),
+    [selectedProperty]
+  );
   const [selectedUnit, setSelectedUnit] = useState("");
   const [selectedTenant, setSelectedTenant] = useState("");
   const [startDate, setStartDate] = useState("");
@@ -22,18 +43,6 @@ export default function Leases() {
   const [showAddForm, setShowAddForm] = useState(false);
   const [selectedLease, setSelectedLease] = useState(null);
 
-  useEffect(() => {
-    getMyProperties().then(setProperties).catch(console.error);
-  }, []);
-
-  useEffect(() => {
-    if (!selectedProperty) return;
-
-    getUnitsByProperty(selectedProperty).then(setUnits).catch(console.error);
-    getTenants().then(setTenants).catch(console.error);
-    getLeasesByProperty(selectedProperty).then(setLeases).catch(console.error);
-  }, [selectedProperty]);
-
   const handleCreateLease = async () => {
     if (!selectedUnit || !selectedTenant || !startDate || !rentAmount)
       return alert("Fill all fields!");
@@ -58,8 +67,7 @@ export default function Leases() {
       setRentAmount("");
       setShowAddForm(false);
 
-      const newList = await getLeasesByProperty(selectedProperty);
-      setLeases(newList);
+      await reloadLeases();
       alert("Lease created successfully!");
     } catch (err) {
       console.error("Failed to create lease:", err);
@@ -156,7 +164,7 @@ export default function Leases() {
             }}
           >
             <option value="">-- Choose Property --</option>
-            {properties.map((p) => (
+            {properties.items.map((p) => (
               <option key={p.id} value={p.id}>
                 {p.title}
               </option>
@@ -171,6 +179,7 @@ export default function Leases() {
             color: '#06b6d4'
           }} size={20} />
         </div>
+        <LoadMore hasMore={properties.hasMore} loading={properties.loadingMore} onClick={properties.loadMore} />
       </div>
 
       {selectedProperty && (
@@ -249,12 +258,13 @@ export default function Leases() {
                     }}
                   >
                     <option value="">-- Select --</option>
-                    {units.map((u) => (
+                    {units.items.map((u) => (
                       <option key={u.id} value={u.id}>
                         {u.unitNumber}
                       </option>
                     ))}
                   </select>
+                  <LoadMore hasMore={units.hasMore} loading={units.loadingMore} onClick={units.loadMore} />
                 </div>
                 <div>
                   <label style={{
@@ -280,12 +290,13 @@ export default function Leases() {
                     }}
                   >
                     <option value="">-- Select --</option>
-                    {tenants.map((t) => (
+                    {tenants.items.map((t) => (
                       <option key={t.id} value={t.id}>
                         {t.user?.name || t.name} ({t.user?.email || 'No email'})
                       </option>
                     ))}
                   </select>
+                  <LoadMore hasMore={tenants.hasMore} loading={tenants.loadingMore} onClick={tenants.loadMore} />
                 </div>
                 <div>
                   <label style={{
@@ -743,6 +754,7 @@ export default function Leases() {
                 </table>
               </div>
             )}
+            <LoadMore hasMore={moreLeases} loading={loadingMoreLeases} onClick={loadMoreLeases} />
           </div>
         </>
       )}
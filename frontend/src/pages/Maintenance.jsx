@@ -2,6 +2,8 @@
 import { useState, useEffect } from "react";
 import { useAuth } from "../context/AuthContext";
 import { Wrench, User, Home, Calendar, X, Search, ChevronDown, AlertCircle, CheckCircle2, Clock } from "lucide-react";
+import LoadMore from "../components/LoadMore";
+import usePagedList from "../hooks/usePagedList";
 
 import {
   getMaintenanceRequests,
@@ -14,9 +16,15 @@ export default function Maintenance() {
   const { user } = useAuth();
   const isManager = user?.role === "LANDLORD";
 
-  const [requests, setRequests] = useState([]);
+  const {
+    items: requests,
+    loading,
+    loadingMore,
+    hasMore,
+    loadMore,
+    reload: loadRequests,
+  } = usePagedList(getMaintenanceRequests);
   const [filtered, setFiltered] = useState([]);
-  const [loading, setLoading] = useState(true);
 
   const [search, setSearch] = useState("");
   const [priorityFilter, setPriorityFilter] = useState("ALL");
@@ -30,22 +38,6 @@ export default function Maintenance() {
   const [completingRequest, setCompletingRequest] = useState(false);
   const [showSuccessMessage, setShowSuccessMessage] = useState(false);
 
-  const loadRequests = async () => {
-    setLoading(true);
-    try {
-      const data = await getMaintenanceRequests();
-      setRequests(data);
-      setFiltered(data);
-    } catch (err) {
-      console.error(err);
-    }
-    setLoading(false);
-  };
-
-  useEffect(() => {
-    loadRequests();
-  }, []);
-
   const applyFilters = () => {
     let res = [...requests];
 
@@ -68,9 +60,10 @@ export default function Maintenance() {
     setFiltered(res);
   };
 
+  // Filters apply to the pages loaded so far
   useEffect(() => {
     applyFilters();
-  }, [search, priorityFilter, statusFilter, propertyFilter]);
+  }, [requests, search, priorityFilter, statusFilter, propertyFilter]);
 
   const handleUpdate = async (id, fields) => {
     try {
@@ -509,6 +502,7 @@ export default function Maintenance() {
             );
           })
         )}
+        <LoadMore hasMore={!loading && hasMore} loading={loadingMore} onClick={loadMore} style={{ alignSelf: 'center' }} />
       </div>
 
       {/* Drawer */}
@@ -745,6 +739,9 @@ export default function Maintenance() {
                   {detailData.photos.map((url, i) => {
                     // Construct full URL with proper encoding
                     const fullUrl = `http://localhost:5000${encodeURI(url)}`;
+                    // Small rendition for the grid once the backend has made it
+                    const thumb = detailData.photoRenditions?.[i]?.thumb;
+                    const thumbUrl = thumb ? `http://localhost:5000${encodeURI(thumb)}` : fullUrl;
                     return (
                       <div key={i} style={{
                         position: 'relative',
@@ -764,8 +761,9 @@ export default function Maintenance() {
                       }}
                       onClick={() => window.open(fullUrl, '_blank')}>
                         <img 
-                          src={fullUrl} 
+                          src={thumbUrl} 
                           alt={`Maintenance ${i + 1}`} 
+                          loading="lazy"
                           style={{
                             width: '100%',
                             height: '140px',
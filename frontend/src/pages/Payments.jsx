@@ -6,7 +6,10 @@ import {
   getLandlordPayments,
   payPayment,
 } from "../api/payments";
+import { getManagerStats } from "../api/alerts";
 import { DollarSign, Calendar, TrendingUp, AlertCircle, CheckCircle } from "lucide-react";
+import LoadMore from "../components/LoadMore";
+import usePagedList from "../hooks/usePagedList";
 
 function formatDate(val) {
   if (!val) return "-";
@@ -34,31 +37,46 @@ export default function Payments() {
   const isTenant = user?.role === "TENANT";
   const isLandlord = user?.role === "LANDLORD";
 
-  const [payments, setPayments] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const {
+    items: payments,
+    loading,
+    loadingMore,
+    error: loadError,
+    hasMore,
+    loadMore,
+    reload: loadPayments,
+  } = usePagedList(
+    (cursor) => {
+      if (!user) return { items: [], next_cursor: null };
+      return isTenant ? getMyPayments(cursor) : getLandlordPayments(cursor);
+    },
+    [user?.role]
+  );
+  // KPIs are totals over every payment, not just the pages loaded
+  const [totals, setTotals] = useState(null);
   const [submitting, setSubmitting] = useState(false);
   const [error, setError] = useState("");
 
-  const load = async () => {
-    if (!user) return;
-
-    setLoading(true);
-    setError("");
-
+  const loadTotals = async () => {
+    if (!isLandlord) return;
     try {
-      const data = isTenant ? await getMyPayments()
-                            : await getLandlordPayments();
-      setPayments(data);
+      setTotals(await getManagerStats());
     } catch (err) {
       console.error(err);
-      setError("Failed to load payments.");
     }
+  };
 
-    setLoading(false);
+  const load = async () => {
+    if (!user) return;
+    await Promise.all([loadPayments(), loadTotals()]);
   };
 
   useEffect(() => {
-    load();
+    setError(loadError ? "Failed to load payments." : "");
+  }, [loadError]);
+
+  useEffect(() => {
+    loadTotals();
   }, [user?.role]);
 
   const handlePay = async (id) => {
@@ -77,16 +95,10 @@ export default function Payments() {
   };
 
   // Calculate KPIs
-  const totalPayments = payments.filter(p => p.status === "PAID").reduce((sum, p) => sum + (p.amount || 0), 0);
-  const paidPayments = payments.filter(p => p.status === "PAID").reduce((sum, p) => sum + (p.amount || 0), 0);
-  const pendingPayments = payments.filter(p => {
-    const status = computeStatus(p);
-    return status === "PENDING";
-  }).reduce((sum, p) => sum + (p.amount || 0), 0);
-  const latePayments = payments.filter(p => {
-    const status = computeStatus(p);
-    return status === "LATE";
-  }).reduce((sum, p) => sum + (p.amount || 0), 0);
+  const totalPayments = totals?.totalRevenue || 0;
+  const paidPayments = totals?.totalRevenue || 0;
+  const latePayments = totals?.overdueRevenue || 0;
+  const pendingPayments = (totals?.pendingRevenue || 0) - latePayments;
 
   return (
     <div style={{
@@ -655,6 +667,10 @@ export default function Payments() {
           </table>
         )}
       </div>
+
+      <div style={{ textAlign: 'center' }}>
+        <LoadMore hasMore={!loading && hasMore} loading={loadingMore} onClick={loadMore} />
+      </div>
     </div>
   );
 }
@@ -3,11 +3,21 @@ import { useEffect, useState } from "react";
 import { getMyProperties, createProperty, updateProperty, deleteProperty } from "../api/properties";
 import { useAuth } from "../context/AuthContext";
 import AddressAutocomplete from "../components/AddressAutocomplete";
+import LoadMore from "../components/LoadMore";
+import usePagedList from "../hooks/usePagedList";
 
 export default function Properties() {
   const { user } = useAuth();
-  const [properties, setProperties] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const {
+    items: properties,
+    setItems: setProperties,
+    loading,
+    loadingMore,
+    error: loadError,
+    hasMore,
+    loadMore,
+    reload: loadProps,
+  } = usePagedList(getMyProperties);
   const [creating, setCreating] = useState(false);
   const [error, setError] = useState("");
   const [editingId, setEditingId] = useState(null);
@@ -22,21 +32,9 @@ export default function Properties() {
     description: "",
   });
 
-  const loadProps = async () => {
-    setLoading(true);
-    try {
-      const data = await getMyProperties();
-      setProperties(data);
-    } catch (err) {
-      setError("Failed to load properties.");
-    } finally {
-      setLoading(false);
-    }
-  };
-
   useEffect(() => {
-    loadProps();
-  }, []);
+    if (loadError) setError("Failed to load properties.");
+  }, [loadError]);
 
   const handleChange = (e) => {
     setForm((f) => ({ ...f, [e.target.name]: e.target.value }));
@@ -260,6 +258,7 @@ export default function Properties() {
                     ))}
                   </tbody>
                 </table>
+                <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
               </div>
             )}
           </div>
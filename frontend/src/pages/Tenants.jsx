@@ -2,27 +2,24 @@
 import { useEffect, useState } from "react";
 import { getTenants, deleteTenant } from "../api/tenants";
 import { Users, Trash2, Mail, Phone, AlertCircle } from 'lucide-react';
+import LoadMore from "../components/LoadMore";
+import usePagedList from "../hooks/usePagedList";
 
 export default function Tenants() {
-  const [tenants, setTenants] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const {
+    items: tenants,
+    loading,
+    loadingMore,
+    error: loadError,
+    hasMore,
+    loadMore,
+    reload: loadTenants,
+  } = usePagedList(getTenants);
   const [error, setError] = useState("");
 
-  const loadTenants = async () => {
-    setLoading(true);
-    try {
-      const data = await getTenants();
-      setTenants(data);
-    } catch (err) {
-      setError("Failed to load tenants.");
-    } finally {
-      setLoading(false);
-    }
-  };
-
   useEffect(() => {
-    loadTenants();
-  }, []);
+    if (loadError) setError("Failed to load tenants.");
+  }, [loadError]);
 
   const handleDelete = async (tenantId, tenantName) => {
     if (!window.confirm(`Are you sure you want to delete ${tenantName}? This action cannot be undone.`)) {
@@ -251,6 +248,8 @@ export default function Tenants() {
             ))}
           </div>
         )}
+
+        <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} style={{ marginTop: '1.5rem' }} />
       </div>
     </div>
   );
@@ -1,16 +1,30 @@
 // src/pages/Units.jsx
-import { useEffect, useState } from "react";
+import { useState } from "react";
 import { getMyProperties } from "../api/properties";
 import { getUnitsByProperty, createUnit, updateUnit, deleteUnit } from "../api/units";
 import { useAuth } from "../context/AuthContext";
 import { Home, Bed, Bath, Plus, Edit2, Trash2, ChevronDown, Users } from 'lucide-react';
+import LoadMore from "../components/LoadMore";
+import usePagedList from "../hooks/usePagedList";
+
+const NO_PAGE = { items: [], next_cursor: null };
 
 export default function Units() {
   const { user } = useAuth();
-  const [properties, setProperties] = useState([]);
   const [selectedProperty, setSelectedProperty] = useState("");
-  const [units, setUnits] = useState([]);
-  const [loadingUnits, setLoadingUnits] = useState(false);
+  const properties = usePagedList(getMyProperties);
+  const {
+    items: units,
+    setItems: setUnits,
+    loading: loadingUnits,
+    loadingMore: loadingMoreUnits,
+    hasMore: moreUnits,
+    loadMore: loadMoreUnits,
+    reload: reloadUnits,
+  } = usePagedList(
+    (cursor) => (selectedProperty ? getUnitsByProperty(selectedProperty, cursor) : NO_PAGE),
+    [selectedProperty]
+  );
   const [editingId, setEditingId] = useState(null);
   const [showAddForm, setShowAddForm] = useState(false);
 
@@ -20,34 +34,8 @@ export default function Units() {
     bathrooms: "",
   });
 
-  useEffect(() => {
-    const load = async () => {
-      try {
-        const data = await getMyProperties();
-        setProperties(data);
-      } catch (err) {
-        console.error("Failed to load properties", err);
-      }
-    };
-    load();
-  }, []);
-
-  const loadUnits = async (propertyId) => {
-    if (!propertyId) return;
-    setLoadingUnits(true);
-    try {
-      const data = await getUnitsByProperty(propertyId);
-      setUnits(data);
-    } catch (err) {
-      console.error("Failed to load units", err);
-    }
-    setLoadingUnits(false);
-  };
-
   const handlePropertyChange = (e) => {
-    const id = e.target.value;
-    setSelectedProperty(id);
-    loadUnits(id);
+    setSelectedProperty(e.target.value);
   };
 
   const handleForm = (e) => {
@@ -79,7 +67,7 @@ export default function Units() {
       }
 
       setForm({ unitNumber: "", bedrooms: "", bathrooms: "" });
-      await loadUnits(selectedProperty);
+      await reloadUnits();
     } catch (err) {
       console.error("Failed to save unit:", err);
       alert(editingId ? "Failed to update unit." : "Failed to create unit.");
@@ -196,7 +184,7 @@ export default function Units() {
               }}
             >
               <option value="">Choose a property...</option>
-              {properties.map((p) => (
+              {properties.items.map((p) => (
                 <option key={p.id} value={p.id} style={{ background: '#1e293b' }}>
                   {p.title} — {p.city}
                 </option>
@@ -214,6 +202,7 @@ export default function Units() {
               }}
             />
           </div>
+          <LoadMore hasMore={properties.hasMore} loading={properties.loadingMore} onClick={properties.loadMore} />
         </div>
 
         {/* Add Unit Button & Form */}
@@ -537,6 +526,7 @@ export default function Units() {
                     ))}
                   </tbody>
                 </table>
+                <LoadMore hasMore={moreUnits} loading={loadingMoreUnits} onClick={loadMoreUnits} />
               </div>
             )}
           </div>
@@ -1,7 +1,6 @@
 // src/pages/tenant/TenantLease.jsx
 import { useEffect, useState } from "react";
-import { getTenantLease } from "../../api/tenantPortal";
-import { getMyPayments } from "../../api/payments";
+import { getTenantLease, getTenantPayments } from "../../api/tenantPortal";
 
 export default function TenantLease() {
   const [leases, setLeases] = useState([]);
@@ -11,7 +10,7 @@ export default function TenantLease() {
   useEffect(() => {
     Promise.all([
       getTenantLease(),
-      getMyPayments()
+      getTenantPayments()
     ])
       .then(([leaseData, paymentData]) => {
         setLeases(Array.isArray(leaseData) ? leaseData : []);